@@ -0,0 +1,53 @@
+"""Add trade performance rollups
+
+Revision ID: a7c41e9d2b30
+Revises: 14e5d2bfe6f6
+Create Date: 2026-10-19 09:12:04.518337
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7c41e9d2b30'
+down_revision: Union[str, Sequence[str], None] = '14e5d2bfe6f6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('trade_performance_rollups',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('owner_id', sa.Integer(), nullable=False),
+    sa.Column('bot_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('trade_count', sa.Integer(), nullable=False),
+    sa.Column('win_count', sa.Integer(), nullable=False),
+    sa.Column('pnl_sum', sa.Float(), nullable=False),
+    sa.Column('return_sum', sa.Float(), nullable=False),
+    sa.Column('return_sq_sum', sa.Float(), nullable=False),
+    sa.Column('growth', sa.Float(), nullable=False),
+    sa.Column('max_prefix', sa.Float(), nullable=False),
+    sa.Column('min_prefix', sa.Float(), nullable=False),
+    sa.Column('max_drawdown', sa.Float(), nullable=False),
+    sa.Column('last_closed_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('owner_id', 'bot_id', 'day', name='uq_trade_rollup_owner_bot_day')
+    )
+    op.create_index(op.f('ix_trade_performance_rollups_id'), 'trade_performance_rollups', ['id'], unique=False)
+    op.create_index('idx_trade_rollup_lookup', 'trade_performance_rollups', ['owner_id', 'bot_id', 'day'], unique=False)
+    # Boundary days of a date-filtered request and rollup rebuilds read trades by bot + close time
+    op.create_index('idx_trades_bot_closed_at', 'trades', ['bot_id', 'closed_at'], unique=False)
+    # Existing history: run `python -m scripts.backfill_trade_rollups` after upgrading
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_trades_bot_closed_at', table_name='trades')
+    op.drop_index('idx_trade_rollup_lookup', table_name='trade_performance_rollups')
+    op.drop_index(op.f('ix_trade_performance_rollups_id'), table_name='trade_performance_rollups')
+    op.drop_table('trade_performance_rollups')
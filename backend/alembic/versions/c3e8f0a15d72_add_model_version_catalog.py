@@ -0,0 +1,48 @@
+"""Add model version metadata catalog
+
+Revision ID: c3e8f0a15d72
+Revises: a7c41e9d2b30
+Create Date: 2026-10-19 11:40:27.903114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e8f0a15d72'
+down_revision: Union[str, Sequence[str], None] = 'a7c41e9d2b30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('model_versions', sa.Column('meta_symbol', sa.String(), nullable=True))
+    op.add_column('model_versions', sa.Column('meta_target_column', sa.JSON(), nullable=True))
+    op.add_column('model_versions', sa.Column('meta_target_is_sl_tp', sa.Boolean(), nullable=False, server_default=sa.false()))
+    op.add_column('model_versions', sa.Column('meta_training_mode', sa.String(), nullable=True))
+    op.add_column('model_versions', sa.Column('meta_setup_type', sa.String(), nullable=True))
+    op.add_column('model_versions', sa.Column('meta_prediction_target', sa.String(), nullable=True))
+    op.add_column('model_versions', sa.Column('catalog_metadata', sa.JSON(), nullable=True))
+    op.add_column('model_versions', sa.Column('catalog_indexed_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index('idx_model_versions_catalog_symbol', 'model_versions', ['meta_symbol'], unique=False)
+    op.create_index('idx_custom_ml_models_user_created', 'custom_ml_models', ['user_id', 'created_at'], unique=False)
+    # Existing versions: run `python -m scripts.backfill_model_catalog` after upgrading
+    # (unindexed active versions are also indexed lazily on first listing)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_custom_ml_models_user_created', table_name='custom_ml_models')
+    op.drop_index('idx_model_versions_catalog_symbol', table_name='model_versions')
+    op.drop_column('model_versions', 'catalog_indexed_at')
+    op.drop_column('model_versions', 'catalog_metadata')
+    op.drop_column('model_versions', 'meta_prediction_target')
+    op.drop_column('model_versions', 'meta_setup_type')
+    op.drop_column('model_versions', 'meta_training_mode')
+    op.drop_column('model_versions', 'meta_target_is_sl_tp')
+    op.drop_column('model_versions', 'meta_target_column')
+    op.drop_column('model_versions', 'meta_symbol')
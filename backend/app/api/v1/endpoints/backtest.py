@@ -6,10 +6,10 @@ import os
 import pandas as pd
 from app import models, schemas
 from app.api import deps
-from app.tasks import run_backtest_task, run_optimization_task, download_candles_task, download_trades_task, run_batch_backtest_task, run_walk_forward_task, publish_task_status
+from app.tasks import run_backtest_task, run_optimization_task, download_candles_task, download_trades_task, run_batch_backtest_task, run_walk_forward_task, publish_task_status, render_report_task, REPORT_QUEUE
 from app.celery_app import celery_app
 from app import utils
-from app.services.report_generator import generate_report
+from app.services.report_generator import cached_report_path
 
 router = APIRouter()
 
@@ -17,6 +17,7 @@ router = APIRouter()
 
 REPORTS_DIR = "app/reports"
 DATA_FEED_DIR = "app/data_feeds"
+REPORT_RENDER_TIMEOUT_SECONDS = 120
 
 @router.post("/run")
 def run_backtest(
@@ -328,10 +329,18 @@ def download_backtest_report(task_id: str, format: str = "pdf"):
     if not result_data or "daily_returns" not in result_data:
         raise HTTPException(status_code=404, detail="Return data not found for report generation.")
 
-    # ৩. রিপোর্ট জেনারেট করা
+    # ৩. রিপোর্ট: cache থেকে, না থাকলে reports worker এ রেন্ডার
     symbol = result_data.get("symbol", "Unknown")
     timeframe = result_data.get("timeframe", "Unknown")
-    file_path = generate_report(task_id, result_data["daily_returns"], symbol, timeframe, format=format)
+    file_path = cached_report_path(result_data["daily_returns"], symbol, timeframe, format)
+    if not file_path:
+        job = render_report_task.apply_async(
+            args=[task_id, result_data["daily_returns"], symbol, timeframe, format], queue=REPORT_QUEUE
+        )
+        try:
+            file_path = job.get(timeout=REPORT_RENDER_TIMEOUT_SECONDS)
+        except Exception:
+            file_path = None
     
     if not file_path or not os.path.exists(file_path):
         raise HTTPException(status_code=500, detail="Failed to generate report file.")
@@ -2,9 +2,14 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from app.services.event_driven.engine import EventDrivenEngine
 import asyncio
+import os
 
 router = APIRouter()
 
+# Recorded candle/trade files (CSV or Parquet) available for historical replay
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))) # backend/app
+REPLAY_DATA_DIR = os.path.join(BASE_DIR, "replay_data") # backend/app/replay_data
+
 @router.websocket("/ws/simulation")
 async def websocket_simulation(websocket: WebSocket):
     await websocket.accept()
@@ -35,8 +40,27 @@ async def websocket_simulation(websocket: WebSocket):
                             pass
 
                 symbol = data.get("symbol", "BTC/USDT")
+
+                # Optional historical replay: file name only, resolved inside REPLAY_DATA_DIR
+                replay_path = None
+                replay_file = data.get("replay_file")
+                if replay_file:
+                    replay_path = os.path.join(REPLAY_DATA_DIR, os.path.basename(replay_file))
+                    if not os.path.isfile(replay_path):
+                        await websocket.send_json({"type": "SYSTEM", "message": f"Replay file not found: {replay_file}"})
+                        engine = None
+                        simulation_task = None
+                        continue
+
                 # Initialize Engine
-                engine = EventDrivenEngine(symbol=symbol, websocket=websocket)
+                engine = EventDrivenEngine(
+                    symbol=symbol,
+                    websocket=websocket,
+                    replay_path=replay_path,
+                    replay_kind=data.get("replay_kind", "candles")
+                )
+                if data.get("speed") is not None:
+                    engine.set_speed(float(data["speed"]))
                 
                 # Run the engine in background
                 simulation_task = asyncio.create_task(engine.run())
@@ -10,6 +10,7 @@ from app import models
 from app.api import deps  
 from app.services.market_service import MarketService
 from app.services.websocket_manager import manager
+from app.services.candle_subscriptions import candle_registry
 
 from app.services.ccxt_service import CcxtService
 from app.strategies.helpers.aether_flow_analyzer import AetherFlowAnalyzer
@@ -197,7 +198,8 @@ async def get_aether_flow(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to calculate aether flow: {str(e)}")
 
-# ✅ 8. WebSocket for Real-Time Candle Updates (Polling Simulation)
+# ✅ 8. WebSocket for Real-Time Candle Updates
+# All clients of one (exchange, symbol, interval) share a single upstream watch_ohlcv stream
 @router.websocket("/ws/candle")
 async def websocket_candle(
     websocket: WebSocket,
@@ -206,54 +208,27 @@ async def websocket_candle(
     exchange: str = "binance"
 ):
     await websocket.accept()
-    import ccxt.async_support as ccxt_async
     import asyncio
 
-    ex = None
     try:
-        # Initialize Exchange
-        if exchange == 'binance':
-            ex = ccxt_async.binance()
-        else:
-             # Fallback or dynamic
-             ex = getattr(ccxt_async, exchange)()
-        
-        while True:
+        async with candle_registry.subscribe(exchange, symbol, interval) as updates:
+
+            async def forward():
+                while True:
+                    await websocket.send_json(await updates.get())
+
+            sender = asyncio.create_task(forward())
             try:
-                # Fetch only the last candle for efficiency
-                # limit=2 to ensure we get the latest open one + previous one if needed
-                ohlcv = await ex.fetch_ohlcv(symbol, interval, limit=2)
-                
-                if ohlcv:
-                    latest = ohlcv[-1]
-                    # Format: [time, open, high, low, close, volume]
-                    data = {
-                        "time": latest[0],
-                        "open": latest[1],
-                        "high": latest[2],
-                        "low": latest[3],
-                        "close": latest[4],
-                        "volume": latest[5],
-                        "symbol": symbol
-                    }
-                    await websocket.send_json(data)
-                
-                # Poll interval (2 seconds is decent for "realtime" feel without hitting rate limits)
-                await asyncio.sleep(2)
-                
-            except Exception as inner_e:
-                err_msg = str(inner_e)
-                if "closed" in err_msg.lower() or "close message" in err_msg.lower():
-                    print("WS Closed, stopping loop.")
-                    break
-                print(f"WS Fetch Error: {inner_e}")
-                # Don't break loop immediately for network blips, but stop if closed
-                await asyncio.sleep(5)
+                # Detach as soon as the client goes away, not on the next candle
+                while not sender.done():
+                    message = await websocket.receive()
+                    if message["type"] == "websocket.disconnect":
+                        break
+            finally:
+                sender.cancel()
+                await asyncio.gather(sender, return_exceptions=True)
 
     except WebSocketDisconnect:
         print("Client disconnected from Candle WS")
     except Exception as e:
         print(f"WS Error: {e}")
-    finally:
-        if ex:
-            await ex.close()
@@ -128,14 +128,20 @@ async def websocket_market_depth(websocket: WebSocket, exchange_id: str, symbol:
     channel_name = f"market_depth_stream:{internal_exchange_id}:{symbol}"
     pubsub = redis.pubsub()
     await pubsub.subscribe(channel_name)
+
+    # Order book frames are snapshot + deltas (orderbook_delta); start the client from the latest snapshot
+    latest_snapshot = await redis.get(f"latest_orderbook:{internal_exchange_id}:{symbol}")
+    if latest_snapshot and '"orderbook_snapshot"' in latest_snapshot[:40]:
+        await websocket.send_text(latest_snapshot)
     
     async def redis_listener():
         try:
             async for message in pubsub.listen():
                 if message["type"] == "message":
                     data = message["data"]
-                    payload = json.loads(data)
-                    if "error" in payload:
+                    # Frames are forwarded as published (serialized once by the streamer)
+                    if data.startswith('{"error"'):
+                        payload = json.loads(data)
                         await websocket.close(code=1008, reason=payload["error"])
                         return
                     await websocket.send_text(data)
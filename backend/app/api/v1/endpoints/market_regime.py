@@ -1,6 +1,6 @@
 from fastapi import APIRouter, HTTPException
 from typing import Any
-from app.services.regime_service import RegimeService
+from app.services.regime_service import get_regime_service
 from app.schemas.regime import RegimeResponse
 
 router = APIRouter()
@@ -10,9 +10,10 @@ def get_market_regime() -> Any:
     """
     Get the current market regime, trend score, and volatility score.
     Uses Hidden Markov Models (HMM) on BTC/USDT data.
+    The fitted model is persisted and only newly appended bars are filtered per request.
     """
     try:
-        service = RegimeService()
+        service = get_regime_service()
         result = service.execute()
         return result
     except Exception as e:
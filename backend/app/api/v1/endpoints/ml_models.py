@@ -11,6 +11,8 @@ from sqlalchemy.orm import Session
 
 from app.core.redis import redis_manager
 from app.services.live_inference_engine import inference_engine
+from app.services import model_catalog
+from app.services.orderbook_delta import OrderBookDeltaDecoder
 
 from app import crud, models, schemas
 from app.api import deps
@@ -175,42 +177,8 @@ def get_custom_models(
     """
     Retrieve all custom models for the current user.
     """
-    models_list = db.query(models.CustomMLModel).filter(models.CustomMLModel.user_id == current_user.id).order_by(models.CustomMLModel.created_at.desc()).all()
-    
-    if mode == 'advanced_sl_tp':
-        filtered_models = []
-        for model in models_list:
-            if model.active_version_id:
-                version = next((v for v in model.versions if v.id == model.active_version_id), None)
-                if version and version.metadata_path and os.path.exists(version.metadata_path):
-                    try:
-                        with open(version.metadata_path, 'r') as f:
-                            meta = json.load(f)
-                            target_col = meta.get('target_column', '')
-                            # Check if the target columns relate to SL/TP directly
-                            is_sl_tp = False
-                            if isinstance(target_col, list):
-                                is_sl_tp = any('SL' in t or 'TP' in t for t in target_col)
-                            elif isinstance(target_col, str):
-                                is_sl_tp = 'SL' in target_col or 'TP' in target_col
-                            
-                            # Additional symbol matching if requested
-                            if symbol:
-                                meta_symbol = meta.get('symbol') or meta.get('config', {}).get('symbol')
-                                # We remove formatting to match safely (e.g. BTC-USDT vs BTC/USDT)
-                                if meta_symbol:
-                                    clean_meta = meta_symbol.replace("/", "").replace("-", "").lower()
-                                    clean_sym = symbol.replace("/", "").replace("-", "").lower()
-                                    if clean_meta != clean_sym:
-                                        continue
-                            
-                            if is_sl_tp or meta.get('training_mode') == 'advanced_setup_sl_tp' or meta.get('setup_type') == 'advanced_sl_tp' or meta.get('prediction_target') == 'advanced_setup':
-                                filtered_models.append(model)
-                    except Exception as e:
-                        print(f"Error reading metadata for model {model.id}: {e}")
-        return filtered_models
-
-    return models_list
+    # mode/symbol filters run in SQL against the metadata catalog
+    return model_catalog.list_user_models(db, current_user.id, mode=mode, symbol=symbol)
 
 @router.post("", response_model=schemas.CustomMLModelResponse)
 async def create_custom_model(
@@ -267,6 +235,7 @@ async def create_custom_model(
         metadata_path=saved_metadata_path,
         status=models.ModelStatus.PROCESSING
     )
+    model_catalog.index_version(db_version)
     db.add(db_version)
     db.commit()
     
@@ -364,6 +333,7 @@ async def upload_new_version(
         metadata_path=saved_metadata_path,
         status=models.ModelStatus.PROCESSING
     )
+    model_catalog.index_version(db_version)
     db.add(db_version)
     db.commit()
     db.refresh(db_model)
@@ -686,6 +656,8 @@ async def ml_inference_stream(websocket: WebSocket, model_id: str, exchange_id:
     channel_name = f"market_depth_stream:{internal_exchange_id}:{symbol}"
     pubsub = redis.pubsub()
     await pubsub.subscribe(channel_name)
+    # Order book messages are snapshot + delta frames; rebuild the full payload
+    decoder = OrderBookDeltaDecoder()
     
     async def redis_listener():
         try:
@@ -693,7 +665,9 @@ async def ml_inference_stream(websocket: WebSocket, model_id: str, exchange_id:
                 if message["type"] == "message":
                     data = message["data"]
                     try:
-                        payload = json.loads(data)
+                        payload = decoder.apply(data)
+                        if payload is None:
+                            continue  # waiting for the next snapshot
                         
                         # Process market data through inference engine
                         prediction = inference_engine.process_market_data(payload)
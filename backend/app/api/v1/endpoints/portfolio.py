@@ -5,6 +5,7 @@ from app import crud, models
 from app.core import security
 from app.services.websocket_manager import manager
 from app.services.portfolio_price_service import portfolio_price_service
+from app.services.portfolio_balance_service import aggregate_balances
 import ccxt.async_support as ccxt
 import logging
 import asyncio
@@ -26,111 +27,8 @@ async def get_portfolio_balances(
     if not api_keys:
         return {"assets": [], "total_portfolio_value": 0.0}
 
-    assets: Dict[str, Dict[str, Any]] = {}
-    
-    for key_record in api_keys:
-        exchange_id = key_record.exchange.lower()
-        if exchange_id not in ccxt.exchanges:
-            logger.warning(f"Exchange {exchange_id} not supported by CCXT")
-            continue
-            
-        exchange_class = getattr(ccxt, exchange_id)
-        
-        try:
-            # Decrypt credentials
-            decrypted_api_key = security.decrypt_key(key_record.api_key)
-            decrypted_secret = security.decrypt_key(key_record.secret_key)
-            decrypted_passphrase = None
-            if key_record.passphrase:
-                decrypted_passphrase = security.decrypt_key(key_record.passphrase)
-
-            exchange_config = {
-                'apiKey': decrypted_api_key,
-                'secret': decrypted_secret,
-                'enableRateLimit': True,
-                'options': {
-                    'adjustForTimeDifference': True,
-                    'recvWindow': 60000 if exchange_id == 'mexc' else 10000
-                }
-            }
-            
-            api = exchange_class(exchange_config)
-        except Exception as decrypt_error:
-            logger.error(f"Failed to decrypt keys for {exchange_id}: {decrypt_error}")
-            continue
-        
-        try:
-            balance = await api.fetch_balance()
-            total = balance.get('total', {})
-            
-            for symbol, amount in total.items():
-                if amount and amount > 0:
-                    if symbol not in assets:
-                        assets[symbol] = {
-                            "id": symbol,
-                            "symbol": symbol,
-                            "name": symbol, # Default to symbol as name
-                            "amount": 0.0,
-                            "value": 0.0,
-                            "price": 0.0,
-                            "price24h": 0.0,
-                            "history": [],
-                            "allocations": []
-                        }
-                    assets[symbol]["amount"] += amount
-                    assets[symbol]["allocations"].append({
-                        "exchange": exchange_id,
-                        "amount": amount
-                    })
-        except Exception as e:
-            logger.error(f"Error fetching balance from {exchange_id} for user {current_user.id}: {e}")
-        finally:
-            await api.close()
-            
-    # Fetch prices to calculate value
-    if assets:
-        binance = ccxt.binance({'enableRateLimit': True})
-        try:
-            tickers = await binance.fetch_tickers()
-            for symbol in assets:
-                ticker_symbol = f"{symbol}/USDT"
-                price = 0.0
-                price24h = 0.0
-                
-                if ticker_symbol in tickers:
-                    price = tickers[ticker_symbol].get('last', 0.0) or 0.0
-                    open_price = tickers[ticker_symbol].get('open', 0.0) or price
-                    price24h = open_price # mock 24h price as open price
-                elif symbol in ['USDT', 'USDC', 'DAI', 'BUSD']:
-                    price = 1.0
-                    price24h = 1.0
-                
-                assets[symbol]["price"] = price
-                assets[symbol]["price24h"] = price24h
-                assets[symbol]["value"] = assets[symbol]["amount"] * price
-                
-                # Create a simple mock history to make sparklines work
-                assets[symbol]["history"] = [
-                    {"time": "24h ago", "value": assets[symbol]["amount"] * price24h},
-                    {"time": "12h ago", "value": assets[symbol]["amount"] * ((price + price24h)/2)},
-                    {"time": "Now", "value": assets[symbol]["amount"] * price}
-                ]
-                
-        except Exception as e:
-            logger.error(f"Error fetching tickers for pricing: {e}")
-        finally:
-            await binance.close()
-
-    total_portfolio_value = sum(item["value"] for item in assets.values())
-    
-    # Sort assets by value descending
-    sorted_assets = sorted(assets.values(), key=lambda x: x["value"], reverse=True)
-    
-    return {
-        "status": "success",
-        "total_portfolio_value": round(total_portfolio_value, 2),
-        "assets": list(assets.values())
-    }
+    # Concurrent per-key fetch with pooled clients, priced from the shared ticker snapshot
+    return await aggregate_balances(api_keys)
 
 @router.get("/fee/{key_id}")
 async def get_fee(
@@ -15,6 +15,7 @@ from app.core.cache import cache
 from app.services.dark_pool_service import dark_pool_service
 from app.services.sentiment_arbitrage import sentiment_arbitrage_service
 from app.services.economic_service import economic_service
+from app.services.market_ticker_table import market_tickers
 
 router = APIRouter()
 
@@ -155,54 +156,41 @@ async def get_sentiment_heatmap():
     Replaces hardcoded list with a dynamic scan of Top 20 assets on Binance.
     """
     try:
-        import ccxt.async_support as ccxt_lib
-        exchange = ccxt_lib.binance()
-        try:
-            # 1. Fetch Tickers to find Top Assets by Volume
-            tickers = await exchange.fetch_tickers()
-            
-            # Filter for USDT pairs and sort by Volume
-            valid_pairs = [
-                ticker for symbol, ticker in tickers.items() 
-                if symbol.endswith('/USDT') and 'UP/' not in symbol and 'DOWN/' not in symbol
-            ]
-            valid_pairs.sort(key=lambda x: float(x.get('quoteVolume', 0) or 0), reverse=True)
-            
-            top_20 = valid_pairs[:20]
-            
-            heatmap_data = []
-            service = MarketService()
-            
-            # 2. Fetch/Calculate Sentiment for each (Simplified heuristic for speed)
-            # In a real production environment, we'd pre-calculate this in a background task.
-            # For now, we use the price momentum + news bias as a proxy.
+        # 1. Top Assets by Volume from the shared ticker table (one watch_tickers stream per exchange)
+        table = await market_tickers.get_table("binance")
+        top_20 = table.top_by_volume(20, "usdt")
+        
+        heatmap_data = []
+        service = MarketService()
+        
+        # 2. Fetch/Calculate Sentiment for each (Simplified heuristic for speed)
+        # In a real production environment, we'd pre-calculate this in a background task.
+        # For now, we use the price momentum + news bias as a proxy.
+        
+        for ticker in top_20:
+            symbol = ticker['symbol']
+            display_symbol = symbol.split('/')[0]
             
-            for ticker in top_20:
-                symbol = ticker['symbol']
-                display_symbol = symbol.split('/')[0]
-                
-                # Heuristic Score: momentum based
-                change = float(ticker.get('percentage', 0) or 0)
-                # Normalize change (-10% to 10% -> -1 to 1)
-                sentiment = max(-1.0, min(1.0, change / 10.0))
-                
-                # Better Heuristic for Market Cap (approximation using Volume and Price stability)
-                # In crypto, Volume and Market Cap usually have a high correlation for top assets.
-                # Normalized approximation: 
-                vol = float(ticker.get('quoteVolume', 0) or 0)
-                estimated_mcap = vol * 25 # Heuristic multiplier for top 20 assets
-
-                heatmap_data.append({
-                    "name": display_symbol, 
-                    "symbol": display_symbol, 
-                    "marketCap": round(estimated_mcap, 0),
-                    "sentimentScore": round(sentiment, 2),
-                    "priceChange": round(change, 2)
-                })
+            # Heuristic Score: momentum based
+            change = float(ticker.get('percentage', 0) or 0)
+            # Normalize change (-10% to 10% -> -1 to 1)
+            sentiment = max(-1.0, min(1.0, change / 10.0))
             
-            return heatmap_data
-        finally:
-            await exchange.close()
+            # Better Heuristic for Market Cap (approximation using Volume and Price stability)
+            # In crypto, Volume and Market Cap usually have a high correlation for top assets.
+            # Normalized approximation: 
+            vol = float(ticker.get('quoteVolume', 0) or 0)
+            estimated_mcap = vol * 25 # Heuristic multiplier for top 20 assets
+
+            heatmap_data.append({
+                "name": display_symbol, 
+                "symbol": display_symbol, 
+                "marketCap": round(estimated_mcap, 0),
+                "sentimentScore": round(sentiment, 2),
+                "priceChange": round(change, 2)
+            })
+        
+        return heatmap_data
             
     except Exception as e:
         print(f"Heatmap Dynamic Fetch Error: {e}")
@@ -267,35 +255,14 @@ async def get_arbitrage_opportunities(exchange_id: str = "binance", sensitivity:
     
     # 1. Fetch Real-Time Tickers from Selected Exchange
     try:
-        import ccxt.async_support as ccxt
-        
         # Validate/Safe-guard exchange ID
         valid_exchanges = ["binance", "kraken", "bybit", "okx", "coinbase", "kucoin", "gateio"]
         if exchange_id not in valid_exchanges:
             exchange_id = "binance"
             
-        # Dynamically instantiate the exchange class
-        exchange_class = getattr(ccxt, exchange_id)
-        exchange = exchange_class()
-        try:
-            # Load tickers
-            tickers = await exchange.fetch_tickers()
-        finally:
-            await exchange.close()
-        
-        # Filter & Normalization Logic
-        valid_pairs = []
-        for symbol, ticker in tickers.items():
-            is_valid = False
-            if "/USDT" in symbol or "/USD" in symbol:
-                is_valid = True
-            if "UP/" in symbol or "DOWN/" in symbol: 
-                is_valid = False
-            if is_valid:
-                valid_pairs.append(ticker)
-                
-        valid_pairs.sort(key=lambda x: float(x.get('quoteVolume') or x.get('baseVolume') or 0), reverse=True)
-        top_assets = valid_pairs[:60]
+        # Shared ticker table for the selected exchange (USD quoted, leveraged tokens excluded)
+        table = await market_tickers.get_table(exchange_id)
+        top_assets = table.top_by_volume(60, "usd", base_volume_fallback=True)
         
     except Exception as e:
         print(f"Scanner Market Data Error ({exchange_id}): {e}")
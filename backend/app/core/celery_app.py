@@ -60,6 +60,7 @@ celery_app.conf.update(
         'app.tasks.run_batch_backtest_task': {'queue': 'heavy'},
         'app.tasks.celery_train_model_task': {'queue': 'heavy'},
         'app.tasks.celery_forex_train_model_task': {'queue': 'heavy'},
+        'app.tasks.render_report_task': {'queue': 'reports'},
     },
     broker_connection_retry_on_startup=True,
     broker_transport_options={'visibility_timeout': 86400},  # 24 hours to prevent duplicate long tasks
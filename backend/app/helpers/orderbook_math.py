@@ -6,8 +6,11 @@ def calculate_dynamic_wall_threshold(bids: List[Dict[str, float]], asks: List[Di
     Calculate a dynamic wall threshold based on the mean and standard deviation
     of order sizes in the current order book snapshot.
     """
-    sizes = [order["size"] for order in bids] + [order["size"] for order in asks]
-    
+    return dynamic_wall_threshold([order["size"] for order in bids] + [order["size"] for order in asks])
+
+
+def dynamic_wall_threshold(sizes: List[float]) -> float:
+    """Same threshold from a flat list of level sizes (bids first, then asks)."""
     if not sizes:
         return 0.0
         
@@ -27,6 +27,7 @@ from datetime import datetime
 from app.core.redis import redis_manager # ✅ Import RedisManager
 from app.services.liquidation_service import liquidation_service # ✅ Import Liquidation Service
 from app.services.block_trade_worker import block_trade_worker # ✅ Import Block Trade Worker
+from app.services.market_ticker_table import market_tickers
 from app.services.block_trade_monitor import block_trade_monitor # ✅ Import Block Trade Monitor (needed for shutdown)
 from app.services.orderbook_snapshot_service import orderbook_snapshot_service # ✅ Import Orderbook Snapshot Service
 from app.services.binance_liq_stream import liquidation_stream # ✅ Import Binance Liquidation Stream
@@ -747,6 +748,9 @@ async def shutdown_event():
     # Stop Portfolio Price Service
     await portfolio_price_service.stop()
 
+    # Stop shared ticker table streams (sentiment heatmap / divergence scanner)
+    await market_tickers.stop()
+
     # Close all cached Exchange Connections (ManualTradeModal pool)
     await exchange_pool.close_all()
 
@@ -98,6 +98,7 @@ from .portfolio import PortfolioSnapshot
 from .indicator import UserIndicator
 from .sentiment_history import SentimentHistory
 from .trade import Trade
+from .trade_rollup import TradePerformanceRollup
 from .education import EducationResource, UserEducationProgress
 from .arbitrage import ArbitrageBot
 from .notification import NotificationSettings
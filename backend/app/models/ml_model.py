@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Float, DateTime, ForeignKey, Enum, Integer, JSON
+from sqlalchemy import Column, String, Float, DateTime, ForeignKey, Enum, Integer, JSON, Boolean, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -27,6 +27,10 @@ class CustomMLModel(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    __table_args__ = (
+        Index('idx_custom_ml_models_user_created', 'user_id', 'created_at'),
+    )
+
     versions = relationship("ModelVersion", back_populates="model", cascade="all, delete-orphan", foreign_keys="ModelVersion.model_id")
     user = relationship("User", back_populates="custom_models")
 
@@ -48,12 +52,30 @@ class ModelVersion(Base):
     dataset_path = Column(String, nullable=True) # For DVC
     metadata_path = Column(String, nullable=True) # For custom uploaded metadata.json
 
+    # Metadata catalog: fields of metadata.json indexed at upload/registration
+    # (services/model_catalog.py) so listings filter in SQL and inference
+    # does not re-read the file
+    meta_symbol = Column(String, nullable=True) # normalized: "BTC-USDT" -> "btcusdt"
+    meta_target_column = Column(JSON, nullable=True)
+    meta_target_is_sl_tp = Column(Boolean, default=False, nullable=False)
+    meta_training_mode = Column(String, nullable=True)
+    meta_setup_type = Column(String, nullable=True)
+    meta_prediction_target = Column(String, nullable=True)
+    catalog_metadata = Column(JSON, nullable=True) # parsed metadata.json
+    catalog_indexed_at = Column(DateTime(timezone=True), nullable=True)
+
     model = relationship("CustomMLModel", back_populates="versions", foreign_keys=[model_id])
 
+    __table_args__ = (
+        Index('idx_model_versions_catalog_symbol', 'meta_symbol'),
+    )
+
     @property
     def features(self):
         import os
         import json
+        if self.metadata_path and self.catalog_metadata is not None:
+            return self.catalog_metadata.get("features", [])
         if self.metadata_path and os.path.exists(self.metadata_path):
             try:
                 with open(self.metadata_path, 'r') as f:
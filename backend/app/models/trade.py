@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base_class import Base
@@ -26,3 +26,7 @@ class Trade(Base):
 
     # Relationship
     bot = relationship("Bot", back_populates="trades")
+
+    __table_args__ = (
+        Index('idx_trades_bot_closed_at', 'bot_id', 'closed_at'),
+    )
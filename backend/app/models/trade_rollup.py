@@ -0,0 +1,42 @@
+from sqlalchemy import Column, Integer, Float, Date, DateTime, UniqueConstraint, Index
+from app.db.base_class import Base
+
+# bot_id used for the owner-wide rows (all bots of a user folded in close order)
+ALL_BOTS = 0
+
+
+class TradePerformanceRollup(Base):
+    """
+    Per user / bot / UTC day summary of closed trades, folded in close order.
+
+    Equity is relative to the start of the day (1.0):
+      growth      = prod(1 + r)               (r = pnl_percent / 100)
+      max_prefix  = highest equity reached    (>= 1, the day's opening equity)
+      min_prefix  = lowest equity reached
+      max_drawdown = min(equity / running peak) within the day (<= 1)
+    These compose across days, so the whole-period metrics need one row per day.
+    """
+    __tablename__ = "trade_performance_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    owner_id = Column(Integer, nullable=False)
+    bot_id = Column(Integer, nullable=False, default=ALL_BOTS)  # ALL_BOTS = owner-wide row
+    day = Column(Date, nullable=False)
+
+    trade_count = Column(Integer, nullable=False, default=0)
+    win_count = Column(Integer, nullable=False, default=0)
+    pnl_sum = Column(Float, nullable=False, default=0.0)
+    return_sum = Column(Float, nullable=False, default=0.0)     # sum(pnl_percent)
+    return_sq_sum = Column(Float, nullable=False, default=0.0)  # sum(pnl_percent ** 2)
+
+    growth = Column(Float, nullable=False, default=1.0)
+    max_prefix = Column(Float, nullable=False, default=1.0)
+    min_prefix = Column(Float, nullable=False, default=1.0)
+    max_drawdown = Column(Float, nullable=False, default=1.0)
+
+    last_closed_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint('owner_id', 'bot_id', 'day', name='uq_trade_rollup_owner_bot_day'),
+        Index('idx_trade_rollup_lookup', 'owner_id', 'bot_id', 'day'),
+    )
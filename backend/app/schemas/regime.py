@@ -15,4 +15,5 @@ class RegimeResponse(BaseModel):
     volatility_score: float
     transition_matrix: List[List[float]]
     regime_map: Dict[int, str]
+    regime_probabilities: Optional[Dict[str, float]] = None
     history: List[RegimeHistoryItem]
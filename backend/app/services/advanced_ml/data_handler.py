@@ -2,6 +2,8 @@ import numpy as np
 import pandas as pd
 from typing import Tuple, List, Union
 
+from app.services.advanced_ml.sequence_windows import sliding_windows, window_targets
+
 class AdvancedDataHandler:
     """
     Handles data preparation for advanced ML models.
@@ -25,7 +27,8 @@ class AdvancedDataHandler:
             target_col: The column to use as target (optional). Can be list of strings.
             
         Returns:
-            X: (samples, sequence_length, feature_count)
+            X: (samples, sequence_length, feature_count) — a read-only sliding-window
+               view over the feature matrix (no per-window copies)
             y: (samples,) or (samples, targets)
         """
         X_data = df[features].values
@@ -35,15 +38,11 @@ class AdvancedDataHandler:
         else:
             y_data = df[target_col].values if target_col in df.columns else None
         
-        X, y = [], []
-        
-        for i in range(len(df) - sequence_length + 1):
-            X.append(X_data[i : i + sequence_length])
-            if y_data is not None:
-                # Target is usually at the end of the sequence or the step after
-                y.append(y_data[i + sequence_length - 1])
-                
-        return np.array(X), np.array(y)
+        X = sliding_windows(X_data, sequence_length)
+        if y_data is None:
+            return X, np.array([])
+        # Target is usually at the end of the sequence or the step after
+        return X, window_targets(y_data, sequence_length)
 
     @staticmethod
     def prepare_rl_data(
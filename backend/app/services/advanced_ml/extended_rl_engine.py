@@ -136,16 +136,16 @@ class ExtendedRLEngine:
         elif algo == "Liquid-NN":
             add_log("Initializing Custom PyTorch Liquid-NN Architecture...")
             from app.services.advanced_ml.architectures import LiquidNN
-            from torch.utils.data import DataLoader, TensorDataset
+            from torch.utils.data import DataLoader
+            from app.services.advanced_ml.sequence_windows import SequenceDataset
             
             seq_len = int(config.get("sequence_length", 30))
             target_col = "Target"
             X, y = AdvancedDataHandler.create_sequences(df, features, sequence_length=seq_len, target_col=target_col)
             
             split = int(len(X) * 0.8)
-            X_train = torch.FloatTensor(X[:split])
-            y_train = torch.FloatTensor(y[:split]).view(-1, 1)
-            train_loader = DataLoader(TensorDataset(X_train, y_train), batch_size=64, shuffle=True)
+            # Windows stay views over the feature matrix; each batch is copied on demand
+            train_loader = DataLoader(SequenceDataset(X[:split], y[:split].reshape(-1, 1)), batch_size=64, shuffle=True)
             
             model = LiquidNN(input_dim=len(features), hidden_dim=64, output_dim=1)
             optimizer = optim.Adam(model.parameters(), lr=lr)
@@ -0,0 +1,109 @@
+"""
+Sequence Windows
+================
+LSTM / Transformer / TimeGAN এর sliding-window input — প্রতিটা window আলাদা copy করে
+(samples, seq_len, features) 3D array বানালে memory হয় seq_len x feature matrix।
+এখানে window গুলো মূল 2D matrix এর উপর zero-copy view:
+
+* `sliding_windows(X, seq_len)` -> (n - seq_len + 1, seq_len, features) strided view
+* `window_targets(y, seq_len, offset)` -> প্রতিটা window এর target, aligned view
+* `float32_memmap(X)` -> feature matrix disk এ float32 np.memmap (RAM এর বাইরে)
+* `SequenceDataset` -> torch Dataset, শুধু requested window টাই float32 এ copy করে
+
+Usage:
+    rows = float32_memmap(df[features].values)
+    dataset = SequenceDataset.from_rows(rows, seq_len=60, targets=df["Target"].values)
+    loader = DataLoader(dataset, batch_size=256, shuffle=True)
+"""
+
+import os
+import tempfile
+from typing import Optional
+
+import numpy as np
+
+try:
+    import torch
+    from torch.utils.data import Dataset
+    TORCH_AVAILABLE = True
+except ImportError:
+    Dataset = object
+    TORCH_AVAILABLE = False
+
+MEMMAP_CHUNK_ROWS = 65_536
+
+
+def sliding_windows(X: np.ndarray, seq_len: int) -> np.ndarray:
+    """
+    Read-only (n - seq_len + 1, seq_len, features) view of a 2D array (or memmap):
+    window i is X[i : i + seq_len]. Nothing is copied.
+    """
+    X = np.asarray(X)
+    if len(X) < seq_len:
+        return np.empty((0, seq_len) + X.shape[1:], dtype=X.dtype)
+    # sliding_window_view puts the window axis last: (n - L + 1, features, L)
+    return np.lib.stride_tricks.sliding_window_view(X, seq_len, axis=0).swapaxes(1, 2)
+
+
+def window_targets(y: np.ndarray, seq_len: int, offset: int = 0) -> np.ndarray:
+    """
+    Target of each window: y[i + seq_len - 1 + offset] (offset 0 = the window's last
+    step, 1 = the step after it). A view; windows without a target are dropped by
+    slicing `sliding_windows(...)[:len(targets)]`.
+    """
+    return y[seq_len - 1 + offset:]
+
+
+def float32_memmap(X: np.ndarray, path: Optional[str] = None) -> np.memmap:
+    """
+    Writes a 2D array to a float32 memmap (a temp file unless `path` is given),
+    chunk by chunk, and reopens it read-only. A temp file is unlinked right away;
+    its pages stay valid until the memmap is garbage collected.
+    """
+    temporary = path is None
+    if temporary:
+        fd, path = tempfile.mkstemp(suffix=".npy")
+        os.close(fd)
+    out = np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=X.shape)
+    for s in range(0, len(X), MEMMAP_CHUNK_ROWS):
+        out[s:s + MEMMAP_CHUNK_ROWS] = X[s:s + MEMMAP_CHUNK_ROWS]
+    out.flush()
+    del out
+    rows = np.load(path, mmap_mode="r")
+    if temporary and os.name == "posix":
+        os.unlink(path)
+    return rows
+
+
+class SequenceDataset(Dataset):
+    """
+    Dataset over (optionally memmapped) windows: `windows[i]` is copied to a
+    float32 tensor only when the DataLoader asks for it. Items are `(x, y)`,
+    or `(x,)` without targets, like TensorDataset.
+    """
+
+    def __init__(self, windows: np.ndarray, targets: Optional[np.ndarray] = None):
+        if not TORCH_AVAILABLE:
+            raise ImportError("SequenceDataset requires PyTorch")
+        if targets is not None and len(targets) < len(windows):
+            windows = windows[:len(targets)]
+        self.windows = windows
+        self.targets = None if targets is None else targets[:len(windows)]
+
+    @classmethod
+    def from_rows(cls, rows: np.ndarray, seq_len: int, targets: Optional[np.ndarray] = None,
+                  target_offset: int = 0) -> "SequenceDataset":
+        """Windows of `seq_len` rows; targets aligned with `window_targets`."""
+        windows = sliding_windows(rows, seq_len)
+        if targets is None:
+            return cls(windows)
+        return cls(windows, window_targets(targets, seq_len, target_offset))
+
+    def __len__(self):
+        return len(self.windows)
+
+    def __getitem__(self, idx):
+        x = torch.from_numpy(np.array(self.windows[idx], dtype=np.float32))
+        if self.targets is None:
+            return (x,)
+        return x, torch.from_numpy(np.array(self.targets[idx], dtype=np.float32))
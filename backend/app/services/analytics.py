@@ -3,7 +3,9 @@ from app.models.trade import Trade
 from app.schemas.analytics import PerformanceMetrics
 from datetime import datetime, timedelta
 from sqlalchemy import desc
+import math
 import statistics
+from app.services.trade_rollups import Segment, performance_segment
 
 class AnalyticsService:
     @staticmethod
@@ -11,14 +13,74 @@ class AnalyticsService:
         db: Session,
         owner_id: int = None,
         start_date: datetime = None,
-        end_date: datetime = None
+        end_date: datetime = None,
+        bot_id: int = None
     ) -> PerformanceMetrics:
+        """
+        Served from the daily trade rollups (O(days)): whole days are
+        composed in SQL, partial boundary days read from the trades table.
+        """
+        if owner_id is None:
+            return AnalyticsService.calculate_from_trades(db, owner_id, start_date, end_date, bot_id)
+
+        segment = performance_segment(db, owner_id, start_date, end_date, bot_id=bot_id)
+        if segment is None:
+            # Equity hit zero somewhere — ln() based composition is undefined
+            return AnalyticsService.calculate_from_trades(db, owner_id, start_date, end_date, bot_id)
+        return AnalyticsService.metrics_from_segment(segment, start_date, end_date)
+
+    @staticmethod
+    def metrics_from_segment(segment: Segment, start_date: datetime = None, end_date: datetime = None) -> PerformanceMetrics:
+        n = segment.trade_count
+        if n == 0:
+            return PerformanceMetrics(
+                sharpe_ratio=0.0,
+                max_drawdown=0.0,
+                win_rate=0.0,
+                total_trades=0,
+                total_pnl=0.0,
+                start_date=start_date,
+                end_date=end_date
+            )
+
+        # Sample std dev from running sums; treat float noise around a
+        # constant return series as zero variance (statistics.stdev == 0)
+        sharpe_ratio = 0.0
+        if n > 1:
+            mean_return = segment.return_sum / n
+            variance = (segment.return_sq_sum - segment.return_sum * mean_return) / (n - 1)
+            if variance > 1e-12 * (segment.return_sq_sum / n):
+                sharpe_ratio = mean_return / math.sqrt(variance)
+
+        max_drawdown = min(segment.max_drawdown - 1.0, 0.0)
+
+        return PerformanceMetrics(
+            sharpe_ratio=round(sharpe_ratio, 2),
+            max_drawdown=round(abs(max_drawdown) * 100, 2),
+            win_rate=round(segment.win_count / n * 100, 2),
+            total_trades=n,
+            total_pnl=round(segment.pnl_sum, 2),
+            start_date=start_date,
+            end_date=end_date
+        )
+
+    @staticmethod
+    def calculate_from_trades(
+        db: Session,
+        owner_id: int = None,
+        start_date: datetime = None,
+        end_date: datetime = None,
+        bot_id: int = None
+    ) -> PerformanceMetrics:
+        """Replays every closed trade (reference implementation / fallback)."""
 
         query = db.query(Trade).filter(Trade.status == "CLOSED")
 
         # Filter by owner if provided (prevents cross-user data leak)
         if owner_id is not None:
             query = query.filter(Trade.bot.has(owner_id=owner_id))
+        if bot_id is not None:
+            query = query.filter(Trade.bot_id == bot_id)
 
         if start_date:
             query = query.filter(Trade.closed_at >= start_date)
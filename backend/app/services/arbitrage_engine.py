@@ -1,5 +1,5 @@
 import asyncio
-import ccxt.async_support as ccxt
+import ccxt.pro as ccxt
 import json
 import time
 from redis import asyncio as aioredis
@@ -7,6 +7,7 @@ from app.core.config import settings
 from app.services.notification import NotificationService
 from app.db.session import SessionLocal
 from app.services.trading import execute_large_order
+from app.services.arbitrage_scanner import ArbitrageScanner
 
 class ArbitrageBotInstance:
     def __init__(self, user_id: int, config: dict):
@@ -16,6 +17,7 @@ class ArbitrageBotInstance:
         self.redis = None
         self.exchange_a = None
         self.exchange_b = None
+        self.scanner = None
         
         # Paper Trading State
         # Strict user choice: defaults to False (Real) only if expicitly set, otherwise be careful.
@@ -50,7 +52,7 @@ class ArbitrageBotInstance:
         ex_a_name = self.config.get("exchange_a", "binance").lower()
         ex_b_name = self.config.get("exchange_b", "kraken").lower()
         
-        # CCXT ক্লাস লোড করা
+        # CCXT ক্লাস লোড করা (ccxt.pro: REST + WebSocket streams on the same instance)
         ex_class_a = getattr(ccxt, ex_a_name)
         ex_class_b = getattr(ccxt, ex_b_name)
 
@@ -154,6 +156,16 @@ class ArbitrageBotInstance:
         except Exception as e:
             print(f"Failed to send start notification: {e}")
 
+        # ১. Streaming top-of-book (replaces 3-second fetch_ticker polling)
+        ex_a_id, ex_b_id = self.exchange_a.id, self.exchange_b.id
+        self.scanner = ArbitrageScanner(
+            pairs=[pair],
+            exchange_ids=[ex_a_id, ex_b_id],
+            exchanges={ex_a_id: self.exchange_a, ex_b_id: self.exchange_b},
+        )
+        await self.scanner.start()
+        last_heartbeat = 0.0
+
         try:
             while self.is_running:
                 # 0. Panic Check
@@ -163,24 +175,17 @@ class ArbitrageBotInstance:
                         await self._log("🚨 PANIC BUTTON ACTIVATED! Engine Stopping Immediately.", "error")
                         break
 
-                # ১. প্যারালাল প্রাইস ফেচিং (Real Market Data)
-                tasks = [
-                    self.exchange_a.fetch_ticker(pair),
-                    self.exchange_b.fetch_ticker(pair)
-                ]
-                results = await asyncio.gather(*tasks, return_exceptions=True)
-                
-                # এরর হ্যান্ডলিং
-                if isinstance(results[0], Exception) or isinstance(results[1], Exception):
-                    await self._log("⚠️ Error fetching prices. Retrying...", "error")
-                    await asyncio.sleep(2)
+                if not await self.scanner.wait_for_update(timeout=10):
+                    await self._log("⚠️ No price updates from streams. Waiting...", "error")
                     continue
 
-                ticker_a = results[0]
-                ticker_b = results[1]
-                
-                price_a = ticker_a['last'] # Buy Price
-                price_b = ticker_b['last'] # Sell Price
+                quote_a = self.scanner.quote(pair, ex_a_id)
+                quote_b = self.scanner.quote(pair, ex_b_id)
+                if not quote_a or not quote_b:
+                    continue
+
+                price_a = quote_a['ask'] # Buy Price
+                price_b = quote_b['bid'] # Sell Price
 
                 # ২. স্প্রেড ক্যালকুলেশন
                 # ধরি A তে কিনে B তে বেচব
@@ -188,8 +193,11 @@ class ArbitrageBotInstance:
                 spread_percent = (diff / price_a) * 100
 
                 # Heartbeat Log (Every 3 seconds)
-                log_msg = f"💓 Heartbeat: {self.exchange_a.id}(${price_a}) vs {self.exchange_b.id}(${price_b}) | Spread: {spread_percent:.4f}%"
-                await self._log(log_msg, "info")
+                now = time.time()
+                if now - last_heartbeat >= 3:
+                    last_heartbeat = now
+                    log_msg = f"💓 Heartbeat: {ex_a_id}(${price_a}) vs {ex_b_id}(${price_b}) | Spread: {spread_percent:.4f}%"
+                    await self._log(log_msg, "info")
 
                 # --- TRAILING STOP LOSS CHECK ---
                 if self.trailing_stop_percentage > 0:
@@ -212,8 +220,8 @@ class ArbitrageBotInstance:
                         await self._execute_trade(pair, price_a, price_b, spread_percent)
                     else:
                         await self._log(f"🔔 Opportunity! Spread {spread_percent:.2f}% found. Waiting for confirmation.", "warning")
-
-                await asyncio.sleep(3) 
+                    # Cooldown so one spread is not acted on repeatedly
+                    await asyncio.sleep(3)
 
         except Exception as e:
             await self._log(f"🔥 Critical Error: {str(e)}", "error")
@@ -360,6 +368,9 @@ class ArbitrageBotInstance:
                 print(f"Failed to send stop notification: {e}")
             
         self.is_running = False
+        if self.scanner:
+            await self.scanner.stop()
+            self.scanner = None
         if self.exchange_a:
             await self.exchange_a.close()
         if self.exchange_b:
@@ -0,0 +1,184 @@
+import asyncio
+import logging
+import time
+import numpy as np
+import ccxt.pro as ccxtpro
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Taker fee assumed for venues without an explicit override (0.1%)
+DEFAULT_TAKER_FEE = 0.001
+
+
+class ArbitrageScanner:
+    """
+    Streams top-of-book for many pairs across many venues.
+
+    Best bid/ask live in (pair x venue) NumPy matrices. Every quote update
+    rewrites one cell and recomputes the net-of-fee spread matrix for that
+    pair's row only (venues x venues), so the cost per update is independent
+    of how many pairs are watched.
+
+    Spread for buying on venue i and selling on venue j:
+        (bid_j * (1 - fee_j) - ask_i * (1 + fee_i)) / (ask_i * (1 + fee_i)) * 100
+    """
+
+    def __init__(
+        self,
+        pairs: List[str],
+        exchange_ids: List[str],
+        fees: Optional[Dict[str, float]] = None,
+        min_spread: float = 0.0,
+        use_order_book: bool = False,
+        exchanges: Optional[Dict[str, Any]] = None,
+        on_opportunity: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None,
+    ):
+        self.pairs = list(pairs)
+        self.exchange_ids = [ex.lower() for ex in exchange_ids]
+        self.pair_index = {p: i for i, p in enumerate(self.pairs)}
+        self.venue_index = {v: i for i, v in enumerate(self.exchange_ids)}
+        self.min_spread = min_spread
+        self.use_order_book = use_order_book
+        self.on_opportunity = on_opportunity
+
+        fees = fees or {}
+        self.fees = np.array([fees.get(v, DEFAULT_TAKER_FEE) for v in self.exchange_ids], dtype=np.float64)
+
+        n_pairs, n_venues = len(self.pairs), len(self.exchange_ids)
+        self.bids = np.full((n_pairs, n_venues), np.nan)
+        self.asks = np.full((n_pairs, n_venues), np.nan)
+        self.updated_at = np.zeros((n_pairs, n_venues))
+
+        # Per-pair best opportunity (kept in sync row by row)
+        self.best_spread = np.full(n_pairs, np.nan)
+        self.best_buy = np.full(n_pairs, -1, dtype=np.int64)
+        self.best_sell = np.full(n_pairs, -1, dtype=np.int64)
+
+        # Exchanges passed in are owned by the caller and not closed on stop()
+        self._owned_exchanges = exchanges is None
+        self.exchanges: Dict[str, Any] = dict(exchanges or {})
+        self._tasks: List[asyncio.Task] = []
+        self._updated = asyncio.Event()
+        self.is_running = False
+        self.update_count = 0
+
+    def _get_exchange(self, ex_id: str):
+        if ex_id not in self.exchanges:
+            ex_class = getattr(ccxtpro, ex_id)
+            self.exchanges[ex_id] = ex_class({
+                'enableRateLimit': True,
+                'options': {'adjustForTimeDifference': True}
+            })
+        return self.exchanges[ex_id]
+
+    def on_quote(self, pair: str, venue: str, bid: Optional[float], ask: Optional[float]) -> Optional[Dict[str, Any]]:
+        """
+        Applies one top-of-book update and returns the pair's best opportunity
+        when it clears `min_spread`.
+        """
+        p = self.pair_index[pair]
+        v = self.venue_index[venue]
+        self.bids[p, v] = bid if bid else np.nan
+        self.asks[p, v] = ask if ask else np.nan
+        self.updated_at[p, v] = time.time()
+        self.update_count += 1
+        self._recompute_row(p)
+        self._updated.set()
+
+        spread = self.best_spread[p]
+        if np.isnan(spread) or spread < self.min_spread:
+            return None
+        return self.opportunity(p)
+
+    def _recompute_row(self, p: int):
+        buy = self.asks[p] * (1 + self.fees)
+        sell = self.bids[p] * (1 - self.fees)
+        spread = (sell[None, :] - buy[:, None]) / buy[:, None] * 100
+        np.fill_diagonal(spread, np.nan)
+
+        if np.isnan(spread).all():
+            self.best_spread[p] = np.nan
+            self.best_buy[p] = self.best_sell[p] = -1
+            return
+        i, j = divmod(int(np.nanargmax(spread)), len(self.exchange_ids))
+        self.best_spread[p] = spread[i, j]
+        self.best_buy[p] = i
+        self.best_sell[p] = j
+
+    def opportunity(self, p: int) -> Dict[str, Any]:
+        i, j = self.best_buy[p], self.best_sell[p]
+        return {
+            "pair": self.pairs[p],
+            "buy_exchange": self.exchange_ids[i],
+            "sell_exchange": self.exchange_ids[j],
+            "buy_price": float(self.asks[p, i]),
+            "sell_price": float(self.bids[p, j]),
+            "net_spread": float(self.best_spread[p]),
+        }
+
+    def quote(self, pair: str, venue: str) -> Optional[Dict[str, float]]:
+        p = self.pair_index[pair]
+        v = self.venue_index[venue.lower()]
+        bid, ask = self.bids[p, v], self.asks[p, v]
+        if np.isnan(bid) or np.isnan(ask):
+            return None
+        return {"bid": float(bid), "ask": float(ask), "timestamp": float(self.updated_at[p, v])}
+
+    def top_opportunities(self, n: int = 10) -> List[Dict[str, Any]]:
+        valid = np.flatnonzero(~np.isnan(self.best_spread))
+        order = valid[np.argsort(self.best_spread[valid])[::-1][:n]]
+        return [self.opportunity(int(p)) for p in order]
+
+    async def wait_for_update(self, timeout: Optional[float] = None) -> bool:
+        """Waits until any quote changes. Returns False on timeout."""
+        try:
+            await asyncio.wait_for(self._updated.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return False
+        self._updated.clear()
+        return True
+
+    async def _watch(self, venue: str, pair: str):
+        exchange = self._get_exchange(venue)
+        while self.is_running:
+            try:
+                if self.use_order_book:
+                    book = await exchange.watch_order_book(pair, limit=5)
+                    bid = book['bids'][0][0] if book.get('bids') else None
+                    ask = book['asks'][0][0] if book.get('asks') else None
+                else:
+                    ticker = await exchange.watch_ticker(pair)
+                    bid, ask = ticker.get('bid'), ticker.get('ask')
+
+                opportunity = self.on_quote(pair, venue, bid, ask)
+                if opportunity and self.on_opportunity:
+                    await self.on_opportunity(opportunity)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"ArbitrageScanner {venue} {pair} stream error: {e}")
+                await asyncio.sleep(5)
+
+    async def start(self):
+        if self.is_running:
+            return
+        self.is_running = True
+        for venue in self.exchange_ids:
+            for pair in self.pairs:
+                self._tasks.append(asyncio.create_task(self._watch(venue, pair)))
+        logger.info(f"ArbitrageScanner started: {len(self.pairs)} pairs x {len(self.exchange_ids)} venues")
+
+    async def stop(self):
+        self.is_running = False
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._owned_exchanges:
+            for exchange in self.exchanges.values():
+                try:
+                    await exchange.close()
+                except Exception:
+                    pass
+            self.exchanges.clear()
@@ -13,8 +13,12 @@ from app.utils import get_redis_client
 from app.core.config import settings
 from app.models.trade import Trade
 from app.services.live_engine import LiveBotEngine # Inherit to reuse setup logic if possible, or copy necessary parts.
+from app.services.ohlcv_ring_buffer import OHLCVRingBuffer
 # We will copy/adapt to avoid issues with the loop in LiveBotEngine
 
+# Candles kept per bot (the forming one included)
+CANDLE_BUFFER_SIZE = 500
+
 class AsyncBotInstance(LiveBotEngine):
     """
     Refactored Bot Engine that runs within the BotManager loop.
@@ -22,6 +26,7 @@ class AsyncBotInstance(LiveBotEngine):
     Instead, it reacts to 'process_tick' calls.
     """
     def __init__(self, bot: models.Bot, db_session: Session):
+        self.candles = OHLCVRingBuffer(CANDLE_BUFFER_SIZE)
         super().__init__(bot, db_session) 
         # LiveBotEngine.__init__ handles config loading, exchange setup, state loading.
         
@@ -30,6 +35,28 @@ class AsyncBotInstance(LiveBotEngine):
         
         self._status_task = None
 
+    @property
+    def df(self):
+        """DataFrame view of the candle buffer, built only when a strategy asks for it."""
+        return self.candles.frame() if len(self.candles) else None
+
+    @df.setter
+    def df(self, value):
+        self.candles.load(value)
+        self._reset_strategy_state()
+
+    def _reset_strategy_state(self):
+        executor = getattr(self, 'strategy_executor', None)
+        if executor is not None and executor.incremental and len(self.candles):
+            executor.reset_state(self.candles.column('close')[:-1])
+
+    def _check_signal(self):
+        """Incremental strategies read their O(1) state; the others get the DataFrame view."""
+        executor = self.strategy_executor
+        if executor.incremental:
+            return executor.check_signal_live(self.candles.last_close)
+        return executor.check_signal(self.df)
+
     async def start(self):
         """Called by Manager when starting the bot."""
         self.is_running = True
@@ -46,8 +73,8 @@ class AsyncBotInstance(LiveBotEngine):
         
         # 1. Initial Data Fetch
         self.df = await self.fetch_market_data(limit=100)
-        if self.df is not None and not self.df.empty:
-            self.last_known_price = self.df['close'].iloc[-1]
+        if len(self.candles):
+            self.last_known_price = self.candles.last_close
             
             
         # 2. Start User Data Stream (Private Order/Trade Updates)
@@ -130,9 +157,9 @@ class AsyncBotInstance(LiveBotEngine):
             
             # (Heartbeat logic moved to _status_loop)
 
-            # 3. Update DataFrame (Crucial for Strategy)
-            if self.df is not None and candle_data:
-                await self._update_dataframe(candle_data)
+            # 3. Update Candle Buffer (Crucial for Strategy)
+            if candle_data:
+                self._update_candles(candle_data)
 
             # 4. Run Strategy Logic
             if self.mode == 'scalp':
@@ -144,18 +171,18 @@ class AsyncBotInstance(LiveBotEngine):
                 if self.position["amount"] > 0:
                      await self.monitor_risk(price)
                      
-                     if self.df is not None:
+                     if len(self.candles):
                          # Log occasionally that we are checking signals
                          # self.log(f"🔎 Checking Sell Signal...", "DEBUG") 
-                         sig, reas, _ = self.strategy_executor.check_signal(self.df)
+                         sig, reas, _ = self._check_signal()
                          if sig == "SELL": 
                              self.log(f"🚨 SELL SIGNAL: {reas}", "TRADE")
                              await self.execute_trade("SELL", price, reas)
                          
                 elif self.position["amount"] <= 0:
-                     if self.df is not None:
+                     if len(self.candles):
                          # self.log(f"🔎 Checking Buy Signal...", "DEBUG")
-                         sig, reas, _ = self.strategy_executor.check_signal(self.df)
+                         sig, reas, _ = self._check_signal()
                          if sig == "BUY": 
                              self.log(f"🚨 BUY SIGNAL: {reas}", "TRADE")
                              await self.execute_trade("BUY", price, reas)
@@ -166,79 +193,34 @@ class AsyncBotInstance(LiveBotEngine):
                 self.log(f"Tick Error: {e}", "ERROR")
                 self.last_err = time.time()
 
-    async def _update_dataframe(self, candle_data):
+    def _update_candles(self, candle_data):
         """
-        Updates self.df with the latest candle data.
+        Applies the latest candle data to the candle buffer (same timestamp: update the
+        forming candle, newer: it closed and a new one starts).
         Handles both Binance (dict) and KuCoin (list) formats.
         """
         try:
-            # Prepare new row data
-            new_row = {}
-            timestamp_ms = 0
-            
             # Analyze format
             if isinstance(candle_data, dict) and 'c' in candle_data: 
                 # Binance Kline
                 timestamp_ms = int(candle_data['t'])
-                new_row = {
-                    'open': float(candle_data['o']),
-                    'high': float(candle_data['h']),
-                    'low': float(candle_data['l']),
-                    'close': float(candle_data['c']),
-                    'volume': float(candle_data['v'])
-                }
+                o, h, l, c, v = (float(candle_data[k]) for k in ('o', 'h', 'l', 'c', 'v'))
             elif isinstance(candle_data, list) and len(candle_data) >= 6:
                 # KuCoin Candle [time, open, close, high, low, volume, turnover]
                 timestamp_ms = int(candle_data[0])
-                new_row = {
-                    'open': float(candle_data[1]),
-                    'close': float(candle_data[2]),
-                    'high': float(candle_data[3]),
-                    'low': float(candle_data[4]),
-                    'volume': float(candle_data[5])
-                }
+                o, c, h, l, v = (float(x) for x in candle_data[1:6])
             else:
                 return # Unknown format
 
-            if self.df is None or self.df.empty:
-                return
-
-            # Convert to Pandas Timestamp
-            new_ts = pd.to_datetime(timestamp_ms, unit='ms')
-            
-            # Get last timestamp from DF
-            # Assuming 'timestamp' column exists as per fetch_market_data in LiveBotEngine
-            last_ts = self.df['timestamp'].iloc[-1]
-            
-            # Add timestamp to new_row for appending
-            new_row['timestamp'] = new_ts
-
-            if new_ts > last_ts:
-                # 🟢 New Candle: Append
-                # Convert dict to DataFrame row
-                row_df = pd.DataFrame([new_row])
-                self.df = pd.concat([self.df, row_df], ignore_index=True)
-                
-                # Keep size manageable (e.g. 500 candles)
-                if len(self.df) > 500:
-                    self.df = self.df.iloc[-500:].reset_index(drop=True)
-                    
-                # Store update for debug
-                # self.log(f"🕯️ New Candle: {new_ts}", "DEBUG")
-
-            elif new_ts == last_ts:
-                # 🟡 Same Candle: Update Last Row
-                idx = self.df.index[-1]
-                for col, val in new_row.items():
-                    if col in self.df.columns:
-                        self.df.at[idx, col] = val
-            
-            else:
-                # Out of order packet? Ignore.
-                pass
+            # Out of order packets (and updates before the initial fetch) are ignored
+            if self.candles.update(timestamp_ms, o, h, l, c, v):
+                # 🟢 New Candle: the previous one closed
+                executor = getattr(self, 'strategy_executor', None)
+                if executor is not None and executor.incremental:
+                    executor.close_candle(self.candles.closed_close)
             
         except Exception as e:
-            # self.log(f"DF Update Error: {e}", "ERROR")
+            # self.log(f"Candle Update Error: {e}", "ERROR")
             pass
 
     async def _user_data_stream_loop(self):
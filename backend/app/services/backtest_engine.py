@@ -14,6 +14,7 @@ import os
 import os
 from app.models.indicator import UserIndicator # ✅ NEW
 from app.strategies.dynamic_indicator import DynamicIndicatorStrategy
+from app.services.genetic_optimizer import BacktestFitness, FitnessCache, GeneticOptimizer, GeneticWorkerPool, run_single_backtest, smart_filter_params
 from weasyprint import HTML
 import importlib
 import importlib.util
@@ -589,7 +590,10 @@ class BacktestEngine:
                  commission: float = 0.001, slippage: float = 0.0, leverage: float = 1.0,
                  df_data: pd.DataFrame = None, # 👈 NEW: Allow passing dataframe directly
                  opt_target: str = "profit", # ✅ New
-                 min_trades: int = 5):       # ✅ New
+                 min_trades: int = 5,        # ✅ New
+                 n_workers: int = None,      # GA: backtest processes (default: one per core)
+                 fitness_cache_path: str = None,  # GA: persist memoized fitness here
+                 worker_pool: GeneticWorkerPool = None):  # GA: shared pool (walk-forward), left running
         
         df = None
 
@@ -714,7 +718,8 @@ class BacktestEngine:
                 pop_size=population_size, generations=generations, 
                 progress_callback=progress_callback, abort_callback=abort_callback,
                 commission=commission, slippage=slippage, leverage=leverage,
-                opt_target=opt_target, min_trades=min_trades # ✅ Pass args
+                opt_target=opt_target, min_trades=min_trades, # ✅ Pass args
+                n_workers=n_workers, fitness_cache_path=fitness_cache_path, worker_pool=worker_pool
             )
 
         # ✅ Dynamic Sorting Logic Helper
@@ -733,7 +738,8 @@ class BacktestEngine:
                      method="grid", population_size=20, generations=5, 
                      commission: float = 0.001, slippage: float = 0.0, leverage: float = 1.0,
                      opt_target="profit", min_trades=5, # ✅ New
-                     progress_callback=None):
+                     progress_callback=None,
+                     n_workers: int = None):  # GA: backtest processes, one pool shared by all windows
         
         print(f"🚀 Starting Walk-Forward Analysis for {symbol}...")
         
@@ -756,88 +762,101 @@ class BacktestEngine:
         total_duration = (full_end_date - full_start_date).days
         step = 0
         
-        while True:
-            train_end = current_start + pd.Timedelta(days=train_window_days)
-            test_end = train_end + pd.Timedelta(days=test_window_days)
-
-            if train_end >= full_end_date:
-                break
-            if test_end > full_end_date:
-                test_end = full_end_date
-
-            # ✅ Progress Update
-            if progress_callback:
-                elapsed_days = (test_end - full_start_date).days
-                percent = int((elapsed_days / total_duration) * 100)
-                if percent > 99: percent = 99
-                progress_callback(percent, meta={
-                    "status": f"WFA Step {step+1}: Testing {train_end.date()} -> {test_end.date()}",
-                    "current_equity": round(cumulative_equity, 2)
-                })
-
-            print(f"🔄 Step {step+1}: Training [{current_start.date()} - {train_end.date()}] | Testing [{train_end.date()} - {test_end.date()}]")
-
-            # ✅ A. TRAINING PHASE (Dynamic Optimization)
-            train_slice_df = full_df.loc[current_start:train_end]
-            
-            if len(train_slice_df) < 10:
-                print("⚠️ Skipping step: Not enough training data.")
-                current_start += pd.Timedelta(days=test_window_days)
-                continue
-
-            # Optimize using the sliced data
-            opt_results = self.optimize(
-                db=db, symbol=symbol, timeframe=timeframe, strategy_name=strategy_name,
-                initial_cash=cumulative_equity, 
-                params=params, 
-                method=method, 
-                population_size=population_size, generations=generations,
-                commission=commission, slippage=slippage, leverage=leverage,
-                df_data=train_slice_df, # 👈 Sliced Training Data
-                opt_target=opt_target, # ✅ Pass
-                min_trades=min_trades  # ✅ Pass
-            )
+        # ✅ GA windows share one spawn pool instead of starting fresh workers per window
+        worker_pool = None
+        if method in ("genetic", "geneticAlgorithm"):
+            from app.services.ml_walk_forward_cv import available_cores
+            workers = max(1, n_workers or available_cores())
+            if workers > 1:
+                worker_pool = GeneticWorkerPool(workers)
 
-            # সেরা প্যারামিটার নির্বাচন
-            if not opt_results or isinstance(opt_results, dict) and "error" in opt_results:
-                print("⚠️ Optimization failed, using default params.")
-                best_params = {k: v['start'] if isinstance(v, dict) else v for k, v in params.items()}
-            else:
-                best_params = opt_results[0]['params']
-                # print(f"✨ Best Params for Step {step+1}: {best_params}")
+        try:
+            while True:
+                train_end = current_start + pd.Timedelta(days=train_window_days)
+                test_end = train_end + pd.Timedelta(days=test_window_days)
 
-            # ✅ B. TESTING PHASE (Validation)
-            test_slice_df = full_df.loc[train_end:test_end]
-            
-            if len(test_slice_df) < 1: break
+                if train_end >= full_end_date:
+                    break
+                if test_end > full_end_date:
+                    test_end = full_end_date
 
-            test_result = self.run(
-                db=db, symbol=symbol, timeframe=timeframe, strategy_name=strategy_name,
-                initial_cash=cumulative_equity,
-                params=best_params, # সেরা প্যারামিটার ব্যবহার
-                commission=commission, slippage=slippage, leverage=leverage,
-                df_data=test_slice_df # 👈 Sliced Testing Data
-            )
+                # ✅ Progress Update
+                if progress_callback:
+                    elapsed_days = (test_end - full_start_date).days
+                    percent = int((elapsed_days / total_duration) * 100)
+                    if percent > 99: percent = 99
+                    progress_callback(percent, meta={
+                        "status": f"WFA Step {step+1}: Testing {train_end.date()} -> {test_end.date()}",
+                        "current_equity": round(cumulative_equity, 2)
+                    })
 
-            if test_result.get('status') == 'success':
-                profit = test_result['final_value'] - cumulative_equity
-                profit_pct = (profit / cumulative_equity) * 100
+                print(f"🔄 Step {step+1}: Training [{current_start.date()} - {train_end.date()}] | Testing [{train_end.date()} - {test_end.date()}]")
+
+                # ✅ A. TRAINING PHASE (Dynamic Optimization)
+                train_slice_df = full_df.loc[current_start:train_end]
+            
+                if len(train_slice_df) < 10:
+                    print("⚠️ Skipping step: Not enough training data.")
+                    current_start += pd.Timedelta(days=test_window_days)
+                    continue
+
+                # Optimize using the sliced data
+                opt_results = self.optimize(
+                    db=db, symbol=symbol, timeframe=timeframe, strategy_name=strategy_name,
+                    initial_cash=cumulative_equity, 
+                    params=params, 
+                    method=method, 
+                    population_size=population_size, generations=generations,
+                    commission=commission, slippage=slippage, leverage=leverage,
+                    df_data=train_slice_df, # 👈 Sliced Training Data
+                    opt_target=opt_target, # ✅ Pass
+                    min_trades=min_trades,  # ✅ Pass
+                    n_workers=n_workers, worker_pool=worker_pool
+                )
+
+                # সেরা প্যারামিটার নির্বাচন
+                if not opt_results or isinstance(opt_results, dict) and "error" in opt_results:
+                    print("⚠️ Optimization failed, using default params.")
+                    best_params = {k: v['start'] if isinstance(v, dict) else v for k, v in params.items()}
+                else:
+                    best_params = opt_results[0]['params']
+                    # print(f"✨ Best Params for Step {step+1}: {best_params}")
+
+                # ✅ B. TESTING PHASE (Validation)
+                test_slice_df = full_df.loc[train_end:test_end]
+            
+                if len(test_slice_df) < 1: break
+
+                test_result = self.run(
+                    db=db, symbol=symbol, timeframe=timeframe, strategy_name=strategy_name,
+                    initial_cash=cumulative_equity,
+                    params=best_params, # সেরা প্যারামিটার ব্যবহার
+                    commission=commission, slippage=slippage, leverage=leverage,
+                    df_data=test_slice_df # 👈 Sliced Testing Data
+                )
+
+                if test_result.get('status') == 'success':
+                    profit = test_result['final_value'] - cumulative_equity
+                    profit_pct = (profit / cumulative_equity) * 100
                 
-                wfa_results.append({
-                    "step": step + 1,
-                    "test_period": f"{train_end.date()} to {test_end.date()}",
-                    "start_equity": round(cumulative_equity, 2),
-                    "end_equity": round(test_result['final_value'], 2),
-                    "profit": round(profit, 2),
-                    "profit_percent": round(profit_pct, 2),
-                    "drawdown": test_result['advanced_metrics'].get('max_drawdown', 0),
-                    "best_params": best_params # রেজাল্টে প্যারামিটার সেভ রাখা
-                })
+                    wfa_results.append({
+                        "step": step + 1,
+                        "test_period": f"{train_end.date()} to {test_end.date()}",
+                        "start_equity": round(cumulative_equity, 2),
+                        "end_equity": round(test_result['final_value'], 2),
+                        "profit": round(profit, 2),
+                        "profit_percent": round(profit_pct, 2),
+                        "drawdown": test_result['advanced_metrics'].get('max_drawdown', 0),
+                        "best_params": best_params # রেজাল্টে প্যারামিটার সেভ রাখা
+                    })
                 
-                cumulative_equity = test_result['final_value']
+                    cumulative_equity = test_result['final_value']
             
-            current_start += pd.Timedelta(days=test_window_days)
-            step += 1
+                current_start += pd.Timedelta(days=test_window_days)
+                step += 1
+        finally:
+            if worker_pool is not None:
+                worker_pool.shutdown()
 
         total_profit = cumulative_equity - initial_cash
         total_profit_pct = (total_profit / initial_cash) * 100
@@ -857,170 +876,23 @@ class BacktestEngine:
     # ২. Genetic Algorithm আপডেট
     def _run_genetic_algorithm(self, df, strategy_class, initial_cash, param_ranges, fixed_params, pop_size=50, generations=10, 
                                progress_callback=None, abort_callback=None, commission=0.001, slippage=0.0, leverage=1.0,
-                               opt_target="profit", min_trades=5): # ✅ Args added
-        
-        param_keys = list(param_ranges.keys())
-        population = []
-        for _ in range(pop_size):
-            population.append({k: random.choice(v) for k, v in param_ranges.items()})
-
-        best_results = []
-        history_cache = {} 
-        total_steps = generations * pop_size
-        best_profit_so_far = -float('inf')
-
-        for gen in range(generations):
-            if abort_callback and abort_callback(): 
-                break
-            
-            evaluated_pop = []
-            
-            for i, individual in enumerate(population):
-                param_signature = json.dumps(individual, sort_keys=True)
-                
-                if param_signature in history_cache:
-                    metrics = history_cache[param_signature]
-                else:
-                    # ✅ Pass pre-loaded strategy_class
-                    metrics = self._run_single_backtest(df, strategy_class, initial_cash, individual, fixed_params, commission, slippage, leverage)
-                    metrics['params'] = individual
-                    history_cache[param_signature] = metrics
-                
-                # Genetic Algorithm এ খারাপ রেজাল্ট একদম বাদ দিলে পপুলেশন কমে যাবে, 
-                # তাই আমরা পেনাল্টি স্কোর দেব (Score -9999)
-                if metrics['total_trades'] < min_trades:
-                    metrics['fitness_score'] = -9999
-                else:
-                    # টার্গেট অনুযায়ী স্কোর সেট করা
-                    if opt_target == 'sharpe': metrics['fitness_score'] = metrics['sharpeRatio']
-                    elif opt_target == 'drawdown': metrics['fitness_score'] = -metrics['maxDrawdown']
-                    elif opt_target == 'win_rate': metrics['fitness_score'] = metrics['winRate']
-                    else: metrics['fitness_score'] = metrics['profitPercent']
-
-                evaluated_pop.append(metrics)
-                
-                if metrics['profitPercent'] > best_profit_so_far:
-                    best_profit_so_far = metrics['profitPercent']
-
-                current_step = (gen * pop_size) + (i + 1)
-                
-                if progress_callback:
-                    percent = int((current_step / total_steps) * 100)
-                    progress_callback(
-                        percent,
-                        meta={
-                            "current": current_step,
-                            "total": total_steps,
-                            "generation": gen + 1,
-                            "best_profit": round(best_profit_so_far, 2)
-                        }
-                    )
-            
-            # ✅ Sort by Fitness Score
-            evaluated_pop.sort(key=lambda x: x.get('fitness_score', -9999), reverse=True)
-            best_results.extend(evaluated_pop[:5]) 
-            
-            elite_count = int(pop_size * 0.2)
-            next_generation = [item['params'] for item in evaluated_pop[:elite_count]]
-            
-            while len(next_generation) < pop_size:
-                parent1 = random.choice(evaluated_pop[:int(pop_size/2)])['params']
-                parent2 = random.choice(evaluated_pop[:int(pop_size/2)])['params']
-                child = parent1.copy()
-                for k in param_keys:
-                    if random.random() > 0.5: child[k] = parent2[k]
-                if random.random() < 0.2: 
-                    mutate_key = random.choice(param_keys)
-                    child[mutate_key] = random.choice(param_ranges[mutate_key])
-                next_generation.append(child)
-            
-            population = next_generation
-
-        unique_results = {json.dumps(r['params'], sort_keys=True): r for r in best_results}
-        return list(unique_results.values())
+                               opt_target="profit", min_trades=5, n_workers=None, fitness_cache_path=None,
+                               worker_pool=None): # ✅ Args added
+        # ✅ Each generation is backtested in a process pool (candle data loaded once per worker);
+        # fitness is memoized per canonical parameter tuple, optionally on disk across runs
+        evaluator = BacktestFitness(df, strategy_class, initial_cash, fixed_params, commission, slippage, leverage)
+        optimizer = GeneticOptimizer(evaluator, n_workers=n_workers, cache=FitnessCache(path=fitness_cache_path),
+                                     pool=worker_pool)
+        return optimizer.run(
+            param_ranges, pop_size=pop_size, generations=generations,
+            opt_target=opt_target, min_trades=min_trades,
+            progress_callback=progress_callback, abort_callback=abort_callback,
+        )
 
     # ✅ UPDATED: Accepts strategy_class object instead of name string
     def _run_single_backtest(self, df, strategy_class, initial_cash, variable_params, fixed_params, commission=0.001, slippage=0.0, leverage=1.0):
-        full_params = {**fixed_params, **variable_params}
-        clean_params = {}
-        for k, v in full_params.items():
-            try: clean_params[k] = int(v)
-            except: 
-                try: clean_params[k] = float(v)
-                except: clean_params[k] = v
-
-        cerebro = bt.Cerebro(stdstats=False) 
-        
         # ✅ Data is already loaded in memory (df), so this is fast
-        data_feed = bt.feeds.PandasData(dataname=df)
-        cerebro.adddata(data_feed)
-        
-        # ✅ Removed _load_strategy_class call from here to avoid repetitive Disk I/O
-        
-        valid_params = self._smart_filter_params(strategy_class, clean_params)
-        
-        if 'stop_loss' in clean_params: valid_params['stop_loss'] = clean_params['stop_loss']
-        if 'take_profit' in clean_params: valid_params['take_profit'] = clean_params['take_profit']
-
-        cerebro.addstrategy(strategy_class, **valid_params)
-        
-        cerebro.broker.setcash(initial_cash)
-        cerebro.broker.setcommission(commission=commission, commtype=bt.CommInfoBase.COMM_PERC, margin=None, mult=1.0, stocklike=True)
-        
-        # ✅ Leveage / Futures Logic
-        is_futures = leverage > 1.0
-        cerebro.broker.setcommission(
-            commission=commission, 
-            commtype=bt.CommInfoBase.COMM_PERC, 
-            leverage=leverage, 
-            stocklike=not is_futures
-        )
-
-        if slippage > 0: cerebro.broker.set_slippage_perc(perc=slippage)
-            
-        cerebro.addsizer(bt.sizers.PercentSizer, percents=90)
-        cerebro.addanalyzer(bt.analyzers.TradeAnalyzer, _name="trades")
-        cerebro.addanalyzer(bt.analyzers.DrawDown, _name="drawdown")
-        cerebro.addanalyzer(bt.analyzers.SharpeRatio, _name="sharpe", riskfreerate=0.0)
-        
-        try:
-            results = cerebro.run()
-            strat = results[0]
-            end_value = cerebro.broker.getvalue()
-            profit_percent = ((end_value - initial_cash) / initial_cash) * 100
-            
-            dd = strat.analyzers.drawdown.get_analysis()
-            max_drawdown = dd.get('max', {}).get('drawdown', 0)
-            
-            sharpe = strat.analyzers.sharpe.get_analysis()
-            sharpe_ratio = sharpe.get('sharperatio', 0) or 0
-
-            trade_analysis = strat.analyzers.trades.get_analysis()
-            total_closed = trade_analysis.get('total', {}).get('closed', 0)
-            won_trades = trade_analysis.get('won', {}).get('total', 0)
-            win_rate = (won_trades / total_closed * 100) if total_closed > 0 else 0
-            
-            return {
-                "profitPercent": round(profit_percent, 2),
-                "maxDrawdown": round(max_drawdown, 2),
-                "sharpeRatio": round(sharpe_ratio, 2),
-                "total_trades": total_closed,
-                "winRate": round(win_rate, 2),
-                "final_value": round(end_value, 2),
-                "initial_cash": initial_cash,
-                "total_candles": len(df)
-            }
-        except Exception:
-            return {
-                "profitPercent": 0, 
-                "maxDrawdown": 0, 
-                "sharpeRatio": 0, 
-                "total_trades": 0, 
-                "winRate": 0, 
-                "final_value": initial_cash, 
-                "initial_cash": initial_cash,
-                "total_candles": len(df) if df is not None else 0
-            }
+        return run_single_backtest(df, strategy_class, initial_cash, variable_params, fixed_params, commission, slippage, leverage)
 
     # ... (বাকি মেথডগুলো অপরিবর্তিত রাখুন) ...
     def _load_strategy_class(self, strategy_name):
@@ -1067,40 +939,8 @@ class BacktestEngine:
 
     # ✅ অপটিমাইজড প্যারামিটার ফিল্টার (Smart Matcher)
     def _smart_filter_params(self, strategy_class, params):
-        valid_params = {}
-        
-        # ১. স্ট্র্যাটেজির নিজস্ব প্যারামিটার লিস্ট বের করা
-        if hasattr(strategy_class, 'params'):
-            # Backtrader এর params dict বা tuple হতে পারে
-            if hasattr(strategy_class.params, '_getkeys'):
-                allowed_keys = strategy_class.params._getkeys()
-            elif isinstance(strategy_class.params, dict):
-                allowed_keys = strategy_class.params.keys()
-            else:
-                # Fallback for tuple based params
-                allowed_keys = dict(strategy_class.params).keys()
-
-            # ২. নরমাল এবং লোয়ারকেস ম্যাপ তৈরি (Case Insensitive Matching)
-            # এটি fast_period, fastPeriod, FastPeriod সব কিছুকে একই ধরবে
-            key_map = {k.lower().replace('_', ''): k for k in allowed_keys}
-            
-            # ৩. ইউজার ইনপুট চেক করা
-            for k, v in params.items():
-                # সরাসরি ম্যাচ করলে
-                if k in allowed_keys:
-                    valid_params[k] = v
-                else:
-                    # যদি নাম হুবহু না মিলে, তবে লোয়ারকেস চেক করা
-                    clean_k = k.lower().replace('_', '')
-                    if clean_k in key_map:
-                        real_key = key_map[clean_k]
-                        valid_params[real_key] = v
-                        # print(f"🔧 Param Fixed: '{k}' -> '{real_key}'") # Debugging log
-                    else:
-                        # যদি তাও না মিলে, ইগনোর করবে (Risk params বাদে)
-                        pass 
-
-        return valid_params
+        # fast_period, fastPeriod, FastPeriod সব কিছুকে একই ধরবে
+        return smart_filter_params(strategy_class, params)
 
     def _calculate_metrics(self, first_strat, start_value, end_value):
         qs_metrics = {
@@ -50,6 +50,18 @@ class BlockTradeMonitor:
         except Exception as e:
             logger.error(f"Error saving config: {e}")
 
+    @staticmethod
+    def exchange_options(exchange_id: str) -> Dict:
+        """CCXT constructor config shared by the REST monitor and the ccxt.pro block trade worker."""
+        options = {
+            'enableRateLimit': True, 'options': {'adjustForTimeDifference': True},
+            'userAgent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+        }
+        if exchange_id == 'okx':
+            # Spot markets only — otherwise okx symbols can resolve to swaps
+            options['options']['defaultType'] = 'spot'
+        return options
+
     async def initialize_exchanges(self):
         """Initializes CCXT exchange instances based on configuration (Async)."""
         # Close existing first to avoid leaks
@@ -62,15 +74,7 @@ class BlockTradeMonitor:
             try:
                 if hasattr(ccxt, exchange_id):
                     exchange_class = getattr(ccxt, exchange_id)
-                    # Enable rate limiting and async mode
-                    options = {
-                        'enableRateLimit': True, 'options': {'adjustForTimeDifference': True},
-                        'userAgent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                    }
-                    if exchange_id == 'okx':
-                        options['options'] = {'defaultType': 'spot'}
-                        
-                    self.exchanges[exchange_id] = exchange_class(options)
+                    self.exchanges[exchange_id] = exchange_class(self.exchange_options(exchange_id))
                 else:
                     logger.warning(f"Exchange {exchange_id} not found in ccxt.")
             except Exception as e:
@@ -128,6 +132,30 @@ class BlockTradeMonitor:
             else:
                  logger.warning(f"Error fetching from {exchange_id}: {type(error).__name__} - {msg}. (Count: {count})")
 
+    def to_block_trade(self, exchange_id: str, symbol: str, trade: Dict) -> Optional[Dict]:
+        """
+        ccxt trade -> block trade payload, or None when it is below min_block_value.
+        Shared by the REST fetch below and the streaming BlockTradeWorker.
+        """
+        price = trade.get('price') or 0
+        amount = trade.get('amount') or 0
+        cost = trade.get('cost') or price * amount
+
+        if cost < self.config["min_block_value"]:
+            return None
+        return {
+            "id": trade.get('id'),
+            "exchange": exchange_id,
+            "symbol": symbol,
+            "price": price,
+            "amount": amount,
+            "value": cost,
+            "side": trade.get('side'),
+            "timestamp": trade.get('timestamp'),
+            "datetime": trade.get('datetime'),
+            "is_whale": cost >= self.config["whale_value"]
+        }
+
     async def fetch_recent_trades(self, symbol: str, limit: int = 100) -> Dict[str, List[Dict]]:
         """
         Fetches recent trades from all active exchanges for a given symbol in parallel.
@@ -152,26 +180,9 @@ class BlockTradeMonitor:
                 
                 block_trades = []
                 for trade in trades:
-                    price = trade.get('price', 0)
-                    amount = trade.get('amount', 0)
-                    cost = trade.get('cost', 0) 
-                    
-                    if cost is None or cost == 0:
-                        cost = price * amount
-
-                    if cost >= self.config["min_block_value"]:
-                        is_whale = cost >= self.config["whale_value"]
-                        block_trades.append({
-                            "exchange": exchange_id,
-                            "symbol": symbol,
-                            "price": price,
-                            "amount": amount,
-                            "value": cost,
-                            "side": trade.get('side'),
-                            "timestamp": trade.get('timestamp'),
-                            "datetime": trade.get('datetime'),
-                            "is_whale": is_whale
-                        })
+                    block = self.to_block_trade(exchange_id, symbol, trade)
+                    if block:
+                        block_trades.append(block)
                 return exchange_id, block_trades
             except Exception as e:
                 self._handle_exchange_error(exchange_id, e)
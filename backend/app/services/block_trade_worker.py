@@ -1,15 +1,68 @@
-
 import asyncio
 import json
 import logging
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import ccxt.pro as ccxtpro
+
 from app.services.block_trade_monitor import block_trade_monitor
 from app.core.redis import redis_manager
 
 logger = logging.getLogger(__name__)
 
+CHANNEL = "block_trade_stream"
+DEDUP_TTL_SECONDS = 86400
+LOCAL_DEDUP_SIZE = 50_000
+CONFIG_REFRESH_SECONDS = 5
+POLL_INTERVAL_SECONDS = 5  # REST fallback for exchanges without watchTrades
+
+
+class RecentTradeIds:
+    """
+    Bounded in-process LRU of seen block trade keys. watch_trades re-delivers
+    trades across reconnects / cache overlaps — these are dropped here without
+    a Redis round trip. Redis SET NX stays as the cross-process check.
+    """
+
+    def __init__(self, maxsize: int = LOCAL_DEDUP_SIZE):
+        self.maxsize = maxsize
+        self._ids: "OrderedDict[str, None]" = OrderedDict()
+
+    def __len__(self):
+        return len(self._ids)
+
+    def add(self, key: str) -> bool:
+        """True if the key was not seen yet."""
+        if key in self._ids:
+            self._ids.move_to_end(key)
+            return False
+        self._ids[key] = None
+        if len(self._ids) > self.maxsize:
+            self._ids.popitem(last=False)
+        return True
+
+
+def block_trade_key(exchange_id: str, symbol: str, trade: Dict) -> str:
+    # Some exchanges provide ID, some don't. Fallback to timestamp+price+amount
+    id_val = trade.get('id')
+    if not id_val:
+        id_val = f"{trade['timestamp']}_{trade['price']}_{trade['amount']}"
+    return f"bt:{exchange_id}:{symbol}:{id_val}"
+
+
 class BlockTradeWorker:
+    """
+    Streams trades with one `watch_trades` subscription per (exchange, symbol),
+    applies the block size threshold inline, dedups locally and writes the
+    Redis dedup keys + publish through pipelines.
+    """
+
     def __init__(self):
         self.running = False
+        self.seen = RecentTradeIds()
+        self._exchanges: Dict[str, ccxtpro.Exchange] = {}
+        self._tasks: Dict[Tuple[str, str], asyncio.Task] = {}
 
     async def start(self):
         if self.running:
@@ -18,60 +71,145 @@ class BlockTradeWorker:
 
         logger.info("🚀 Block Trade Worker Started")
         self.running = True
-        
+
         # Ensure Redis is initialized
         if not redis_manager.redis:
              await redis_manager.init_redis()
 
-        while self.running:
-            try:
-                # 1. Get Config
-                config = block_trade_monitor.get_config()
-                # Load symbols from config or use defaults
-                target_symbols = config.get("target_symbols", ["BTC/USDT", "ETH/USDT", "SOL/USDT"])
-                
-                for symbol in target_symbols:
-                    if not self.running: break
-                    
-                    # 2. Fetch Trades
-                    trades_map = await block_trade_monitor.fetch_recent_trades(symbol, limit=50)
-                    
-                    for exchange_id, trades in trades_map.items():
-                        new_trades = []
-                        for trade in trades:
-                            # Create a unique ID for deduplication
-                            # Some exchanges provide ID, some don't. Fallback to timestamp+price+amount
-                            id_val = trade.get('id')
-                            if not id_val:
-                                id_val = f"{trade['timestamp']}_{trade['price']}_{trade['amount']}"
-                            
-                            trade_id = f"bt:{exchange_id}:{symbol}:{id_val}"
-                            
-                            # Use Redis for deduplication (SET if Not Exists with 24h TTL)
-                            is_new = await redis_manager.redis.set(trade_id, "1", ex=86400, nx=True)
-                            
-                            if is_new:
-                                new_trades.append(trade)
-                        
-                        # 3. Publish New Block Trades
-                        if new_trades:
-                            logger.info(f"💎 Detected {len(new_trades)} new block trades on {exchange_id} for {symbol}")
-                            
-                            payload = {
-                                "type": "block_trade",
-                                "data": new_trades
-                            }
-                            
-                            await redis_manager.redis.publish("block_trade_stream", json.dumps(payload))
-                
-                await asyncio.sleep(5)  # Poll interval
-
-            except Exception as e:
-                logger.error(f"Block Trade Worker Error: {e}")
-                await asyncio.sleep(10) # Longer sleep on error
+        try:
+            while self.running:
+                try:
+                    # Config changes (symbols / exchanges) start or stop subscriptions
+                    await self._sync_subscriptions()
+                except Exception as e:
+                    logger.error(f"Block Trade Worker Error: {e}")
+                await asyncio.sleep(CONFIG_REFRESH_SECONDS)
+        finally:
+            await self._shutdown()
 
     async def stop(self):
         self.running = False
+        await self._shutdown()
         logger.info("🛑 Block Trade Worker Stopped")
 
+    async def _sync_subscriptions(self):
+        config = block_trade_monitor.get_config()
+        # Load symbols from config or use defaults
+        target_symbols = config.get("target_symbols", ["BTC/USDT", "ETH/USDT", "SOL/USDT"])
+        wanted = set()
+        for exchange_id in config.get("active_exchanges", []):
+            exchange = await self._get_exchange(exchange_id)
+            if exchange is None:
+                continue
+            for symbol in target_symbols:
+                # Exchange-specific pairs (FDUSD, ...) are silently skipped
+                if symbol in exchange.markets:
+                    wanted.add((exchange_id, symbol))
+
+        for key in list(self._tasks):
+            if key not in wanted or self._tasks[key].done():
+                self._tasks.pop(key).cancel()
+        for exchange_id, symbol in wanted - self._tasks.keys():
+            self._tasks[(exchange_id, symbol)] = asyncio.create_task(
+                self._watch(exchange_id, self._exchanges[exchange_id], symbol)
+            )
+        for exchange_id in list(self._exchanges):
+            if all(key[0] != exchange_id for key in wanted):
+                await self._close_exchange(exchange_id)
+
+    async def _get_exchange(self, exchange_id: str) -> Optional[ccxtpro.Exchange]:
+        """
+        Cached ccxt.pro instance with loaded markets. An instance is only cached
+        once load_markets() succeeded; on failure it is closed and the next
+        config sync retries.
+        """
+        if exchange_id in self._exchanges:
+            return self._exchanges[exchange_id]
+        exchange_class = getattr(ccxtpro, exchange_id, None)
+        if not exchange_class:
+            logger.warning(f"Exchange {exchange_id} not found in ccxt.pro.")
+            return None
+        exchange = exchange_class(block_trade_monitor.exchange_options(exchange_id))
+        try:
+            await exchange.load_markets()
+        except Exception as e:
+            logger.warning(f"[BlockTrade] Could not load markets for {exchange_id}, retrying on the next sync: {e}")
+            try:
+                await exchange.close()
+            except Exception:
+                pass
+            return None
+        self._exchanges[exchange_id] = exchange
+        return exchange
+
+    async def _watch(self, exchange_id: str, exchange, symbol: str):
+        streaming = exchange.has.get('watchTrades', False)
+        errors = 0
+        while self.running:
+            try:
+                if streaming:
+                    trades = await exchange.watch_trades(symbol)
+                else:
+                    trades = await exchange.fetch_trades(symbol, limit=100)
+                errors = 0
+                await self.process_trades(exchange_id, symbol, trades)
+                if not streaming:
+                    await asyncio.sleep(POLL_INTERVAL_SECONDS)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                errors += 1
+                if errors == 1 or errors % 60 == 0:
+                    logger.warning(f"[BlockTrade] {exchange_id} {symbol} stream error: {type(e).__name__} - {e} (Count: {errors})")
+                await asyncio.sleep(min(30, 2 ** min(errors, 5)))
+
+    async def process_trades(self, exchange_id: str, symbol: str, trades: List[Dict]) -> List[Dict]:
+        """Threshold -> local dedup -> Redis SET NX (one pipeline) -> publish. Returns the published trades."""
+        candidates = []
+        for trade in trades:
+            block = block_trade_monitor.to_block_trade(exchange_id, symbol, trade)
+            if block is None:
+                continue
+            key = block_trade_key(exchange_id, symbol, trade)
+            if self.seen.add(key):
+                candidates.append((key, block))
+        if not candidates:
+            return []
+
+        redis = redis_manager.redis
+        pipe = redis.pipeline(transaction=False)
+        for key, _ in candidates:
+            # Cross-process dedup (SET if Not Exists with 24h TTL)
+            pipe.set(key, "1", ex=DEDUP_TTL_SECONDS, nx=True)
+        results = await pipe.execute()
+        new_trades = [block for (_, block), is_new in zip(candidates, results) if is_new]
+
+        # Publish New Block Trades
+        if new_trades:
+            logger.info(f"💎 Detected {len(new_trades)} new block trades on {exchange_id} for {symbol}")
+            payload = {
+                "type": "block_trade",
+                "data": new_trades
+            }
+            await redis.publish(CHANNEL, json.dumps(payload))
+        return new_trades
+
+    async def _close_exchange(self, exchange_id: str):
+        exchange = self._exchanges.pop(exchange_id, None)
+        if exchange is None:
+            return
+        try:
+            await exchange.close()
+        except Exception as e:
+            logger.error(f"Error closing {exchange_id}: {e}")
+
+    async def _shutdown(self):
+        tasks = list(self._tasks.values())
+        self._tasks.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for exchange_id in list(self._exchanges):
+            await self._close_exchange(exchange_id)
+
 block_trade_worker = BlockTradeWorker()
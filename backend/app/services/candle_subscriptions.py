@@ -0,0 +1,176 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+import ccxt.async_support as ccxt_async
+import ccxt.pro as ccxtpro
+
+logger = logging.getLogger(__name__)
+
+# Per-client buffer; a slow client drops its oldest candle instead of stalling the stream
+CLIENT_QUEUE_SIZE = 8
+# REST fallback for exchanges without watch_ohlcv (one poller per key, not per client)
+POLL_INTERVAL_SECONDS = 2
+RETRY_DELAY_SECONDS = 5
+
+SubscriptionKey = Tuple[str, str, str]
+
+
+def default_exchange_factory(exchange_id: str):
+    # ccxt.pro classes extend the async ones and add watch_* streams
+    ex_class = getattr(ccxtpro, exchange_id, None) or getattr(ccxt_async, exchange_id, None)
+    if ex_class is None:
+        raise ValueError(f"Unsupported exchange: {exchange_id}")
+    return ex_class({'enableRateLimit': True})
+
+
+def format_candle(candle, symbol: str) -> Dict[str, Any]:
+    # Format: [time, open, high, low, close, volume]
+    return {
+        "time": candle[0],
+        "open": candle[1],
+        "high": candle[2],
+        "low": candle[3],
+        "close": candle[4],
+        "volume": candle[5],
+        "symbol": symbol
+    }
+
+
+class _Subscription:
+    def __init__(self, key: SubscriptionKey):
+        self.key = key
+        self.clients: Set[asyncio.Queue] = set()
+        self.task: Optional[asyncio.Task] = None
+        self.latest: Optional[Dict[str, Any]] = None
+
+
+class CandleSubscriptionRegistry:
+    """
+    Reference-counted kline subscriptions keyed by (exchange, symbol, timeframe).
+
+    The first client of a key starts one upstream `watch_ohlcv` loop; every
+    update is pushed to all attached client queues. When the last client
+    leaves, the loop is cancelled, and the exchange connection is closed
+    once no key uses it any more.
+    """
+
+    def __init__(self, exchange_factory: Callable[[str], Any] = default_exchange_factory,
+                 poll_interval: float = POLL_INTERVAL_SECONDS, retry_delay: float = RETRY_DELAY_SECONDS):
+        self.exchange_factory = exchange_factory
+        self.poll_interval = poll_interval
+        self.retry_delay = retry_delay
+        self._subs: Dict[SubscriptionKey, _Subscription] = {}
+        self._exchanges: Dict[str, Any] = {}
+        self._retiring: Set[asyncio.Task] = set()
+
+    # --- bookkeeping (synchronous: no awaits between check and update) ---
+
+    def attach(self, exchange_id: str, symbol: str, timeframe: str) -> Tuple[SubscriptionKey, asyncio.Queue]:
+        key = (exchange_id.lower(), symbol, timeframe)
+        if key[0] not in self._exchanges:
+            self._exchanges[key[0]] = self.exchange_factory(key[0])
+
+        sub = self._subs.get(key)
+        if sub is None:
+            sub = self._subs[key] = _Subscription(key)
+            sub.task = asyncio.create_task(self._run(sub))
+            logger.info(f"Started candle stream {key}")
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=CLIENT_QUEUE_SIZE)
+        if sub.latest is not None:
+            queue.put_nowait(sub.latest)  # late joiner gets the current candle right away
+        sub.clients.add(queue)
+        return key, queue
+
+    def detach(self, key: SubscriptionKey, queue: asyncio.Queue):
+        sub = self._subs.get(key)
+        if sub is None:
+            return
+        sub.clients.discard(queue)
+        if sub.clients:
+            return
+
+        del self._subs[key]
+        exchange = None
+        if not any(k[0] == key[0] for k in self._subs):
+            exchange = self._exchanges.pop(key[0], None)
+        retire = asyncio.create_task(self._retire(sub.task, exchange))
+        self._retiring.add(retire)
+        retire.add_done_callback(self._retiring.discard)
+        logger.info(f"Stopped candle stream {key}")
+
+    @asynccontextmanager
+    async def subscribe(self, exchange_id: str, symbol: str, timeframe: str):
+        """`async with registry.subscribe(...) as updates:` — `updates` is an asyncio.Queue of candle dicts."""
+        key, queue = self.attach(exchange_id, symbol, timeframe)
+        try:
+            yield queue
+        finally:
+            self.detach(key, queue)
+
+    def client_count(self, exchange_id: str, symbol: str, timeframe: str) -> int:
+        sub = self._subs.get((exchange_id.lower(), symbol, timeframe))
+        return len(sub.clients) if sub else 0
+
+    @property
+    def upstream_count(self) -> int:
+        return len(self._subs)
+
+    async def close(self):
+        for key, sub in list(self._subs.items()):
+            sub.clients.clear()
+            sub.task.cancel()
+        await asyncio.gather(*(s.task for s in self._subs.values()), *self._retiring, return_exceptions=True)
+        self._subs.clear()
+        for exchange in self._exchanges.values():
+            await self._close_exchange(exchange)
+        self._exchanges.clear()
+
+    # --- upstream ---
+
+    def _publish(self, sub: _Subscription, candle: Dict[str, Any]):
+        sub.latest = candle
+        for queue in sub.clients:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(candle)
+
+    async def _run(self, sub: _Subscription):
+        exchange_id, symbol, timeframe = sub.key
+        exchange = self._exchanges[exchange_id]
+        streaming = bool(getattr(exchange, 'has', {}).get('watchOHLCV')) and hasattr(exchange, 'watch_ohlcv')
+        while True:
+            try:
+                if streaming:
+                    ohlcv = await exchange.watch_ohlcv(symbol, timeframe)
+                else:
+                    ohlcv = await exchange.fetch_ohlcv(symbol, timeframe, limit=2)
+                if ohlcv:
+                    self._publish(sub, format_candle(ohlcv[-1], symbol))
+                if not streaming:
+                    await asyncio.sleep(self.poll_interval)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Candle stream {sub.key} error: {e}")
+                await asyncio.sleep(self.retry_delay)
+
+    async def _retire(self, task: Optional[asyncio.Task], exchange):
+        if task:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        if exchange is not None:
+            await self._close_exchange(exchange)
+
+    @staticmethod
+    async def _close_exchange(exchange):
+        try:
+            await exchange.close()
+        except Exception as e:
+            logger.debug(f"Exchange close failed: {e}")
+
+
+# One registry per API process: all /ws/candle clients share its upstreams
+candle_registry = CandleSubscriptionRegistry()
@@ -1,7 +1,13 @@
 import os
 import glob
-import pandas as pd
+import json
+import pyarrow as pa
+import pyarrow.parquet as pq
 from datetime import datetime
+from collections import namedtuple
+from itertools import islice
+from typing import Dict, Any, Iterable, List, Tuple
+from sqlalchemy import select, delete, cast, Text
 from sqlalchemy.orm import Session
 from app.models.orderbook_snapshot import OrderBookSnapshot
 from app.services.notification import NotificationService
@@ -11,6 +17,20 @@ from app.db.session import SessionLocal
 ARCHIVE_DIR = os.path.join(os.getcwd(), "uploads", "datasets", "historical_l2_archive")
 MAX_ARCHIVE_SIZE_BYTES = 9.5 * 1024 * 1024 * 1024  # 9.5 GB (leaves 500MB buffer for safety)
 
+# Column layout shared by archive_snapshots and the streaming prune pipeline
+ARCHIVE_SCHEMA = pa.schema([
+    ("id", pa.int64()),
+    ("exchange", pa.string()),
+    ("symbol", pa.string()),
+    ("timestamp", pa.timestamp("us", tz="UTC")),
+    ("bids", pa.string()),
+    ("asks", pa.string()),
+    ("obi", pa.float64()),
+    ("spread", pa.float64()),
+    ("microprice", pa.float64()),
+])
+_ArchiveRow = namedtuple("_ArchiveRow", ARCHIVE_SCHEMA.names)
+
 class DatasetArchiver:
     """
     Enterprise-grade module for archiving L2 OrderBook snapshots before they are pruned from the database.
@@ -22,10 +42,13 @@ class DatasetArchiver:
         os.makedirs(ARCHIVE_DIR, exist_ok=True)
 
     @classmethod
-    def enforce_size_limit(cls, add_log_func=None):
+    def enforce_size_limit(cls, add_log_func=None, reserved_bytes: int = 0, warn: bool = True):
         """
         Scans the archive directory. If total size exceeds MAX_ARCHIVE_SIZE_BYTES,
         deletes the oldest files until the size is under the limit.
+
+        `reserved_bytes` counts files still being written (not yet *.parquet) towards
+        the budget; `warn=False` skips the 9GB admin warning for per-page checks.
         """
         cls._ensure_dir()
         
@@ -35,7 +58,7 @@ class DatasetArchiver:
             return
 
         file_stats = []
-        total_size = 0
+        total_size = reserved_bytes
         for f in files:
             try:
                 stat = os.stat(f)
@@ -47,7 +70,7 @@ class DatasetArchiver:
                 continue
 
         if total_size <= MAX_ARCHIVE_SIZE_BYTES:
-            if total_size > 9 * 1024 * 1024 * 1024:  # Warning at 9GB
+            if warn and total_size > 9 * 1024 * 1024 * 1024:  # Warning at 9GB
                 db = SessionLocal()
                 NotificationService.broadcast_admin_alert_sync(
                     db,
@@ -86,75 +109,214 @@ class DatasetArchiver:
             db.close()
 
     @classmethod
-    def archive_snapshots(cls, snapshots: list[OrderBookSnapshot], add_log_func=None) -> bool:
+    def archive_snapshots(cls, snapshots: Iterable[OrderBookSnapshot], add_log_func=None,
+                          chunk_size: int = 5000) -> bool:
         """
-        Converts SQLAlchemy models to a highly compressed Parquet file.
-        Groups by symbol to avoid massive mixed files.
+        Streams snapshots (any iterable, e.g. a lazily loaded query) into per-symbol
+        Parquet files, `chunk_size` rows per row group, through the same writers as
+        archive_and_prune. Only one chunk is held in memory at a time.
         """
-        if not snapshots:
-            return False
-
         cls._ensure_dir()
 
         # Enforce size limit BEFORE adding new files
         cls.enforce_size_limit(add_log_func)
 
+        file_tag = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+        writers: Dict[str, Tuple[pq.ParquetWriter, str]] = {}
+        written = 0
+
         try:
-            # Convert to dictionary format
-            data = []
-            for s in snapshots:
-                import json
-                bids_val = json.dumps(s.bids) if not isinstance(s.bids, str) else s.bids
-                asks_val = json.dumps(s.asks) if not isinstance(s.asks, str) else s.asks
-                
-                data.append({
-                    "id": s.id,
-                    "exchange": s.exchange,
-                    "symbol": s.symbol,
-                    "timestamp": s.timestamp,
-                    "bids": bids_val,
-                    "asks": asks_val,
-                    "obi": s.obi,
-                    "spread": s.spread,
-                    "microprice": s.microprice
-                })
-
-            df = pd.DataFrame(data)
-            df["bids"] = df["bids"].astype(str)
-            df["asks"] = df["asks"].astype(str)
-            
-            # Group by symbol and save separately
-            for symbol, group_df in df.groupby("symbol"):
-                # Clean symbol for filename
-                clean_symbol = "".join(c if c.isalnum() else "_" for c in symbol)
-                date_str = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-                
-                filename = f"l2_archive_{clean_symbol}_{date_str}.parquet"
-                filepath = os.path.join(ARCHIVE_DIR, filename)
-                
-                # Use pyarrow compression for maximum space efficiency
-                group_df.to_parquet(filepath, engine='pyarrow', compression='snappy', index=False)
-                
-                if add_log_func:
-                    add_log_func(f"[Archiver] Archived {len(group_df)} rows for {symbol} to {filename}")
-                
-            db = SessionLocal()
-            NotificationService.broadcast_admin_alert_sync(
-                db,
-                f"✅ *24H Backup Success*\nSuccessfully archived {len(snapshots)} L2 rows to compressed Parquet format.",
-                parse_mode="Markdown"
-            )
-            db.close()
-            return True
+            iterator = iter(snapshots)
+            while True:
+                chunk = [cls._archive_row(s) for s in islice(iterator, chunk_size)]
+                if not chunk:
+                    break
+                cls._write_chunk(writers, chunk, file_tag)
+                written += len(chunk)
+                cls.enforce_size_limit(add_log_func, reserved_bytes=cls._open_bytes(writers), warn=False)
 
+            files = cls._close_writers(writers)
         except Exception as e:
+            cls._close_writers(writers, abort=True)
             if add_log_func:
                 add_log_func(f"[Archiver] Failed to archive snapshots: {e}")
-            db = SessionLocal()
-            NotificationService.broadcast_admin_alert_sync(
-                db,
-                f"❌ *Auto-Archiver Failed*\nError: {e}",
-                parse_mode="Markdown"
-            )
-            db.close()
+            cls._notify_admins(f"❌ *Auto-Archiver Failed*\nError: {e}")
             return False
+
+        if not written:
+            return False
+
+        if add_log_func:
+            for filepath in files:
+                add_log_func(f"[Archiver] Archived rows to {os.path.basename(filepath)}")
+        cls._notify_admins(f"✅ *24H Backup Success*\nSuccessfully archived {written} L2 rows to compressed Parquet format.")
+        return True
+
+    @staticmethod
+    def _archive_row(snapshot: Any) -> "_ArchiveRow":
+        """Flattens a snapshot into the archive layout, with bids/asks as JSON text."""
+        bids = snapshot.bids if isinstance(snapshot.bids, str) else json.dumps(snapshot.bids)
+        asks = snapshot.asks if isinstance(snapshot.asks, str) else json.dumps(snapshot.asks)
+        return _ArchiveRow(snapshot.id, snapshot.exchange, snapshot.symbol, snapshot.timestamp,
+                           bids, asks, snapshot.obi, snapshot.spread, snapshot.microprice)
+
+    @staticmethod
+    def _open_bytes(writers: Dict[str, Tuple[pq.ParquetWriter, str]]) -> int:
+        """Bytes already flushed to the in-progress .part files of this run."""
+        total = 0
+        for _, filepath in writers.values():
+            try:
+                total += os.path.getsize(filepath + ".part")
+            except OSError:
+                pass
+        return total
+
+    @staticmethod
+    def _notify_admins(message: str):
+        db = SessionLocal()
+        try:
+            NotificationService.broadcast_admin_alert_sync(db, message, parse_mode="Markdown")
+        except Exception as e:
+            print(f"[Archiver] Admin alert failed: {e}")
+        finally:
+            db.close()
+
+    @staticmethod
+    def _write_chunk(writers: Dict[str, Tuple[pq.ParquetWriter, str]], rows: List[Any], file_tag: str):
+        """Appends one keyset chunk to the per-symbol Parquet writers (one row group each)."""
+        by_symbol: Dict[str, List[Any]] = {}
+        for row in rows:
+            by_symbol.setdefault(row.symbol, []).append(row)
+
+        for symbol, group in by_symbol.items():
+            if symbol not in writers:
+                clean_symbol = "".join(c if c.isalnum() else "_" for c in symbol)
+                filepath = os.path.join(ARCHIVE_DIR, f"l2_archive_{clean_symbol}_{file_tag}.parquet")
+                part_path = filepath + ".part"
+                writers[symbol] = (pq.ParquetWriter(part_path, ARCHIVE_SCHEMA, compression="snappy"), filepath)
+
+            table = pa.Table.from_pydict({
+                "id": [r.id for r in group],
+                "exchange": [r.exchange for r in group],
+                "symbol": [r.symbol for r in group],
+                "timestamp": [r.timestamp for r in group],
+                "bids": [r.bids for r in group],
+                "asks": [r.asks for r in group],
+                "obi": [r.obi for r in group],
+                "spread": [r.spread for r in group],
+                "microprice": [r.microprice for r in group],
+            }, schema=ARCHIVE_SCHEMA)
+            writers[symbol][0].write_table(table)
+
+    @staticmethod
+    def _close_writers(writers: Dict[str, Tuple[pq.ParquetWriter, str]], abort: bool = False) -> List[str]:
+        """Finalizes (or discards) open writers. Files only get their .parquet name once complete."""
+        closed = []
+        for writer, filepath in writers.values():
+            part_path = filepath + ".part"
+            try:
+                writer.close()
+                if abort:
+                    os.remove(part_path)
+                else:
+                    os.replace(part_path, filepath)
+                    closed.append(filepath)
+            except OSError:
+                pass
+        writers.clear()
+        return closed
+
+    @classmethod
+    def archive_and_prune(cls, db: Session, threshold: datetime, archive: bool = True, chunk_size: int = 5000,
+                          commit_every: int = 200_000, add_log_func=None) -> Dict[str, Any]:
+        """
+        Streams expired snapshots out of the database with bounded memory.
+
+        Rows are read in keyset pages (id > last_id, timestamp < threshold) as plain
+        column tuples, appended to per-symbol Parquet writers, and deleted by id range
+        inside the open transaction. Every `commit_every` rows the Parquet files are
+        finalized first and the transaction committed second, so deleted rows always
+        live in a complete archive file. Any failure rolls back the uncommitted
+        deletes and discards the partial files. The archive size budget is re-checked
+        after every page, counting the bytes already written by this run.
+
+        Keyset pages are used instead of a server-side cursor (stream_results/yield_per):
+        a non-holdable cursor is closed by the periodic commits, and each page is an
+        index range scan on the primary key, so memory stays bounded either way.
+        """
+        columns = (
+            OrderBookSnapshot.id,
+            OrderBookSnapshot.exchange,
+            OrderBookSnapshot.symbol,
+            OrderBookSnapshot.timestamp,
+            cast(OrderBookSnapshot.bids, Text).label("bids"),  # raw JSON text, no decode/encode round-trip
+            cast(OrderBookSnapshot.asks, Text).label("asks"),
+            OrderBookSnapshot.obi,
+            OrderBookSnapshot.spread,
+            OrderBookSnapshot.microprice,
+        )
+
+        if archive:
+            cls._ensure_dir()
+            cls.enforce_size_limit(add_log_func)
+
+        run_tag = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+        writers: Dict[str, Tuple[pq.ParquetWriter, str]] = {}
+        files: List[str] = []
+        last_id = 0
+        deleted = 0
+        uncommitted = 0
+        segment = 0
+
+        try:
+            while True:
+                rows = db.execute(
+                    select(*columns)
+                    .where(OrderBookSnapshot.timestamp < threshold, OrderBookSnapshot.id > last_id)
+                    .order_by(OrderBookSnapshot.id)
+                    .limit(chunk_size)
+                ).all()
+                if not rows:
+                    break
+
+                first_id, last_id = rows[0].id, rows[-1].id
+                if archive:
+                    cls._write_chunk(writers, rows, f"{run_tag}_{segment:04d}")
+                    cls.enforce_size_limit(add_log_func, reserved_bytes=cls._open_bytes(writers), warn=False)
+
+                result = db.execute(
+                    delete(OrderBookSnapshot)
+                    .where(
+                        OrderBookSnapshot.id >= first_id,
+                        OrderBookSnapshot.id <= last_id,
+                        OrderBookSnapshot.timestamp < threshold,
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+                deleted += result.rowcount
+                uncommitted += len(rows)
+                del rows
+
+                if uncommitted >= commit_every:
+                    files += cls._close_writers(writers)
+                    db.commit()
+                    uncommitted = 0
+                    segment += 1
+
+            files += cls._close_writers(writers)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            cls._close_writers(writers, abort=True)
+            if add_log_func:
+                add_log_func(f"[Archiver] Streaming prune failed, uncommitted deletes rolled back: {e}")
+            if archive:
+                cls._notify_admins(f"❌ *Auto-Archiver Failed*\nError: {e}")
+            raise
+
+        if add_log_func:
+            add_log_func(f"[Archiver] Pruned {deleted} rows, wrote {len(files)} Parquet files")
+        if archive and deleted:
+            cls._notify_admins(f"✅ *24H Backup Success*\nSuccessfully archived {deleted} L2 rows to compressed Parquet format.")
+
+        return {"deleted": deleted, "files": files}
@@ -1,10 +1,13 @@
 import asyncio
+import os
 import queue
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional, Callable, Any
+from typing import List, Dict, Optional, Callable, Any, Iterator
+import pandas as pd
 from .events import Event, EventType, MarketEvent, SignalEvent, OrderEvent, FillEvent
 from .portfolio import Portfolio
 from .market_maker import OrderBookGenerator
+from .pending_orders import PendingOrderBook
 from fastapi import WebSocket
 
 class DataHandler:
@@ -52,6 +55,87 @@ class DataHandler:
             await self.events.put(event)
             # No sleep here! Speed is controlled by the Engine.
 
+class ReplayDataHandler:
+    """
+    Replays recorded candles or trades from a local CSV/Parquet file.
+
+    The file is read in chunks so memory stays flat regardless of its size.
+    Candle files need timestamp/open/high/low/close/volume columns; trade files
+    need timestamp/price/amount and are emitted as single-price bars.
+    Timestamps may be epoch milliseconds or ISO strings. Playback speed is the
+    engine's concern (speed_multiplier None = as fast as possible).
+    """
+    def __init__(self, symbol: str, events: asyncio.Queue, path: str, kind: str = "candles",
+                 chunk_size: int = 100_000):
+        if kind not in ("candles", "trades"):
+            raise ValueError(f"Unknown replay kind: {kind}")
+        self.symbol = symbol
+        self.events = events
+        self.path = path
+        self.kind = kind
+        self.chunk_size = chunk_size
+        self.continue_backtest = True
+        self.current_time: Optional[datetime] = None
+
+    def _iter_chunks(self) -> Iterator[pd.DataFrame]:
+        ext = os.path.splitext(self.path)[1].lower()
+        if ext in (".parquet", ".pq"):
+            import pyarrow.parquet as pq
+            parquet_file = pq.ParquetFile(self.path)
+            for batch in parquet_file.iter_batches(batch_size=self.chunk_size):
+                yield batch.to_pandas()
+        else:
+            yield from pd.read_csv(self.path, chunksize=self.chunk_size)
+
+    @staticmethod
+    def _to_datetimes(col: pd.Series) -> List[datetime]:
+        if pd.api.types.is_numeric_dtype(col):
+            ts = pd.to_datetime(col, unit="ms")
+        else:
+            ts = pd.to_datetime(col)
+        if ts.dt.tz is not None:
+            ts = ts.dt.tz_convert(None)
+        return list(pd.DatetimeIndex(ts).to_pydatetime())
+
+    async def stream_data(self):
+        """
+        Streams the file into the event queue, then a None sentinel.
+        """
+        for chunk in self._iter_chunks():
+            dates = self._to_datetimes(chunk["timestamp"])
+            if self.kind == "trades":
+                prices = chunk["price"].astype(float).tolist()
+                rows = zip(dates, prices, prices, prices, prices, chunk["amount"].astype(float).tolist())
+            else:
+                rows = zip(
+                    dates,
+                    chunk["open"].astype(float).tolist(),
+                    chunk["high"].astype(float).tolist(),
+                    chunk["low"].astype(float).tolist(),
+                    chunk["close"].astype(float).tolist(),
+                    chunk["volume"].astype(float).tolist(),
+                )
+
+            for date, open_price, high, low, close, volume in rows:
+                if not self.continue_backtest:
+                    return
+
+                self.current_time = date
+                await self.events.put(MarketEvent(
+                    symbol=self.symbol,
+                    date=date,
+                    open_price=open_price,
+                    high=high,
+                    low=low,
+                    close=close,
+                    volume=volume
+                ))
+                # One bar in flight: the strategy reacts before the next bar arrives,
+                # and the queue never holds more than a bar's worth of events
+                await self.events.join()
+
+        await self.events.put(None)
+
 class SimulationStrategy:
     """
     A simple strategy for the simulation engine that supports hot-reloading parameters.
@@ -61,7 +145,9 @@ class SimulationStrategy:
         self.params = {
             "stop_loss": 0.01,   # 1%
             "take_profit": 0.02, # 2%
-            "buy_probability": 0.2 # 20% chance to buy on signal check
+            "buy_probability": 0.2, # 20% chance to buy on signal check
+            "entry_order": "MKT", # MKT, LMT (entry_offset better than close) or STP (entry_offset worse)
+            "entry_offset": 0.002 # 0.2%
         }
         print(f"Strategy Initialized with: {self.params}", flush=True)
 
@@ -94,21 +180,35 @@ class SimulationStrategy:
         # in a real strategy, this would check indicators
         if random.random() < self.params["buy_probability"]:
             signal_type = "LONG" if random.random() > 0.5 else "SHORT"
+
+            # Limit entries wait for a better price, stop entries for a breakout
+            order_type = self.params["entry_order"]
+            price = None
+            if order_type in ("LMT", "STP"):
+                offset = self.params["entry_offset"]
+                below = (signal_type == "LONG") == (order_type == "LMT")
+                price = event.close * (1 - offset if below else 1 + offset)
             
             return SignalEvent(
                 strategy_id="SimHotReload",
                 symbol=event.symbol,
                 datetime=datetime.now(),
                 signal_type=signal_type,
-                strength=1.0
+                strength=1.0,
+                order_type=order_type,
+                price=price
             )
         return None
 
 class EventDrivenEngine:
-    def __init__(self, symbol: str, websocket: WebSocket = None):
+    def __init__(self, symbol: str, websocket: WebSocket = None, replay_path: Optional[str] = None,
+                 replay_kind: str = "candles", chunk_size: int = 100_000):
         self.events = asyncio.Queue()
         self.symbol = symbol
-        self.data_handler = DataHandler(symbol, self.events)
+        if replay_path:
+            self.data_handler = ReplayDataHandler(symbol, self.events, replay_path, kind=replay_kind, chunk_size=chunk_size)
+        else:
+            self.data_handler = DataHandler(symbol, self.events)
         self.websocket = websocket
         self.running = False
         self.speed_multiplier: Optional[float] = None # None or 0 means Max Speed
@@ -122,9 +222,9 @@ class EventDrivenEngine:
         # Strategy Instance
         self.strategy = SimulationStrategy()
 
-        # Latency Simulation
+        # Latency Simulation + resting LMT/STP orders (heap-indexed)
         self.latency_ms: float = 0.0
-        self.pending_orders: List[Dict[str, Any]] = []
+        self.order_book = PendingOrderBook()
 
         # Slippage Simulation
         self.slippage_pct: float = 0.0
@@ -264,21 +364,10 @@ class EventDrivenEngine:
                 self.last_event_time = current_event_time
             
             # --- Latency Simulation Logic ---
-            # Check if any pending orders are ready to be executed based on current simulated time
-            if self.last_event_time and self.pending_orders:
-                ready_orders = []
-                remaining_orders = []
-                
-                for item in self.pending_orders:
-                    if self.last_event_time >= item['execute_at']:
-                        ready_orders.append(item)
-                    else:
-                        remaining_orders.append(item)
-                
-                self.pending_orders = remaining_orders
-                
-                for item in ready_orders:
-                    await self._execute_order(item['order'])
+            # Release orders whose latency has elapsed based on current simulated time
+            if self.last_event_time and self.order_book:
+                for order in self.order_book.pop_due(self.last_event_time):
+                    await self._route_order(order)
             # --------------------------------
 
             if event.type == EventType.MARKET:
@@ -292,6 +381,9 @@ class EventDrivenEngine:
             elif event.type == EventType.FILL:
                 await self.handle_fill_event(event)
 
+            # Lets replay feeds wait (queue.join) until a bar's signal/order/fill cascade is done
+            self.events.task_done()
+
         print("Event Loop Finished.", flush=True)
         await self._send({"type": "SYSTEM", "message": "Simulation Finished"})
 
@@ -351,14 +443,26 @@ class EventDrivenEngine:
             execute_at = current_time # Ready now
             
             for order in self.waiting_for_volume_orders:
-                 self.pending_orders.append({
-                     "order": order,
-                     "execute_at": execute_at
-                 })
+                 self.order_book.schedule(order, execute_at)
             
             # Clear waiting queue
             self.waiting_for_volume_orders = []
 
+        # 0.6 Fill resting limit/stop orders this bar crossed
+        if self.order_book:
+            for order, price in self.order_book.pop_triggered(event.open, event.high, event.low):
+                await self._execute_order(order, price=price)
+
+        # Replay at max speed without a UI: skip building broadcast payloads
+        if self.websocket:
+            await self._broadcast_market(event)
+
+        # 2. Simulate Strategy interacting via Strategy Class
+        signal = self.strategy.calculate_signal(event)
+        if signal:
+             await self.events.put(signal)
+
+    async def _broadcast_market(self, event: MarketEvent):
         # 1. Send Market Data to Frontend
         await self._send({
             "type": "MARKET",
@@ -387,11 +491,6 @@ class EventDrivenEngine:
             "asks": order_book["asks"],
             "time": event.date.isoformat()
         })
-            
-        # 2. Simulate Strategy interacting via Strategy Class
-        signal = self.strategy.calculate_signal(event)
-        if signal:
-             await self.events.put(signal)
 
     async def handle_signal_event(self, event: SignalEvent):
         await self.log_event("INFO", f"Signal Received: {event.signal_type} on {event.symbol}")
@@ -401,9 +500,10 @@ class EventDrivenEngine:
         # Here we just blindly follow signal
         order = OrderEvent(
             symbol=event.symbol,
-            order_type="MKT",
+            order_type=event.order_type,
             quantity=1, # Fixed qty
-            direction="BUY" if event.signal_type == "LONG" else "SELL"
+            direction="BUY" if event.signal_type == "LONG" else "SELL",
+            price=event.price
         )
         await self.events.put(order)
 
@@ -414,10 +514,14 @@ class EventDrivenEngine:
          current_time = self.last_event_time if self.last_event_time else datetime.now()
          execute_at = current_time + timedelta(milliseconds=self.latency_ms)
          
-         self.pending_orders.append({
-             "order": event,
-             "execute_at": execute_at
-         })
+         self.order_book.schedule(event, execute_at)
+
+    async def _route_order(self, event: OrderEvent):
+         """Market orders fill now; limit/stop orders rest on the book until triggered."""
+         if event.order_type in ("LMT", "STP"):
+             self.order_book.arm(event)
+         else:
+             await self._execute_order(event)
 
     def apply_slippage(self, price: float, direction: str) -> float:
         """
@@ -439,9 +543,10 @@ class EventDrivenEngine:
         
         return exec_price
 
-    async def _execute_order(self, event: OrderEvent):
+    async def _execute_order(self, event: OrderEvent, price: Optional[float] = None):
          # Simulate Execution Handler filling the order immediately
          # In real life, this would go to a broker API
+         # `price` is set for triggered limit/stop orders
          
          # Use last known time
          fill_time = self.last_event_time if self.last_event_time else datetime.now()
@@ -454,6 +559,8 @@ class EventDrivenEngine:
          if self.current_market_event:
              market_price = self.current_market_event.close
              current_volume = self.current_market_event.volume
+         if price is not None:
+             market_price = price
          
          # --- Partial Fill Logic ---
          fill_qty = event.quantity
@@ -477,8 +584,11 @@ class EventDrivenEngine:
                  is_partial = True
          # --------------------------
 
-         # Apply Slippage
-         exec_price = self.apply_slippage(market_price, event.direction)
+         # Apply Slippage (limit orders never fill worse than their price)
+         if event.order_type == 'LMT':
+             exec_price = market_price
+         else:
+             exec_price = self.apply_slippage(market_price, event.direction)
          
          slippage_cost = abs(exec_price - market_price) * fill_qty
          
@@ -486,8 +596,8 @@ class EventDrivenEngine:
              await self.log_event("WARNING", f"⚠ Slippage Applied: ${slippage_cost:.2f} difference")
 
          # Calculate Commission
-         # Rule: MKT -> Taker Fee, LMT -> Maker Fee
-         fee_rate = self.taker_fee if event.order_type == 'MKT' else self.maker_fee
+         # Rule: MKT/STP -> Taker Fee, LMT -> Maker Fee
+         fee_rate = self.maker_fee if event.order_type == 'LMT' else self.taker_fee
          commission = exec_price * fill_qty * fee_rate
 
          fill = FillEvent(
@@ -535,6 +645,4 @@ class EventDrivenEngine:
                 "commission": event.commission
             }
         )
-            
-    def stop(self):
-        self.running = False
+
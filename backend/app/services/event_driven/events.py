@@ -1,7 +1,10 @@
+import logging
 from datetime import datetime
 from enum import Enum
 from typing import Optional, Dict, Any
 
+logger = logging.getLogger(__name__)
+
 class EventType(Enum):
     MARKET = 'MARKET'
     SIGNAL = 'SIGNAL'
@@ -38,13 +41,16 @@ class SignalEvent(Event):
     Handles the event of sending a Signal from a Strategy object.
     This is received by a Portfolio object and acted upon.
     """
-    def __init__(self, strategy_id: str, symbol: str, datetime: datetime, signal_type: str, strength: float = 1.0):
+    def __init__(self, strategy_id: str, symbol: str, datetime: datetime, signal_type: str, strength: float = 1.0,
+                 order_type: str = "MKT", price: Optional[float] = None):
         super().__init__(EventType.SIGNAL)
         self.strategy_id = strategy_id
         self.symbol = symbol
         self.datetime = datetime
         self.signal_type = signal_type  # 'LONG' or 'SHORT' or 'EXIT'
         self.strength = strength
+        self.order_type = order_type  # order to enter with: 'MKT', 'LMT' or 'STP'
+        self.price = price  # Limit / stop trigger price (None for 'MKT')
 
     def __str__(self):
         return f"SignalEvent: {self.symbol} - {self.signal_type} (Strength: {self.strength})"
@@ -53,17 +59,19 @@ class OrderEvent(Event):
     """
     Handles the event of sending an Order to an execution system.
     The order contains a symbol (e.g. GOOG), a type (market or limit),
-    quantity and a direction.
+    quantity and a direction. Limit and stop orders also carry a trigger price.
     """
-    def __init__(self, symbol: str, order_type: str, quantity: int, direction: str):
+    def __init__(self, symbol: str, order_type: str, quantity: int, direction: str, price: Optional[float] = None):
         super().__init__(EventType.ORDER)
         self.symbol = symbol
-        self.order_type = order_type  # 'MKT' or 'LMT'
+        self.order_type = order_type  # 'MKT', 'LMT' or 'STP'
         self.quantity = quantity
         self.direction = direction  # 'BUY' or 'SELL'
+        self.price = price  # Limit / stop trigger price (None for 'MKT')
 
     def print_order(self):
-        print(f"Order: Symbol={self.symbol}, Type={self.order_type}, Quantity={self.quantity}, Direction={self.direction}")
+        logger.info("Order: Symbol=%s, Type=%s, Quantity=%s, Direction=%s, Price=%s",
+                    self.symbol, self.order_type, self.quantity, self.direction, self.price)
 
     def __str__(self):
         return f"OrderEvent: {self.direction} {self.quantity} {self.symbol} @ {self.order_type}"
@@ -0,0 +1,93 @@
+import heapq
+import itertools
+from datetime import datetime
+from typing import List, Dict, Tuple, Any
+from .events import OrderEvent
+
+
+class PendingOrderBook:
+    """
+    Holds orders that are not yet executable.
+
+    Two stages, each backed by heaps instead of a list scanned on every event:
+      1. Latency buffer - a min-heap on `execute_at`. Popping due orders costs
+         O(k log n) for the k orders that are actually due.
+      2. Resting limit/stop orders - price-indexed heaps. Buy limits and sell
+         stops are keyed so the highest trigger price is on top (they fire as
+         price falls); sell limits and buy stops keep the lowest on top (they
+         fire as price rises). A bar only pops the orders its range crossed.
+
+    Orders released together are returned in submission order so fills are
+    identical to a plain list scan.
+    """
+
+    def __init__(self):
+        self._seq = itertools.count()
+        self._by_time: List[Tuple[datetime, int, OrderEvent]] = []
+        self._buy_limits: List[Tuple[float, int, OrderEvent]] = []   # key: -price
+        self._sell_limits: List[Tuple[float, int, OrderEvent]] = []  # key: price
+        self._buy_stops: List[Tuple[float, int, OrderEvent]] = []    # key: price
+        self._sell_stops: List[Tuple[float, int, OrderEvent]] = []   # key: -price
+
+    def __len__(self) -> int:
+        return (len(self._by_time) + len(self._buy_limits) + len(self._sell_limits)
+                + len(self._buy_stops) + len(self._sell_stops))
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def schedule(self, order: OrderEvent, execute_at: datetime):
+        """Buffers an order until simulated time reaches `execute_at`."""
+        heapq.heappush(self._by_time, (execute_at, next(self._seq), order))
+
+    def scheduled(self) -> List[Dict[str, Any]]:
+        """Orders still in the latency buffer, earliest first."""
+        return [{"order": order, "execute_at": at} for at, _, order in sorted(self._by_time)]
+
+    def pop_due(self, now: datetime) -> List[OrderEvent]:
+        """Releases every buffered order whose latency has elapsed."""
+        due = []
+        while self._by_time and self._by_time[0][0] <= now:
+            _, seq, order = heapq.heappop(self._by_time)
+            due.append((seq, order))
+        due.sort(key=lambda item: item[0])
+        return [order for _, order in due]
+
+    def arm(self, order: OrderEvent):
+        """Rests a LMT/STP order on the price heaps until a bar crosses its price."""
+        seq = next(self._seq)
+        price = order.price
+        if order.order_type == "LMT":
+            if order.direction == "BUY":
+                heapq.heappush(self._buy_limits, (-price, seq, order))
+            else:
+                heapq.heappush(self._sell_limits, (price, seq, order))
+        elif order.order_type == "STP":
+            if order.direction == "BUY":
+                heapq.heappush(self._buy_stops, (price, seq, order))
+            else:
+                heapq.heappush(self._sell_stops, (-price, seq, order))
+        else:
+            raise ValueError(f"Only LMT/STP orders can rest on the book, got {order.order_type}")
+
+    def pop_triggered(self, open_price: float, high: float, low: float) -> List[Tuple[OrderEvent, float]]:
+        """
+        Pops every resting order crossed by a bar and returns (order, fill_price).
+
+        Fill price is the order price, or the open when the bar gapped through it.
+        """
+        triggered = []
+        while self._buy_limits and -self._buy_limits[0][0] >= low:
+            _, seq, order = heapq.heappop(self._buy_limits)
+            triggered.append((seq, order, min(order.price, open_price)))
+        while self._sell_limits and self._sell_limits[0][0] <= high:
+            _, seq, order = heapq.heappop(self._sell_limits)
+            triggered.append((seq, order, max(order.price, open_price)))
+        while self._buy_stops and self._buy_stops[0][0] <= high:
+            _, seq, order = heapq.heappop(self._buy_stops)
+            triggered.append((seq, order, max(order.price, open_price)))
+        while self._sell_stops and -self._sell_stops[0][0] >= low:
+            _, seq, order = heapq.heappop(self._sell_stops)
+            triggered.append((seq, order, min(order.price, open_price)))
+        triggered.sort(key=lambda item: item[0])
+        return [(order, price) for _, order, price in triggered]
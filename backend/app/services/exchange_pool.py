@@ -5,8 +5,7 @@ CCXT Exchange অবজেক্টগুলো মেমোরিতে Cache 
 প্রতিটি অর্ডারে নতুন করে Exchange Init করতে হয় না,
 ফলে Order Latency ~400-800ms কমে যায়।
 
-শুধুমাত্র ManualTradeModal এর জন্য ব্যবহার করা হবে।
-অন্য কোনো সার্ভিস এটি ব্যবহার করে না।
+ManualTradeModal, Bracket Orders এবং Portfolio Balances এটি ব্যবহার করে।
 """
 
 import asyncio
@@ -19,7 +18,10 @@ logger = logging.getLogger(__name__)
 
 # Cache entry: (exchange_instance, created_at_timestamp)
 _pool: Dict[str, Tuple[Any, float]] = {}
-_pool_lock = asyncio.Lock()
+# Per-key lock: a cold load_markets() for one key must not block cache hits
+# (or creation) for other keys. Creation, invalidate and close_all all go
+# through the key's lock, so none of them race on the same entry.
+_key_locks: Dict[str, asyncio.Lock] = {}
 
 # একটি Exchange Instance কতক্ষণ Cache এ থাকবে (seconds)
 CACHE_TTL_SECONDS = 3600  # ১ ঘন্টা
@@ -44,7 +46,7 @@ async def get_or_create_exchange(
     """
     cache_key = _make_cache_key(api_key_id, is_futures)
 
-    async with _pool_lock:
+    async with _key_locks.setdefault(cache_key, asyncio.Lock()):
         # Cache Hit — TTL চেক করুন
         if cache_key in _pool:
             exchange, created_at = _pool[cache_key]
@@ -90,6 +92,14 @@ async def get_or_create_exchange(
         try:
             await exchange.load_markets()
             logger.info(f"[ExchangePool] ✅ Markets loaded for {exchange_name} key={api_key_id}")
+        except asyncio.CancelledError:
+            # Caller timed out (asyncio.wait_for) mid-creation — the instance is
+            # never cached, so close its session here instead of leaking it
+            try:
+                await exchange.close()
+            except Exception:
+                pass
+            raise
         except Exception as e:
             logger.warning(f"[ExchangePool] ⚠️ Market load warning for {exchange_name}: {e}")
 
@@ -97,32 +107,34 @@ async def get_or_create_exchange(
         return exchange
 
 
+async def _evict(cache_key: str) -> bool:
+    """Key lock নিয়ে একটি entry Cache থেকে সরিয়ে বন্ধ করে।"""
+    async with _key_locks.setdefault(cache_key, asyncio.Lock()):
+        entry = _pool.pop(cache_key, None)
+        if entry:
+            try:
+                await entry[0].close()
+            except Exception:
+                pass
+        return entry is not None
+
+
 async def invalidate(api_key_id: int):
     """
     নির্দিষ্ট API Key-এর সব Cache Entry মুছে ফেলে।
     Key Update বা Delete হলে call করতে হবে।
     """
-    async with _pool_lock:
-        keys_to_remove = [k for k in _pool if k.startswith(f"key_{api_key_id}_")]
-        for k in keys_to_remove:
-            exchange, _ = _pool.pop(k)
-            try:
-                await exchange.close()
-            except Exception:
-                pass
-        if keys_to_remove:
-            logger.info(f"[ExchangePool] 🗑️ Invalidated {len(keys_to_remove)} cache entries for api_key_id={api_key_id}")
+    keys_to_remove = [k for k in list(_pool) if k.startswith(f"key_{api_key_id}_")]
+    for k in keys_to_remove:
+        await _evict(k)
+    if keys_to_remove:
+        logger.info(f"[ExchangePool] 🗑️ Invalidated {len(keys_to_remove)} cache entries for api_key_id={api_key_id}")
 
 
 async def close_all():
     """
     সব Connection বন্ধ করে। App shutdown এ call করতে হবে।
     """
-    async with _pool_lock:
-        for key, (exchange, _) in list(_pool.items()):
-            try:
-                await exchange.close()
-            except Exception:
-                pass
-        _pool.clear()
-        logger.info("[ExchangePool] 🛑 All cached connections closed.")
+    for key in list(_pool):
+        await _evict(key)
+    logger.info("[ExchangePool] 🛑 All cached connections closed.")
@@ -14,6 +14,7 @@ from sqlalchemy.orm import Session
 from app.db.session import SessionLocal
 from app.models.model_training import ModelTrainingJob, TrainingStatus
 from app import models
+from app.services import model_catalog
 from app.services.economic_service import economic_service
 from app.services.ml.forex_model_factory import get_forex_model
 
@@ -574,7 +575,12 @@ class ForexMLTrainingEngine:
                         self._log(f"Running AutoML Optuna on Fold {i+1}...")
                         from app.services.ml.optuna_optimizer import run_optuna_study
                         trials = self.job.config.get('automl_trials', 10)
-                        best_params = run_optuna_study(X_train, y_train, algorithm, trials)
+                        best_params = run_optuna_study(
+                            X_train, y_train, algorithm, trials,
+                            study_name=f"forex_{self.job_id}_{algorithm}_fold{i+1}",
+                            n_workers=int(self.job.config.get('automl_workers', 1)),
+                            pruner=self.job.config.get('automl_pruner', 'median'),
+                        )
                         model = get_model_instance(algorithm, {**self.job.config, **best_params})
                     else:
                         model = get_model_instance(algorithm, self.job.config)
@@ -620,7 +626,12 @@ class ForexMLTrainingEngine:
                     self._log("Running AutoML Optuna...")
                     from app.services.ml.optuna_optimizer import run_optuna_study
                     trials = self.job.config.get('automl_trials', 30)
-                    best_params = run_optuna_study(X_train, y_train, algorithm, trials)
+                    best_params = run_optuna_study(
+                        X_train, y_train, algorithm, trials,
+                        study_name=f"forex_{self.job_id}_{algorithm}",
+                        n_workers=int(self.job.config.get('automl_workers', 1)),
+                        pruner=self.job.config.get('automl_pruner', 'median'),
+                    )
                     model = get_model_instance(algorithm, {**self.job.config, **best_params})
                 else:
                     model = get_model_instance(algorithm, self.job.config)
@@ -743,6 +754,7 @@ class ForexMLTrainingEngine:
                 explainability=explainability_data,
                 metadata_path=metadata_path
             )
+            model_catalog.index_version(db_version, metadata)
             self.db.add(db_version)
             self.db.flush()
             
@@ -3,6 +3,7 @@ import torch.nn as nn
 from torch.utils.data import DataLoader, TensorDataset
 import torch.optim as optim
 from .timegan import TimeGANWrapper
+from app.services.advanced_ml.sequence_windows import SequenceDataset, sliding_windows
 import numpy as np
 
 def train_timegan(X_train: np.ndarray, 
@@ -20,15 +21,12 @@ def train_timegan(X_train: np.ndarray,
     
     # 1. Windowing if necessary
     if len(X_train.shape) == 2:
-        num_samples = len(X_train) - seq_len + 1
-        # Strided windowing to save RAM, avoiding huge allocations
-        windows = np.lib.stride_tricks.sliding_window_view(X_train, window_shape=(seq_len, input_dim))
-        windows = windows.squeeze(1) # shape: (num_samples, seq_len, input_dim)
-        X_train_tensor = torch.tensor(windows, dtype=torch.float32)
+        # Strided windowing to save RAM: windows stay a view and are copied per batch,
+        # never materialized as one (num_samples, seq_len, input_dim) tensor
+        dataset = SequenceDataset(sliding_windows(X_train, seq_len))
     else:
-        X_train_tensor = torch.tensor(X_train, dtype=torch.float32)
+        dataset = TensorDataset(torch.tensor(X_train, dtype=torch.float32))
         
-    dataset = TensorDataset(X_train_tensor)
     dataloader = DataLoader(dataset, batch_size=batch_size, shuffle=True, drop_last=True)
     
     # 2. Initialize Model
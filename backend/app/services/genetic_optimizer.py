@@ -0,0 +1,498 @@
+"""
+Genetic Optimizer
+=================
+Strategy optimization এর Genetic Algorithm driver — প্রতিটা individual একটার পর একটা
+backtrader run এ না চালিয়ে পুরো generation একসাথে process pool এ evaluate হয়।
+
+* Candle DataFrame প্রতি run এ একবার temp file এ pickle হয়, প্রতি worker একবারই load করে;
+  তাই walk-forward এর সব window একই pool (GeneticWorkerPool) reuse করতে পারে
+* Pool futures as_completed — progress প্রতিটা evaluated individual এ update হয়
+* Fitness memoization: canonical parameter tuple -> metrics, bounded LRU,
+  চাইলে disk এ persist (একই strategy / data / cost setting এ পরের run এ reuse)
+* একই generation এ duplicate genome (elitism / crossover) একবারই simulate হয়
+* প্রতি generation এর সময় আর cache hit rate log + `generation_stats` এ যায়
+
+Selection, crossover আর mutation আগের sequential GA এর মতোই, একই random stream
+থেকে — তাই একই seed এ best individual হুবহু একই থাকে।
+
+Usage:
+    evaluator = BacktestFitness(df, strategy_class, 10_000, fixed_params)
+    optimizer = GeneticOptimizer(evaluator, n_workers=4, cache=FitnessCache(path="ga_cache.pkl"))
+    results = optimizer.run(param_ranges, pop_size=50, generations=20)
+
+    with GeneticWorkerPool(4) as pool:          # one pool for many runs (walk-forward windows)
+        for evaluator in window_evaluators:
+            GeneticOptimizer(evaluator, pool=pool).run(param_ranges)
+"""
+
+import hashlib
+import importlib
+import importlib.util
+import json
+import logging
+import multiprocessing as mp
+import os
+import pickle
+import random
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter, OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Tuple
+
+import backtrader as bt
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+PENALTY_SCORE = -9999
+
+
+def canonical_genome(params: Dict) -> Tuple:
+    """Order-independent, hashable form of an individual's parameters."""
+    return tuple(sorted(params.items()))
+
+
+class FitnessCache:
+    """
+    Bounded LRU of backtest metrics keyed by (evaluation namespace, canonical genome).
+    With `path` the entries are loaded on start and written back by `save()`.
+    """
+
+    def __init__(self, maxsize: int = 10_000, path: Optional[str] = None):
+        self.maxsize = maxsize
+        self.path = path
+        self._entries: "OrderedDict[Tuple, Dict]" = OrderedDict()
+        if path and os.path.exists(path):
+            try:
+                with open(path, "rb") as f:
+                    self._entries.update(pickle.load(f))
+                self._evict()
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable GA fitness cache {path}: {e}")
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key) -> Optional[Dict]:
+        metrics = self._entries.get(key)
+        if metrics is not None:
+            self._entries.move_to_end(key)
+        return metrics
+
+    def put(self, key, metrics: Dict):
+        self._entries[key] = metrics
+        self._entries.move_to_end(key)
+        self._evict()
+
+    def _evict(self):
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(dict(self._entries), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.path)  # never leave a half-written cache behind
+
+
+def smart_filter_params(strategy_class, params: Dict) -> Dict:
+    """Keeps the params the strategy declares, matching fast_period / fastPeriod / FastPeriod alike."""
+    valid_params = {}
+    if hasattr(strategy_class, 'params'):
+        # Backtrader এর params dict বা tuple হতে পারে
+        if hasattr(strategy_class.params, '_getkeys'):
+            allowed_keys = strategy_class.params._getkeys()
+        elif isinstance(strategy_class.params, dict):
+            allowed_keys = strategy_class.params.keys()
+        else:
+            allowed_keys = dict(strategy_class.params).keys()
+
+        key_map = {k.lower().replace('_', ''): k for k in allowed_keys}
+        for k, v in params.items():
+            if k in allowed_keys:
+                valid_params[k] = v
+            else:
+                clean_k = k.lower().replace('_', '')
+                if clean_k in key_map:
+                    valid_params[key_map[clean_k]] = v
+    return valid_params
+
+
+def run_single_backtest(df: pd.DataFrame, strategy_class, initial_cash: float, variable_params: Dict,
+                        fixed_params: Dict, commission: float = 0.001, slippage: float = 0.0,
+                        leverage: float = 1.0) -> Dict:
+    """One lightweight backtrader run (no observers / QuantStats) for optimizers."""
+    full_params = {**fixed_params, **variable_params}
+    clean_params = {}
+    for k, v in full_params.items():
+        try: clean_params[k] = int(v)
+        except:
+            try: clean_params[k] = float(v)
+            except: clean_params[k] = v
+
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.adddata(bt.feeds.PandasData(dataname=df))
+
+    valid_params = smart_filter_params(strategy_class, clean_params)
+    if 'stop_loss' in clean_params: valid_params['stop_loss'] = clean_params['stop_loss']
+    if 'take_profit' in clean_params: valid_params['take_profit'] = clean_params['take_profit']
+
+    cerebro.addstrategy(strategy_class, **valid_params)
+    cerebro.broker.setcash(initial_cash)
+    cerebro.broker.setcommission(commission=commission, commtype=bt.CommInfoBase.COMM_PERC, margin=None, mult=1.0, stocklike=True)
+
+    # ✅ Leveage / Futures Logic
+    is_futures = leverage > 1.0
+    cerebro.broker.setcommission(
+        commission=commission,
+        commtype=bt.CommInfoBase.COMM_PERC,
+        leverage=leverage,
+        stocklike=not is_futures
+    )
+
+    if slippage > 0: cerebro.broker.set_slippage_perc(perc=slippage)
+
+    cerebro.addsizer(bt.sizers.PercentSizer, percents=90)
+    cerebro.addanalyzer(bt.analyzers.TradeAnalyzer, _name="trades")
+    cerebro.addanalyzer(bt.analyzers.DrawDown, _name="drawdown")
+    cerebro.addanalyzer(bt.analyzers.SharpeRatio, _name="sharpe", riskfreerate=0.0)
+
+    try:
+        results = cerebro.run()
+        strat = results[0]
+        end_value = cerebro.broker.getvalue()
+        profit_percent = ((end_value - initial_cash) / initial_cash) * 100
+
+        dd = strat.analyzers.drawdown.get_analysis()
+        max_drawdown = dd.get('max', {}).get('drawdown', 0)
+
+        sharpe = strat.analyzers.sharpe.get_analysis()
+        sharpe_ratio = sharpe.get('sharperatio', 0) or 0
+
+        trade_analysis = strat.analyzers.trades.get_analysis()
+        total_closed = trade_analysis.get('total', {}).get('closed', 0)
+        won_trades = trade_analysis.get('won', {}).get('total', 0)
+        win_rate = (won_trades / total_closed * 100) if total_closed > 0 else 0
+
+        return {
+            "profitPercent": round(profit_percent, 2),
+            "maxDrawdown": round(max_drawdown, 2),
+            "sharpeRatio": round(sharpe_ratio, 2),
+            "total_trades": total_closed,
+            "winRate": round(win_rate, 2),
+            "final_value": round(end_value, 2),
+            "initial_cash": initial_cash,
+            "total_candles": len(df)
+        }
+    except Exception:
+        return {
+            "profitPercent": 0,
+            "maxDrawdown": 0,
+            "sharpeRatio": 0,
+            "total_trades": 0,
+            "winRate": 0,
+            "final_value": initial_cash,
+            "initial_cash": initial_cash,
+            "total_candles": len(df) if df is not None else 0
+        }
+
+
+def strategy_reference(strategy_class) -> Optional[Tuple]:
+    """
+    How a worker process can re-import `strategy_class`: its STRATEGY_MAP name (most
+    built-ins are generated with type()), module + name, or a custom strategy file.
+    None when the class only exists in this process (e.g. built inside a function).
+    """
+    strategies = sys.modules.get("app.strategies")
+    for name, cls in getattr(strategies, "STRATEGY_MAP", {}).items():
+        if cls is strategy_class:
+            return ("map", name)
+    module = sys.modules.get(strategy_class.__module__)
+    if module is not None and getattr(module, strategy_class.__qualname__, None) is strategy_class:
+        return ("module", strategy_class.__module__, strategy_class.__qualname__, getattr(module, "__file__", None))
+    return None
+
+
+def resolve_strategy(reference: Tuple):
+    if reference[0] == "map":
+        from app.strategies import STRATEGY_MAP
+        return STRATEGY_MAP[reference[1]]
+
+    _, module_name, qualname, source_file = reference
+    module = sys.modules.get(module_name)
+    if module is None:
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError:
+            # Custom strategy files (app/strategies/custom) are loaded by path, not as a package
+            spec = importlib.util.spec_from_file_location(module_name, source_file)
+            module = importlib.util.module_from_spec(spec)
+            sys.modules[module_name] = module
+            spec.loader.exec_module(module)
+    return getattr(module, qualname)
+
+
+class BacktestFitness:
+    """
+    Picklable `params -> metrics` evaluator holding the candle data and the run settings.
+    The strategy class travels by reference (see `strategy_reference`).
+    """
+
+    def __init__(self, df: pd.DataFrame, strategy_class, initial_cash: float, fixed_params: Dict,
+                 commission: float = 0.001, slippage: float = 0.0, leverage: float = 1.0):
+        self.df = df
+        self.strategy_class = strategy_class
+        self.initial_cash = initial_cash
+        self.fixed_params = fixed_params
+        self.commission = commission
+        self.slippage = slippage
+        self.leverage = leverage
+
+    def __call__(self, params: Dict) -> Dict:
+        return run_single_backtest(self.df, self.strategy_class, self.initial_cash, params, self.fixed_params,
+                                   self.commission, self.slippage, self.leverage)
+
+    @property
+    def picklable(self) -> bool:
+        return strategy_reference(self.strategy_class) is not None
+
+    @property
+    def namespace(self) -> str:
+        """Identifies everything besides the genome that a cached result depends on."""
+        df = self.df
+        data_sig = (len(df), str(df.index[0]) if len(df) else "", str(df.index[-1]) if len(df) else "",
+                    float(df["close"].sum()) if len(df) else 0.0)
+        payload = json.dumps([
+            strategy_reference(self.strategy_class) or self.strategy_class.__qualname__, data_sig,
+            self.initial_cash, self.fixed_params, self.commission, self.slippage, self.leverage,
+        ], sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode()).hexdigest()
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["strategy_class"] = strategy_reference(state["strategy_class"])
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.strategy_class = resolve_strategy(state["strategy_class"])
+
+
+# Worker-process side: (token, evaluator) of the run the worker last served. A new
+# token (next walk-forward window) makes the worker load that run's evaluator once.
+_WORKER_EVALUATOR: Optional[Tuple[str, Callable]] = None
+
+
+def _evaluate_in_worker(ref: Tuple[str, str], params: Dict) -> Dict:
+    global _WORKER_EVALUATOR
+    token, path = ref
+    if _WORKER_EVALUATOR is None or _WORKER_EVALUATOR[0] != token:
+        with open(path, "rb") as f:
+            _WORKER_EVALUATOR = (token, pickle.load(f))
+    return _WORKER_EVALUATOR[1](params)
+
+
+class GeneticWorkerPool:
+    """
+    Spawn process pool that can outlive one GA run — walk-forward shares it across windows.
+    `register()` pickles an evaluator (candle data + settings) to a temp file once; each
+    worker loads it on its first genome of that run instead of per task.
+    """
+
+    def __init__(self, n_workers: int):
+        self.n_workers = n_workers
+        self._dir = tempfile.mkdtemp(prefix="ga_pool_")
+        # spawn: the Celery worker may hold threads (Redis / logging) that fork would copy mid-state
+        self.executor = ProcessPoolExecutor(max_workers=n_workers, mp_context=mp.get_context("spawn"))
+
+    def register(self, evaluator: Callable) -> Tuple[str, str]:
+        token = uuid.uuid4().hex
+        path = os.path.join(self._dir, f"{token}.pkl")
+        with open(path, "wb") as f:
+            pickle.dump(evaluator, f, protocol=pickle.HIGHEST_PROTOCOL)
+        return token, path
+
+    def release(self, ref: Tuple[str, str]):
+        try:
+            os.remove(ref[1])
+        except OSError:
+            pass
+
+    def submit(self, ref: Tuple[str, str], params: Dict) -> Future:
+        return self.executor.submit(_evaluate_in_worker, ref, params)
+
+    def shutdown(self):
+        self.executor.shutdown(cancel_futures=True)
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+
+def fitness_score(metrics: Dict, opt_target: str = "profit", min_trades: int = 5) -> float:
+    # Genetic Algorithm এ খারাপ রেজাল্ট একদম বাদ দিলে পপুলেশন কমে যাবে, তাই পেনাল্টি স্কোর
+    if metrics['total_trades'] < min_trades:
+        return PENALTY_SCORE
+    if opt_target == 'sharpe': return metrics['sharpeRatio']
+    if opt_target == 'drawdown': return -metrics['maxDrawdown']
+    if opt_target == 'win_rate': return metrics['winRate']
+    return metrics['profitPercent']
+
+
+class GeneticOptimizer:
+    """
+    Generation-at-a-time GA: the population is deduplicated against the fitness cache,
+    the remaining genomes are backtested in parallel, then selection / crossover /
+    mutation run exactly as in the sequential GA.
+
+    Pass `pool` to run on a caller-owned GeneticWorkerPool (left running afterwards);
+    otherwise a pool is created for this run when `n_workers > 1`.
+    """
+
+    def __init__(self, evaluator: Callable, n_workers: Optional[int] = None,
+                 cache: Optional[FitnessCache] = None, rng: Optional[random.Random] = None,
+                 pool: Optional[GeneticWorkerPool] = None):
+        from app.services.ml_walk_forward_cv import available_cores
+
+        self.evaluator = evaluator
+        self.pool = pool
+        self.n_workers = pool.n_workers if pool is not None else max(1, n_workers or available_cores())
+        self.cache = cache if cache is not None else FitnessCache()
+        self.rng = rng or random  # default: the module-level stream the sequential GA used
+        self.namespace = getattr(evaluator, "namespace", "")
+        self.generation_stats: List[Dict] = []
+
+    def _evaluate(self, pool, ref, genomes: Dict[Tuple, Dict], on_result: Callable):
+        """Backtests `genomes` ({key: params}), calling `on_result(key, metrics)` as each one finishes."""
+        if pool is None:
+            for key, params in genomes.items():
+                on_result(key, self.evaluator(params))
+            return
+        futures = {pool.submit(ref, params): key for key, params in genomes.items()}
+        try:
+            for future in as_completed(futures):
+                on_result(futures[future], future.result())
+        finally:
+            for future in futures:
+                future.cancel()  # only matters when bailing out early on a shared pool
+
+    def _evaluate_generation(self, pool, ref, population: List[Dict],
+                             on_progress: Optional[Callable] = None) -> Tuple[List[Dict], int]:
+        keys = [(self.namespace, canonical_genome(individual)) for individual in population]
+        copies = Counter(keys)
+        pending: Dict[Tuple, Dict] = {}
+        for key, individual in zip(keys, population):
+            if key not in self.cache and key not in pending:
+                pending[key] = individual
+        done = len(population) - sum(copies[key] for key in pending)  # individuals already in the cache
+        if on_progress and done:
+            cached = [self.cache.get(key) for key in copies.keys() - pending.keys()]
+            on_progress(done, max(cached, key=lambda m: m['profitPercent']))
+
+        def record(key, metrics):
+            nonlocal done
+            self.cache.put(key, metrics)
+            done += copies[key]
+            if on_progress:
+                on_progress(done, metrics)
+
+        self._evaluate(pool, ref, pending, record)
+        return [self.cache.get(key) for key in keys], len(population) - len(pending)
+
+    def run(self, param_ranges: Dict[str, list], pop_size: int = 50, generations: int = 10,
+            opt_target: str = "profit", min_trades: int = 5,
+            progress_callback: Optional[Callable] = None, abort_callback: Optional[Callable] = None) -> List[Dict]:
+        rng = self.rng
+        param_keys = list(param_ranges.keys())
+        population = [{k: rng.choice(v) for k, v in param_ranges.items()} for _ in range(pop_size)]
+
+        best_results = []
+        total_steps = generations * pop_size
+        best_profit_so_far = -float('inf')
+
+        pool = None
+        if self.n_workers > 1 and getattr(self.evaluator, "picklable", True):
+            pool = self.pool or GeneticWorkerPool(self.n_workers)
+        ref = pool.register(self.evaluator) if pool is not None else None
+        try:
+            for gen in range(generations):
+                if abort_callback and abort_callback():
+                    break
+
+                def report(done, metrics):
+                    nonlocal best_profit_so_far
+                    best_profit_so_far = max(best_profit_so_far, metrics['profitPercent'])
+                    current_step = gen * pop_size + done
+                    progress_callback(
+                        int((current_step / total_steps) * 100),
+                        meta={
+                            "current": current_step,
+                            "total": total_steps,
+                            "generation": gen + 1,
+                            "best_profit": round(best_profit_so_far, 2)
+                        }
+                    )
+
+                t0 = time.perf_counter()
+                metrics_list, hits = self._evaluate_generation(pool, ref, population,
+                                                               report if progress_callback else None)
+                evaluated_pop = []
+                for individual, metrics in zip(population, metrics_list):
+                    metrics = dict(metrics, params=individual)
+                    metrics['fitness_score'] = fitness_score(metrics, opt_target, min_trades)
+                    evaluated_pop.append(metrics)
+                    best_profit_so_far = max(best_profit_so_far, metrics['profitPercent'])
+
+                elapsed = time.perf_counter() - t0
+                stats = {
+                    "generation": gen + 1,
+                    "seconds": round(elapsed, 3),
+                    "backtests": pop_size - hits,
+                    "cache_hits": hits,
+                    "cache_hit_rate": round(hits / pop_size, 3) if pop_size else 0.0,
+                }
+                self.generation_stats.append(stats)
+                logger.info(f"🧬 GA generation {gen + 1}/{generations}: {elapsed:.2f}s, "
+                            f"{stats['backtests']} backtests, cache hit rate {stats['cache_hit_rate'] * 100:.0f}%")
+
+                # ✅ Sort by Fitness Score
+                evaluated_pop.sort(key=lambda x: x.get('fitness_score', PENALTY_SCORE), reverse=True)
+                best_results.extend(evaluated_pop[:5])
+
+                elite_count = int(pop_size * 0.2)
+                next_generation = [item['params'] for item in evaluated_pop[:elite_count]]
+
+                while len(next_generation) < pop_size:
+                    parent1 = rng.choice(evaluated_pop[:int(pop_size/2)])['params']
+                    parent2 = rng.choice(evaluated_pop[:int(pop_size/2)])['params']
+                    child = parent1.copy()
+                    for k in param_keys:
+                        if rng.random() > 0.5: child[k] = parent2[k]
+                    if rng.random() < 0.2:
+                        mutate_key = rng.choice(param_keys)
+                        child[mutate_key] = rng.choice(param_ranges[mutate_key])
+                    next_generation.append(child)
+
+                population = next_generation
+        finally:
+            if pool is not None:
+                pool.release(ref)
+                if pool is not self.pool:
+                    pool.shutdown()
+            self.cache.save()
+
+        unique_results = {json.dumps(r['params'], sort_keys=True): r for r in best_results}
+        return list(unique_results.values())
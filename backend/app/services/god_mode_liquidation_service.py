@@ -2,11 +2,14 @@ import asyncio
 import logging
 import time
 import math
+from collections import deque
 from typing import Dict, Any, Callable, Awaitable, List
 
 import ccxt.pro as ccxtpro
 from ccxt.base.errors import NetworkError
 
+from app.services.liquidation_window import RollingLiquidationWindow
+
 logger = logging.getLogger(__name__)
 
 class GodModeService:
@@ -37,7 +40,10 @@ class GodModeService:
         }
         
         # Internal states for calculations
-        self._liq_history_1m = []
+        # Per-second buckets (exchange x side x smart/dumb x price band) — window queries are O(buckets);
+        # the price bands feed the magnet zones
+        self._liq_window = RollingLiquidationWindow(horizon_seconds=300, exchanges=("binance", "bybit"))
+        self._whale_feed = deque(maxlen=20) # keep latest 20
         self._smart_vol = 0.0
         self._dumb_vol = 0.0
         self._active_tasks = []
@@ -126,8 +132,7 @@ class GodModeService:
         now = time.time()
         
         # 1. Update rolling history
-        is_smart = usd_value > 50000
-        self._liq_history_1m.append({"time": now, "value": usd_value, "is_smart": is_smart})
+        is_smart = self._liq_window.add(now, ex_id, side, usd_value, price)
 
         # 3. Whale Kill Feed
         if is_smart and usd_value > 100000:
@@ -139,9 +144,8 @@ class GodModeService:
                 "time": "Just now",
                 "exchange": ex_id
             }
-            self.state["whale_feed"].insert(0, whale_event)
-            if len(self.state["whale_feed"]) > 20: # keep latest 20
-                self.state["whale_feed"].pop()
+            self._whale_feed.appendleft(whale_event)
+            self.state["whale_feed"] = list(self._whale_feed)
 
     async def _scan_global_vulnerabilities(self):
         """Scans the entire market for highly volatile/vulnerable coins"""
@@ -193,6 +197,53 @@ class GodModeService:
                 
             await asyncio.sleep(60)
 
+    def _update_liquidation_gauges(self, now: float) -> float:
+        """Pain gauge + smart/dumb split from the rolling buckets; returns the 5-minute pain value."""
+        # We calculate pain using the 5-minute rolling window
+        pain_value, _ = self._liq_window.total(now, 300)
+        
+        # Map pain value to 0-100 gauge
+        # $1M liquidations over 5 minutes is 100% Extreme
+        gauge_level = min(100, (pain_value / 1_000_000) * 100)
+        status = "NORMAL"
+        if gauge_level > 80: status = "EXTREME"
+        elif gauge_level > 50: status = "HIGH"
+        
+        self.state["pain_threshold"] = {
+            "level": round(gauge_level),
+            "status": status,
+            "value": round(pain_value)
+        }
+
+        # --- Smart vs Dumb Money (Rolling 60s for faster reaction) ---
+        smart_sum, dumb_sum = self._liq_window.smart_dumb(now, 60)
+        total_sum = smart_sum + dumb_sum
+        
+        if total_sum > 0:
+            self.state["smart_money"] = round((smart_sum / total_sum) * 100)
+            self.state["dumb_money"] = 100 - self.state["smart_money"]
+        else:
+            self.state["smart_money"] = 50
+            self.state["dumb_money"] = 50
+        return pain_value
+
+    def _update_magnet_zones(self, now: float, current_price: float):
+        """Top 2 price bands by liquidated USD in the last 5 minutes; fixed +2% / -3% zones until there are any."""
+        bands = self._liq_window.by_price_band(now, 300)
+        if not bands:
+            self.state["magnet_zones"] = [
+                {"price": round(current_price * 1.02, 5), "intensity": 80}, # +2%
+                {"price": round(current_price * 0.97, 5), "intensity": 90}, # -3%
+            ]
+            return
+        half_band = self._liq_window.band_width / 2
+        densest = sorted(bands.items(), key=lambda band: band[1], reverse=True)[:2]
+        peak = densest[0][1]
+        self.state["magnet_zones"] = [
+            {"price": round(lower + half_band, 5), "intensity": round(100 * value / peak)}
+            for lower, value in densest
+        ]
+
     async def _calculate_heuristics_loop(self, symbol: str):
         """Background loop that recalculates math models using active streams"""
         exchange = await self._init_exchange('binance')
@@ -205,37 +256,9 @@ class GodModeService:
             try:
                 now = time.time()
                 
-                # --- A. Clean old pain threshold data (keep 5 minutes for gauge, 60s for smart money) ---
-                self._liq_history_1m = [x for x in self._liq_history_1m if now - x["time"] < 300]
-                
-                # We calculate pain using the 5-minute rolling window
-                pain_value = sum(x["value"] for x in self._liq_history_1m)
-                
-                # Map pain value to 0-100 gauge
-                # $1M liquidations over 5 minutes is 100% Extreme
+                # --- A. Pain gauge (5 minutes) and smart money split (60s) ---
+                pain_value = self._update_liquidation_gauges(now)
                 gauge_level = min(100, (pain_value / 1_000_000) * 100)
-                status = "NORMAL"
-                if gauge_level > 80: status = "EXTREME"
-                elif gauge_level > 50: status = "HIGH"
-                
-                self.state["pain_threshold"] = {
-                    "level": round(gauge_level),
-                    "status": status,
-                    "value": round(pain_value)
-                }
-
-                # --- Smart vs Dumb Money (Rolling 60s for faster reaction) ---
-                recent_60s = [x for x in self._liq_history_1m if now - x["time"] < 60]
-                smart_sum = sum(x["value"] for x in recent_60s if x["is_smart"])
-                dumb_sum = sum(x["value"] for x in recent_60s if not x["is_smart"])
-                total_sum = smart_sum + dumb_sum
-                
-                if total_sum > 0:
-                    self.state["smart_money"] = round((smart_sum / total_sum) * 100)
-                    self.state["dumb_money"] = 100 - self.state["smart_money"]
-                else:
-                    self.state["smart_money"] = 50
-                    self.state["dumb_money"] = 50
 
                 # --- B. Cross-Exchange Arbitrage (Binance vs Bybit) ---
                 bin_price = self._last_prices.get('binance', 0)
@@ -268,13 +291,10 @@ class GodModeService:
                     self.state["cvd_spoof"] = "NEGATIVE"
 
                 # --- D. Heuristic AI Cascade Models / Magnet Zones ---
-                # Based on current price, generate magnetic pull zones (density clusters)
+                # Magnetic pull zones = densest liquidation price bands (5 minutes)
                 cp = self.state['current_price']
                 if cp > 0:
-                    self.state["magnet_zones"] = [
-                        {"price": round(cp * 1.02, 5), "intensity": 80}, # +2%
-                        {"price": round(cp * 0.97, 5), "intensity": 90}, # -3%
-                    ]
+                    self._update_magnet_zones(now, cp)
                     
                     self.state["cascade_probs"] = [
                         {"price": round(cp * 1.015, 5), "prob": 85},
@@ -323,9 +343,10 @@ class GodModeService:
         self.exchanges.clear()
         
         # Reset memory
-        self._liq_history_1m = []
+        self._liq_window.clear()
         self._smart_vol = 0
         self._dumb_vol = 0
+        self._whale_feed.clear()
         self.state["whale_feed"] = []
         logger.info("GodMode Pipeline stopped.")
 
@@ -0,0 +1,299 @@
+"""
+Multi-Timeframe Kline Cache
+===========================
+প্রতিটি (exchange, symbol) এর জন্য একটি shared candle cache — প্রতিটি timeframe
+একবার REST দিয়ে seed হয়, তারপর একটি kline stream (CandleSubscriptionRegistry)
+থেকে live update হয়।
+
+* Bollinger Band state (rolling sum / sum of squares) প্রতি candle update এ O(1) এ update হয়
+* Cascading bot এর সব timeframe আগে থেকেই ready থাকে — higher TF এ গেলে cold start হয় না
+* একই symbol এ চলা সব bot একই state share করে (bot প্রতি REST polling নেই)
+"""
+
+import asyncio
+import logging
+import math
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+import ccxt.async_support as ccxt
+
+from app.services.candle_subscriptions import CandleSubscriptionRegistry, default_exchange_factory
+
+logger = logging.getLogger(__name__)
+
+# Closed candles beyond the longest BB length (seed limit = length + 5, like the bots used)
+SEED_EXTRA_CANDLES = 5
+# A candle arriving more than this many intervals after the forming one means candles were missed
+GAP_INTERVALS = 1.5
+RETRY_DELAY_SECONDS = 5
+
+FeedKey = Tuple[str, str, str]
+
+
+def market_exchange_factory(market_type: str) -> Callable[[str], Any]:
+    def factory(exchange_id: str):
+        exchange = default_exchange_factory(exchange_id)
+        if market_type == "futures":
+            exchange.options['defaultType'] = 'future'
+        return exchange
+    return factory
+
+
+class BollingerState:
+    """
+    Bollinger Bands over the last `length` closes (closed candles + the forming one),
+    kept as a rolling sum / sum of squares. Sums are taken relative to an anchor
+    price (re-anchored every `length` closes) so large prices don't lose precision.
+    Matches pandas_ta.bbands (SMA middle, population std).
+    """
+
+    def __init__(self, length: int):
+        self.length = length
+        self.closed = deque()
+        self.forming: Optional[float] = None
+        self.anchor = 0.0
+        self._sum = 0.0
+        self._sumsq = 0.0
+        self._rolls = 0
+
+    def reset(self, closed: Iterable[float], forming: Optional[float]):
+        self.closed = deque(list(closed)[-(self.length - 1):] if self.length > 1 else [])
+        self.forming = forming
+        self._reanchor()
+
+    def _reanchor(self):
+        self.anchor = self.closed[-1] if self.closed else (self.forming or 0.0)
+        self._sum = sum(c - self.anchor for c in self.closed)
+        self._sumsq = sum((c - self.anchor) ** 2 for c in self.closed)
+        self._rolls = 0
+
+    def update_forming(self, close: float):
+        self.forming = close
+
+    def close_candle(self, close: float, next_forming: Optional[float] = None):
+        """The forming candle closed at `close`; `next_forming` is the new candle's close so far."""
+        self.forming = next_forming
+        if self.length <= 1:
+            return
+        self.closed.append(close)
+        d = close - self.anchor
+        self._sum += d
+        self._sumsq += d * d
+        if len(self.closed) > self.length - 1:
+            d = self.closed.popleft() - self.anchor
+            self._sum -= d
+            self._sumsq -= d * d
+        self._rolls += 1
+        if self._rolls >= self.length:
+            self._reanchor()
+
+    def bands(self, std: float) -> Optional[Tuple[float, float, float]]:
+        """(lower, middle, upper), or None until `length` closes are available."""
+        if self.forming is None or len(self.closed) < self.length - 1:
+            return None
+        d = self.forming - self.anchor
+        mean_d = (self._sum + d) / self.length
+        var = (self._sumsq + d * d) / self.length - mean_d * mean_d
+        middle = self.anchor + mean_d
+        width = std * math.sqrt(var) if var > 0 else 0.0
+        return middle - width, middle, middle + width
+
+
+class _TimeframeSeries:
+    def __init__(self, timeframe: str):
+        self.timeframe = timeframe
+        self.interval_ms = ccxt.Exchange.parse_timeframe(timeframe) * 1000
+        self.history = 0
+        self.closed = deque()
+        self.forming_time: Optional[int] = None
+        self.forming_close: Optional[float] = None
+        self.states: Dict[int, BollingerState] = {}
+
+    @property
+    def ready(self) -> bool:
+        return self.forming_time is not None
+
+    def ensure_length(self, length: int) -> bool:
+        """Adds a BB state; True if the stored history is too short and a reseed is needed."""
+        if length not in self.states:
+            self.states[length] = BollingerState(length)
+            self.states[length].reset(self.closed, self.forming_close)
+        if length - 1 > self.history:
+            self.history = length - 1
+            return True
+        return False
+
+    def seed(self, ohlcv):
+        rows = sorted(ohlcv, key=lambda c: c[0])
+        if not rows:
+            return
+        self.closed = deque((c[4] for c in rows[:-1]), maxlen=max(self.history, 1))
+        self.forming_time, self.forming_close = rows[-1][0], rows[-1][4]
+        for state in self.states.values():
+            state.reset(self.closed, self.forming_close)
+
+    def apply(self, candle: Dict[str, Any]) -> bool:
+        """Applies one streamed candle. False if candles were missed (caller reseeds)."""
+        if self.forming_time is None:
+            return False
+        t, close = candle["time"], candle["close"]
+        if t < self.forming_time:
+            return True  # stale update of an older candle
+        if t == self.forming_time:
+            self.forming_close = close
+            for state in self.states.values():
+                state.update_forming(close)
+            return True
+        if t - self.forming_time > GAP_INTERVALS * self.interval_ms:
+            return False
+
+        self.closed.append(self.forming_close)
+        for state in self.states.values():
+            state.close_candle(self.forming_close, close)
+        self.forming_time, self.forming_close = t, close
+        return True
+
+    def bollinger(self, length: int, std: float) -> Optional[Dict[str, float]]:
+        state = self.states.get(length)
+        bands = state.bands(std) if state else None
+        if bands is None:
+            return None
+        lower, middle, upper = bands
+        return {"lower": lower, "middle": middle, "upper": upper, "close": self.forming_close}
+
+
+class _SymbolFeed:
+    def __init__(self, key: FeedKey):
+        self.key = key
+        self.refs = 0
+        self.series: Dict[str, _TimeframeSeries] = {}
+        self.tasks: Dict[str, asyncio.Task] = {}
+
+
+class MultiTimeframeKlineCache:
+    """
+    Reference-counted per-(exchange, symbol, market type) candle cache.
+
+    `attach()` makes every requested timeframe live: one REST seed, then the
+    timeframe's kline stream from the CandleSubscriptionRegistry. Bots read
+    Bollinger Bands with `bollinger()`; `detach()` from the last bot stops
+    the streams.
+    """
+
+    def __init__(self, exchange_factory: Callable[[str, str], Any] = None,
+                 registry_factory: Callable[[str], CandleSubscriptionRegistry] = None,
+                 retry_delay: float = RETRY_DELAY_SECONDS):
+        self.exchange_factory = exchange_factory or (lambda ex_id, market_type: market_exchange_factory(market_type)(ex_id))
+        self.registry_factory = registry_factory or (
+            lambda market_type: CandleSubscriptionRegistry(exchange_factory=market_exchange_factory(market_type)))
+        self.retry_delay = retry_delay
+        self._feeds: Dict[FeedKey, _SymbolFeed] = {}
+        self._registries: Dict[str, CandleSubscriptionRegistry] = {}
+        self._rest: Dict[Tuple[str, str], Any] = {}
+
+    @staticmethod
+    def _key(exchange_id: str, symbol: str, market_type: str) -> FeedKey:
+        return exchange_id.lower(), symbol, market_type or "spot"
+
+    def attach(self, exchange_id: str, symbol: str, timeframes: Iterable[str], bb_length: int,
+               market_type: str = "spot") -> FeedKey:
+        key = self._key(exchange_id, symbol, market_type)
+        feed = self._feeds.get(key)
+        if feed is None:
+            feed = self._feeds[key] = _SymbolFeed(key)
+        feed.refs += 1
+
+        for timeframe in timeframes:
+            series = feed.series.get(timeframe)
+            if series is None:
+                series = feed.series[timeframe] = _TimeframeSeries(timeframe)
+            needs_seed = series.ensure_length(bb_length)
+            task = feed.tasks.get(timeframe)
+            if task is None or needs_seed:
+                if task is not None:
+                    task.cancel()
+                feed.tasks[timeframe] = asyncio.create_task(self._follow(feed, series))
+        return key
+
+    def detach(self, key: FeedKey):
+        feed = self._feeds.get(key)
+        if feed is None:
+            return
+        feed.refs -= 1
+        if feed.refs > 0:
+            return
+        del self._feeds[key]
+        for task in feed.tasks.values():
+            task.cancel()
+        logger.info(f"[KlineCache] Stopped {key}")
+
+    def bollinger(self, exchange_id: str, symbol: str, timeframe: str, length: int, std: float,
+                  market_type: str = "spot") -> Optional[Dict[str, float]]:
+        """Current BB of the timeframe (forming candle included), None until seeded."""
+        feed = self._feeds.get(self._key(exchange_id, symbol, market_type))
+        series = feed.series.get(timeframe) if feed else None
+        return series.bollinger(length, std) if series else None
+
+    def is_ready(self, key: FeedKey, timeframes: Iterable[str]) -> bool:
+        feed = self._feeds.get(key)
+        return bool(feed) and all(tf in feed.series and feed.series[tf].ready for tf in timeframes)
+
+    @property
+    def stream_count(self) -> int:
+        return sum(len(feed.tasks) for feed in self._feeds.values())
+
+    async def close(self):
+        tasks = [t for feed in self._feeds.values() for t in feed.tasks.values()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._feeds.clear()
+        for registry in self._registries.values():
+            await registry.close()
+        self._registries.clear()
+        for exchange in self._rest.values():
+            try:
+                await exchange.close()
+            except Exception as e:
+                logger.debug(f"[KlineCache] Exchange close failed: {e}")
+        self._rest.clear()
+
+    # --- upstream ---
+
+    def _registry(self, market_type: str) -> CandleSubscriptionRegistry:
+        registry = self._registries.get(market_type)
+        if registry is None:
+            registry = self._registries[market_type] = self.registry_factory(market_type)
+        return registry
+
+    async def _seed(self, feed: _SymbolFeed, series: _TimeframeSeries):
+        exchange_id, symbol, market_type = feed.key
+        rest = self._rest.get((exchange_id, market_type))
+        if rest is None:
+            rest = self._rest[(exchange_id, market_type)] = self.exchange_factory(exchange_id, market_type)
+        ohlcv = await rest.fetch_ohlcv(symbol, series.timeframe, limit=series.history + 1 + SEED_EXTRA_CANDLES)
+        series.seed(ohlcv)
+
+    async def _follow(self, feed: _SymbolFeed, series: _TimeframeSeries):
+        exchange_id, symbol, market_type = feed.key
+        registry = self._registry(market_type)
+        while True:
+            try:
+                # Subscribe first so candles arriving during the seed are queued, not lost
+                async with registry.subscribe(exchange_id, symbol, series.timeframe) as updates:
+                    await self._seed(feed, series)
+                    while True:
+                        candle = await updates.get()
+                        if not series.apply(candle):
+                            logger.info(f"[KlineCache] Gap in {feed.key} {series.timeframe}, reseeding")
+                            await self._seed(feed, series)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"[KlineCache] {feed.key} {series.timeframe} error: {e}")
+                await asyncio.sleep(self.retry_delay)
+
+
+# One cache per bot process: every cascading bot on a symbol shares its streams
+kline_cache = MultiTimeframeKlineCache()
@@ -0,0 +1,128 @@
+"""
+Rolling Liquidation Window
+==========================
+God Mode liquidation map এর rolling aggregates — প্রতিটা liquidation list এ রেখে প্রতি
+cycle এ পুরো list filter + sum করার বদলে fixed per-second bucket এর ring।
+
+* প্রতি bucket এ running sum / count, dimension: exchange x side x smart/dumb
+* Price band (fixed-width price level) অনুযায়ী sum আলাদা রাখা হয়
+* যেকোনো window query (5m pain gauge, 60s smart/dumb split) O(buckets) —
+  liquidation volume যত বেশিই হোক
+
+A bucket counts towards a window when any part of its second is inside the
+window, so results match per-event filtering (`now - t < window`) exactly at
+whole-second `now` and differ by at most the oldest second otherwise.
+"""
+
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+SMART_MONEY_USD = 50_000
+DEFAULT_HORIZON_SECONDS = 300
+DEFAULT_BAND_BPS = 10  # price band width, relative to the first liquidation price after a clear()
+
+SIDES = ("buy", "sell")  # sell = long liquidated, buy = short liquidated
+
+
+class RollingLiquidationWindow:
+    """
+    Ring of `horizon_seconds + 1` one-second buckets. Dense NumPy arrays hold the
+    sums / counts per (exchange, side, smart) so a window query is one masked
+    sum over the ring; price bands are kept as a small dict per bucket.
+    """
+
+    def __init__(self, horizon_seconds: int = DEFAULT_HORIZON_SECONDS,
+                 exchanges: Iterable[str] = ("binance", "bybit"),
+                 smart_threshold: float = SMART_MONEY_USD,
+                 band_width: Optional[float] = None):
+        self.horizon = int(horizon_seconds)
+        self.smart_threshold = smart_threshold
+        self._fixed_band_width = band_width
+        self.band_width = band_width
+        self._exchanges: Dict[str, int] = {ex: i for i, ex in enumerate(exchanges)}
+        slots = self.horizon + 1  # the boundary second of a full-horizon window
+        self._second = np.full(slots, np.iinfo(np.int64).min, dtype=np.int64)
+        self._sums = np.zeros((slots, len(self._exchanges), 2, 2))
+        self._counts = np.zeros((slots, len(self._exchanges), 2, 2), dtype=np.int64)
+        self._bands = [dict() for _ in range(slots)]
+
+    def clear(self):
+        """Drops every bucket; a derived band width is re-derived from the next price."""
+        self.band_width = self._fixed_band_width
+        self._second[:] = np.iinfo(np.int64).min
+        self._sums[:] = 0
+        self._counts[:] = 0
+        for bands in self._bands:
+            bands.clear()
+
+    def _exchange_index(self, exchange: str) -> int:
+        index = self._exchanges.get(exchange)
+        if index is None:
+            index = self._exchanges[exchange] = len(self._exchanges)
+            pad = ((0, 0), (0, 1), (0, 0), (0, 0))
+            self._sums = np.pad(self._sums, pad)
+            self._counts = np.pad(self._counts, pad)
+        return index
+
+    def add(self, timestamp: float, exchange: str, side: str, value: float, price: float) -> bool:
+        """Records one liquidation; returns True if it is smart money."""
+        second = int(timestamp // 1)
+        slot = second % len(self._second)
+        if self._second[slot] != second:
+            self._second[slot] = second
+            self._sums[slot] = 0
+            self._counts[slot] = 0
+            self._bands[slot].clear()
+
+        is_smart = value > self.smart_threshold
+        key = (slot, self._exchange_index(exchange), int(side == "sell"), int(is_smart))
+        self._sums[key] += value
+        self._counts[key] += 1
+
+        if price > 0:
+            if self.band_width is None:
+                self.band_width = price * DEFAULT_BAND_BPS / 10_000
+            band = int(price // self.band_width)
+            bands = self._bands[slot]
+            bands[band] = bands.get(band, 0.0) + value
+        return is_smart
+
+    def _mask(self, now: float, seconds: int) -> np.ndarray:
+        # Buckets overlapping (now - seconds, now]
+        newest = int(now // 1)
+        return (self._second > now - seconds - 1) & (self._second <= newest)
+
+    def _select(self, now: float, seconds: int, exchange: Optional[str], side: Optional[str]):
+        mask = self._mask(now, min(seconds, self.horizon))
+        sums, counts = self._sums[mask], self._counts[mask]
+        if exchange is not None:
+            index = self._exchanges.get(exchange)
+            if index is None:
+                return sums[:, :0], counts[:, :0]
+            sums, counts = sums[:, index:index + 1], counts[:, index:index + 1]
+        if side is not None:
+            s = int(side == "sell")
+            sums, counts = sums[:, :, s:s + 1], counts[:, :, s:s + 1]
+        return sums, counts
+
+    def total(self, now: float, seconds: int, exchange: Optional[str] = None,
+              side: Optional[str] = None) -> Tuple[float, int]:
+        """(USD value, liquidation count) in the last `seconds`."""
+        sums, counts = self._select(now, seconds, exchange, side)
+        return float(sums.sum()), int(counts.sum())
+
+    def smart_dumb(self, now: float, seconds: int, exchange: Optional[str] = None,
+                   side: Optional[str] = None) -> Tuple[float, float]:
+        """(smart money USD, dumb money USD) in the last `seconds`."""
+        sums, _ = self._select(now, seconds, exchange, side)
+        split = sums.sum(axis=(0, 1, 2))
+        return float(split[1]), float(split[0])
+
+    def by_price_band(self, now: float, seconds: int) -> Dict[float, float]:
+        """Liquidated USD per price band (band lower edge -> value) in the last `seconds`."""
+        totals: Dict[int, float] = {}
+        for slot in np.flatnonzero(self._mask(now, min(seconds, self.horizon))):
+            for band, value in self._bands[slot].items():
+                totals[band] = totals.get(band, 0.0) + value
+        return {band * self.band_width: value for band, value in sorted(totals.items())}
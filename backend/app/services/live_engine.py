@@ -18,6 +18,7 @@ from app.core.security import decrypt_key
 from app.core.security import decrypt_key
 from app.strategies.live_strategies import LiveStrategyFactory
 from app.models.trade import Trade
+from app.services.trade_rollups import record_trade_close
 
 redis_log_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
 
@@ -457,6 +458,8 @@ class LiveBotEngine:
                                     open_trade.pnl = (open_trade.pnl or 0.0) + pnl
                                     open_trade.pnl_percent = ((price - open_trade.entry_price) / open_trade.entry_price) * 100
                                 
+                                if open_trade.status == "CLOSED":
+                                    record_trade_close(self.db, open_trade, self.bot.owner_id)
                                 self.db.commit()
                                 self.log(f"💾 Trade DB Sync (Stream). Incremental PnL: {pnl:.2f}", "SYSTEM")
                         except Exception as db_err:
@@ -942,6 +945,8 @@ class LiveBotEngine:
                              open_trade.pnl = (open_trade.pnl or 0.0) + pnl
                              open_trade.pnl_percent = pnl_pct
                          
+                         if open_trade.status == "CLOSED":
+                             record_trade_close(self.db, open_trade, self.bot.owner_id)
                          self.db.commit()
                          self.log(f"💾 Trade DB Updated. Incremental PnL: {pnl}", "SYSTEM")
                 except Exception as db_err:
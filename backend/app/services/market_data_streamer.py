@@ -5,7 +5,7 @@ import ccxt.pro as ccxtpro
 from typing import Dict, Set
 
 from app.core.redis import redis_manager
-from app.helpers.orderbook_math import calculate_dynamic_wall_threshold
+from app.services.orderbook_delta import OrderBookDeltaEncoder, dumps
 
 logger = logging.getLogger(__name__)
 
@@ -122,55 +122,25 @@ class MarketDataStreamer:
             self._active_streams.discard(stream_key)
             return
 
+        # Snapshot + per-level delta frames, serialized once per update (see orderbook_delta)
+        encoder = OrderBookDeltaEncoder()
+        latest_key = f"latest_orderbook:{exchange_id}:{symbol}"
+
         while stream_key in self._active_streams:
             try:
                 depth_limit = self._normalize_order_book_limit(exchange_id, 50)
                 
                 # CCXT watch_order_book handles the WS connection gracefully behind the scenes
                 orderbook = await exchange.watch_order_book(symbol.upper(), limit=depth_limit)
-
-                bids = []
-                bid_total = 0
-                for bid in orderbook.get('bids', []):
-                    price = float(bid[0])
-                    size = float(bid[1])
-                    bid_total += size
-                    bids.append({"price": price, "size": size, "total": bid_total})
-                    
-                asks = []
-                ask_total = 0
-                for ask in orderbook.get('asks', []):
-                    price = float(ask[0])
-                    size = float(ask[1])
-                    ask_total += size
-                    asks.append({"price": price, "size": size, "total": ask_total})
-                
-                wall_threshold = calculate_dynamic_wall_threshold(bids, asks)
-                
-                walls = []
-                for ask in asks:
-                    if ask["size"] >= wall_threshold:
-                        walls.append({"price": ask["price"], "type": "sell", "size": ask["size"]})
-                for bid in bids:
-                    if bid["size"] >= wall_threshold:
-                        walls.append({"price": bid["price"], "type": "buy", "size": bid["size"]})
-                        
-                current_price = 0
-                if asks and bids:
-                    current_price = (asks[0]["price"] + bids[0]["price"]) / 2
-                
-                payload = {
-                    "type": "orderbook",
-                    "bids": bids,
-                    "asks": asks,
-                    "walls": walls,
-                    "currentPrice": current_price
-                }
+                frame = encoder.encode(orderbook.get('bids', []), orderbook.get('asks', []))
                 
-                # Publish to Redis
+                # Publish to Redis (one round trip). The latest key always holds the
+                # current book: the snapshot frame itself, or the book after this delta
                 if redis:
-                    await redis.setex(f"latest_orderbook:{exchange_id}:{symbol}", 60, json.dumps(payload))
-                    await redis.publish(channel, json.dumps(payload))
+                    pipe = redis.pipeline(transaction=False)
+                    pipe.setex(latest_key, 60, frame if encoder.is_snapshot else encoder.snapshot())
+                    pipe.publish(channel, frame)
+                    await pipe.execute()
                 
             except Exception as e:
                 err_msg = str(e)
@@ -185,6 +155,7 @@ class MarketDataStreamer:
                         await redis.publish(channel, json.dumps({"error": f"Invalid symbol {symbol} or exchange error"}))
                     break
                     
+                encoder.force_snapshot()
                 await asyncio.sleep(5) # Backoff before reconnecting
                 
         # Cleanup
@@ -218,15 +189,13 @@ class MarketDataStreamer:
                     
                     if redis:
                         trade_key = f"recent_trades:{exchange_id}:{symbol}"
-                        trade_strs = [json.dumps(t) for t in trades]
-                        if trade_strs:
-                            await redis.rpush(trade_key, *trade_strs)
-                            # Keep only the last 1000 trades
-                            await redis.ltrim(trade_key, -1000, -1)
-                            # Expire after 1 hour of inactivity
-                            await redis.expire(trade_key, 3600)
-                            
-                        await redis.publish(channel, json.dumps(payload))
+                        # One round trip: append, keep the last 1000 trades, expire after 1 hour of inactivity, publish
+                        pipe = redis.pipeline(transaction=False)
+                        pipe.rpush(trade_key, *[dumps(t) for t in trades])
+                        pipe.ltrim(trade_key, -1000, -1)
+                        pipe.expire(trade_key, 3600)
+                        pipe.publish(channel, dumps(payload))
+                        await pipe.execute()
             except Exception as e:
                 err_msg = str(e)
                 if "1006" in err_msg or "closed by remote server" in err_msg or "Connection closed" in err_msg:
@@ -6,6 +6,7 @@ import asyncio
 from typing import Dict, List, Any, Optional
 from app.core.config import settings
 from app.core.redis import redis_manager
+from app.services.orderbook_delta import load_cached_orderbook
 
 logger = logging.getLogger(__name__)
 
@@ -168,10 +169,7 @@ class MarketDepthService:
             if redis:
                 live_ob = await redis.get(f"latest_orderbook:{exchange_id.lower()}:{symbol.upper()}")
                 if live_ob:
-                    live_data = json.loads(live_ob)
-                    bids = [[b["price"], b["size"]] for b in live_data.get("bids", [])]
-                    asks = [[a["price"], a["size"]] for a in live_data.get("asks", [])]
-                    order_book = {"bids": bids, "asks": asks}
+                    order_book = load_cached_orderbook(live_ob)
 
             # 2. Fetch Live Data if cache missing
             if exchange_id.lower() == 'oanda':
@@ -576,12 +574,12 @@ class MarketDepthService:
             if redis:
                 cached_ob = await redis.get(f"latest_orderbook:{exchange_id.lower()}:{symbol.upper()}")
                 if cached_ob:
-                    data = json.loads(cached_ob)
+                    data = load_cached_orderbook(cached_ob)
                     return {
                         "symbol": symbol.upper(),
                         "exchange": exchange_id.lower(),
-                        "bids": [{"price": b["price"], "size": b["size"]} for b in data.get("bids", [])][:limit],
-                        "asks": [{"price": a["price"], "size": a["size"]} for a in data.get("asks", [])][:limit],
+                        "bids": [{"price": p, "size": s} for p, s in data["bids"][:limit]],
+                        "asks": [{"price": p, "size": s} for p, s in data["asks"][:limit]],
                         "timestamp": int(time.time() * 1000),
                         "datetime": None
                     }
@@ -0,0 +1,177 @@
+"""
+Market-wide Ticker Table
+========================
+Sentiment heatmap / divergence scanner এর জন্য process-wide ticker snapshot —
+প্রতি request এ নতুন ccxt exchange বানিয়ে পুরো market এর fetch_tickers() না করে
+প্রতি exchange এ একটাই `watch_tickers` stream একটা NumPy table আপডেট রাখে।
+
+* Symbol -> row id map, প্রতিটা field একটা NumPy column (last, percentage, quoteVolume, ...)
+* Symbol filter (USDT / USD quoted, leveraged token বাদ) insert এর সময় একবারই হিসাব হয়
+* Top-K by volume query = mask + partition + stable argsort (2,500 symbol এ ~70 µs)
+* watchTickers নেই এমন exchange এ REST fetch_tickers() poll হয়
+
+Usage:
+    table = await market_tickers.get_table("binance")
+    top_20 = table.top_by_volume(20, "usdt")
+"""
+
+import asyncio
+import logging
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import ccxt.pro as ccxtpro
+from ccxt.base.errors import ArgumentsRequired, NotSupported
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ("last", "percentage", "quoteVolume", "baseVolume", "vwap", "average", "bidVolume", "askVolume")
+READY_TIMEOUT_SECONDS = 10.0
+REST_REFRESH_SECONDS = 10.0
+
+
+def _not_leveraged(symbol: str) -> bool:
+    return 'UP/' not in symbol and 'DOWN/' not in symbol
+
+
+# Symbol filters, evaluated once per symbol when it first appears
+SYMBOL_FILTERS: Dict[str, Callable[[str], bool]] = {
+    "usdt": lambda s: s.endswith('/USDT') and _not_leveraged(s),
+    "usd": lambda s: ("/USDT" in s or "/USD" in s) and _not_leveraged(s),
+}
+
+
+class TickerTable:
+    """One exchange's latest tickers as NumPy columns indexed by a symbol id map."""
+
+    def __init__(self, capacity: int = 1024):
+        self.symbol_ids: Dict[str, int] = {}
+        self.symbols: List[str] = []
+        self._columns = np.zeros((len(COLUMNS), capacity))
+        self._masks = {name: np.zeros(capacity, dtype=bool) for name in SYMBOL_FILTERS}
+        self.updates = 0
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def _add_symbol(self, symbol: str) -> int:
+        row = len(self.symbols)
+        if row == self._columns.shape[1]:
+            self._columns = np.concatenate([self._columns, np.zeros_like(self._columns)], axis=1)
+            for name, mask in self._masks.items():
+                self._masks[name] = np.concatenate([mask, np.zeros_like(mask)])
+        self.symbol_ids[symbol] = row
+        self.symbols.append(symbol)
+        for name, matches in SYMBOL_FILTERS.items():
+            self._masks[name][row] = matches(symbol)
+        return row
+
+    def update(self, tickers: Dict[str, Dict]):
+        """Applies a ccxt `{symbol: ticker}` batch; missing / None fields are stored as 0."""
+        for symbol, ticker in tickers.items():
+            row = self.symbol_ids.get(symbol)
+            if row is None:
+                row = self._add_symbol(symbol)
+            for col, field in enumerate(COLUMNS):
+                self._columns[col, row] = float(ticker.get(field) or 0)
+        self.updates += 1
+
+    def column(self, field: str) -> np.ndarray:
+        return self._columns[COLUMNS.index(field), :len(self.symbols)]
+
+    def row(self, row: int) -> Dict:
+        return {"symbol": self.symbols[row], **dict(zip(COLUMNS, self._columns[:, row].tolist()))}
+
+    def get(self, symbol: str) -> Optional[Dict]:
+        row = self.symbol_ids.get(symbol)
+        return None if row is None else self.row(row)
+
+    def top_by_volume(self, k: int, symbol_filter: str = "usdt", base_volume_fallback: bool = False) -> List[Dict]:
+        """
+        Top `k` filtered symbols by quoteVolume (ties keep first-seen order, like
+        a stable sort of the fetch_tickers() dict). With `base_volume_fallback`
+        symbols without a quoteVolume rank by baseVolume.
+        """
+        n = len(self.symbols)
+        rows = np.flatnonzero(self._masks[symbol_filter][:n])
+        volume = self._columns[COLUMNS.index("quoteVolume"), rows]
+        if base_volume_fallback:
+            volume = np.where(volume != 0, volume, self._columns[COLUMNS.index("baseVolume"), rows])
+        if 0 < k < len(rows):
+            # Only rows at or above the k-th largest volume can make the cut (ties included)
+            kth = np.partition(volume, len(rows) - k)[len(rows) - k]
+            keep = volume >= kth
+            rows, volume = rows[keep], volume[keep]
+        top = rows[np.argsort(-volume, kind="stable")[:k]]
+        values = self._columns[:, top].T.tolist()
+        return [{"symbol": self.symbols[row], **dict(zip(COLUMNS, vals))} for row, vals in zip(top.tolist(), values)]
+
+
+class MarketTickerService:
+    """Process-wide ticker tables, one stream per exchange, started on first use."""
+
+    def __init__(self):
+        self.tables: Dict[str, TickerTable] = {}
+        self._ready: Dict[str, asyncio.Event] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._exchanges: Dict[str, ccxtpro.Exchange] = {}
+
+    async def get_table(self, exchange_id: str, timeout: float = READY_TIMEOUT_SECONDS) -> TickerTable:
+        """The exchange's table once it holds a first snapshot (asyncio.TimeoutError otherwise)."""
+        task = self._tasks.get(exchange_id)
+        if task is None or task.done():
+            self.tables.setdefault(exchange_id, TickerTable())
+            self._ready.setdefault(exchange_id, asyncio.Event())
+            self._tasks[exchange_id] = asyncio.create_task(self._stream(exchange_id))
+        ready = self._ready[exchange_id]
+        if not ready.is_set():
+            await asyncio.wait_for(ready.wait(), timeout)
+        return self.tables[exchange_id]
+
+    async def _stream(self, exchange_id: str):
+        exchange = self._exchanges.get(exchange_id)
+        if exchange is None:
+            exchange = self._exchanges[exchange_id] = getattr(ccxtpro, exchange_id)({'enableRateLimit': True})
+        table, ready = self.tables[exchange_id], self._ready[exchange_id]
+        streaming = exchange.has.get('watchTickers', False)
+        errors = 0
+        logger.info(f"📈 Ticker table stream started for {exchange_id} ({'watch_tickers' if streaming else 'REST poll'})")
+
+        while True:
+            try:
+                if not ready.is_set() or not streaming:
+                    # Seed with one full REST snapshot; exchanges without watchTickers keep polling
+                    if ready.is_set():
+                        await asyncio.sleep(REST_REFRESH_SECONDS)
+                    table.update(await exchange.fetch_tickers())
+                    ready.set()
+                else:
+                    table.update(await exchange.watch_tickers())
+                errors = 0
+            except asyncio.CancelledError:
+                raise
+            except (NotSupported, ArgumentsRequired) as e:
+                logger.info(f"{exchange_id} has no market-wide watch_tickers ({e}), polling fetch_tickers()")
+                streaming = False
+            except Exception as e:
+                errors += 1
+                if errors == 1 or errors % 60 == 0:
+                    logger.warning(f"Ticker table {exchange_id} error: {type(e).__name__} - {e} (Count: {errors})")
+                await asyncio.sleep(min(30, 2 ** min(errors, 5)))
+
+    async def stop(self):
+        tasks = list(self._tasks.values())
+        self._tasks.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for exchange_id, exchange in list(self._exchanges.items()):
+            try:
+                await exchange.close()
+            except Exception as e:
+                logger.error(f"Error closing {exchange_id}: {e}")
+        self._exchanges.clear()
+        self._ready.clear()
+
+
+market_tickers = MarketTickerService()
@@ -3,13 +3,14 @@ import pandas as pd
 import torch
 import torch.nn as nn
 import torch.optim as optim
-from torch.utils.data import DataLoader, TensorDataset
+from torch.utils.data import DataLoader
 import warnings
 
 warnings.filterwarnings("ignore")
 
 # Import the PyTorch architectures from Crypto ML layer
 from app.services.ml_architectures import SimpleLSTM, SimpleGRU, CNN1D, DeepLOB, TimeSeriesTransformer
+from app.services.advanced_ml.sequence_windows import SequenceDataset, sliding_windows, window_targets
 
 class PyTorchModelWrapper:
     """
@@ -26,15 +27,14 @@ class PyTorchModelWrapper:
         self.model = None
 
     def _create_sequences(self, X: np.ndarray, y: np.ndarray = None):
-        """Convert 2D array into 3D sequences using sliding window"""
-        Xs, ys = [], []
-        for i in range(len(X) - self.seq_len):
-            Xs.append(X[i:(i + self.seq_len)])
-            if y is not None:
-                ys.append(y[i + self.seq_len])
+        """
+        Sliding windows over the 2D array (a zero-copy view): window i is
+        X[i : i + seq_len] and its target y[i + seq_len], the step after it.
+        """
+        windows = sliding_windows(X, self.seq_len)[:-1]
         if y is not None:
-            return np.array(Xs), np.array(ys)
-        return np.array(Xs)
+            return windows, window_targets(y, self.seq_len, offset=1)
+        return windows
 
     def fit(self, X: pd.DataFrame, y: pd.Series):
         X_vals = X.values.astype(np.float32)
@@ -59,8 +59,8 @@ class PyTorchModelWrapper:
 
         self.model = self.model.to(self.device)
         
-        # DataLoader
-        dataset = TensorDataset(torch.tensor(X_seq), torch.tensor(y_seq).unsqueeze(1))
+        # DataLoader: windows are copied per batch, never as one 3D tensor
+        dataset = SequenceDataset(X_seq, y_seq.reshape(-1, 1))
         loader = DataLoader(dataset, batch_size=self.batch_size, shuffle=True)
 
         criterion = nn.BCEWithLogitsLoss()
@@ -89,7 +89,7 @@ class PyTorchModelWrapper:
             return np.random.choice([0, 1], size=len(X))
             
         X_seq = self._create_sequences(X_vals)
-        dataset = TensorDataset(torch.tensor(X_seq))
+        dataset = SequenceDataset(X_seq)
         loader = DataLoader(dataset, batch_size=self.batch_size, shuffle=False)
 
         self.model.eval()
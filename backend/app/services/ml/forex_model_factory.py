@@ -25,10 +25,13 @@ def get_forex_model(algorithm_name: str, config: dict = None):
         return ForexARIMAModel()
     elif base_algo == 'VAR':
         return ForexVARModel()
-    elif base_algo == 'GARCH':
-        return ForexGARCHModel()
-    elif base_algo == 'EGARCH':
-        return ForexEGARCHModel()
+    elif base_algo in ('GARCH', 'EGARCH'):
+        garch_cls = ForexGARCHModel if base_algo == 'GARCH' else ForexEGARCHModel
+        return garch_cls(
+            forecast_method=config.get('garch_forecast_method', 'analytic'),
+            refit_every=config.get('garch_refit_every'),
+            refit_window=config.get('garch_refit_window'),
+        )
     elif base_algo == 'NeuralProphet':
         return ForexNeuralProphetModel()
         
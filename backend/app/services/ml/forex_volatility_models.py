@@ -1,41 +1,137 @@
 import numpy as np
 import pandas as pd
 import warnings
+from math import exp, log, sqrt
 
 warnings.filterwarnings("ignore")
 
+EGARCH_ABS_MEAN = sqrt(2 / np.pi)  # E|z| for standard normal z
+
+
+def _returns(X) -> np.ndarray:
+    """First feature column as percent returns (GARCH is fit on x100 for convergence)."""
+    first = X.iloc[:, 0].values if hasattr(X, "iloc") else np.asarray(X)[:, 0]
+    return np.asarray(first, dtype=np.float64) * 100
+
+
+def garch_one_step_variance(returns, params, vol='Garch', p=1, q=1, last_resid=None, last_variance=None):
+    """
+    Analytic one-step-ahead conditional variance for every row of `returns`,
+    filtered recursively with fixed (already fitted) parameters — O(n), no
+    simulation. Row t only uses returns up to t-1; `last_resid` / `last_variance`
+    are the final residuals / conditional variances of the fit (most recent last)
+    that seed the recursion.
+
+        GARCH : s2_t = omega + sum a_i * e_{t-i}^2 + sum b_j * s2_{t-j}
+        EGARCH: ln s2_t = omega + sum a_i * (|e_{t-i}| / s_{t-i} - sqrt(2/pi)) + sum b_j * ln s2_{t-j}
+    """
+    params = dict(params)
+    mu = float(params.get("mu", 0.0))
+    omega = float(params["omega"])
+    alpha = [float(params[f"alpha[{i + 1}]"]) for i in range(p)]
+    beta = [float(params[f"beta[{j + 1}]"]) for j in range(q)]
+    resid = np.asarray(returns, dtype=np.float64) - mu
+    n = len(resid)
+    lag = max(p, q)
+
+    # History buffers: [seed ..., test rows], newest last. Plain floats — the
+    # recursion is sequential, NumPy per-element ops would only add overhead.
+    seed_resid = [0.0] * lag if last_resid is None else [float(v) for v in np.asarray(last_resid)[-lag:]]
+    seed_var = [omega] * lag if last_variance is None else [float(v) for v in np.asarray(last_variance)[-lag:]]
+    eps = seed_resid + resid.tolist()
+    s2 = seed_var + [0.0] * n
+    egarch = vol.upper() == 'EGARCH'
+    if egarch:
+        state = [log(v) for v in seed_var] + [0.0] * n  # ln s2
+        shock = [abs(e) / sqrt(v) - EGARCH_ABS_MEAN for e, v in zip(seed_resid, seed_var)] + [0.0] * n
+    else:
+        state = s2
+        shock = [e * e for e in seed_resid] + [0.0] * n
+
+    for t in range(lag, lag + n):
+        value = omega
+        for i in range(p):
+            value += alpha[i] * shock[t - 1 - i]
+        for j in range(q):
+            value += beta[j] * state[t - 1 - j]
+        state[t] = value
+        if egarch:
+            s2[t] = exp(value)
+            shock[t] = abs(eps[t]) / sqrt(s2[t]) - EGARCH_ABS_MEAN
+        else:
+            shock[t] = eps[t] * eps[t]
+    return np.array(s2[lag:])
+
+
 class ForexVolatilityModel:
-    """Wrapper for ARCH/GARCH Volatility Models"""
-    def __init__(self, vol='Garch', p=1, q=1, **kwargs):
+    """
+    Wrapper for ARCH/GARCH Volatility Models.
+
+    forecast_method='analytic' (default) filters the conditional variance
+    recursively over the test returns with the fitted parameters (rolling
+    one-step-ahead). With `refit_every` the parameters are re-estimated every
+    that many rows on a fixed trailing window of `refit_window` returns.
+    forecast_method='simulation' keeps the old Monte Carlo multi-step forecast.
+    """
+    def __init__(self, vol='Garch', p=1, q=1, forecast_method='analytic',
+                 refit_every=None, refit_window=None, **kwargs):
         self.vol = vol # 'Garch' or 'EGARCH'
         self.p = p
         self.q = q
+        self.forecast_method = forecast_method
+        self.refit_every = int(refit_every) if refit_every else None
+        self.refit_window = int(refit_window) if refit_window else None
         self.model_fit = None
+        self._train_returns = None
         
+    def _fit_returns(self, returns):
+        from arch import arch_model
+        am = arch_model(returns, vol=self.vol, p=self.p, q=self.q)
+        return am.fit(disp='off')
+
     def fit(self, X: pd.DataFrame, y: pd.Series):
         try:
-            from arch import arch_model
             # Volatility models typically fit on returns, not binary targets
             # Since our pipeline provides a binary target `y`, we will instead fit GARCH on the first feature
             # Assuming first feature is some form of return or price difference.
             # In a real implementation, we would extract 'close' returns.
-            returns = X.iloc[:, 0].values * 100 # Rescaling for GARCH convergence
-            
-            am = arch_model(returns, vol=self.vol, p=self.p, q=self.q)
-            self.model_fit = am.fit(disp='off')
+            returns = _returns(X) # Rescaling for GARCH convergence
+            self.model_fit = self._fit_returns(returns)
+            self._train_returns = returns
         except ImportError:
             print(f"Warning: arch not installed. Using dummy {self.vol}.")
             self.model_fit = "dummy"
             
         return self
 
+    def forecast_variance(self, X: pd.DataFrame) -> np.ndarray:
+        """Rolling one-step-ahead conditional variance for each row of X (analytic)."""
+        returns = _returns(X)
+        fit = self.model_fit
+        variance = np.empty(len(returns))
+        step = self.refit_every or len(returns) or 1
+        for start in range(0, len(returns), step):
+            if start and self.refit_every:
+                history = np.concatenate([self._train_returns, returns[:start]])
+                if self.refit_window:
+                    history = history[-self.refit_window:]
+                fit = self._fit_returns(history)
+            variance[start:start + step] = garch_one_step_variance(
+                returns[start:start + step], fit.params, vol=self.vol, p=self.p, q=self.q,
+                last_resid=np.asarray(fit.resid), last_variance=np.asarray(fit.conditional_volatility) ** 2,
+            )
+        return variance
+
     def predict(self, X: pd.DataFrame):
         if self.model_fit == "dummy":
             return np.random.choice([0, 1], size=len(X))
             
         # Forecast volatility
-        forecasts = self.model_fit.forecast(horizon=len(X), reindex=False, method='simulation')
-        vol_pred = np.sqrt(forecasts.variance.values[-1, :])
+        if self.forecast_method == 'simulation':
+            forecasts = self.model_fit.forecast(horizon=len(X), reindex=False, method='simulation')
+            vol_pred = np.sqrt(forecasts.variance.values[-1, :])
+        else:
+            vol_pred = np.sqrt(self.forecast_variance(X))
         
         # This is a hack for classification: if volatility increases, output 1 (long volatility)
         # For a true trading signal, GARCH would be a feature, not the final predictor.
@@ -1,52 +1,251 @@
+import glob
+import os
+import re
+import time
+import uuid
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 import optuna
 import pandas as pd
+from optuna.storages import JournalStorage
+from optuna.storages.journal import JournalFileBackend
+from optuna.trial import TrialState
 from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import cross_val_score
+from sklearn.model_selection import StratifiedKFold
+
+# Studies are journal files, one per study: they survive restarts and several
+# worker processes can append to the same file (it is lock-protected).
+# Retention: a journal is kept while its study is in use (resume / extend with a
+# larger n_trials) and deleted once it has not been written for JOURNAL_RETENTION_DAYS.
+OPTUNA_STORAGE_DIR = os.path.join(os.getcwd(), "uploads", "optuna")
+JOURNAL_RETENTION_DAYS = 7
+MAX_TRIALS = 200
+REPORT_EVERY = 10        # boosting rounds between intermediate validation scores
+VALIDATION_FRACTION = 0.2
+BOOSTED_MODELS = ("XGBoost", "LightGBM")
+FINISHED_STATES = (TrialState.COMPLETE, TrialState.PRUNED)
+
+
+def study_journal_path(study_name: str, storage_dir: str = None) -> str:
+    safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", study_name)
+    return os.path.join(storage_dir or OPTUNA_STORAGE_DIR, f"{safe_name}.journal")
+
+
+def cleanup_stale_journals(storage_dir: str = None, max_age_days: float = JOURNAL_RETENTION_DAYS) -> int:
+    """Deletes study journals not written for `max_age_days`; returns how many were removed."""
+    cutoff = time.time() - max_age_days * 86400
+    removed = 0
+    for path in glob.glob(os.path.join(storage_dir or OPTUNA_STORAGE_DIR, "*.journal")):
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed += 1
+        except OSError:
+            continue
+    return removed
+
+
+def load_study_storage(journal_path: str) -> JournalStorage:
+    os.makedirs(os.path.dirname(journal_path), exist_ok=True)
+    return JournalStorage(JournalFileBackend(journal_path))
+
+
+def build_pruner(pruner: str = "median", algorithm: str = "XGBoost") -> optuna.pruners.BasePruner:
+    """'median' | 'hyperband' | 'none'. Steps are boosting rounds (boosters) or CV folds (RF)."""
+    boosted = algorithm in BOOSTED_MODELS
+    if pruner == "hyperband":
+        if boosted:
+            return optuna.pruners.HyperbandPruner(min_resource=REPORT_EVERY, max_resource=500, reduction_factor=3)
+        return optuna.pruners.HyperbandPruner(min_resource=1, max_resource=3, reduction_factor=3)
+    if pruner == "median":
+        return optuna.pruners.MedianPruner(n_startup_trials=5, n_warmup_steps=2 * REPORT_EVERY if boosted else 0)
+    return optuna.pruners.NopPruner()
+
+
+def _xgboost_pruning_callback(trial, metric: str):
+    import xgboost as xgb
+
+    class XGBoostPruningCallback(xgb.callback.TrainingCallback):
+        def after_iteration(self, model, epoch, evals_log):
+            step = epoch + 1
+            if step % REPORT_EVERY == 0:
+                trial.report(1.0 - evals_log["validation_0"][metric][-1], step)
+                if trial.should_prune():
+                    raise optuna.TrialPruned(f"Pruned at boosting round {step}")
+            return False
+
+    return XGBoostPruningCallback()
 
-def run_optuna_study(X: pd.DataFrame, y: pd.Series, algorithm: str, n_trials: int = 50) -> dict:
+
+def _lightgbm_pruning_callback(trial, metric: str):
+    def callback(env):
+        step = env.iteration + 1
+        if step % REPORT_EVERY == 0:
+            for _, name, value, _ in env.evaluation_result_list:
+                if name == metric:
+                    trial.report(1.0 - value, step)
+            if trial.should_prune():
+                raise optuna.TrialPruned(f"Pruned at boosting round {step}")
+    return callback
+
+
+def make_objective(X: pd.DataFrame, y: pd.Series, algorithm: str, n_threads: int = -1):
     """
-    Runs an Optuna study to find the best hyperparameters for the selected algorithm.
-    
-    Args:
-        X: Training features
-        y: Training targets
-        algorithm: Name of the algorithm (e.g. 'Random Forest')
-        n_trials: Number of optimization trials
-        
-    Returns:
-        dict: Best hyperparameters found
+    Trial objective: validation accuracy. Boosters train on the first 80% (time order)
+    and report the held-out accuracy every REPORT_EVERY rounds; Random Forest reports
+    the running mean over its 3 CV folds. Both feed the study's pruner.
     """
-    
+    X_values = X.values if hasattr(X, "values") else np.asarray(X)
+    classes, y_codes = np.unique(np.asarray(y).ravel(), return_inverse=True)
+    n_classes = len(classes)
+
     def objective(trial):
+        if algorithm in BOOSTED_MODELS:
+            n_estimators = trial.suggest_int('n_estimators', 50, 500, step=50)
+            tree_depth = trial.suggest_int('tree_depth', 3, 10)
+            learning_rate = trial.suggest_float('learning_rate', 1e-3, 0.3, log=True)
+            split = int(len(X_values) * (1 - VALIDATION_FRACTION))
+            X_fit, X_val = X_values[:split], X_values[split:]
+            y_fit, y_val = y_codes[:split], y_codes[split:]
+
+            if algorithm == 'XGBoost':
+                from xgboost import XGBClassifier
+                metric = "merror" if n_classes > 2 else "error"
+                model = XGBClassifier(
+                    n_estimators=n_estimators, max_depth=tree_depth, learning_rate=learning_rate,
+                    random_state=42, n_jobs=n_threads, eval_metric=metric, verbosity=0,
+                    callbacks=[_xgboost_pruning_callback(trial, metric)],
+                )
+                model.fit(X_fit, y_fit, eval_set=[(X_val, y_val)], verbose=False)
+            else:
+                from lightgbm import LGBMClassifier
+                metric = "multi_error" if n_classes > 2 else "binary_error"
+                model = LGBMClassifier(
+                    n_estimators=n_estimators, max_depth=tree_depth, learning_rate=learning_rate,
+                    random_state=42, n_jobs=n_threads, verbose=-1,
+                )
+                model.fit(X_fit, y_fit, eval_set=[(X_val, y_val)], eval_metric=metric,
+                          callbacks=[_lightgbm_pruning_callback(trial, metric)])
+            return float(np.mean(model.predict(X_val) == y_val))
+
         if algorithm == 'Random Forest':
             n_estimators = trial.suggest_int('n_estimators', 50, 500, step=50)
             max_depth = trial.suggest_int('max_depth', 3, 20)
             min_samples_split = trial.suggest_int('min_samples_split', 2, 20)
             min_samples_leaf = trial.suggest_int('min_samples_leaf', 1, 10)
-            
+
             model = RandomForestClassifier(
                 n_estimators=n_estimators,
                 max_depth=max_depth,
                 min_samples_split=min_samples_split,
                 min_samples_leaf=min_samples_leaf,
                 random_state=42,
-                n_jobs=-1
+                n_jobs=n_threads
             )
         else:
             # Fallback to default RF if algorithm is not fully implemented in AutoML yet
             n_estimators = trial.suggest_int('n_estimators', 50, 200, step=50)
-            model = RandomForestClassifier(n_estimators=n_estimators, random_state=42)
-            
-        # Use simple 3-fold CV for speed during Optuna search
-        score = cross_val_score(model, X, y, cv=3, scoring='accuracy').mean()
-        return score
+            model = RandomForestClassifier(n_estimators=n_estimators, random_state=42, n_jobs=n_threads)
+
+        # Simple 3-fold CV for speed during Optuna search (the folds cross_val_score used),
+        # reporting the running mean so weak trials stop after a fold or two
+        scores = []
+        for step, (train_idx, val_idx) in enumerate(StratifiedKFold(n_splits=3).split(X_values, y_codes), start=1):
+            model.fit(X_values[train_idx], y_codes[train_idx])
+            scores.append(float(np.mean(model.predict(X_values[val_idx]) == y_codes[val_idx])))
+            trial.report(float(np.mean(scores)), step)
+            if step < 3 and trial.should_prune():
+                raise optuna.TrialPruned(f"Pruned after CV fold {step}")
+        return float(np.mean(scores))
+
+    return objective
+
+
+def _optimize_worker(journal_path: str, study_name: str, X, y, algorithm: str,
+                     n_trials: int, seed: int, pruner: str, n_threads: int) -> int:
+    """Runs `n_trials` of a shared study (in this process, or a pool worker)."""
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+    study = optuna.load_study(
+        study_name=study_name,
+        storage=load_study_storage(journal_path),
+        sampler=optuna.samplers.TPESampler(seed=seed),
+        pruner=build_pruner(pruner, algorithm),
+    )
+    study.optimize(make_objective(X, y, algorithm, n_threads), n_trials=n_trials)
+    return n_trials
+
+
+def _requeue_interrupted_trials(study: optuna.Study) -> int:
+    """
+    Trials left RUNNING by a killed process are marked FAIL and their parameters
+    queued again, so a resumed study re-evaluates them first.
+    """
+    interrupted = study.get_trials(deepcopy=False, states=(TrialState.RUNNING,))
+    for trial in interrupted:
+        study.tell(trial.number, state=TrialState.FAIL)
+        study.enqueue_trial(trial.params)
+    return len(interrupted)
+
+
+def run_optuna_study(X: pd.DataFrame, y: pd.Series, algorithm: str, n_trials: int = 50,
+                     study_name: str = None, n_workers: int = 1, pruner: str = "median",
+                     storage_dir: str = None, seed: int = 42) -> dict:
+    """
+    Runs an Optuna study to find the best hyperparameters for the selected algorithm.
+
+    Args:
+        X: Training features
+        y: Training targets
+        algorithm: Name of the algorithm (e.g. 'Random Forest')
+        n_trials: Total finished trials the study should hold. Re-running a study
+            resumes it (only the missing trials run); a larger value extends it.
+        study_name: Journal-backed study to create or resume (new name if None)
+        n_workers: Processes sharing the study storage
+        pruner: 'median' | 'hyperband' | 'none'
+
+    Journals older than JOURNAL_RETENTION_DAYS in the storage directory are
+    deleted first.
+
+    Returns:
+        dict: Best hyperparameters found
+    """
+    from app.services.ml_walk_forward_cv import plan_fold_workers
 
     # Suppress optuna logging output to keep server logs clean
     optuna.logging.set_verbosity(optuna.logging.WARNING)
-    
-    study = optuna.create_study(direction='maximize')
-    # Limit trials artificially if dataset is large to prevent timeouts
-    study.optimize(objective, n_trials=min(n_trials, 50))
-    
-    print(f"Optuna Study completed. Best Accuracy: {study.best_value*100:.2f}%")
+
+    study_name = study_name or f"{algorithm}-{uuid.uuid4().hex[:8]}"
+    journal_path = study_journal_path(study_name, storage_dir)
+    cleanup_stale_journals(storage_dir)
+    study = optuna.create_study(
+        study_name=study_name, storage=load_study_storage(journal_path),
+        direction='maximize', load_if_exists=True,
+    )
+    requeued = _requeue_interrupted_trials(study)
+    finished = len(study.get_trials(deepcopy=False, states=FINISHED_STATES))
+    remaining = max(0, min(n_trials, MAX_TRIALS) - finished)
+    if finished or requeued:
+        print(f"Optuna Study '{study_name}' resumed: {finished} finished trials, {requeued} interrupted re-queued, {remaining} to run")
+
+    workers, n_threads = plan_fold_workers(max(remaining, 1), n_workers)
+    # Seeds differ per run and per worker so resumed / parallel samplers do not repeat each other
+    base_seed = seed + len(study.trials)
+    shares = [remaining // workers + (k < remaining % workers) for k in range(workers)]
+    if workers == 1:
+        if remaining:
+            _optimize_worker(journal_path, study_name, X, y, algorithm, remaining, base_seed, pruner, n_threads)
+    else:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn")) as pool:
+            futures = [
+                pool.submit(_optimize_worker, journal_path, study_name, X, y, algorithm, share, base_seed + k, pruner, n_threads)
+                for k, share in enumerate(shares) if share
+            ]
+            for future in futures:
+                future.result()
+
+    study = optuna.load_study(study_name=study_name, storage=load_study_storage(journal_path))
+    pruned = len(study.get_trials(deepcopy=False, states=(TrialState.PRUNED,)))
+    print(f"Optuna Study completed. Best Accuracy: {study.best_value*100:.2f}% ({len(study.trials)} trials, {pruned} pruned)")
     return study.best_params
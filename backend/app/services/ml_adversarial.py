@@ -1,32 +1,34 @@
 import torch
 import torch.nn as nn
 
-def generate_fgsm_attack(model, loss_fn, inputs, targets, epsilon=0.01):
+def generate_fgsm_attack(model, loss_fn, inputs, targets, epsilon=0.01, chunk_size=4096):
     """
     Generates adversarial examples using Fast Gradient Sign Method (FGSM).
-    inputs: original PyTorch tensor with requires_grad=True
+    inputs: original PyTorch tensor (left untouched)
     targets: original targets
     epsilon: perturbation magnitude
+    chunk_size: rows per forward/backward pass — peak memory is one chunk's graph.
+        sign(grad) per row does not depend on how rows are chunked (mean-reduced
+        losses only rescale it), so the result matches a single full pass.
+    Gradients are taken w.r.t. the inputs only (torch.autograd.grad), so parameter
+    grads accumulated by the training loop are not touched.
     """
-    if inputs.grad is not None:
-        inputs.grad.zero_()
-        
-    inputs.requires_grad = True
-    outputs = model(inputs)
+    perturbed_data = torch.empty_like(inputs)
+    chunk_size = max(1, int(chunk_size or len(inputs)))
     
-    # Handle both binary classification (N, 1) and cross-entropy (N, C)
-    if outputs.shape == targets.shape:
-        loss = loss_fn(outputs, targets)
-    else:
-        # e.g., if outputs is squeezed but targets is not
-        loss = loss_fn(outputs.squeeze(-1), targets.view(-1))
+    for start in range(0, len(inputs), chunk_size):
+        x = inputs[start:start + chunk_size].detach().requires_grad_(True)
+        y = targets[start:start + chunk_size]
+        outputs = model(x).float()
         
-    model.zero_grad()
-    loss.backward()
-    
-    data_grad = inputs.grad.data
-    perturbed_data = inputs + epsilon * data_grad.sign()
+        # Handle both binary classification (N, 1) and cross-entropy (N, C)
+        if outputs.shape == y.shape:
+            loss = loss_fn(outputs, y)
+        else:
+            # e.g., if outputs is squeezed but targets is not
+            loss = loss_fn(outputs.squeeze(-1), y.view(-1))
+            
+        data_grad, = torch.autograd.grad(loss, x)
+        perturbed_data[start:start + chunk_size] = x.detach() + epsilon * data_grad.sign()
     
-    # Detach to avoid interfering with next backward pass
-    perturbed_data = perturbed_data.detach()
     return perturbed_data
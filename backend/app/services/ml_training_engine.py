@@ -14,6 +14,7 @@ from app import models
 import traceback
 from datetime import datetime, timedelta
 import joblib
+from app.services import model_catalog
 from app.services.ml_utils import extract_feature_importance, calculate_classification_metrics, calculate_regression_metrics, generate_real_explainability
 from app.services.auto_feature_selector import calculate_l2_advanced_features
 from app.services.advanced_ml.engine import AdvancedMLEngine
@@ -1574,7 +1575,8 @@ def train_model_task(job_id: str, db: Session):
                 epochs=int(config.get("epochs", 10)),
                 learning_rate=float(config.get("learning_rate", 0.1)),
                 max_depth=int(config.get("max_depth", 6)),
-                add_log=add_log
+                add_log=add_log,
+                n_workers=int(config["cv_workers"]) if config.get("cv_workers") else None
             )
         except Exception as _cv_ex:
             add_log(f"⚠️ Walk-Forward CV failed (non-critical): {_cv_ex}")
@@ -2846,6 +2848,7 @@ def train_model_task(job_id: str, db: Session):
             json.dump(metadata_payload, f)
             
         db_version.metadata_path = metadata_path
+        model_catalog.index_version(db_version, metadata_payload)
         db.flush()
 
         # ── Fix 2: Attach CV scores to explainability ─────────────────────────
@@ -2914,6 +2917,7 @@ def train_model_task(job_id: str, db: Session):
             metadata_payload["explainability"] = db_version.explainability
             with open(metadata_path, "w") as f:
                 json.dump(metadata_payload, f)
+            model_catalog.index_version(db_version, dict(metadata_payload))
         except Exception as e:
             add_log(f"⚠️ Failed to update metadata.json with explainability: {e}")
 
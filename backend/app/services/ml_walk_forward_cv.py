@@ -12,81 +12,186 @@ to keep CV time reasonable.
 ────────────────────────────────────────────────────
 """
 
+import multiprocessing as mp
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from typing import Callable, List, Optional, Tuple
+
 import numpy as np
-from typing import List, Callable
 
 
 # ─── Tree-Based CV ────────────────────────────────────────────────────────────
 
-def _cv_tree_model(algorithm: str, X_train: np.ndarray, y_train: np.ndarray,
-                   features: list, prediction_target: str,
-                   epochs: int, learning_rate: float, max_depth: int,
-                   n_splits: int, add_log: Callable) -> List[float]:
-    """Run TimeSeriesSplit CV for tree-based models."""
-    from sklearn.model_selection import TimeSeriesSplit
+# Below this many feature cells (rows x features) process start-up costs more than it saves
+PARALLEL_MIN_CELLS = 200_000
+
+
+def available_cores() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def plan_fold_workers(n_splits: int, n_workers: Optional[int] = None,
+                      cores: Optional[int] = None) -> Tuple[int, int]:
+    """
+    (process workers, threads per model) so that workers x threads <= cores.
+    Folds are spread first; spare cores go to the models' own threads.
+    """
+    cores = cores or available_cores()
+    workers = max(1, min(n_workers or cores, n_splits, cores))
+    return workers, max(1, cores // workers)
+
+
+def _build_tree_model(algorithm: str, prediction_target: str, epochs: int,
+                      learning_rate: float, max_depth: int, n_threads: int):
+    if algorithm == "Random Forest":
+        if prediction_target == "classification":
+            from sklearn.ensemble import RandomForestClassifier
+            return RandomForestClassifier(n_estimators=min(epochs, 50), max_depth=max_depth, random_state=42, n_jobs=n_threads)
+        from sklearn.ensemble import RandomForestRegressor
+        return RandomForestRegressor(n_estimators=min(epochs, 50), max_depth=max_depth, random_state=42, n_jobs=n_threads)
+
+    if algorithm == "XGBoost":
+        if prediction_target == "classification":
+            from xgboost import XGBClassifier
+            return XGBClassifier(n_estimators=min(epochs, 50), learning_rate=learning_rate, max_depth=max_depth, random_state=42, eval_metric='logloss', verbosity=0, n_jobs=n_threads)
+        from xgboost import XGBRegressor
+        return XGBRegressor(n_estimators=min(epochs, 50), learning_rate=learning_rate, max_depth=max_depth, random_state=42, verbosity=0, n_jobs=n_threads)
+
+    if algorithm == "LightGBM":
+        import lightgbm as lgb
+        # deterministic: identical trees whatever the thread count / worker split
+        if prediction_target == "classification":
+            return lgb.LGBMClassifier(n_estimators=min(epochs, 50), learning_rate=learning_rate, max_depth=max_depth, random_state=42, verbose=-1, n_jobs=n_threads, deterministic=True, force_row_wise=True)
+        return lgb.LGBMRegressor(n_estimators=min(epochs, 50), learning_rate=learning_rate, max_depth=max_depth, random_state=42, verbose=-1, n_jobs=n_threads, deterministic=True, force_row_wise=True)
+
+    if algorithm == "CatBoost":
+        import catboost as cb
+        if prediction_target == "classification":
+            return cb.CatBoostClassifier(iterations=min(epochs, 50), learning_rate=learning_rate, depth=max_depth, random_seed=42, verbose=False, thread_count=n_threads)
+        return cb.CatBoostRegressor(iterations=min(epochs, 50), learning_rate=learning_rate, depth=max_depth, random_seed=42, verbose=False, thread_count=n_threads)
+    return None
+
+
+def _fit_score_tree_fold(X: np.ndarray, y: np.ndarray, features: list, spec: dict,
+                         train_range: Tuple[int, int], val_range: Tuple[int, int]) -> float:
+    """Fits one walk-forward fold (contiguous TimeSeriesSplit ranges) and returns its score."""
     import pandas as pd
 
-    tscv = TimeSeriesSplit(n_splits=n_splits)
-    X_df = pd.DataFrame(X_train, columns=features)
-    y_flat = y_train.ravel()
-    scores = []
+    X_fold_train = pd.DataFrame(X[train_range[0]:train_range[1]], columns=features)
+    X_fold_val   = pd.DataFrame(X[val_range[0]:val_range[1]], columns=features)
+    y_fold_train = y[train_range[0]:train_range[1]]
+    y_fold_val   = y[val_range[0]:val_range[1]]
 
-    for fold_idx, (train_idx, val_idx) in enumerate(tscv.split(X_df)):
-        X_fold_train = X_df.iloc[train_idx]
-        X_fold_val   = X_df.iloc[val_idx]
-        y_fold_train = y_flat[train_idx]
-        y_fold_val   = y_flat[val_idx]
+    m = _build_tree_model(**spec)
+    m.fit(X_fold_train, y_fold_train)
+    preds = m.predict(X_fold_val)
 
-        try:
-            if algorithm == "Random Forest":
-                if prediction_target == "classification":
-                    from sklearn.ensemble import RandomForestClassifier
-                    m = RandomForestClassifier(n_estimators=min(epochs, 50), max_depth=max_depth, random_state=42)
-                else:
-                    from sklearn.ensemble import RandomForestRegressor
-                    m = RandomForestRegressor(n_estimators=min(epochs, 50), max_depth=max_depth, random_state=42)
-
-            elif algorithm == "XGBoost":
-                if prediction_target == "classification":
-                    from xgboost import XGBClassifier
-                    m = XGBClassifier(n_estimators=min(epochs, 50), learning_rate=learning_rate, max_depth=max_depth, random_state=42, eval_metric='logloss', verbosity=0)
-                else:
-                    from xgboost import XGBRegressor
-                    m = XGBRegressor(n_estimators=min(epochs, 50), learning_rate=learning_rate, max_depth=max_depth, random_state=42, verbosity=0)
-
-            elif algorithm == "LightGBM":
-                import lightgbm as lgb
-                if prediction_target == "classification":
-                    m = lgb.LGBMClassifier(n_estimators=min(epochs, 50), learning_rate=learning_rate, max_depth=max_depth, random_state=42, verbose=-1)
-                else:
-                    m = lgb.LGBMRegressor(n_estimators=min(epochs, 50), learning_rate=learning_rate, max_depth=max_depth, random_state=42, verbose=-1)
-
-            elif algorithm == "CatBoost":
-                import catboost as cb
-                if prediction_target == "classification":
-                    m = cb.CatBoostClassifier(iterations=min(epochs, 50), learning_rate=learning_rate, depth=max_depth, random_seed=42, verbose=False)
-                else:
-                    m = cb.CatBoostRegressor(iterations=min(epochs, 50), learning_rate=learning_rate, depth=max_depth, random_seed=42, verbose=False)
-            else:
-                return []
+    if spec["prediction_target"] == "classification":
+        from sklearn.metrics import accuracy_score
+        return accuracy_score(y_fold_val.astype(int), preds.astype(int))
+    from sklearn.metrics import r2_score
+    return max(0.0, r2_score(y_fold_val, preds))
 
-            m.fit(X_fold_train, y_fold_train)
-            preds = m.predict(X_fold_val)
 
-            if prediction_target == "classification":
-                from sklearn.metrics import accuracy_score
-                score = accuracy_score(y_fold_val.astype(int), preds.astype(int))
-            else:
-                from sklearn.metrics import r2_score
-                score = max(0.0, r2_score(y_fold_val, preds))
+# Worker-process side: X / y attached from shared memory once per worker
+_WORKER_DATA: dict = {}
 
-            scores.append(score)
-            add_log(f"[CV] Fold {fold_idx+1}/{n_splits}: {'Accuracy' if prediction_target == 'classification' else 'R2'} = {score*100:.1f}%")
 
-        except Exception as e:
-            add_log(f"[CV] Fold {fold_idx+1} failed: {e}")
+def _attach_shared_arrays(features: list, blocks: list):
+    for name, shm_name, shape, dtype in blocks:
+        shm = shared_memory.SharedMemory(name=shm_name)
+        _WORKER_DATA[name] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        _WORKER_DATA[f"_{name}_shm"] = shm  # keep the mapping alive
+    _WORKER_DATA["features"] = features
 
-    return scores
+
+def _tree_fold_worker(fold_idx: int, spec: dict, train_range, val_range):
+    try:
+        score = _fit_score_tree_fold(_WORKER_DATA["X"], _WORKER_DATA["y"], _WORKER_DATA["features"],
+                                     spec, train_range, val_range)
+        return fold_idx, score, None
+    except Exception as e:
+        return fold_idx, None, str(e)
+
+
+def _run_fold_inline(X, y, features, spec, fold_idx, train_range, val_range):
+    try:
+        return fold_idx, _fit_score_tree_fold(X, y, features, spec, train_range, val_range), None
+    except Exception as e:
+        return fold_idx, None, str(e)
+
+
+def _run_folds_parallel(X: np.ndarray, y: np.ndarray, features: list, spec: dict,
+                        folds: list, workers: int):
+    """Puts X / y in shared memory once and yields (fold_idx, score, error) as folds finish."""
+    blocks, segments = [], []
+    try:
+        for name, arr in (("X", X), ("y", y)):
+            shm = shared_memory.SharedMemory(create=True, size=max(1, arr.nbytes))
+            segments.append(shm)
+            np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[...] = arr
+            blocks.append((name, shm.name, arr.shape, arr.dtype.str))
+
+        # spawn: the training process may hold threads (torch / BLAS pools) that fork would copy mid-state
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn"),
+                                 initializer=_attach_shared_arrays, initargs=(features, blocks)) as pool:
+            futures = [pool.submit(_tree_fold_worker, fold_idx, spec, train_range, val_range)
+                       for fold_idx, train_range, val_range in folds]
+            for future in as_completed(futures):
+                yield future.result()
+    finally:
+        for shm in segments:
+            shm.close()
+            shm.unlink()
+
+
+def _cv_tree_model(algorithm: str, X_train: np.ndarray, y_train: np.ndarray,
+                   features: list, prediction_target: str,
+                   epochs: int, learning_rate: float, max_depth: int,
+                   n_splits: int, add_log: Callable, n_workers: Optional[int] = None) -> List[float]:
+    """
+    Run TimeSeriesSplit CV for tree-based models. Folds are independent, so with
+    more than one worker they are fitted in a process pool over shared-memory X / y;
+    scores are always returned in fold order.
+    """
+    from sklearn.model_selection import TimeSeriesSplit
+
+    if algorithm not in TREE_MODELS:
+        return []
+
+    tscv = TimeSeriesSplit(n_splits=n_splits)
+    X = np.ascontiguousarray(X_train)
+    y = np.ascontiguousarray(y_train.ravel())
+    folds = [(fold_idx, (int(train_idx[0]), int(train_idx[-1]) + 1), (int(val_idx[0]), int(val_idx[-1]) + 1))
+             for fold_idx, (train_idx, val_idx) in enumerate(tscv.split(X))]
+
+    workers, threads = plan_fold_workers(n_splits, n_workers)
+    if X.size < PARALLEL_MIN_CELLS and n_workers is None:
+        workers, threads = 1, available_cores()
+    spec = dict(algorithm=algorithm, prediction_target=prediction_target, epochs=epochs,
+                learning_rate=learning_rate, max_depth=max_depth, n_threads=threads)
+    metric = 'Accuracy' if prediction_target == 'classification' else 'R2'
+
+    if workers > 1:
+        add_log(f"[CV] Fitting {n_splits} folds on {workers} worker processes ({threads} thread(s) each)...")
+        results = _run_folds_parallel(X, y, features, spec, folds, workers)
+    else:
+        results = (_run_fold_inline(X, y, features, spec, *fold) for fold in folds)
+
+    scores = {}
+    for fold_idx, score, error in results:
+        # Progress is logged as folds finish; the scores keep fold order
+        if error is not None:
+            add_log(f"[CV] Fold {fold_idx+1} failed: {error}")
+            continue
+        scores[fold_idx] = score
+        add_log(f"[CV] Fold {fold_idx+1}/{n_splits}: {metric} = {score*100:.1f}%")
+
+    return [scores[i] for i in sorted(scores)]
 
 
 # ─── Deep Learning CV ─────────────────────────────────────────────────────────
@@ -215,10 +320,13 @@ def run_walk_forward_cv(
     epochs: int,
     learning_rate: float,
     max_depth: int,
-    add_log: Callable
+    add_log: Callable,
+    n_workers: Optional[int] = None
 ) -> dict:
     """
     Run Walk-Forward Cross-Validation for all supported model types.
+    Tree-model folds run on `n_workers` processes (default: one per core,
+    sequential for small datasets); pass 1 to force the sequential path.
     
     Returns a dict:
       {
@@ -243,7 +351,7 @@ def run_walk_forward_cv(
         if is_tree:
             scores = _cv_tree_model(
                 algorithm, X_train, y_train, features, prediction_target,
-                epochs, learning_rate, max_depth, n_splits, add_log
+                epochs, learning_rate, max_depth, n_splits, add_log, n_workers
             )
         else:
             scores = _cv_deep_model(
@@ -0,0 +1,179 @@
+"""
+ML Model Metadata Catalog
+=========================
+metadata.json এর দরকারি field গুলো ModelVersion এর DB column এ index করে রাখে
+(upload / registration / training এর সময়), যাতে:
+
+* Model listing (mode=advanced_sl_tp, symbol) SQL এ filter হয় — প্রতি request এ
+  প্রতিটি model এর metadata.json open + parse করতে হয় না
+* ml_predictor.predict প্রতি call এ একাধিক metadata path probe না করে
+"""
+
+import json
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session, selectinload
+
+from app import models
+
+logger = logging.getLogger(__name__)
+
+# Listing mode=advanced_sl_tp matches any of these markers
+SL_TP_TRAINING_MODE = 'advanced_setup_sl_tp'
+SL_TP_SETUP_TYPE = 'advanced_sl_tp'
+SL_TP_PREDICTION_TARGET = 'advanced_setup'
+
+
+def normalize_symbol(symbol: Optional[str]) -> Optional[str]:
+    """"BTC/USDT", "BTC-USDT", "btcusdt" -> "btcusdt"."""
+    if not symbol:
+        return None
+    return symbol.replace("/", "").replace("-", "").lower()
+
+
+def target_is_sl_tp(target_col) -> bool:
+    # Check if the target columns relate to SL/TP directly
+    if isinstance(target_col, list):
+        return any('SL' in t or 'TP' in t for t in target_col if isinstance(t, str))
+    if isinstance(target_col, str):
+        return 'SL' in target_col or 'TP' in target_col
+    return False
+
+
+def _read_json(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "r") as f:
+            meta = json.load(f)
+        return meta if isinstance(meta, dict) else None
+    except Exception as e:
+        logger.warning(f"[ModelCatalog] Could not parse {path}: {e}")
+        return None
+
+
+def metadata_candidates(version, model_path: Optional[str] = None) -> List[str]:
+    """
+    metadata.json lookup order:
+      1. version.metadata_path from DB
+      2. metadata.json in the same directory as the model file
+      3. Old naming convention: <model_name>.json (legacy)
+    """
+    model_path = model_path or version.file_path
+    paths = []
+    if version.metadata_path:
+        paths.append(version.metadata_path)
+    if model_path:
+        paths.append(os.path.join(os.path.dirname(model_path), "metadata.json"))
+        paths.append(model_path.replace(".pkl", ".json").replace(".pt", ".json").replace(".zip", ".json"))
+    return list(dict.fromkeys(paths))
+
+
+def read_metadata(version, model_path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    for path in metadata_candidates(version, model_path):
+        if path and os.path.exists(path):
+            meta = _read_json(path)
+            if meta is not None:
+                return meta
+    return None
+
+
+def index_version(version, metadata: Optional[Dict[str, Any]] = None, model_path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Copies the catalog fields of a version's metadata into its DB columns
+    (reads the file when `metadata` is not given). Does not commit.
+    Returns the metadata (None if the version has none).
+    """
+    meta = metadata if metadata is not None else read_metadata(version, model_path)
+    meta_for_columns = meta or {}
+
+    symbol = meta_for_columns.get('symbol') or (meta_for_columns.get('config') or {}).get('symbol')
+    target_col = meta_for_columns.get('target_column')
+
+    version.meta_symbol = normalize_symbol(symbol) if isinstance(symbol, str) else None
+    version.meta_target_column = target_col
+    version.meta_target_is_sl_tp = target_is_sl_tp(target_col)
+    version.meta_training_mode = meta_for_columns.get('training_mode') or None
+    version.meta_setup_type = meta_for_columns.get('setup_type') or None
+    version.meta_prediction_target = meta_for_columns.get('prediction_target') or None
+    version.catalog_metadata = meta
+    version.catalog_indexed_at = datetime.now(timezone.utc)
+    return meta
+
+
+def version_metadata(db: Session, version, model_path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Catalogued metadata of a version; indexes it on first use."""
+    if version.catalog_indexed_at is not None:
+        return version.catalog_metadata
+    meta = index_version(version, model_path=model_path)
+    try:
+        db.commit()
+    except Exception as e:
+        logger.warning(f"[ModelCatalog] Could not save catalog for version {version.id}: {e}")
+        db.rollback()
+    return meta
+
+
+def _index_unindexed_active_versions(db: Session, user_id: int):
+    pending = (
+        db.query(models.ModelVersion)
+        .join(models.CustomMLModel, models.CustomMLModel.active_version_id == models.ModelVersion.id)
+        .filter(models.CustomMLModel.user_id == user_id, models.ModelVersion.catalog_indexed_at.is_(None))
+        .all()
+    )
+    if not pending:
+        return
+    for version in pending:
+        index_version(version)
+    db.commit()
+    logger.info(f"[ModelCatalog] Indexed {len(pending)} active versions for user {user_id}")
+
+
+def list_user_models(db: Session, user_id: int, mode: Optional[str] = None, symbol: Optional[str] = None):
+    """
+    User's models, newest first. mode='advanced_sl_tp' keeps models whose
+    active version is an SL/TP model (and, with `symbol`, trained on that
+    symbol or without a recorded one) — filtered in SQL on the catalog.
+    """
+    query = (
+        db.query(models.CustomMLModel)
+        .filter(models.CustomMLModel.user_id == user_id)
+        .options(selectinload(models.CustomMLModel.versions))
+        .order_by(models.CustomMLModel.created_at.desc())
+    )
+
+    if mode == 'advanced_sl_tp':
+        # Versions created before the catalog existed (no backfill yet)
+        _index_unindexed_active_versions(db, user_id)
+
+        Version = models.ModelVersion
+        query = query.join(Version, models.CustomMLModel.active_version_id == Version.id).filter(
+            or_(
+                Version.meta_target_is_sl_tp.is_(True),
+                Version.meta_training_mode == SL_TP_TRAINING_MODE,
+                Version.meta_setup_type == SL_TP_SETUP_TYPE,
+                Version.meta_prediction_target == SL_TP_PREDICTION_TARGET,
+            ),
+        )
+        if symbol:
+            query = query.filter(or_(Version.meta_symbol.is_(None), Version.meta_symbol == normalize_symbol(symbol)))
+
+    return query.all()
+
+
+def backfill_catalog(db: Session, force: bool = False, batch_size: int = 500) -> int:
+    """Indexes every version (only unindexed ones unless `force`). Commits per batch."""
+    query = db.query(models.ModelVersion.id)
+    if not force:
+        query = query.filter(models.ModelVersion.catalog_indexed_at.is_(None))
+    ids = [row.id for row in query.order_by(models.ModelVersion.id)]
+
+    for start in range(0, len(ids), batch_size):
+        batch = db.query(models.ModelVersion).filter(models.ModelVersion.id.in_(ids[start:start + batch_size])).all()
+        for version in batch:
+            index_version(version)
+        db.commit()
+        db.expunge_all()
+    return len(ids)
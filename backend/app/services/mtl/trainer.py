@@ -1,16 +1,102 @@
 import torch
 import torch.nn as nn
+import copy
 import time
 import os
 import numpy as np
-from torch.utils.data import TensorDataset, DataLoader
+
+DEFAULT_BATCH_SIZE = 1024
+DEFAULT_EARLY_STOPPING_FRACTION = 0.1
+DEFAULT_EARLY_STOPPING_PATIENCE = 0  # off: every training row is fitted unless the config opts in
+
+_interop_threads_set = False
+
+
+def configure_torch_threads(config, add_log=None):
+    """
+    Intra-op threads = CPUs available to this process (cgroup / affinity aware),
+    overridable with `torch_threads`. Inter-op threads can only be set once per
+    process, before any parallel work — later calls keep the first value.
+    """
+    global _interop_threads_set
+    try:
+        available = len(os.sched_getaffinity(0))
+    except AttributeError:
+        available = os.cpu_count() or 1
+    num_threads = int(config.get("torch_threads") or available)
+    torch.set_num_threads(num_threads)
+
+    interop_threads = int(config.get("torch_interop_threads") or 1)
+    if not _interop_threads_set:
+        try:
+            torch.set_num_interop_threads(interop_threads)
+        except RuntimeError:
+            pass
+        _interop_threads_set = True
+
+    if add_log:
+        add_log(f"Torch threads: {torch.get_num_threads()} intra-op, {torch.get_num_interop_threads()} inter-op")
+    return num_threads
+
+
+class ArrayBatches:
+    """
+    Mini-batches over NumPy arrays (or sliding-window views of them) as float32
+    tensors. Only one batch is materialized at a time; batches are contiguous row
+    slices, visited in shuffled order when `shuffle` is set.
+    """
+    def __init__(self, X, y=None, batch_size=DEFAULT_BATCH_SIZE, start=0, stop=None,
+                 shuffle=False, rng=None, unsqueeze=False, target_shape=None):
+        self.X = X
+        self.y = y
+        self.batch_size = max(1, int(batch_size))
+        self.start = start
+        self.stop = len(X) if stop is None else stop
+        self.shuffle = shuffle
+        self.rng = rng if rng is not None else np.random.default_rng(42)
+        self.unsqueeze = unsqueeze
+        self.target_shape = target_shape
+
+    def __len__(self):
+        return max(0, -(-(self.stop - self.start) // self.batch_size))
+
+    def __iter__(self):
+        starts = np.arange(self.start, self.stop, self.batch_size)
+        if self.shuffle:
+            starts = self.rng.permutation(starts)
+        for s in starts:
+            e = min(s + self.batch_size, self.stop)
+            xb = torch.from_numpy(np.array(self.X[s:e], dtype=np.float32))
+            if self.unsqueeze:
+                xb = xb.unsqueeze(1)
+            if self.y is None:
+                yield xb
+                continue
+            yb = torch.from_numpy(np.array(self.y[s:e], dtype=np.float32))
+            if self.target_shape is not None:
+                yb = yb.reshape(self.target_shape)
+            yield xb, yb
+
 
 class PyTorchTrainer:
     """
     Modular trainer for PyTorch-based Deep Learning models.
     Supports Standard Classification, Regression, and Multi-Task Learning (MTL).
-    RAM Optimized: Clears unused tensors and minimizes memory footprints.
+    RAM Optimized: slices mini-batch tensors out of the training arrays instead
+    of one full-dataset tensor, so tensor memory is bounded by the batch size.
+
+    Config keys: batch_size, grad_accumulation_steps, early_stopping_patience
+    (0 = off, the default), early_stopping_fraction (held-out tail of the
+    training rows, only used when patience > 0), use_bf16, torch_threads,
+    torch_interop_threads.
     """
+    @staticmethod
+    def _loss(criterion, outputs, yb, prediction_target, out_size):
+        if prediction_target == "multi_task":
+            class_logits, reg_preds = outputs
+            return criterion(class_logits.float(), reg_preds.float(), yb[:, 0:1], yb[:, 1:2])
+        return criterion(outputs.float(), yb.reshape(-1, out_size))
+
     @staticmethod
     def train_model(
         model, 
@@ -29,16 +115,19 @@ class PyTorchTrainer:
         epochs = int(config.get("epochs", 10))
         learning_rate = float(config.get("learning_rate", 0.001))
         is_fine_tune = config.get("is_fine_tune", False)
-        
-        # 1. Setup Tensors
-        if job.algorithm in ["LSTM", "GRU"]:
-            X_train_t = torch.FloatTensor(X_train).unsqueeze(1)
-            X_test_t = torch.FloatTensor(X_test).unsqueeze(1)
-        else:
-            X_train_t = torch.FloatTensor(X_train)
-            X_test_t = torch.FloatTensor(X_test)
-            
-        y_train_t = torch.FloatTensor(y_train)
+        batch_size = int(config.get("batch_size", DEFAULT_BATCH_SIZE))
+        accumulation_steps = max(1, int(config.get("grad_accumulation_steps", 1)))
+        patience = int(config.get("early_stopping_patience", DEFAULT_EARLY_STOPPING_PATIENCE))
+        holdout_fraction = float(config.get("early_stopping_fraction", DEFAULT_EARLY_STOPPING_FRACTION))
+        use_bf16 = bool(config.get("use_bf16", False))
+        if use_bf16 and not torch.backends.mkldnn.is_available():
+            add_log("⚠️ bf16 autocast needs oneDNN on this CPU, training in fp32.")
+            use_bf16 = False
+
+        configure_torch_threads(config, add_log)
+
+        # 1. Setup Batches (no full-dataset tensors — slices of X/y become tensors per batch)
+        unsqueeze = job.algorithm in ["LSTM", "GRU"]
         
         # Determine output size
         if prediction_target == "multi_task":
@@ -47,6 +136,20 @@ class PyTorchTrainer:
             out_size = 3
         else:
             out_size = 1
+        target_shape = (-1, out_size)
+
+        # Early stopping watches the most recent rows (tail) of the training set
+        n_train = len(X_train)
+        n_holdout = int(n_train * holdout_fraction) if patience > 0 else 0
+        if n_holdout < 1 or n_train - n_holdout < 1:
+            n_holdout = 0
+        n_fit = n_train - n_holdout
+        rng = np.random.default_rng(42)
+        train_batches = ArrayBatches(X_train, y_train, batch_size, stop=n_fit, shuffle=True, rng=rng,
+                                     unsqueeze=unsqueeze, target_shape=target_shape)
+        holdout_batches = ArrayBatches(X_train, y_train, batch_size * 4, start=n_fit,
+                                       unsqueeze=unsqueeze, target_shape=target_shape) if n_holdout else None
+        autocast = lambda: torch.autocast(device_type="cpu", dtype=torch.bfloat16, enabled=use_bf16)
 
         # 2. Fine-tuning
         _ft_lr = learning_rate
@@ -68,8 +171,10 @@ class PyTorchTrainer:
             criterion = MultiTaskLoss()
             optimizer = torch.optim.Adam(list(model.parameters()) + list(criterion.parameters()), lr=_ft_lr)
         elif prediction_target == "classification":
-            num_pos = max(y_train_t.sum().item(), 1.0)
-            num_neg = max(len(y_train_t) - y_train_t.sum().item(), 0.0)
+            # float64 accumulator, no float copy of the targets
+            y_fit = y_train[:n_fit]
+            num_pos = max(float(np.sum(y_fit, dtype=np.float64)), 1.0)
+            num_neg = max(len(y_fit) - num_pos, 0.0)
             pos_weight = torch.tensor([num_neg / num_pos], dtype=torch.float32)
             criterion = nn.BCEWithLogitsLoss(pos_weight=pos_weight)
             optimizer = torch.optim.Adam(model.parameters(), lr=_ft_lr)
@@ -88,81 +193,112 @@ class PyTorchTrainer:
             try:
                 add_log("Initializing EWC (Continual Learning) to preserve prior knowledge...")
                 from app.services.ml_continual_learning import EWC
-                _ds = TensorDataset(X_train_t, y_train_t.reshape(-1, out_size))
-                _dl = DataLoader(_ds, batch_size=32, shuffle=True)
+                _dl = ArrayBatches(X_train, y_train, batch_size, stop=n_fit, shuffle=True, rng=rng,
+                                   unsqueeze=unsqueeze, target_shape=target_shape)
                 ewc_instance = EWC(model, _dl, device="cpu", ew_weight=ewc_lambda)
             except Exception as e_ewc:
                 add_log(f"⚠️ Failed to initialize EWC: {e_ewc}")
                 
-        enable_adversarial = config.get("enable_adversarial", False)
+        enable_adversarial = config.get("enable_adversarial", False) and prediction_target != "multi_task"
         adv_epsilon = float(config.get("adversarial_epsilon", 0.01))
         if enable_adversarial:
+            from app.services.ml_adversarial import generate_fgsm_attack
             add_log(f"Adversarial FGSM Training Enabled (Epsilon={adv_epsilon:.3f})")
+        if ewc_instance:
+            from app.services.ml_continual_learning import attach_ewc_to_loss
             
-        # 5. Training Loop
-        add_log(f"Starting {job.algorithm} training for {epochs} epochs...")
+        # 5. Training Loop (mini-batches, gradient accumulation, early stopping)
+        add_log(
+            f"Starting {job.algorithm} training for {epochs} epochs "
+            f"({n_fit:,} rows, batch {batch_size} x {accumulation_steps} accumulation"
+            f"{', bf16' if use_bf16 else ''}"
+            f"{f', early stopping on last {n_holdout:,} rows' if n_holdout else ''})..."
+        )
+        best_loss = float("inf")
+        best_state = None
+        bad_epochs = 0
+        n_batches = len(train_batches)
         for epoch in range(epochs):
             model.train()
-            outputs = model(X_train_t)
             optimizer.zero_grad()
-            
-            if prediction_target == "multi_task":
-                class_logits, reg_preds = outputs
-                true_class = y_train_t[:, 0].unsqueeze(1)
-                true_reg = y_train_t[:, 1].unsqueeze(1)
-                loss = criterion(class_logits, reg_preds, true_class, true_reg)
-            else:
-                loss = criterion(outputs, y_train_t.reshape(-1, out_size))
-                
-            if ewc_instance:
-                from app.services.ml_continual_learning import attach_ewc_to_loss
-                loss = attach_ewc_to_loss(loss, model, ewc_instance)
-                
-            loss.backward()
-            torch.nn.utils.clip_grad_norm_(model.parameters(), max_norm=1.0)
-            optimizer.step()
-            
-            if enable_adversarial and prediction_target != "multi_task":
-                from app.services.ml_adversarial import generate_fgsm_attack
-                X_adv = generate_fgsm_attack(model, criterion, X_train_t, y_train_t.reshape(-1, out_size), epsilon=adv_epsilon)
-                outputs_adv = model(X_adv)
-                optimizer.zero_grad()
-                loss_adv = criterion(outputs_adv, y_train_t.reshape(-1, out_size))
-                loss_adv.backward()
-                torch.nn.utils.clip_grad_norm_(model.parameters(), max_norm=1.0)
-                optimizer.step()
+            epoch_loss = 0.0
+            for i, (xb, yb) in enumerate(train_batches):
+                with autocast():
+                    loss = PyTorchTrainer._loss(criterion, model(xb), yb, prediction_target, out_size)
+                if ewc_instance:
+                    loss = attach_ewc_to_loss(loss, model, ewc_instance)
+                epoch_loss += loss.item() * len(xb)
+                (loss / accumulation_steps).backward()
+
+                if enable_adversarial:
+                    # Gradients w.r.t. the batch only — accumulated parameter grads are untouched
+                    X_adv = generate_fgsm_attack(model, criterion, xb, yb, epsilon=adv_epsilon)
+                    with autocast():
+                        loss_adv = PyTorchTrainer._loss(criterion, model(X_adv), yb, prediction_target, out_size)
+                    (loss_adv / accumulation_steps).backward()
+
+                if (i + 1) % accumulation_steps == 0 or i + 1 == n_batches:
+                    torch.nn.utils.clip_grad_norm_(model.parameters(), max_norm=1.0)
+                    optimizer.step()
+                    optimizer.zero_grad()
+            epoch_loss /= max(1, n_fit)
+
+            val_loss = None
+            if holdout_batches is not None:
+                model.eval()
+                total = 0.0
+                with torch.no_grad(), autocast():
+                    for xb, yb in holdout_batches:
+                        total += PyTorchTrainer._loss(criterion, model(xb), yb, prediction_target, out_size).item() * len(xb)
+                val_loss = total / n_holdout
+                if val_loss < best_loss:
+                    best_loss = val_loss
+                    best_state = copy.deepcopy(model.state_dict())
+                    bad_epochs = 0
+                else:
+                    bad_epochs += 1
                 
             if job.algorithm == "LSTM":
                 pct = 10.0 + (70.0 * (epoch+1)/epochs)
                 job.progress = pct
                 
             if (epoch+1) % max(1, epochs//5) == 0 or epoch == 0:
-                add_log(f"Epoch [{epoch+1}/{epochs}], Loss: {loss.item():.6f}")
+                add_log(f"Epoch [{epoch+1}/{epochs}], Loss: {epoch_loss:.6f}"
+                        + (f", Holdout Loss: {val_loss:.6f}" if val_loss is not None else ""))
                 if job.algorithm == "LSTM":
                     time.sleep(0.5)
+
+            if holdout_batches is not None and bad_epochs >= patience:
+                add_log(f"⏹️ Early stopping at epoch {epoch+1}: holdout loss did not improve for {patience} epochs (best {best_loss:.6f}).")
+                break
+
+        if best_state is not None:
+            model.load_state_dict(best_state)
         
         # 6. Save Model
         model_filename_pt = model_path.replace(".pkl", ".pt")
         torch.save(model.state_dict(), model_filename_pt)
         
-        # 7. Evaluation
+        # 7. Evaluation (batched inference)
         model.eval()
-        with torch.no_grad():
+        test_batches = ArrayBatches(X_test, batch_size=batch_size * 4, unsqueeze=unsqueeze)
+        with torch.no_grad(), autocast():
             start_time = time.time()
+            outputs = [model(xb) for xb in test_batches]
+            end_time = time.time()
+            final_latency = max(1.0, (end_time - start_time) / max(1, len(X_test)) * 1000)
+
             if prediction_target == "multi_task":
-                class_logits, reg_preds = model(X_test_t)
+                class_logits = torch.cat([o[0] for o in outputs]).float() if outputs else torch.empty(0, 1)
+                reg_preds = torch.cat([o[1] for o in outputs]).float() if outputs else torch.empty(0, 1)
                 preds_class = (torch.sigmoid(class_logits).numpy() > 0.5).astype(int)
                 preds_reg = reg_preds.numpy()
-                end_time = time.time()
-                final_latency = max(1.0, (end_time - start_time) / max(1, len(X_test)) * 1000)
                 
                 process_metrics(calculate_classification_metrics(y_test[:, 0], preds_class), True)
                 process_metrics(calculate_regression_metrics(y_test[:, 1], preds_reg), False)
                 preds_to_return = preds_class # For explainability compatibility
             else:
-                preds = model(X_test_t).numpy()
-                end_time = time.time()
-                final_latency = max(1.0, (end_time - start_time) / max(1, len(X_test)) * 1000)
+                preds = torch.cat(outputs).float().numpy() if outputs else np.empty((0, out_size), dtype=np.float32)
                 
                 if prediction_target == "classification":
                     preds_class = (1 / (1 + np.exp(-preds)) > 0.5).astype(int)
@@ -174,7 +310,7 @@ class PyTorchTrainer:
                     
         add_log(f"PyTorch {job.algorithm} training complete.")
         
-        del X_train_t, X_test_t, y_train_t
+        del outputs, best_state
         import gc
         gc.collect()
         
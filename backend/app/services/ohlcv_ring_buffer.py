@@ -0,0 +1,132 @@
+"""
+OHLCV Ring Buffer
+=================
+Live bot এর candle history — প্রতি candle এ `pd.concat` + 500 row trim না করে
+fixed-capacity NumPy column array তে রাখা হয় (head / tail index সহ ring)।
+
+* সবচেয়ে নতুন row টা forming (in-progress) candle, তার আগের সব row closed
+* একই timestamp এর update শুধু forming row overwrite করে; নতুন timestamp এলে forming
+  row closed হয়ে যায় আর নতুন row append হয় (buffer full হলে সবচেয়ে পুরনো row বাদ)
+* DataFrame শুধু যে strategy চায় তার জন্য — candle বদলালে পরের `frame()` call এ নতুন করে বানানো হয়
+
+Usage:
+    candles = OHLCVRingBuffer(capacity=500)
+    candles.load(df)
+    if candles.update(timestamp_ms, o, h, l, c, v):
+        strategy.close_candle(candles.closed_close)
+"""
+
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = ("open", "high", "low", "close", "volume")
+
+
+class OHLCVRingBuffer:
+    """
+    The last `capacity` candles as one int64 timestamp (ms) array and one float64
+    array per OHLCV column. Rows live at head .. tail - 1 (mod capacity).
+    """
+
+    def __init__(self, capacity: int = 500):
+        self.capacity = capacity
+        self.timestamps = np.zeros(capacity, dtype=np.int64)
+        self.columns = {name: np.zeros(capacity, dtype=np.float64) for name in COLUMNS}
+        self.head = 0  # oldest row
+        self.tail = 0  # next write position
+        self.size = 0
+        self._frame: Optional[pd.DataFrame] = None
+
+    def __len__(self):
+        return self.size
+
+    def clear(self):
+        self.head = self.tail = self.size = 0
+        self._frame = None
+
+    def load(self, df: Optional[pd.DataFrame]):
+        """Replaces the buffer with a fetch_market_data frame (its last row is the forming candle)."""
+        self.clear()
+        if df is None or df.empty:
+            return
+        rows = df.tail(self.capacity)
+        n = len(rows)
+        self.timestamps[:n] = rows["timestamp"].to_numpy(dtype="datetime64[ms]").astype(np.int64)
+        for name in COLUMNS:
+            self.columns[name][:n] = rows[name].to_numpy(dtype=np.float64)
+        self.size = n
+        self.tail = n % self.capacity
+
+    @property
+    def _last(self) -> int:
+        return (self.tail - 1) % self.capacity
+
+    @property
+    def last_timestamp(self) -> int:
+        return int(self.timestamps[self._last])
+
+    @property
+    def last_close(self) -> float:
+        """Close of the forming candle so far."""
+        return float(self.columns["close"][self._last])
+
+    @property
+    def closed_close(self) -> Optional[float]:
+        """Close of the newest closed candle."""
+        if self.size < 2:
+            return None
+        return float(self.columns["close"][(self.tail - 2) % self.capacity])
+
+    def update(self, timestamp_ms: int, open: float, high: float, low: float, close: float,
+               volume: float) -> bool:
+        """
+        Applies one candle update. True if it started a new candle, i.e. the forming
+        candle just closed. Updates older than the forming candle are ignored, and so
+        is everything until the buffer has been loaded.
+        """
+        if not self.size or timestamp_ms < self.last_timestamp:
+            return False
+        if timestamp_ms == self.last_timestamp:
+            i = self._last
+            started = False
+        else:
+            i = self.tail
+            self.tail = (self.tail + 1) % self.capacity
+            if self.size == self.capacity:
+                self.head = (self.head + 1) % self.capacity
+            else:
+                self.size += 1
+            started = True
+
+        self.timestamps[i] = timestamp_ms
+        self.columns["open"][i] = open
+        self.columns["high"][i] = high
+        self.columns["low"][i] = low
+        self.columns["close"][i] = close
+        self.columns["volume"][i] = volume
+        self._frame = None
+        return started
+
+    def column(self, name: str) -> np.ndarray:
+        """One column in time order (a copy); "timestamp" gives epoch milliseconds."""
+        values = self.timestamps if name == "timestamp" else self.columns[name]
+        end = self.head + self.size
+        if end <= self.capacity:
+            return values[self.head:end].copy()
+        return np.concatenate((values[self.head:], values[:end - self.capacity]))
+
+    def frame(self) -> pd.DataFrame:
+        """
+        The buffer as the DataFrame fetch_market_data returns (timestamp, open, high,
+        low, close, volume). Cached until the next update.
+        """
+        if self._frame is None:
+            # datetime64 cast instead of pd.to_datetime, and the column copies are handed
+            # over without another copy: ~2.5x cheaper for a 500-row frame
+            timestamps = self.column("timestamp").astype("datetime64[ms]").astype("datetime64[ns]")
+            data = {"timestamp": timestamps}
+            data.update({name: self.column(name) for name in COLUMNS})
+            self._frame = pd.DataFrame(data, copy=False)
+        return self._frame
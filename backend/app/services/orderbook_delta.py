@@ -0,0 +1,221 @@
+"""
+Order Book Delta Frames
+=======================
+MarketDataStreamer এর order book fan-out এর compact frame format — প্রতি update
+এ পুরো book publish না করে periodic full snapshot + মাঝে শুধু পরিবর্তিত level।
+
+* Snapshot frame (default প্রতি 1s) — Pub/Sub এ পাঠানো হয়
+* Delta frame — শুধু বদলানো level (`[price, size]`, size 0 = level removed)
+* Redis `latest_orderbook:*` key প্রতি update এ current book এর snapshot frame
+  (delta update এ `snapshot()`, একই seq) — reader রা কখনো পুরনো book পায় না
+* Frame একবারই serialize হয় (orjson, requirements.txt এ pinned) — একই bytes
+  Pub/Sub ও সব WebSocket client এ যায়
+* OrderBookDeltaDecoder consumer side এ আগের full `orderbook` payload ফিরিয়ে দেয়
+  (browser side: frontend/src/workers/marketDataWorker.ts)
+
+Frames are JSON text so they pass through the decode_responses=True Redis client:
+
+    {"type": "orderbook_snapshot", "seq": 41, "bids": [[p, s], ...], "asks": [...], "walls": [...], "currentPrice": m}
+    {"type": "orderbook_delta", "seq": 42, "bids": [[p, s], ...], "asks": [...], "currentPrice": m}
+
+`walls` is only sent when it changed. A delta only applies on top of the
+previous `seq`; after a gap the decoder waits for the next snapshot. Frames
+at or below the current `seq` (already contained in a `latest_orderbook`
+snapshot a client started from) are skipped.
+"""
+
+import json
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from app.helpers.orderbook_math import dynamic_wall_threshold
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:  # pinned in requirements.txt; stdlib json keeps bare checkouts working
+    ORJSON_AVAILABLE = False
+
+SNAPSHOT = "orderbook_snapshot"
+DELTA = "orderbook_delta"
+SNAPSHOT_INTERVAL_SECONDS = 1.0
+
+
+def dumps(payload: Any) -> bytes:
+    """Compact JSON bytes (orjson when installed)."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(",", ":")).encode()
+
+
+def loads(data: Any) -> Any:
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class OrderBookDeltaEncoder:
+    """
+    Turns successive order books (ccxt `bids` / `asks` level lists) into frames:
+    a full snapshot every `snapshot_interval` seconds, per-level deltas in between.
+    """
+
+    def __init__(self, snapshot_interval: float = SNAPSHOT_INTERVAL_SECONDS,
+                 clock: Callable[[], float] = time.monotonic):
+        self.snapshot_interval = snapshot_interval
+        self.clock = clock
+        self.seq = 0
+        self.is_snapshot = False  # kind of the last encoded frame
+        self._bids: Dict[float, float] = {}
+        self._asks: Dict[float, float] = {}
+        self._walls: Optional[List[Dict[str, Any]]] = None
+        self._last_snapshot: Optional[float] = None
+
+    def force_snapshot(self):
+        """The next frame is a full snapshot (e.g. after a reconnect)."""
+        self._last_snapshot = None
+
+    def snapshot(self) -> bytes:
+        """The current book (as of the last `encode`) as a snapshot frame with the same seq."""
+        bids, asks = self._bids, self._asks
+        best_bid, best_ask = next(iter(bids), None), next(iter(asks), None)
+        return dumps({
+            "type": SNAPSHOT,
+            "seq": self.seq,
+            "bids": [[p, s] for p, s in bids.items()],
+            "asks": [[p, s] for p, s in asks.items()],
+            "walls": self._walls or [],
+            "currentPrice": (best_ask + best_bid) / 2 if best_bid is not None and best_ask is not None else 0,
+        })
+
+    def encode(self, bids: Sequence[Sequence[float]], asks: Sequence[Sequence[float]]) -> bytes:
+        new_bids = {float(level[0]): float(level[1]) for level in bids}
+        new_asks = {float(level[0]): float(level[1]) for level in asks}
+        now = self.clock()
+        self.seq += 1
+        self.is_snapshot = self._last_snapshot is None or now - self._last_snapshot >= self.snapshot_interval
+
+        walls = self._find_walls(new_bids, new_asks)
+        best_bid, best_ask = next(iter(new_bids), None), next(iter(new_asks), None)
+        current_price = (best_ask + best_bid) / 2 if best_bid is not None and best_ask is not None else 0
+
+        if self.is_snapshot:
+            self._last_snapshot = now
+            frame = {
+                "type": SNAPSHOT,
+                "seq": self.seq,
+                "bids": [[p, s] for p, s in new_bids.items()],
+                "asks": [[p, s] for p, s in new_asks.items()],
+                "walls": walls,
+                "currentPrice": current_price,
+            }
+        else:
+            frame = {
+                "type": DELTA,
+                "seq": self.seq,
+                "bids": self._diff(self._bids, new_bids),
+                "asks": self._diff(self._asks, new_asks),
+                "currentPrice": current_price,
+            }
+            if walls != self._walls:
+                frame["walls"] = walls
+
+        self._bids, self._asks, self._walls = new_bids, new_asks, walls
+        return dumps(frame)
+
+    @staticmethod
+    def _diff(old: Dict[float, float], new: Dict[float, float]) -> List[List[float]]:
+        changes = [[p, s] for p, s in new.items() if old.get(p) != s]
+        changes.extend([p, 0.0] for p in old if p not in new)
+        return changes
+
+    @staticmethod
+    def _find_walls(bids: Dict[float, float], asks: Dict[float, float]) -> List[Dict[str, Any]]:
+        threshold = dynamic_wall_threshold(list(bids.values()) + list(asks.values()))
+        walls = [{"price": p, "type": "sell", "size": s} for p, s in asks.items() if s >= threshold]
+        walls.extend({"price": p, "type": "buy", "size": s} for p, s in bids.items() if s >= threshold)
+        return walls
+
+
+class OrderBookDeltaDecoder:
+    """
+    Rebuilds the full `orderbook` payload (bids / asks with running totals,
+    walls, currentPrice) from snapshot + delta frames. Other messages on the
+    channel (trade / error payloads) are returned as they are.
+    """
+
+    def __init__(self):
+        self.seq: Optional[int] = None
+        self._bids: Dict[float, float] = {}
+        self._asks: Dict[float, float] = {}
+        self._walls: List[Dict[str, Any]] = []
+        self._current_price = 0
+
+    @property
+    def synced(self) -> bool:
+        return self.seq is not None
+
+    def apply(self, message: Any) -> Optional[Dict[str, Any]]:
+        """Applies one channel message; None while waiting for a snapshot."""
+        frame = loads(message) if isinstance(message, (str, bytes, bytearray)) else message
+        kind = frame.get("type")
+        if kind == SNAPSHOT:
+            self._bids = {p: s for p, s in frame["bids"]}
+            self._asks = {p: s for p, s in frame["asks"]}
+        elif kind == DELTA:
+            if self.seq is not None and frame["seq"] <= self.seq:
+                return None  # already contained in the snapshot we started from
+            if self.seq is None or frame["seq"] != self.seq + 1:
+                self.seq = None
+                return None
+            self._apply_levels(self._bids, frame["bids"])
+            self._apply_levels(self._asks, frame["asks"])
+        else:
+            return frame
+
+        self.seq = frame["seq"]
+        if "walls" in frame:
+            self._walls = frame["walls"]
+        self._current_price = frame.get("currentPrice", 0)
+        return self.payload()
+
+    @staticmethod
+    def _apply_levels(book: Dict[float, float], changes: List[List[float]]):
+        for price, size in changes:
+            if size:
+                book[price] = size
+            else:
+                book.pop(price, None)
+
+    def payload(self) -> Dict[str, Any]:
+        return {
+            "type": "orderbook",
+            "bids": self._levels(sorted(self._bids.items(), reverse=True)),
+            "asks": self._levels(sorted(self._asks.items())),
+            "walls": self._walls,
+            "currentPrice": self._current_price,
+        }
+
+    @staticmethod
+    def _levels(levels) -> List[Dict[str, float]]:
+        result = []
+        total = 0
+        for price, size in levels:
+            total += size
+            result.append({"price": price, "size": size, "total": total})
+        return result
+
+
+def load_cached_orderbook(raw: Any) -> Optional[Dict[str, List[List[float]]]]:
+    """
+    `latest_orderbook:*` Redis value -> {"bids": [[price, size], ...], "asks": [...]}.
+    Accepts snapshot frames and the older {"price", "size"} level payloads.
+    """
+    if not raw:
+        return None
+    data = loads(raw)
+    return {
+        side: [[level["price"], level["size"]] if isinstance(level, dict) else [level[0], level[1]]
+               for level in data.get(side, [])]
+        for side in ("bids", "asks")
+    }
@@ -0,0 +1,196 @@
+"""
+Portfolio Balance Aggregation
+=============================
+`GET /portfolio/balances` এর জন্য সব API Key এর balance একসাথে (concurrently) আনে।
+
+* Balance fetch গুলো bounded asyncio.gather দিয়ে চলে, প্রতিটি exchange এর timeout আলাদা
+* Exchange client গুলো exchange_pool থেকে আসে (request প্রতি নতুন init হয় না)
+* Pricing হয় একটি shared fetch_tickers snapshot থেকে, যা কয়েক সেকেন্ড cache থাকে
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import ccxt.async_support as ccxt
+
+from app.core import security
+from app.services import exchange_pool
+
+logger = logging.getLogger(__name__)
+
+MAX_CONCURRENT_BALANCE_FETCHES = 8
+BALANCE_TIMEOUT_SECONDS = 10
+TICKER_SNAPSHOT_TTL_SECONDS = 5
+PRICING_EXCHANGE = "binance"
+STABLECOINS = ['USDT', 'USDC', 'DAI', 'BUSD']
+
+
+class TickerSnapshotCache:
+    """
+    One shared `fetch_tickers()` result for every portfolio request.
+    Refreshed at most once per TTL; concurrent callers await the same
+    in-flight fetch instead of each firing their own.
+    """
+
+    def __init__(self, exchange_id: str = PRICING_EXCHANGE, ttl: float = TICKER_SNAPSHOT_TTL_SECONDS,
+                 exchange_factory: Optional[Callable[[str], Any]] = None, clock: Callable[[], float] = time.monotonic):
+        self.exchange_id = exchange_id
+        self.ttl = ttl
+        self.exchange_factory = exchange_factory or (lambda ex_id: getattr(ccxt, ex_id)({'enableRateLimit': True}))
+        self.clock = clock
+        self._exchange = None
+        self._tickers: Optional[Dict[str, Any]] = None
+        self._fetched_at = 0.0
+        self._inflight: Optional[asyncio.Task] = None
+
+    async def get(self) -> Dict[str, Any]:
+        if self._tickers is not None and self.clock() - self._fetched_at < self.ttl:
+            return self._tickers
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.create_task(self._refresh())
+        return await asyncio.shield(self._inflight)
+
+    async def _refresh(self) -> Dict[str, Any]:
+        if self._exchange is None:
+            self._exchange = self.exchange_factory(self.exchange_id)
+        tickers = await self._exchange.fetch_tickers()
+        self._tickers, self._fetched_at = tickers, self.clock()
+        return tickers
+
+    async def close(self):
+        if self._exchange is not None:
+            await self._exchange.close()
+            self._exchange = None
+
+
+ticker_snapshot = TickerSnapshotCache()
+
+
+async def _fetch_key_balance(key_record, semaphore: asyncio.Semaphore, timeout: float) -> Optional[Tuple[str, Dict[str, float]]]:
+    exchange_id = key_record.exchange.lower()
+    if exchange_id not in ccxt.exchanges:
+        logger.warning(f"Exchange {exchange_id} not supported by CCXT")
+        return None
+
+    try:
+        # Decrypt credentials
+        decrypted_api_key = security.decrypt_key(key_record.api_key)
+        decrypted_secret = security.decrypt_key(key_record.secret_key)
+        decrypted_passphrase = None
+        if key_record.passphrase:
+            decrypted_passphrase = security.decrypt_key(key_record.passphrase)
+    except Exception as decrypt_error:
+        logger.error(f"Failed to decrypt keys for {exchange_id}: {decrypt_error}")
+        return None
+
+    async def fetch():
+        api = await exchange_pool.get_or_create_exchange(
+            api_key_id=key_record.id,
+            exchange_name=exchange_id,
+            decrypted_api_key=decrypted_api_key,
+            decrypted_secret=decrypted_secret,
+            is_futures=False,
+            passphrase=decrypted_passphrase,
+        )
+        return await api.fetch_balance()
+
+    async with semaphore:
+        try:
+            balance = await asyncio.wait_for(fetch(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"Balance fetch from {exchange_id} (key {key_record.id}) timed out after {timeout}s")
+            return None
+        except Exception as e:
+            logger.error(f"Error fetching balance from {exchange_id} (key {key_record.id}): {e}")
+            return None
+    return exchange_id, balance.get('total', {}) or {}
+
+
+def _merge_balances(results: List[Optional[Tuple[str, Dict[str, float]]]]) -> Dict[str, Dict[str, Any]]:
+    assets: Dict[str, Dict[str, Any]] = {}
+    for result in results:
+        if result is None:
+            continue
+        exchange_id, total = result
+        for symbol, amount in total.items():
+            if amount and amount > 0:
+                if symbol not in assets:
+                    assets[symbol] = {
+                        "id": symbol,
+                        "symbol": symbol,
+                        "name": symbol, # Default to symbol as name
+                        "amount": 0.0,
+                        "value": 0.0,
+                        "price": 0.0,
+                        "price24h": 0.0,
+                        "history": [],
+                        "allocations": []
+                    }
+                assets[symbol]["amount"] += amount
+                assets[symbol]["allocations"].append({
+                    "exchange": exchange_id,
+                    "amount": amount
+                })
+    return assets
+
+
+def _price_assets(assets: Dict[str, Dict[str, Any]], tickers: Dict[str, Any]):
+    for symbol, asset in assets.items():
+        ticker = tickers.get(f"{symbol}/USDT")
+        price = 0.0
+        price24h = 0.0
+
+        if ticker:
+            price = ticker.get('last', 0.0) or 0.0
+            price24h = ticker.get('open', 0.0) or price # mock 24h price as open price
+        elif symbol in STABLECOINS:
+            price = 1.0
+            price24h = 1.0
+
+        asset["price"] = price
+        asset["price24h"] = price24h
+        asset["value"] = asset["amount"] * price
+
+        # Create a simple mock history to make sparklines work
+        asset["history"] = [
+            {"time": "24h ago", "value": asset["amount"] * price24h},
+            {"time": "12h ago", "value": asset["amount"] * ((price + price24h) / 2)},
+            {"time": "Now", "value": asset["amount"] * price}
+        ]
+
+
+async def aggregate_balances(
+    api_keys,
+    tickers: TickerSnapshotCache = None,
+    max_concurrency: int = MAX_CONCURRENT_BALANCE_FETCHES,
+    timeout: float = BALANCE_TIMEOUT_SECONDS,
+) -> Dict[str, Any]:
+    """
+    Fetches every key's balance concurrently (bounded, per-exchange timeout),
+    merges them per asset and prices the result from the shared ticker snapshot.
+    A key that fails or times out is left out; the others are still returned.
+    """
+    tickers = tickers or ticker_snapshot
+    # Ticker snapshot does not depend on balances — fetch it alongside them
+    tickers_task = asyncio.create_task(tickers.get())
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+    results = await asyncio.gather(*(_fetch_key_balance(k, semaphore, timeout) for k in api_keys))
+    assets = _merge_balances(results)
+
+    try:
+        snapshot = await tickers_task
+    except Exception as e:
+        logger.error(f"Error fetching tickers for pricing: {e}")
+    else:
+        if assets:
+            _price_assets(assets, snapshot)
+
+    total_portfolio_value = sum(item["value"] for item in assets.values())
+    return {
+        "status": "success",
+        "total_portfolio_value": round(total_portfolio_value, 2),
+        "assets": list(assets.values())
+    }
@@ -1,26 +1,126 @@
+import os
+import time
+import threading
 import numpy as np
 import pandas as pd
 import ccxt
+import joblib
+from collections import deque
 from hmmlearn.hmm import GaussianHMM
+from scipy.special import logsumexp
+from scipy.stats import multivariate_normal
 import logging
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) # backend/app
+REGIME_MODEL_DIR = os.path.join(BASE_DIR, "regime_models") # backend/app/regime_models
+
+# Rolling volatility window used by prepare_features (1 day for 1h data)
+VOLATILITY_WINDOW = 24
+
+# Trend Score:
+# Bull Volatile: 1.0 (Strong Up)
+# Bull Stable: 0.5 (Steady Up)
+# Bear Stable: -0.5 (Steady Down)
+# Bear Volatile: -1.0 (Strong Down)
+TREND_SCORE_MAP = {
+    'Bull Volatile': 1.0,
+    'Bull Stable': 0.5,
+    'Bear Stable': -0.5,
+    'Bear Volatile': -1.0
+}
+
+# Volatility Score (Normalized across states):
+# Volatile regimes -> High score (0.8 - 1.0)
+# Stable regimes -> Low score (0.0 - 0.4)
+VOLATILITY_SCORE_MAP = {
+    'Bull Volatile': 0.9,
+    'Bull Stable': 0.2,
+    'Bear Stable': 0.3,
+    'Bear Volatile': 0.9
+}
+
+
+def _log_emissions(model: GaussianHMM, X: np.ndarray) -> np.ndarray:
+    """Per-state Gaussian log densities, shape (n_samples, n_components)."""
+    return np.column_stack([
+        np.atleast_1d(multivariate_normal.logpdf(X, mean=model.means_[k], cov=model.covars_[k], allow_singular=True))
+        for k in range(model.n_components)
+    ])
+
+
+def _log_transmat(model: GaussianHMM) -> np.ndarray:
+    return np.log(np.clip(model.transmat_, 1e-300, None))
+
+
+def forward_filter(log_alpha: np.ndarray, log_transmat: np.ndarray, log_b: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Runs the HMM forward recursion over new observations only.
+
+    Returns (final log posterior, per-step log posteriors, per-step predictive
+    log-likelihoods log p(x_t | x_1..t-1)).
+    """
+    posteriors = np.empty_like(log_b)
+    step_ll = np.empty(len(log_b))
+    for t, lb in enumerate(log_b):
+        joint = logsumexp(log_alpha[:, None] + log_transmat, axis=0) + lb
+        norm = logsumexp(joint)
+        log_alpha = joint - norm
+        posteriors[t] = log_alpha
+        step_ll[t] = norm
+    return log_alpha, posteriors, step_ll
+
+
 class RegimeService:
-    def __init__(self, symbol: str = 'BTC/USDT', timeframe: str = '1h', limit: int = 2000):
+    """
+    Stateful HMM regime detector for a single (symbol, timeframe).
+
+    The fitted model and the forward-filter posterior are persisted to disk.
+    Each request only fetches and filters bars appended since the last call;
+    a full refit happens on a bar/age schedule or when the predictive
+    log-likelihood of recent bars drifts below the in-sample baseline.
+    """
+
+    def __init__(
+        self,
+        symbol: str = 'BTC/USDT',
+        timeframe: str = '1h',
+        limit: int = 2000,
+        refit_every_bars: int = 168,
+        refit_max_age_seconds: float = 7 * 24 * 3600,
+        drift_window: int = 24,
+        drift_tolerance: float = 1.5,
+        model_dir: Optional[str] = REGIME_MODEL_DIR,
+        exchange: Any = None,
+    ):
         self.symbol = symbol
         self.timeframe = timeframe
         self.limit = limit
-        self.exchange = ccxt.binance()
+        self.refit_every_bars = refit_every_bars
+        self.refit_max_age_seconds = refit_max_age_seconds
+        self.drift_window = drift_window
+        self.drift_tolerance = drift_tolerance
+        self.model_dir = model_dir
+        self.exchange = exchange if exchange is not None else ccxt.binance()
         self.model = GaussianHMM(n_components=4, covariance_type="full", n_iter=100, random_state=42)
-        
-    def fetch_data(self) -> pd.DataFrame:
-        """Fetches OHLCV data from Binance."""
+        self.state: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+
+    @property
+    def model_path(self) -> Optional[str]:
+        if not self.model_dir:
+            return None
+        safe_symbol = self.symbol.replace("/", "_")
+        return os.path.join(self.model_dir, f"hmm_{safe_symbol}_{self.timeframe}.joblib")
+
+    def fetch_data(self, since: Optional[int] = None) -> pd.DataFrame:
+        """Fetches OHLCV data from Binance (only bars from `since` onwards when given)."""
         try:
-            ohlcv = self.exchange.fetch_ohlcv(self.symbol, self.timeframe, limit=self.limit)
+            ohlcv = self.exchange.fetch_ohlcv(self.symbol, self.timeframe, since=since, limit=self.limit)
             df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
             df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
             return df
@@ -33,143 +133,243 @@ class RegimeService:
         df = df.copy()
         # Log Returns
         df['log_return'] = np.log(df['close'] / df['close'].shift(1))
-        
+
         # Rolling Volatility (Standard Deviation of Log Returns) - 24 period window (1 day for 1h data)
-        df['volatility'] = df['log_return'].rolling(window=24).std()
-        
+        df['volatility'] = df['log_return'].rolling(window=VOLATILITY_WINDOW).std()
+
         # Scale features to avoid numerical instability with HMM (small variances)
         # Using percentage terms (x 100)
         df['log_return'] = df['log_return'] * 100
         df['volatility'] = df['volatility'] * 100
-        
+
         # Handle Inf values if any (e.g. log(0)) and drop NaNs
         df.replace([np.inf, -np.inf], np.nan, inplace=True)
         df.dropna(inplace=True)
         return df
 
-    def fit_predict(self, df: pd.DataFrame) -> Dict[str, Any]:
-        """Fits HMM model and predicts regimes."""
-        # Feature matrix
-        X = df[['log_return', 'volatility']].values
-        
-        # Fit model
-        self.model.fit(X)
-        
-        # Predict states
-        hidden_states = self.model.predict(X)
-        df['state'] = hidden_states
-        
+    def _map_states(self, X: np.ndarray, hidden_states: np.ndarray) -> Dict[int, str]:
         # Calculate stats for each state to map them
         state_stats = []
         for i in range(self.model.n_components):
             state_mask = (hidden_states == i)
-            mean_return = X[state_mask, 0].mean()
-            mean_volatility = X[state_mask, 1].mean()
+            mean_return = X[state_mask, 0].mean() if state_mask.any() else self.model.means_[i, 0]
+            mean_volatility = X[state_mask, 1].mean() if state_mask.any() else self.model.means_[i, 1]
             state_stats.append({
                 'state': i,
                 'mean_return': mean_return,
                 'mean_volatility': mean_volatility
             })
-            
+
         # Sort/Map States
         # Mapping logic:
         # We want: [Bull Stable, Bull Volatile, Bear Stable, Bear Volatile]
         #
-        # Let's categorize based on Return and Volatility relative to the global mean/median or just relative sorting.
-        #
-        # A robust way:
         # 1. Sort by Mean Return. Top 2 are Bullish, Bottom 2 are Bearish.
         # 2. Within Bullish: Higher Volatility -> Bull Volatile, Lower -> Bull Stable
         # 3. Within Bearish: Higher Volatility -> Bear Volatile, Lower -> Bear Stable
-        
+
         sorted_by_return = sorted(state_stats, key=lambda x: x['mean_return'], reverse=True)
         bullish_states = sorted_by_return[:2]
         bearish_states = sorted_by_return[2:]
-        
+
         # Sort bullish by volatility
         bullish_states.sort(key=lambda x: x['mean_volatility'])
         bull_stable = bullish_states[0]
         bull_volatile = bullish_states[1]
-        
+
         # Sort bearish by volatility
         bearish_states.sort(key=lambda x: x['mean_volatility'])
         bear_stable = bearish_states[0]
         bear_volatile = bearish_states[1]
-        
+
         # Create mapping dictionary {original_state_id: 'Label'}
-        regime_map = {
-            bull_stable['state']: 'Bull Stable',
-            bull_volatile['state']: 'Bull Volatile',
-            bear_stable['state']: 'Bear Stable',
-            bear_volatile['state']: 'Bear Volatile'
+        return {
+            int(bull_stable['state']): 'Bull Stable',
+            int(bull_volatile['state']): 'Bull Volatile',
+            int(bear_stable['state']): 'Bear Stable',
+            int(bear_volatile['state']): 'Bear Volatile'
         }
-        
-        # Assign mapped labels to dataframe
-        df['regime'] = df['state'].map(regime_map)
-        
-        # Get current state info
-        current_state_idx = hidden_states[-1]
-        current_regime = regime_map[current_state_idx]
-        
-        # Calculate Trend Score (-1 to 1) and Volatility Score (0 to 1) for the Compass
-        # Normalize stats for scores
-        # Simplified scoring based on the regime properties
-        
-        # Trend Score:
-        # Bull Volatile: 1.0 (Strong Up)
-        # Bull Stable: 0.5 (Steady Up)
-        # Bear Stable: -0.5 (Steady Down)
-        # Bear Volatile: -1.0 (Strong Down)
-        
-        trend_score_map = {
-            'Bull Volatile': 1.0, 
-            'Bull Stable': 0.5,
-            'Bear Stable': -0.5,
-            'Bear Volatile': -1.0
-        }
-        
-        # Volatility Score (Normalized across states):
-        # We can use the rank or the actual volatility value normalized.
-        # Let's use a mapping for simplicity and consistency with the "Compass" metaphor.
-        # Volatile regimes -> High score (0.8 - 1.0)
-        # Stable regimes -> Low score (0.0 - 0.4)
-        
-        volatility_score_map = {
-            'Bull Volatile': 0.9,
-            'Bull Stable': 0.2,
-            'Bear Stable': 0.3,
-            'Bear Volatile': 0.9
+
+    def fit_predict(self, df: pd.DataFrame) -> Dict[str, Any]:
+        """
+        Fits the HMM on all closed bars and seeds the incremental state.
+
+        The last row is treated as the still-forming candle: it is filtered on
+        top of the fitted posterior but not committed to the persisted state.
+        """
+        closed, forming = df.iloc[:-1].copy(), df.iloc[-1:]
+        X = closed[['log_return', 'volatility']].values
+
+        # Fit model
+        self.model.fit(X)
+
+        # Predict states
+        hidden_states = self.model.predict(X)
+        regime_map = self._map_states(X, hidden_states)
+        closed['regime'] = pd.Series(hidden_states, index=closed.index).map(regime_map)
+
+        # Filtered posterior at the last closed bar equals the smoothed one
+        posterior = self.model.predict_proba(X)[-1]
+        tail_cols = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+
+        self.state = {
+            'model': self.model,
+            'regime_map': regime_map,
+            'log_alpha': np.log(np.clip(posterior, 1e-300, None)),
+            'last_timestamp': closed['timestamp'].iloc[-1],
+            'tail': closed[tail_cols].tail(VOLATILITY_WINDOW + 1).reset_index(drop=True),
+            'history': closed[['timestamp', 'close', 'regime', 'log_return', 'volatility']].tail(100).reset_index(drop=True),
+            'baseline_ll': self.model.score(X) / len(X),
+            'recent_ll': deque(maxlen=self.drift_window),
+            'bars_since_refit': 0,
+            'fitted_at': time.time(),
         }
+        self._save_state()
+        return self._build_result(forming)
+
+    def update(self, df_new: pd.DataFrame) -> Dict[str, Any]:
+        """
+        Forward-filters bars appended since the last committed bar.
+
+        Cost is O(new bars): only the persisted tail (enough closes for the
+        rolling volatility) is re-featurized alongside the new rows.
+        """
+        state = self.state
+        last_ts = state['last_timestamp']
+        df_new = df_new[df_new['timestamp'] > last_ts]
+        if df_new.empty:
+            return self._build_result(df_new)
+
+        raw = pd.concat([state['tail'], df_new], ignore_index=True)
+        feats = self.prepare_features(raw)
+        feats = feats[feats['timestamp'] > last_ts]
+        closed, forming = feats.iloc[:-1].copy(), feats.iloc[-1:]
+
+        if not closed.empty:
+            model = state['model']
+            log_b = _log_emissions(model, closed[['log_return', 'volatility']].values)
+            log_alpha, posteriors, step_ll = forward_filter(state['log_alpha'], _log_transmat(model), log_b)
+            closed['regime'] = [state['regime_map'][int(k)] for k in posteriors.argmax(axis=1)]
+
+            state['log_alpha'] = log_alpha
+            state['last_timestamp'] = closed['timestamp'].iloc[-1]
+            closed_raw = raw[raw['timestamp'] <= state['last_timestamp']]
+            state['tail'] = closed_raw.tail(VOLATILITY_WINDOW + 1).reset_index(drop=True)
+            state['history'] = pd.concat(
+                [state['history'], closed[['timestamp', 'close', 'regime', 'log_return', 'volatility']]],
+                ignore_index=True
+            ).tail(100).reset_index(drop=True)
+            state['recent_ll'].extend(step_ll.tolist())
+            state['bars_since_refit'] += len(closed)
+            self._save_state()
+
+        return self._build_result(forming)
+
+    def needs_refit(self) -> bool:
+        """Schedule (bars / age) or log-likelihood drift trigger."""
+        state = self.state
+        if state is None:
+            return True
+        if state['bars_since_refit'] >= self.refit_every_bars:
+            return True
+        if time.time() - state['fitted_at'] >= self.refit_max_age_seconds:
+            return True
+        recent = state['recent_ll']
+        if len(recent) == recent.maxlen and np.mean(recent) < state['baseline_ll'] - self.drift_tolerance:
+            logger.info(f"Regime HMM drift detected for {self.symbol} {self.timeframe}: "
+                        f"recent LL {np.mean(recent):.3f} vs baseline {state['baseline_ll']:.3f}")
+            return True
+        return False
+
+    def _build_result(self, forming: pd.DataFrame) -> Dict[str, Any]:
+        state = self.state
+        model = state['model']
+        regime_map = state['regime_map']
+        history = state['history']
+        log_alpha = state['log_alpha']
+
+        # Score the in-progress candle without committing it
+        if not forming.empty:
+            log_b = _log_emissions(model, forming[['log_return', 'volatility']].values)
+            log_alpha, _, _ = forward_filter(log_alpha, _log_transmat(model), log_b)
+            forming = forming[['timestamp', 'close', 'log_return', 'volatility']].copy()
+            forming['regime'] = regime_map[int(np.argmax(log_alpha))]
+            history = pd.concat([history, forming], ignore_index=True).tail(100)
 
-        current_trend_score = trend_score_map[current_regime]
-        current_vol_score = volatility_score_map[current_regime]
-        
-        # Transition Matrix
-        transition_matrix = self.model.transmat_
-        
-        # Output structure
-        result = {
+        current_regime = regime_map[int(np.argmax(log_alpha))]
+
+        return {
             "current_regime": current_regime,
-            "trend_score": current_trend_score,
-            "volatility_score": current_vol_score,
-            "transition_matrix": transition_matrix.tolist(),
+            "trend_score": TREND_SCORE_MAP[current_regime],
+            "volatility_score": VOLATILITY_SCORE_MAP[current_regime],
+            "transition_matrix": model.transmat_.tolist(),
             "regime_map": regime_map,
+            "regime_probabilities": {regime_map[k]: float(p) for k, p in enumerate(np.exp(log_alpha))},
             # Return last 100 points for validaton/charting
-            "history": df[['timestamp', 'close', 'regime', 'log_return', 'volatility']].tail(100).to_dict(orient='records')
+            "history": history[['timestamp', 'close', 'regime', 'log_return', 'volatility']].to_dict(orient='records')
         }
-        
-        return result
 
-    def execute(self):
-        """Main execution method."""
+    def _save_state(self):
+        path = self.model_path
+        if not path:
+            return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            joblib.dump(self.state, path)
+        except Exception as e:
+            logger.warning(f"Could not persist regime model to {path}: {e}")
+
+    def _load_state(self) -> Optional[Dict[str, Any]]:
+        path = self.model_path
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            state = joblib.load(path)
+            state['recent_ll'] = deque(state['recent_ll'], maxlen=self.drift_window)
+            self.model = state['model']
+            return state
+        except Exception as e:
+            logger.warning(f"Could not load regime model from {path}: {e}")
+            return None
+
+    def refit(self) -> Dict[str, Any]:
+        """Full refit on the last `limit` bars."""
         df = self.fetch_data()
         df = self.prepare_features(df)
-        result = self.fit_predict(df)
-        return result
+        return self.fit_predict(df)
+
+    def execute(self):
+        """Main execution method."""
+        with self._lock:
+            if self.state is None:
+                self.state = self._load_state()
+            if self.needs_refit():
+                return self.refit()
+
+            since = int(self.state['last_timestamp'].value // 1_000_000)
+            result = self.update(self.fetch_data(since=since))
+            if self.needs_refit():
+                return self.refit()
+            return result
+
+
+# One long-lived service per (symbol, timeframe)
+_services: Dict[Tuple[str, str], RegimeService] = {}
+_services_lock = threading.Lock()
+
+
+def get_regime_service(symbol: str = 'BTC/USDT', timeframe: str = '1h') -> RegimeService:
+    key = (symbol, timeframe)
+    with _services_lock:
+        service = _services.get(key)
+        if service is None:
+            service = RegimeService(symbol=symbol, timeframe=timeframe)
+            _services[key] = service
+        return service
 
 # Simple test block
 if __name__ == "__main__":
-    service = RegimeService()
+    service = get_regime_service()
     try:
         result = service.execute()
         print(f"Current Regime: {result['current_regime']}")
@@ -1,12 +1,14 @@
 import os
 import pandas as pd
-import quantstats as qs
-from weasyprint import HTML
 import io
+import hashlib
+import tempfile
+import matplotlib
 import matplotlib.pyplot as plt
 import logging
+import numpy as np
 
-# ✅ ফিক্স ১: ফন্ট ওয়ার্নিং বন্ধ করা
+# ✅ ফিক্স ১: ফন্ট ওয়ার্নিং বন্ধ করা
 logging.getLogger('matplotlib.font_manager').disabled = True
 plt.rcParams['font.family'] = 'sans-serif'
 plt.rcParams['font.sans-serif'] = ['Liberation Sans', 'DejaVu Sans', 'Arial', 'sans-serif']
@@ -17,47 +19,135 @@ REPORT_DIR = os.path.join(BASE_DIR, "reports") # backend/app/reports
 
 os.makedirs(REPORT_DIR, exist_ok=True)
 
+# quantstats (~2s) and weasyprint are imported on first render, so only the
+# report workers pay for them — not every process that imports this module.
+_qs = None
+_weasy_html = None
+
+
+def _quantstats():
+    global _qs
+    if _qs is None:
+        import quantstats as qs
+        _qs = qs
+    return _qs
+
+
+def _weasyprint_html():
+    global _weasy_html
+    if _weasy_html is None:
+        from weasyprint import HTML
+        _weasy_html = HTML
+    return _weasy_html
+
+
+def warm_up(pdf: bool = True):
+    """
+    Loads quantstats/matplotlib (and weasyprint) and renders a tiny report
+    once, so font caches and templates are hot before the first real job.
+    Called once per report worker process.
+    """
+    matplotlib.use("Agg")
+    qs = _quantstats()
+    returns = pd.Series(np.linspace(-0.01, 0.01, 30), index=pd.date_range("2020-01-01", periods=30))
+    with tempfile.TemporaryDirectory() as tmp:
+        html_path = os.path.join(tmp, "warmup.html")
+        qs.reports.html(returns, output=html_path, title="warmup", download_filename=html_path)
+        if pdf:
+            try:
+                _weasyprint_html()(filename=html_path).write_pdf(os.path.join(tmp, "warmup.pdf"))
+            except Exception as e:
+                print(f"⚠️ weasyprint warm-up skipped: {e}")
+
+
+def _parse_returns(returns_json: str) -> pd.Series:
+    returns = pd.read_json(io.StringIO(returns_json), typ='series')
+    returns.index = pd.to_datetime(returns.index)
+    if returns.index.tz is not None:
+        returns.index = returns.index.tz_localize(None)
+    return returns
+
+
+def report_cache_key(returns: pd.Series, symbol: str, timeframe: str, format: str) -> str:
+    """Content hash of the returns series + report options (independent of JSON formatting)."""
+    h = hashlib.sha256()
+    h.update(returns.index.asi8.tobytes())
+    h.update(np.ascontiguousarray(returns.to_numpy(dtype=np.float64)).tobytes())
+    h.update(f"|{symbol}|{timeframe}|{format}".encode())
+    return h.hexdigest()[:32]
+
+
+def report_path(returns: pd.Series, symbol: str, timeframe: str, format: str) -> str:
+    # ✅ ফিক্স ৩: ফাইলের নাম স্যানিটাইজ করা (BTC/USDT -> BTC_USDT)
+    safe_symbol = symbol.replace("/", "_")
+    key = report_cache_key(returns, symbol, timeframe, format)
+    return os.path.join(REPORT_DIR, f"report_{safe_symbol}_{timeframe}_{key}.{format}")
+
+
+def cached_report_path(returns_json: str, symbol: str, timeframe: str, format: str = "pdf"):
+    """Path of an already rendered report for this data, or None."""
+    try:
+        path = report_path(_parse_returns(returns_json), symbol, timeframe, format)
+    except Exception:
+        return None
+    return path if os.path.exists(path) else None
+
+
+def _render_atomic(path: str, render):
+    # Write to a temp file in the same folder, then rename — readers never
+    # see a half-written report and concurrent renders of one key are safe.
+    fd, tmp_path = tempfile.mkstemp(dir=REPORT_DIR, suffix=os.path.splitext(path)[1])
+    os.close(fd)
+    try:
+        render(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
 def generate_report(task_id: str, returns_json: str, symbol: str, timeframe: str, format: str = "pdf"):
     try:
         print(f"📄 Generating report for task: {task_id}")
 
         # ১. JSON ডাটা প্রসেসিং
         try:
-            returns = pd.read_json(io.StringIO(returns_json), typ='series')
-            returns.index = pd.to_datetime(returns.index)
-            if returns.index.tz is not None:
-                returns.index = returns.index.tz_localize(None)
+            returns = _parse_returns(returns_json)
         except Exception as e:
             print(f"⚠️ Data conversion error: {e}")
             return None
 
-        # ✅ ফিক্স ৩: ফাইলের নাম স্যানিটাইজ করা (BTC/USDT -> BTC_USDT)
-        safe_symbol = symbol.replace("/", "_")
-        
-        filename = f"report_{safe_symbol}_{timeframe}_{task_id}.html"
-        file_path = os.path.join(REPORT_DIR, filename)
-
         # ✅ ফিক্স ৪: ফোল্ডার আছে কিনা নিশ্চিত করা
         if not os.path.exists(REPORT_DIR):
             os.makedirs(REPORT_DIR)
 
-        # HTML রিপোর্ট জেনারেট
-        qs.reports.html(returns, output=file_path, title=f"Backtest Report - {symbol}", download_filename=file_path)
-        print(f"✅ HTML Report saved: {file_path}")
+        # Same data + options → same file: serve it from disk
+        target_path = report_path(returns, symbol, timeframe, format)
+        if os.path.exists(target_path):
+            print(f"♻️ Report cache hit: {target_path}")
+            return target_path
+
+        # HTML রিপোর্ট জেনারেট (PDF এর জন্যও HTML লাগে, তাই সেটাও cache হয়)
+        file_path = report_path(returns, symbol, timeframe, "html")
+        if not os.path.exists(file_path):
+            qs = _quantstats()
+            _render_atomic(file_path, lambda out: qs.reports.html(
+                returns, output=out, title=f"Backtest Report - {symbol}", download_filename=out
+            ))
+            print(f"✅ HTML Report saved: {file_path}")
 
         if format == "html":
             return file_path
 
         # PDF কনভার্শন
         if format == "pdf":
-            pdf_name = f"report_{safe_symbol}_{timeframe}_{task_id}.pdf"
-            pdf_path = os.path.join(REPORT_DIR, pdf_name)
-            HTML(filename=file_path).write_pdf(pdf_path)
-            print(f"✅ PDF Report saved: {pdf_path}")
-            return pdf_path
-            
+            HTML = _weasyprint_html()
+            _render_atomic(target_path, lambda out: HTML(filename=file_path).write_pdf(out))
+            print(f"✅ PDF Report saved: {target_path}")
+            return target_path
+
     except Exception as e:
         import traceback
         print(f"❌ Report Generation Error: {e}")
         print(traceback.format_exc()) # বিস্তারিত এরর লগ
-        return None
\ No newline at end of file
+        return None
@@ -0,0 +1,240 @@
+"""
+SOR Session Pool
+================
+Per-worker-process pool of ccxt async exchange sessions for SOR child orders.
+
+A TWAP/VWAP parent order fans out into many child slices that all hit the
+same exchange with the same credentials. Instead of building a new exchange
+instance (market load + TLS handshake) and a new event loop per slice, each
+Celery worker process keeps:
+
+  * one long-lived event loop (`run()`), recreated only after a fork
+  * one exchange session per (exchange, credentials hash) with markets loaded
+
+Eviction policy:
+  * max age  - sessions older than `max_age_seconds` are rebuilt
+  * idle     - sessions unused for `idle_seconds` are closed
+  * LRU      - at most `max_sessions` sessions are kept open
+  * errors   - NetworkError / AuthenticationError inside `session()` evicts
+  * health   - a session idle for `health_check_interval` is probed with
+               `fetch_time()` before reuse; a failed probe rebuilds it
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import ccxt.async_support as ccxt
+
+logger = logging.getLogger(__name__)
+
+SESSION_MAX_AGE_SECONDS = 3600
+SESSION_IDLE_SECONDS = 900
+HEALTH_CHECK_INTERVAL_SECONDS = 60
+MAX_SESSIONS = 32
+
+# Errors after which a cached session is no longer trusted
+EVICTING_ERRORS = (ccxt.NetworkError, ccxt.AuthenticationError)
+
+SessionKey = Tuple[str, str]
+
+
+def credentials_hash(api_key: str, secret: str, passphrase: Optional[str] = None) -> str:
+    """SHA-256 of the credentials so raw secrets never become dict keys or log lines."""
+    raw = f"{api_key}\x00{secret}\x00{passphrase or ''}".encode()
+    return hashlib.sha256(raw).hexdigest()
+
+
+def default_exchange_factory(exchange_id: str, api_key: str, secret: str, passphrase: Optional[str] = None):
+    exchange_class = getattr(ccxt, exchange_id.lower(), None)
+    if not exchange_class:
+        raise ValueError(f"Unsupported exchange: {exchange_id}")
+
+    config = {
+        'apiKey': api_key,
+        'secret': secret,
+        'enableRateLimit': True,
+        'options': {
+            'adjustForTimeDifference': True,
+            'recvWindow': 60000 if exchange_id.lower() == 'mexc' else 10000,
+        },
+    }
+    if passphrase:
+        config['password'] = passphrase
+    return exchange_class(config)
+
+
+class _Session:
+    __slots__ = ("exchange", "created_at", "last_used", "last_checked")
+
+    def __init__(self, exchange: Any, now: float):
+        self.exchange = exchange
+        self.created_at = now
+        self.last_used = now
+        self.last_checked = now
+
+
+class SorSessionPool:
+    def __init__(
+        self,
+        exchange_factory: Callable[..., Any] = default_exchange_factory,
+        max_sessions: int = MAX_SESSIONS,
+        max_age_seconds: float = SESSION_MAX_AGE_SECONDS,
+        idle_seconds: float = SESSION_IDLE_SECONDS,
+        health_check_interval: float = HEALTH_CHECK_INTERVAL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.exchange_factory = exchange_factory
+        self.max_sessions = max_sessions
+        self.max_age_seconds = max_age_seconds
+        self.idle_seconds = idle_seconds
+        self.health_check_interval = health_check_interval
+        self.clock = clock
+
+        self._sessions: "OrderedDict[SessionKey, _Session]" = OrderedDict()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._pid = os.getpid()
+        self.stats: Dict[str, int] = {"created": 0, "hits": 0, "evicted": 0, "health_failures": 0}
+
+    # --- Event loop -------------------------------------------------------
+
+    def _check_fork(self):
+        # Sessions and the loop inherited from a parent process share its
+        # sockets; drop them without closing so the parent is unaffected.
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._sessions = OrderedDict()
+            self._loop = None
+            self._lock = None
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        self._check_fork()
+        if self._loop is None or self._loop.is_closed():
+            self._loop = asyncio.new_event_loop()
+            self._lock = None
+        return self._loop
+
+    def run(self, coro):
+        """Runs `coro` on this worker's persistent loop (sync Celery entry point)."""
+        loop = self.loop
+        asyncio.set_event_loop(loop)
+        return loop.run_until_complete(coro)
+
+    # --- Sessions ---------------------------------------------------------
+
+    async def _close(self, session: _Session):
+        try:
+            await session.exchange.close()
+        except Exception:
+            pass
+
+    async def _evict_key(self, key: SessionKey, reason: str):
+        session = self._sessions.pop(key, None)
+        if session is None:
+            return
+        self.stats["evicted"] += 1
+        logger.info(f"[SorSessionPool] Evicting {key[0]} session ({reason})")
+        await self._close(session)
+
+    async def _sweep(self, now: float):
+        for key, session in list(self._sessions.items()):
+            if now - session.created_at >= self.max_age_seconds:
+                await self._evict_key(key, "max age")
+            elif now - session.last_used >= self.idle_seconds:
+                await self._evict_key(key, "idle")
+        while len(self._sessions) >= self.max_sessions:
+            oldest = next(iter(self._sessions))
+            await self._evict_key(oldest, "lru")
+
+    async def _healthy(self, session: _Session, now: float) -> bool:
+        if now - session.last_checked < self.health_check_interval:
+            return True
+        try:
+            await session.exchange.fetch_time()
+        except Exception as e:
+            self.stats["health_failures"] += 1
+            logger.warning(f"[SorSessionPool] Health check failed: {e}")
+            return False
+        session.last_checked = now
+        return True
+
+    async def acquire(self, exchange_id: str, api_key: str, secret: str, passphrase: Optional[str] = None) -> Any:
+        """Returns a ready exchange session with markets loaded, creating it if needed."""
+        self._check_fork()
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        key = (exchange_id.lower(), credentials_hash(api_key, secret, passphrase))
+        async with self._lock:
+            now = self.clock()
+            session = self._sessions.get(key)
+            if session is not None:
+                expired = (now - session.created_at >= self.max_age_seconds
+                           or now - session.last_used >= self.idle_seconds)
+                if not expired and await self._healthy(session, now):
+                    session.last_used = now
+                    self._sessions.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return session.exchange
+                await self._evict_key(key, "expired" if expired else "health check")
+
+            await self._sweep(now)
+            exchange = self.exchange_factory(exchange_id, api_key, secret, passphrase)
+            try:
+                await exchange.load_markets()
+            except Exception:
+                await self._close(_Session(exchange, now))
+                raise
+            self._sessions[key] = _Session(exchange, now)
+            self.stats["created"] += 1
+            return exchange
+
+    async def evict(self, exchange_id: str, api_key: str, secret: str, passphrase: Optional[str] = None):
+        key = (exchange_id.lower(), credentials_hash(api_key, secret, passphrase))
+        await self._evict_key(key, "requested")
+
+    @asynccontextmanager
+    async def session(self, exchange_id: str, api_key: str, secret: str, passphrase: Optional[str] = None):
+        """
+        Yields a pooled exchange. Network and auth errors evict the session so
+        the next child order reconnects with a fresh one.
+        """
+        exchange = await self.acquire(exchange_id, api_key, secret, passphrase)
+        try:
+            yield exchange
+        except EVICTING_ERRORS:
+            await self.evict(exchange_id, api_key, secret, passphrase)
+            raise
+
+    async def close_all(self):
+        for key in list(self._sessions):
+            await self._evict_key(key, "shutdown")
+
+    def shutdown(self):
+        """Closes every session and the loop. Call on worker process shutdown."""
+        self._check_fork()
+        if self._loop is None or self._loop.is_closed():
+            return
+        self._loop.run_until_complete(self.close_all())
+        self._loop.close()
+        self._loop = None
+
+    def __len__(self):
+        return len(self._sessions)
+
+
+_pool: Optional[SorSessionPool] = None
+
+
+def get_sor_session_pool() -> SorSessionPool:
+    global _pool
+    if _pool is None:
+        _pool = SorSessionPool()
+    return _pool
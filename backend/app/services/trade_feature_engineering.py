@@ -1,6 +1,14 @@
+import math
+from bisect import bisect_left, insort
+from collections import deque
+
 import pandas as pd
 import numpy as np
 
+# --- Institutional Grade Windows ---
+WINDOW_SHORT = 100  # Fast HFT window (~2-5 seconds on highly active pairs like BTC)
+WINDOW_LONG = 500   # Slow HFT window (~15-30 seconds)
+
 def calculate_advanced_trade_features(df_raw: pd.DataFrame, requested_features: list = None) -> pd.DataFrame:
     """
     Calculates institutional/hedge-fund grade HFT features from raw tick data.
@@ -43,9 +51,8 @@ def calculate_advanced_trade_features(df_raw: pd.DataFrame, requested_features:
         
     tick_speed_ms = time_diff.fillna(1.0).clip(lower=1.0)
     
-    # --- Institutional Grade Windows ---
-    window_short = 100  # Fast HFT window (~2-5 seconds on highly active pairs like BTC)
-    window_long = 500   # Slow HFT window (~15-30 seconds)
+    window_short = WINDOW_SHORT
+    window_long = WINDOW_LONG
     
     feats = {}
     
@@ -145,3 +152,421 @@ def calculate_advanced_trade_features(df_raw: pd.DataFrame, requested_features:
     df = df.drop(columns=[c for c in cleanup_cols if c in df.columns], errors='ignore')
     
     return df
+
+
+# =============================================================================
+# Streaming (per-trade) version of calculate_advanced_trade_features
+# =============================================================================
+
+TRADE_FEATURES = [
+    'rolling_vol_imbalance', 'trade_velocity', 'buy_volume', 'sell_volume', 'trade_count', 'cvd',
+    'vwap_deviation', 'consecutive_runs', 'aggressor_ratio', 'avg_trade_size', 'whale_trade_freq',
+    'large_trade_flag', 'retail_participation_ratio', 'trade_size_variance', 'iceberg_proxy_count',
+    'up_down_tick_ratio', 'micro_volatility', 'amihud_illiquidity', 'tick_speed', 'tick_acceleration',
+    'zero_tick_ratio', 'realized_variance', 'kyles_lambda', 'autocorr_signs', 'entropy_of_signs',
+    'roll_measure_spread', 'vpin_proxy',
+]
+
+_NAN = float('nan')
+_INF = float('inf')
+_SIDE_DIR = {'buy': 1, 'sell': -1}
+
+
+class _RollingWindow:
+    """
+    Trailing window of the last `size` values with O(1) sum / mean / var.
+
+    Uses the same online update rules as pandas' rolling sum/mean/var
+    (Kahan-compensated add/remove, Welford variance, repeated-value guard,
+    NaN skipping), so the results equal `Series.rolling(size, min_periods=1)`.
+    """
+
+    __slots__ = ('size', 'values', 'track_var', 'nobs', 'sum_x', 'comp_add', 'comp_remove', 'neg_ct',
+                 'same_ct', 'prev_value', 'mean_x', 'ssqdm_x', 'var_comp_add', 'var_comp_remove')
+
+    def __init__(self, size: int, track_var: bool = False):
+        self.size = size
+        self.values = deque()
+        self.track_var = track_var
+        self.nobs = 0
+        self.sum_x = self.comp_add = self.comp_remove = 0.0
+        self.neg_ct = 0
+        self.same_ct = 0
+        self.prev_value = _NAN
+        self.mean_x = self.ssqdm_x = self.var_comp_add = self.var_comp_remove = 0.0
+
+    def push(self, val: float):
+        values = self.values
+        if len(values) == self.size:
+            self._remove(values.popleft())
+        values.append(val)
+        if val != val:
+            return
+
+        self.nobs += 1
+        y = val - self.comp_add
+        t = self.sum_x + y
+        self.comp_add = t - self.sum_x - y
+        self.sum_x = t
+        if math.copysign(1.0, val) < 0:
+            self.neg_ct += 1
+        if val == self.prev_value:
+            self.same_ct += 1
+        else:
+            self.same_ct = 1
+        self.prev_value = val
+
+        if self.track_var:
+            prev_mean = self.mean_x - self.var_comp_add
+            y = val - self.var_comp_add
+            t = y - self.mean_x
+            self.var_comp_add = t + self.mean_x - y
+            self.mean_x = self.mean_x + t / self.nobs
+            self.ssqdm_x = self.ssqdm_x + (val - prev_mean) * (val - self.mean_x)
+
+    def _remove(self, val: float):
+        if val != val:
+            return
+
+        self.nobs -= 1
+        y = -val - self.comp_remove
+        t = self.sum_x + y
+        self.comp_remove = t - self.sum_x - y
+        self.sum_x = t
+        if math.copysign(1.0, val) < 0:
+            self.neg_ct -= 1
+
+        if self.track_var:
+            if self.nobs:
+                prev_mean = self.mean_x - self.var_comp_remove
+                y = val - self.var_comp_remove
+                t = y - self.mean_x
+                self.var_comp_remove = t + self.mean_x - y
+                self.mean_x = self.mean_x - t / self.nobs
+                self.ssqdm_x = self.ssqdm_x - (val - prev_mean) * (val - self.mean_x)
+            else:
+                self.mean_x = self.ssqdm_x = 0.0
+
+    def sum(self) -> float:
+        if self.nobs == 0:
+            return _NAN
+        if self.same_ct >= self.nobs:
+            return self.prev_value * self.nobs
+        return self.sum_x
+
+    def mean(self) -> float:
+        nobs = self.nobs
+        if nobs == 0:
+            return _NAN
+        if self.same_ct >= nobs:
+            return self.prev_value
+        result = self.sum_x / nobs
+        if self.neg_ct == 0 and result < 0:
+            return 0.0
+        if self.neg_ct == nobs and result > 0:
+            return 0.0
+        return result
+
+    def var(self) -> float:
+        if self.nobs < 2:
+            return _NAN
+        if self.same_ct >= self.nobs:
+            return 0.0
+        return self.ssqdm_x / (self.nobs - 1)
+
+
+class _RollingCov:
+    """
+    Rolling sample covariance, computed like `Series.rolling(n).cov(other)`:
+    E[xy] - E[x]E[y] over the pairs where both values are present.
+    """
+
+    __slots__ = ('xy', 'x', 'y', 'last')
+
+    def __init__(self, size: int):
+        self.xy, self.x, self.y = _RollingWindow(size), _RollingWindow(size), _RollingWindow(size)
+        self.last = 0.0  # .ffill().fillna(0)
+
+    def push(self, x: float, y: float) -> float:
+        # pandas aligns the pair first: a NaN on either side drops both
+        x, y = x + 0 * y, y + 0 * x
+        self.xy.push(x * y)
+        self.x.push(x)
+        self.y.push(y)
+
+        count = self.xy.nobs
+        factor = _INF if count == 1 else count / (count - 1)
+        result = (self.xy.mean() - self.x.mean() * self.y.mean()) * factor
+        if result == result:
+            self.last = result
+        return self.last
+
+
+class _RollingQuantiles:
+    """Sorted trailing window; rolling quantiles with pandas' linear interpolation."""
+
+    __slots__ = ('size', 'values', 'ordered')
+
+    def __init__(self, size: int):
+        self.size = size
+        self.values = deque()
+        self.ordered = []
+
+    def push(self, val: float):
+        if len(self.values) == self.size:
+            old = self.values.popleft()
+            del self.ordered[bisect_left(self.ordered, old)]
+        self.values.append(val)
+        insort(self.ordered, val)
+
+    def quantile(self, q: float) -> float:
+        ordered = self.ordered
+        nobs = len(ordered)
+        if nobs == 1:
+            return ordered[0]
+        idx_with_fraction = q * (nobs - 1)
+        idx = int(idx_with_fraction)
+        if idx == idx_with_fraction:
+            return ordered[idx]
+        vlow = ordered[idx]
+        return vlow + (ordered[idx + 1] - vlow) * (idx_with_fraction - idx)
+
+
+def _clip_lower(value: float, lower: float) -> float:
+    return lower if value < lower else value
+
+
+def _pct_change(price: float, prev_price: float) -> float:
+    if prev_price == 0:
+        return (_NAN if price == 0 else math.copysign(_INF, price)) - 1
+    return price / prev_price - 1
+
+
+class TradeFeatureEngine:
+    """
+    Stateful, per-symbol version of `calculate_advanced_trade_features`.
+
+    Instead of recomputing ~30 rolling features over the whole trade frame on
+    every refresh, each `update(trade)` advances every feature incrementally:
+    rolling sums/means/variances in O(1), the 95th/25th percentile windows in
+    O(log w) lookups on a sorted window, run lengths with counters.
+    `snapshot()` returns the same values as the last row of the batch function
+    for the same trade tape.
+
+    `trade` is a mapping (e.g. a ccxt trade) with 'price', 'amount' and
+    optionally 'side' / 'trade_dir' and 'timestamp' (ms or datetime) / 'datetime'.
+    Direction falls back to the tick rule when neither is given.
+    """
+
+    def __init__(self, requested_features: list = None):
+        self.features = [f for f in TRADE_FEATURES if requested_features is None or f in requested_features]
+        self.trades = 0
+
+        self._prev_price = None
+        self._prev_dir = None
+        self._tick_rule_dir = 0
+        self._prev_ts = None
+        self._prev_speed = None
+        self._prev_price_diff = None
+
+        self._cvd = 0.0
+        self._cum_vol = 0.0
+        self._cum_vol_price = 0.0
+        self._vwap_deviation = 0.0
+        self._run = 0
+        self._iceberg = 0
+        self._large_trade_flag = 0
+
+        short = WINDOW_SHORT
+        self._buy_vol = _RollingWindow(short)
+        self._sell_vol = _RollingWindow(short)
+        self._amount = _RollingWindow(short, track_var=True)
+        self._speed = _RollingWindow(short)
+        self._acceleration = _RollingWindow(short)
+        self._is_buy = _RollingWindow(short)
+        self._whale = _RollingWindow(short)
+        self._retail = _RollingWindow(short)
+        self._up_vol = _RollingWindow(short)
+        self._down_vol = _RollingWindow(short)
+        self._returns = _RollingWindow(short, track_var=True)
+        self._amihud = _RollingWindow(short)
+        self._zero_ret = _RollingWindow(short)
+        self._sq_ret = _RollingWindow(short)
+        self._sizes = _RollingQuantiles(WINDOW_LONG)
+
+        # Kyle's lambda: cov(signed_volume, price_diff) / var(signed_volume)
+        self._signed_vol = _RollingWindow(short, track_var=True)
+        self._sv_pd = _RollingCov(short)
+        # Sign autocorrelation: cov(dir, dir[t-1]) / var(dir)
+        self._dir = _RollingWindow(short, track_var=True)
+        self._dir_lag = _RollingCov(short)
+        # Roll spread: cov(dp, dp[t-1])
+        self._dp_lag = _RollingCov(short)
+
+        self._cov_sv_pd = self._cov_dir = self._cov_dp = 0.0
+        self._var_sv = self._var_dir = self._var_amount = self._var_returns = 0.0
+
+    def _direction(self, trade, price: float) -> float:
+        if 'trade_dir' in trade:
+            return trade['trade_dir']
+        if 'side' in trade:
+            return _SIDE_DIR.get(trade['side'], 0)
+        # Tick rule: sign of the price change, zero changes carry the last sign
+        if self._prev_price is not None:
+            if price > self._prev_price:
+                self._tick_rule_dir = 1
+            elif price < self._prev_price:
+                self._tick_rule_dir = -1
+        return self._tick_rule_dir
+
+    def _tick_speed_ms(self, trade) -> float:
+        ts = trade.get('timestamp')
+        if ts is None:
+            ts = trade.get('datetime')
+        if ts is None:
+            return 1.0
+        if not isinstance(ts, (int, float, np.number)):
+            ts = pd.Timestamp(ts).value / 1_000_000_000 * 1000  # ns -> ms
+        prev_ts, self._prev_ts = self._prev_ts, ts
+        if prev_ts is None:
+            return 1.0
+        diff = ts - prev_ts
+        if diff != diff:
+            return 1.0
+        return _clip_lower(float(diff), 1.0)
+
+    def update(self, trade):
+        price = float(trade['price'])
+        amount = float(trade['amount'])
+        direction = self._direction(trade, price)
+        speed = self._tick_speed_ms(trade)
+        prev_price = self._prev_price
+        first = prev_price is None
+
+        # --- Volume & Flow ---
+        signed_volume = amount * direction
+        self._buy_vol.push(amount if direction == 1 else 0.0)
+        self._sell_vol.push(amount if direction == -1 else 0.0)
+        self._is_buy.push(1.0 if direction == 1 else 0.0)
+        self._amount.push(amount)
+        self._speed.push(speed)
+        self._acceleration.push(0.0 if self._prev_speed is None else speed - self._prev_speed)
+        self._prev_speed = speed
+
+        self._cvd += signed_volume
+        self._cum_vol += amount
+        self._cum_vol_price += price * amount
+        vwap_tick = self._cum_vol_price / _clip_lower(self._cum_vol, 1e-9)
+        self._vwap_deviation = (price - vwap_tick) / _clip_lower(vwap_tick, 1e-9)
+
+        self._run = self._run + 1 if not first and direction == self._prev_dir else 1
+
+        # --- Trade Size ---
+        self._sizes.push(amount)
+        whale = int(amount > self._sizes.quantile(0.95))
+        self._large_trade_flag = whale
+        self._whale.push(float(whale))
+        self._retail.push(1.0 if amount < self._sizes.quantile(0.25) else 0.0)
+
+        # --- Price Moves ---
+        self._iceberg = self._iceberg + 1 if not first and price == prev_price else 0
+        self._up_vol.push(amount if not first and price > prev_price else 0.0)
+        self._down_vol.push(amount if not first and price < prev_price else 0.0)
+
+        ret = 0.0 if first else _pct_change(price, prev_price)
+        self._returns.push(ret)
+        self._amihud.push(abs(ret) / _clip_lower(amount, 1e-9))
+        self._zero_ret.push(1.0 if ret == 0 else 0.0)
+        self._sq_ret.push(ret * ret)
+
+        # --- Covariance-based Stats ---
+        price_diff = 0.0 if first else price - prev_price
+        lag_price_diff = 0.0 if self._prev_price_diff is None else self._prev_price_diff
+        lag_dir = _NAN if first else self._prev_dir
+
+        self._signed_vol.push(signed_volume)
+        self._dir.push(direction)
+        self._cov_sv_pd = self._sv_pd.push(signed_volume, price_diff)
+        self._cov_dir = self._dir_lag.push(direction, lag_dir)
+        self._cov_dp = self._dp_lag.push(price_diff, lag_price_diff)
+        # rolling var is NaN until two observations -> .ffill().fillna(0)
+        var_sv, var_dir = self._signed_vol.var(), self._dir.var()
+        var_amount, var_returns = self._amount.var(), self._returns.var()
+        if var_sv == var_sv:
+            self._var_sv = var_sv
+        if var_dir == var_dir:
+            self._var_dir = var_dir
+        if var_amount == var_amount:
+            self._var_amount = var_amount
+        if var_returns == var_returns:
+            self._var_returns = var_returns
+
+        self._prev_price = price
+        self._prev_dir = direction
+        self._prev_price_diff = price_diff
+        self.trades += 1
+
+    def snapshot(self) -> dict:
+        """Current value of every requested feature (empty before the first trade)."""
+        if not self.trades:
+            return {}
+
+        buy_vol, sell_vol = self._buy_vol.sum(), self._sell_vol.sum()
+        trade_count = float(self._amount.nobs)
+        aggressor_ratio = self._is_buy.mean()
+        p = min(max(aggressor_ratio, 1e-5), 1 - 1e-5)
+        var_returns = self._var_returns
+
+        values = {
+            'rolling_vol_imbalance': buy_vol / _clip_lower(buy_vol + sell_vol, 1e-9),
+            'trade_velocity': trade_count / _clip_lower(self._speed.sum() / 1000, 1e-3),
+            'buy_volume': buy_vol,
+            'sell_volume': sell_vol,
+            'trade_count': trade_count,
+            'cvd': self._cvd,
+            'vwap_deviation': self._vwap_deviation,
+            'consecutive_runs': self._run,
+            'aggressor_ratio': aggressor_ratio,
+            'avg_trade_size': self._amount.mean(),
+            'whale_trade_freq': self._whale.sum(),
+            'large_trade_flag': self._large_trade_flag,
+            'retail_participation_ratio': self._retail.mean(),
+            'trade_size_variance': self._var_amount,
+            'iceberg_proxy_count': self._iceberg,
+            'up_down_tick_ratio': self._up_vol.sum() / _clip_lower(self._down_vol.sum(), 1e-9),
+            'micro_volatility': math.sqrt(var_returns) if var_returns > 0 else 0.0,
+            'amihud_illiquidity': self._amihud.mean(),
+            'tick_speed': self._speed.mean(),
+            'tick_acceleration': self._acceleration.mean(),
+            'zero_tick_ratio': self._zero_ret.mean(),
+            'realized_variance': self._sq_ret.sum(),
+            'kyles_lambda': self._cov_sv_pd / _clip_lower(self._var_sv, 1e-9),
+            'autocorr_signs': self._cov_dir / _clip_lower(self._var_dir, 1e-9),
+            'entropy_of_signs': -p * math.log2(p) - (1 - p) * math.log2(1 - p),
+            'roll_measure_spread': 2 * math.sqrt(max(-self._cov_dp, 0.0)),
+            'vpin_proxy': abs(buy_vol - sell_vol) / _clip_lower(buy_vol + sell_vol, 1e-9),
+        }
+        return {f: values[f] for f in self.features}
+
+
+class TradeFeatureStreams:
+    """One TradeFeatureEngine per symbol, created on the symbol's first trade."""
+
+    def __init__(self, requested_features: list = None):
+        self.requested_features = requested_features
+        self._engines = {}
+
+    def engine(self, symbol: str) -> TradeFeatureEngine:
+        engine = self._engines.get(symbol)
+        if engine is None:
+            engine = self._engines[symbol] = TradeFeatureEngine(self.requested_features)
+        return engine
+
+    def update(self, symbol: str, trade) -> dict:
+        engine = self.engine(symbol)
+        engine.update(trade)
+        return engine.snapshot()
+
+    def snapshot(self, symbol: str) -> dict:
+        engine = self._engines.get(symbol)
+        return engine.snapshot() if engine else {}
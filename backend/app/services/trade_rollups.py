@@ -0,0 +1,309 @@
+"""
+Daily performance rollups for closed trades.
+
+Every trade close folds into two `trade_performance_rollups` rows — the
+bot's day and the owner's day (bot_id = ALL_BOTS) — in O(1). The analytics
+endpoint then composes one row per day with SQL window functions instead of
+replaying every trade.
+
+A day summary (`Segment`) is a monoid: count/wins/sums add up, and the
+equity path is captured by growth, highest/lowest equity and worst
+drawdown relative to the day's opening equity, so two consecutive segments
+combine exactly:
+
+    growth  = a.growth * b.growth
+    max     = max(a.max, a.growth * b.max)
+    min     = min(a.min, a.growth * b.min)
+    dd      = min(a.dd, b.dd, a.growth * b.min / a.max)
+"""
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import case, delete, func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.bot import Bot
+from app.models.trade import Trade
+from app.models.trade_rollup import ALL_BOTS, TradePerformanceRollup
+
+
+@dataclass
+class Segment:
+    trade_count: int = 0
+    win_count: int = 0
+    pnl_sum: float = 0.0
+    return_sum: float = 0.0
+    return_sq_sum: float = 0.0
+    growth: float = 1.0
+    max_prefix: float = 1.0
+    min_prefix: float = 1.0
+    max_drawdown: float = 1.0  # lowest equity / running peak
+
+    def add(self, pnl: float, pnl_percent: float) -> "Segment":
+        """Folds one closed trade onto the end of the segment."""
+        pnl = pnl or 0.0
+        pnl_percent = pnl_percent or 0.0
+        self.trade_count += 1
+        self.win_count += 1 if pnl > 0 else 0
+        self.pnl_sum += pnl
+        self.return_sum += pnl_percent
+        self.return_sq_sum += pnl_percent * pnl_percent
+
+        self.growth *= 1 + pnl_percent / 100.0
+        if self.growth > self.max_prefix:
+            self.max_prefix = self.growth
+        if self.growth < self.min_prefix:
+            self.min_prefix = self.growth
+        drawdown = self.growth / self.max_prefix
+        if drawdown < self.max_drawdown:
+            self.max_drawdown = drawdown
+        return self
+
+    def combine(self, other: "Segment") -> "Segment":
+        """This segment followed by `other`."""
+        if other.trade_count == 0:
+            return self
+        if self.trade_count == 0:
+            return other
+        return Segment(
+            trade_count=self.trade_count + other.trade_count,
+            win_count=self.win_count + other.win_count,
+            pnl_sum=self.pnl_sum + other.pnl_sum,
+            return_sum=self.return_sum + other.return_sum,
+            return_sq_sum=self.return_sq_sum + other.return_sq_sum,
+            growth=self.growth * other.growth,
+            max_prefix=max(self.max_prefix, self.growth * other.max_prefix),
+            min_prefix=min(self.min_prefix, self.growth * other.min_prefix),
+            max_drawdown=min(self.max_drawdown, other.max_drawdown,
+                             self.growth * other.min_prefix / self.max_prefix),
+        )
+
+    @classmethod
+    def from_row(cls, row: TradePerformanceRollup) -> "Segment":
+        return cls(**{name: getattr(row, name) for name in cls.__dataclass_fields__})
+
+
+def _utc_naive(dt: Optional[datetime]) -> Optional[datetime]:
+    if dt is not None and dt.tzinfo is not None:
+        return dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
+def _midnight(day: date) -> datetime:
+    return datetime.combine(day, time.min)
+
+
+def _owner_trades(owner_id: int, bot_id: Optional[int] = None):
+    # bot_id IN (...) rather than a join, so the (bot_id, closed_at) index drives the range scan
+    if bot_id is not None and bot_id != ALL_BOTS:
+        bots = select(Bot.id).where(Bot.owner_id == owner_id, Bot.id == bot_id)
+    else:
+        bots = select(Bot.id).where(Bot.owner_id == owner_id)
+    return select(Trade.pnl, Trade.pnl_percent).where(Trade.status == "CLOSED", Trade.bot_id.in_(bots))
+
+
+def summarize_trades(db: Session, owner_id: int, start: Optional[datetime], end: Optional[datetime],
+                     bot_id: Optional[int] = None, end_inclusive: bool = True) -> Segment:
+    """Folds the owner's closed trades in [start, end] straight from the trades table."""
+    stmt = _owner_trades(owner_id, bot_id)
+    if start is not None:
+        stmt = stmt.where(Trade.closed_at >= start)
+    if end is not None:
+        stmt = stmt.where(Trade.closed_at <= end if end_inclusive else Trade.closed_at < end)
+    stmt = stmt.order_by(Trade.closed_at.asc(), Trade.id.asc())
+
+    segment = Segment()
+    for pnl, pnl_percent in db.execute(stmt):
+        segment.add(pnl, pnl_percent)
+    return segment
+
+
+# ---------------------------------------------------------------------------
+# Maintenance (trade close / backfill)
+# ---------------------------------------------------------------------------
+
+def _get_or_create_row(db: Session, owner_id: int, bot_id: int, day: date) -> TradePerformanceRollup:
+    R = TradePerformanceRollup
+    lookup = db.query(R).filter(R.owner_id == owner_id, R.bot_id == bot_id, R.day == day)
+    row = lookup.with_for_update().first()
+    if row is not None:
+        return row
+    try:
+        # Another bot of the same owner may insert the day concurrently
+        with db.begin_nested():
+            row = R(owner_id=owner_id, bot_id=bot_id, day=day, **vars(Segment()))
+            db.add(row)
+        return row
+    except IntegrityError:
+        return lookup.with_for_update().one()
+
+
+def _rebuild_row(db: Session, row: TradePerformanceRollup):
+    start = _midnight(row.day)
+    segment = summarize_trades(db, row.owner_id, start, start + timedelta(days=1),
+                               bot_id=row.bot_id, end_inclusive=False)
+    for name, value in vars(segment).items():
+        setattr(row, name, value)
+    last = db.execute(
+        _owner_trades(row.owner_id, row.bot_id).with_only_columns(func.max(Trade.closed_at))
+        .where(Trade.closed_at >= start, Trade.closed_at < start + timedelta(days=1))
+    ).scalar()
+    row.last_closed_at = _utc_naive(last)
+
+
+def record_trade_close(db: Session, trade: Trade, owner_id: int):
+    """
+    Folds a just-closed trade into its bot's and owner's daily rollup rows.
+    Runs inside the caller's transaction (commit together with the trade).
+    """
+    if trade.status != "CLOSED" or trade.closed_at is None:
+        return
+    closed_at = _utc_naive(trade.closed_at)
+    day = closed_at.date()
+
+    for bot_id in (trade.bot_id, ALL_BOTS):
+        row = _get_or_create_row(db, owner_id, bot_id, day)
+        if row.last_closed_at is not None and closed_at < row.last_closed_at:
+            # Closed out of order (e.g. two bots racing): the fold is path
+            # dependent, so recompute this one day from its trades
+            db.flush()
+            _rebuild_row(db, row)
+            continue
+        segment = Segment.from_row(row).add(trade.pnl, trade.pnl_percent)
+        for name, value in vars(segment).items():
+            setattr(row, name, value)
+        row.last_closed_at = closed_at
+
+
+def rebuild_trade_rollups(db: Session, owner_id: Optional[int] = None, batch_size: int = 10000) -> int:
+    """
+    Recomputes rollups from the trades table (backfill / repair). Streams
+    trades in close order; memory is one Segment per owner x bot x day.
+    Does not commit. Returns the number of rollup rows written.
+    """
+    R = TradePerformanceRollup
+    clear = delete(R)
+    stmt = (
+        select(Bot.owner_id, Trade.bot_id, Trade.closed_at, Trade.pnl, Trade.pnl_percent)
+        .join(Bot, Trade.bot_id == Bot.id)
+        .where(Trade.status == "CLOSED", Trade.closed_at.isnot(None))
+        .order_by(Trade.closed_at.asc(), Trade.id.asc())
+        .execution_options(yield_per=batch_size)
+    )
+    if owner_id is not None:
+        clear = clear.where(R.owner_id == owner_id)
+        stmt = stmt.where(Bot.owner_id == owner_id)
+
+    segments = {}
+    last_closed = {}
+    for owner, bot_id, closed_at, pnl, pnl_percent in db.execute(stmt):
+        closed_at = _utc_naive(closed_at)
+        for key in ((owner, bot_id, closed_at.date()), (owner, ALL_BOTS, closed_at.date())):
+            segment = segments.get(key)
+            if segment is None:
+                segment = segments[key] = Segment()
+            segment.add(pnl, pnl_percent)
+            last_closed[key] = closed_at
+
+    db.execute(clear)
+    rows = [
+        dict(owner_id=owner, bot_id=bot_id, day=day, last_closed_at=last_closed[(owner, bot_id, day)], **vars(segment))
+        for (owner, bot_id, day), segment in segments.items()
+    ]
+    for i in range(0, len(rows), batch_size):
+        db.execute(R.__table__.insert(), rows[i:i + batch_size])
+    return len(rows)
+
+
+# ---------------------------------------------------------------------------
+# Reads
+# ---------------------------------------------------------------------------
+
+def summarize_rollups(db: Session, owner_id: int, bot_id: int = ALL_BOTS,
+                      first_day: Optional[date] = None, last_day: Optional[date] = None) -> Segment:
+    """
+    Composes the daily rows in [first_day, last_day] in SQL: window sums of
+    ln(growth) give each day's opening equity, a running max gives the peak
+    before it, and the worst drawdown is min(day's own, day's low / prior peak).
+    """
+    R = TradePerformanceRollup
+    where = [R.owner_id == owner_id, R.bot_id == bot_id]
+    if first_day is not None:
+        where.append(R.day >= first_day)
+    if last_day is not None:
+        where.append(R.day <= last_day)
+
+    before = dict(order_by=R.day, rows=(None, -1))
+    days = select(
+        R.trade_count, R.win_count, R.pnl_sum, R.return_sum, R.return_sq_sum,
+        R.growth, R.max_prefix, R.min_prefix, R.max_drawdown, R.day,
+        func.exp(func.coalesce(func.sum(func.ln(R.growth)).over(**before), 0.0)).label("equity"),
+    ).where(*where).subquery()
+
+    peak_before = func.max(days.c.equity * days.c.max_prefix).over(order_by=days.c.day, rows=(None, -1))
+    path = select(
+        days,
+        (days.c.equity * days.c.max_prefix).label("high"),
+        (days.c.equity * days.c.min_prefix).label("low"),
+        peak_before.label("peak_before"),
+    ).subquery()
+
+    peak = case((path.c.peak_before > 1.0, path.c.peak_before), else_=1.0)
+    carried = path.c.low / peak
+    day_drawdown = case((carried < path.c.max_drawdown, carried), else_=path.c.max_drawdown)
+
+    row = db.execute(select(
+        func.sum(path.c.trade_count), func.sum(path.c.win_count), func.sum(path.c.pnl_sum),
+        func.sum(path.c.return_sum), func.sum(path.c.return_sq_sum),
+        func.exp(func.sum(func.ln(path.c.growth))), func.max(path.c.high), func.min(path.c.low),
+        func.min(day_drawdown),
+    )).one()
+
+    if not row[0]:
+        return Segment()
+    return Segment(
+        trade_count=int(row[0]), win_count=int(row[1]), pnl_sum=row[2],
+        return_sum=row[3], return_sq_sum=row[4], growth=row[5],
+        max_prefix=max(1.0, row[6]), min_prefix=min(1.0, row[7]), max_drawdown=row[8],
+    )
+
+
+def _has_wiped_out_day(db: Session, owner_id: int, bot_id: int) -> bool:
+    R = TradePerformanceRollup
+    return db.query(
+        db.query(R.id).filter(R.owner_id == owner_id, R.bot_id == bot_id, R.min_prefix <= 0).exists()
+    ).scalar()
+
+
+def performance_segment(db: Session, owner_id: int, start_date: Optional[datetime] = None,
+                        end_date: Optional[datetime] = None, bot_id: Optional[int] = None) -> Optional[Segment]:
+    """
+    Summary of the owner's closed trades in [start_date, end_date]: whole
+    days from the rollups, partial boundary days from the trades table.
+    Returns None when the equity path hit zero (ln(growth) is undefined);
+    callers fall back to replaying the trades.
+    """
+    bot_id = ALL_BOTS if bot_id is None else bot_id
+    if _has_wiped_out_day(db, owner_id, bot_id):
+        return None
+
+    start, end = _utc_naive(start_date), _utc_naive(end_date)
+    first_day = None
+    if start is not None:
+        first_day = start.date() if start == _midnight(start.date()) else start.date() + timedelta(days=1)
+    # end's own day is partial (closed_at <= end_date), unless nothing of it is covered
+    last_day = end.date() - timedelta(days=1) if end is not None else None
+
+    if first_day is not None and last_day is not None and first_day > last_day:
+        return summarize_trades(db, owner_id, start_date, end_date, bot_id=bot_id)
+
+    head = Segment()
+    if start is not None and start != _midnight(first_day):
+        head = summarize_trades(db, owner_id, start_date, _midnight(first_day), bot_id=bot_id, end_inclusive=False)
+    body = summarize_rollups(db, owner_id, bot_id, first_day, last_day)
+    tail = Segment()
+    if end is not None:
+        tail = summarize_trades(db, owner_id, _midnight(end.date()), end_date, bot_id=bot_id)
+    return head.combine(body).combine(tail)
@@ -9,6 +9,7 @@ import pandas_ta as ta
 import json
 from app.utils import get_redis_client
 from app.strategies.order_block_bot import OrderBlockExecutionEngine
+from app.services.kline_cache import kline_cache
 
 logger = logging.getLogger(__name__)
 
@@ -94,6 +95,7 @@ class CascadingBBBot:
         self._task = None
         self._exchange = None
         self._ws_exchange = None
+        self._kline_key = None
 
     async def start(self, api_key_record=None):
         """Starts the bot."""
@@ -127,6 +129,10 @@ class CascadingBBBot:
             ws_params['options'] = {'defaultType': 'future'}
             
         self._ws_exchange = ws_exchange_class(ws_params)
+
+        # Every cascade level is streamed (and shared with other bots on this symbol) from the start
+        self._kline_key = kline_cache.attach(self.exchange_id, self.symbol, self.timeframes, self.bb_length,
+                                             market_type=trading_mode)
         
         self._task = asyncio.create_task(self._run_loop())
 
@@ -136,14 +142,24 @@ class CascadingBBBot:
         self.logger.info(f"🛑 Stopping Cascading BB Bot {self.bot_id}")
         if self._task:
             self._task.cancel()
+        if self._kline_key:
+            kline_cache.detach(self._kline_key)
+            self._kline_key = None
         if self._exchange:
             await self._exchange.close()
         if self._ws_exchange:
             await self._ws_exchange.close()
         self.logger.info(f"🔴 Cascading BB Bot {self.bot_id} stopped.")
 
+    def _cached_bb_data(self, timeframe: str) -> Dict[str, float]:
+        """BB of the timeframe from the shared kline cache (None until it is seeded)."""
+        if not self._kline_key:
+            return None
+        return kline_cache.bollinger(self.exchange_id, self.symbol, timeframe, self.bb_length, self.bb_std,
+                                     market_type=self._kline_key[2])
+
     async def _fetch_bb_data(self, timeframe: str) -> Dict[str, float]:
-        """Fetches OHLCV and calculates BB for the given timeframe."""
+        """Fetches OHLCV and calculates BB for the given timeframe (REST fallback)."""
         try:
             ohlcv = await self._exchange.fetch_ohlcv(self.symbol, timeframe, limit=self.bb_length + 5)
             if not ohlcv or len(ohlcv) < self.bb_length:
@@ -252,9 +268,13 @@ class CascadingBBBot:
             while self.running:
                 current_tf = self.timeframes[self.current_tf_index]
                 
-                # 1. Fetch Bollinger Bands (Every 10 seconds to save API limits)
+                # 1. Bollinger Bands: live from the shared kline cache; REST (every 10 seconds
+                # to save API limits) only until the cache has seeded this timeframe
                 current_time = time.time()
-                if not self.cached_bb_data or (current_time - self.last_bb_fetch) >= 10:
+                bb_data = self._cached_bb_data(current_tf)
+                if bb_data:
+                    self.cached_bb_data = bb_data
+                elif not self.cached_bb_data or (current_time - self.last_bb_fetch) >= 10:
                     self.logger.info(f"🔍 Monitoring timeframe: {current_tf} (Updating BB)")
                     bb_data = await self._fetch_bb_data(current_tf)
                     if bb_data:
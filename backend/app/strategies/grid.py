@@ -1,6 +1,9 @@
 import asyncio
 import ccxt.async_support as ccxt
+import ccxt.pro as ccxtpro
+import itertools
 import time
+from collections import OrderedDict
 import json
 import logging
 from redis import asyncio as aioredis
@@ -8,25 +11,46 @@ from typing import List, Optional, Tuple
 from sqlalchemy.orm import Session
 from app.core.config import settings
 from app.db.session import SessionLocal
-from app.models.grid import GridBot, GridOrder
+from app.models.grid import GridBot
+from app.strategies.helpers.grid_ledger import GridLedger, GridLedgerWriter, LedgerOrder
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Price polling interval when the venue has no ticker stream
+POLL_INTERVAL_SECONDS = 3
+# REST reconciliation interval while private order streams are healthy / down
+RECONCILE_INTERVAL_SECONDS = 60
+STREAM_DOWN_RECONCILE_SECONDS = 3
+# Spacing between initial real-mode placements (exchange rate limits)
+ORDER_PLACEMENT_DELAY_SECONDS = 0.1
+# Stream events for orders not yet in the ledger (fill raced the create call)
+MAX_UNMATCHED_EVENTS = 1000
+
 class GridTradingBot:
-    def __init__(self, bot_id: int, config: dict):
+    def __init__(self, bot_id: int, config: dict, exchange=None, session_factory=SessionLocal):
         self.bot_id = bot_id
         self.config = config
         self.user_id = config.get("user_id")
         self.is_running = False
         self.redis = None
-        self.exchange = None
-        self.db: Session = SessionLocal()
+        self.exchange = exchange
+        self.session_factory = session_factory
+        self.db: Session = session_factory()
         
         # Dual Mode Flag
         self.is_paper = config.get("is_paper_trading", True)
 
+        # In-memory order/metric state, written back to the DB in batches
+        self.ledger = GridLedger(bot_id)
+        self.writer = GridLedgerWriter(self.ledger, session_factory)
+        self._stream_tasks: List[asyncio.Task] = []
+        self._streams_healthy = False
+        self._last_reconcile = 0.0
+        self._sim_ids = itertools.count()
+        self._unmatched: "OrderedDict[str, dict]" = OrderedDict()
+
     async def _log(self, message: str, type: str = "info"):
         if not self.redis:
             self.redis = aioredis.from_url(settings.REDIS_URL, decode_responses=True)
@@ -44,8 +68,11 @@ class GridTradingBot:
             print(f"Redis logging failed: {e}")
 
     async def _init_exchange(self):
+        if self.exchange is not None:
+            return
         ex_name = self.config.get("exchange", "binance").lower()
-        ex_class = getattr(ccxt, ex_name)
+        # ccxt.pro classes extend the async ones and add watch_* streams
+        ex_class = getattr(ccxtpro, ex_name, None) or getattr(ccxt, ex_name)
         
         exchange_config = {
             'enableRateLimit': True, 'options': {'adjustForTimeDifference': True},
@@ -73,11 +100,7 @@ class GridTradingBot:
         - Real: From Exchange Wallet
         """
         if self.is_paper:
-            # Refresh bot status to get latest balance
-            bot = self.db.query(GridBot).filter(GridBot.id == self.bot_id).first()
-            if bot:
-                return bot.paper_balance_current
-            return 0.0
+            return self.ledger.metrics["paper_balance_current"]
         else:
             try:
                 balance = await self.exchange.fetch_balance()
@@ -86,12 +109,13 @@ class GridTradingBot:
                 await self._log(f"Failed to fetch real balance: {e}", "error")
                 return 0.0
 
-    async def _place_order_dual(self, side: str, price: float, quantity: float) -> Optional[GridOrder]:
+    async def _place_order_dual(self, side: str, price: float, quantity: float) -> Optional[LedgerOrder]:
         """
         Unified Order Placement
         """
         pair = self.config.get("pair")
-        order_id = f"sim_{side}_{int(time.time()*100000)}" # default fake ID
+        order_id = f"sim_{side}_{int(time.time()*100000)}_{next(self._sim_ids)}" # default fake ID
+        placed_at = time.time()
         status = "open"
         
         if self.is_paper:
@@ -116,82 +140,133 @@ class GridTradingBot:
                 await self._log(f"❌ Real Order Failed: {e}", "error")
                 return None
 
-        # Save to DB (Unified for both modes)
-        new_order = GridOrder(
-            bot_id=self.bot_id,
-            order_id=order_id,
-            price=price,
-            quantity=quantity,
-            side=side,
-            status=status
-        )
-        self.db.add(new_order)
-        self.db.commit()
+        # Record in the ledger (Unified for both modes); persisted by the writer
+        new_order = self.ledger.add(order_id, side, float(price), float(quantity), placed_at=placed_at)
+        self.writer.notify()
+
+        early_event = self._unmatched.pop(new_order.order_id, None)
+        if early_event is not None:
+            await self._on_exchange_order(early_event)
         return new_order
 
-    async def _check_order_status_dual(self, open_orders: List[GridOrder], current_price: float):
+    async def _check_order_status_dual(self, current_price: float):
         """
-        Syncs order status.
-        - Paper: Checks if Price crossed Limit Price.
-        - Real: Fetches status from Exchange.
+        Paper fills: only the levels the price crossed are touched
+        (BUY filled if Market Price <= Order Price, SELL if >= Order Price).
+        Real orders are driven by the private streams and `_reconcile`.
+        """
+        for order in self.ledger.crossed(current_price):
+            await self._fill(order)
+
+    async def _fill(self, order: LedgerOrder):
+        if self.ledger.set_status(order.order_id, 'filled') is None:
+            return  # Already closed by another source (stream vs reconcile)
+        await self._handle_filled_order(order)
+
+    async def _on_exchange_order(self, ex_order: dict):
+        order = self.ledger.get(ex_order.get('id'))
+        if order is None:
+            # Keep final states briefly in case the order is still being recorded
+            if ex_order.get('status') != 'open' and ex_order.get('id') is not None:
+                self._unmatched[str(ex_order['id'])] = ex_order
+                while len(self._unmatched) > MAX_UNMATCHED_EVENTS:
+                    self._unmatched.popitem(last=False)
+            return
+        status = ex_order.get('status')
+        if status == 'closed':
+            await self._fill(order)
+        elif status in ('canceled', 'expired', 'rejected'):
+            self.ledger.set_status(order.order_id, 'cancelled')
+            self.writer.notify()
+
+    async def _watch_orders(self, pair: str):
+        while self.is_running:
+            try:
+                for ex_order in await self.exchange.watch_orders(pair):
+                    await self._on_exchange_order(ex_order)
+                self._streams_healthy = True
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._streams_healthy = False
+                logger.warning(f"Grid {self.bot_id} order stream error: {e}")
+                await asyncio.sleep(5)
+
+    async def _watch_my_trades(self, pair: str):
+        while self.is_running:
+            try:
+                for trade in await self.exchange.watch_my_trades(pair):
+                    order = self.ledger.record_trade(trade.get('order'), trade.get('id'), trade.get('amount'))
+                    if order is not None:
+                        await self._fill(order)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Grid {self.bot_id} trade stream error: {e}")
+                await asyncio.sleep(5)
+
+    def _start_streams(self, pair: str):
+        has = getattr(self.exchange, 'has', {}) or {}
+        if has.get('watchOrders'):
+            self._stream_tasks.append(asyncio.create_task(self._watch_orders(pair)))
+        if has.get('watchMyTrades'):
+            self._stream_tasks.append(asyncio.create_task(self._watch_my_trades(pair)))
+
+    async def _reconcile(self):
+        """
+        REST fallback: one `fetch_open_orders` call for the whole grid.
+        Only ledger orders missing from it are resolved with `fetch_order`.
         """
         pair = self.config.get("pair")
-        
-        for order in open_orders:
-            is_filled = False
-            
-            if self.is_paper:
-                # Simulation Logic
-                # BUY filled if Market Price <= Order Price
-                # SELL filled if Market Price >= Order Price
-                if order.side == 'buy' and current_price <= order.price:
-                    is_filled = True
-                elif order.side == 'sell' and current_price >= order.price:
-                    is_filled = True
-            
-            else:
-                # Real Logic
-                try:
-                    ex_order = await self.exchange.fetch_order(order.order_id, pair)
-                    status = ex_order['status']
-                    if status == 'closed':
-                        is_filled = True
-                        # Update actual filled price/qty if slightly different?
-                    elif status == 'canceled' or status == 'expired':
-                        order.status = 'cancelled'
-                        self.db.commit()
-                except Exception as e:
-                    logger.error(f"Sync Error for {order.order_id}: {e}")
+        started = time.time()
+        self._last_reconcile = started
+        try:
+            open_ids = {str(o['id']) for o in await self.exchange.fetch_open_orders(pair)}
+        except Exception as e:
+            logger.error(f"Grid {self.bot_id} reconcile failed: {e}")
+            return
 
-            if is_filled:
-                order.status = 'filled'
-                self.db.commit()
-                await self._handle_filled_order(order)
+        for order in self.ledger.open_orders():
+            if order.order_id in open_ids or order.placed_at > started:
+                continue
+            try:
+                ex_order = await self.exchange.fetch_order(order.order_id, pair)
+                await self._on_exchange_order(ex_order)
+            except Exception as e:
+                logger.error(f"Sync Error for {order.order_id}: {e}")
+
+    async def _reconcile_if_due(self):
+        interval = RECONCILE_INTERVAL_SECONDS if self._streams_healthy else STREAM_DOWN_RECONCILE_SECONDS
+        if time.time() - self._last_reconcile >= interval:
+            await self._reconcile()
 
+    async def _next_price(self, pair: str) -> float:
+        has = getattr(self.exchange, 'has', {}) or {}
+        if has.get('watchTicker'):
+            ticker = await self.exchange.watch_ticker(pair)
+        else:
+            ticker = await self.exchange.fetch_ticker(pair)
+            await asyncio.sleep(POLL_INTERVAL_SECONDS)
+        return ticker['last']
 
-    async def _handle_filled_order(self, order: GridOrder):
+    async def _handle_filled_order(self, order: LedgerOrder):
         """
         Core Grid Logic: Place Counter-Order & Update Metrics (Paper & Real)
         """
         fee_rate = 0.001 
-        bot = self.db.query(GridBot).filter(GridBot.id == self.bot_id).first()
         
         # 1. Update Paper Wallet if Paper Mode
-        if self.is_paper and bot:
+        if self.is_paper:
             cost = order.price * order.quantity
-            fee = cost * fee_rate
             
             if order.side == 'buy':
                 # Spent Quote, Gained Base
-                bot.paper_balance_current -= cost # In paper we assume we had the quote logic valid
-                bot.paper_asset_quantity += (order.quantity * (1 - fee_rate))
+                self.ledger.adjust(paper_balance_current=-cost, # In paper we assume we had the quote logic valid
+                                   paper_asset_quantity=order.quantity * (1 - fee_rate))
             else:
                 # Sold Base, Gained Quote
                 revenue = cost * (1 - fee_rate)
-                bot.paper_balance_current += revenue
-                bot.paper_asset_quantity -= order.quantity
-            
-            self.db.commit()
+                self.ledger.adjust(paper_balance_current=revenue, paper_asset_quantity=-order.quantity)
 
         # 2. Calculate Next Grid Step
         lower = float(self.config["lower_limit"])
@@ -220,10 +295,7 @@ class GridTradingBot:
             
             # Profit Calc (Approx per grid cycle)
             profit = (step * order.quantity) - (order.price * order.quantity * fee_rate * 2) # approx 2x fees
-            if bot:
-                bot.total_profit += max(0, profit)
-                bot.current_cycle_count += 1
-                self.db.commit()
+            self.ledger.adjust(total_profit=max(0, profit), current_cycle_count=1)
             
             await self._log(f"✅ SELL Filled @ {order.price}. Profit: ~${profit:.2f}. Placing Buy @ {buy_price:.2f}", "success")
             await self._place_order_dual('buy', buy_price, qty)
@@ -249,6 +321,7 @@ class GridTradingBot:
         base, quote = pair.split('/') # e.g. BTC/USDT -> BTC, USDT
         
         try:
+            self.ledger.load(self.db)
             await self._init_exchange()
             if not self.is_paper:
                 await self.exchange.load_markets() # Important for precision
@@ -270,14 +343,19 @@ class GridTradingBot:
 
 
             # 2. Reconcile / Initialize
-            existing_orders = self.db.query(GridOrder).filter(GridOrder.bot_id == self.bot_id, GridOrder.status == 'open').all()
+            existing_orders = self.ledger.open_orders()
+            self.writer.start()
+            if not self.is_paper:
+                self._start_streams(pair)
             
             if existing_orders:
                  # Already running: Just sync status
-                 # To get current price for paper sync
-                 ticker = await self.exchange.fetch_ticker(pair)
-                 current_price = ticker['last']
-                 await self._check_order_status_dual(existing_orders, current_price)
+                 if self.is_paper:
+                     # To get current price for paper sync
+                     ticker = await self.exchange.fetch_ticker(pair)
+                     await self._check_order_status_dual(ticker['last'])
+                 else:
+                     await self._reconcile()
                  await self._log(f"Resumed with {len(existing_orders)} open orders.")
             else:
                  # New Start
@@ -293,28 +371,26 @@ class GridTradingBot:
                      # Qty = QuoteAmt / Price
                      qty = req_per_grid / g['price']
                      await self._place_order_dual(g['type'], g['price'], qty)
-                     await asyncio.sleep(0.1) 
+                     if not self.is_paper:
+                         await asyncio.sleep(ORDER_PLACEMENT_DELAY_SECONDS)
 
             # 3. Main Loop
             while self.is_running:
                 try:
-                    # 1. Fetch Price
-                    ticker = await self.exchange.fetch_ticker(pair)
-                    current_price = ticker['last']
-                    
-                    # 2. Check Open Orders
-                    # Optimization: Don't load all if too many. But for <100 grids ok.
-                    open_orders = self.db.query(GridOrder).filter(GridOrder.bot_id == self.bot_id, GridOrder.status == 'open').all()
-                    
-                    if not open_orders:
+                    if not self.ledger.orders:
                          # Maybe market moved out of range? 
                          # Optional: Dynamic grid adjustment could go here.
                          await asyncio.sleep(5)
                          continue
-                         
-                    await self._check_order_status_dual(open_orders, current_price)
-                    
-                    await asyncio.sleep(3) # Loop Delay
+
+                    if self.is_paper:
+                        # Each price move only touches the crossed levels
+                        current_price = await self._next_price(pair)
+                        await self._check_order_status_dual(current_price)
+                    else:
+                        # Fills arrive on the private streams; REST is the fallback
+                        await self._reconcile_if_due()
+                        await asyncio.sleep(1)
 
                 except Exception as e:
                     await self._log(f"Loop Error: {e}", "error")
@@ -337,6 +413,16 @@ class GridTradingBot:
         # Log BEFORE closing connections
         await self._log("🛑 Bot Stopping...", "warning")
 
+        for task in self._stream_tasks:
+            task.cancel()
+        await asyncio.gather(*self._stream_tasks, return_exceptions=True)
+        self._stream_tasks = []
+
+        try:
+            await self.writer.stop()
+        except Exception as e:
+            print(f"Error flushing grid ledger: {e}")
+
         if self.exchange:
             try:
                 await self.exchange.close()
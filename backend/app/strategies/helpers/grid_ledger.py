@@ -0,0 +1,262 @@
+import asyncio
+import heapq
+import itertools
+import logging
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Set
+
+from sqlalchemy import and_, bindparam
+
+from app.models.grid import GridBot, GridOrder
+
+logger = logging.getLogger(__name__)
+
+# GridBot columns the bot mutates; written back as increments so that API
+# edits made while the bot runs (e.g. paper balance reset) are not clobbered.
+METRIC_COLUMNS = ("paper_balance_current", "paper_asset_quantity", "total_profit", "current_cycle_count")
+
+
+@dataclass
+class LedgerOrder:
+    order_id: str
+    side: str
+    price: float
+    quantity: float
+    status: str = "open"
+    seq: int = 0
+    filled: float = 0.0
+    placed_at: float = 0.0
+    trade_ids: Set[str] = field(default_factory=set)
+
+
+class GridLedger:
+    """
+    In-memory copy of one grid bot's orders and metrics.
+
+    Loaded from Postgres once at start, then updated from exchange events.
+    Open orders are indexed by price (max-heap for buys, min-heap for sells)
+    so a price move only touches the levels it crossed. Every change is
+    queued and handed to `GridLedgerWriter` in batches.
+    """
+
+    def __init__(self, bot_id: int):
+        self.bot_id = bot_id
+        self.orders: Dict[str, LedgerOrder] = {}
+        self.metrics: Dict[str, float] = {col: 0.0 for col in METRIC_COLUMNS}
+
+        self._buys: list = []   # (-price, seq, order_id)
+        self._sells: list = []  # (price, seq, order_id)
+        self._seq = itertools.count()
+
+        self._pending_inserts: Dict[str, dict] = {}
+        self._pending_updates: Dict[str, str] = {}
+        self._pending_deltas: Dict[str, float] = {}
+
+    # --- Loading ----------------------------------------------------------
+
+    def load(self, db) -> "GridLedger":
+        bot = db.query(GridBot).filter(GridBot.id == self.bot_id).first()
+        if bot:
+            for col in METRIC_COLUMNS:
+                self.metrics[col] = float(getattr(bot, col) or 0.0)
+
+        rows = db.query(GridOrder).filter(
+            GridOrder.bot_id == self.bot_id, GridOrder.status == 'open'
+        ).order_by(GridOrder.id).all()
+        for row in rows:
+            self._index(LedgerOrder(row.order_id, row.side, row.price, row.quantity, seq=next(self._seq)))
+        return self
+
+    def _index(self, order: LedgerOrder):
+        self.orders[order.order_id] = order
+        if order.side == 'buy':
+            heapq.heappush(self._buys, (-order.price, order.seq, order.order_id))
+        else:
+            heapq.heappush(self._sells, (order.price, order.seq, order.order_id))
+
+    # --- Orders -----------------------------------------------------------
+
+    def add(self, order_id: str, side: str, price: float, quantity: float, placed_at: float = 0.0) -> LedgerOrder:
+        order = LedgerOrder(str(order_id), side, float(price), float(quantity),
+                            seq=next(self._seq), placed_at=placed_at)
+        self._index(order)
+        self._pending_inserts[order.order_id] = {
+            "bot_id": self.bot_id, "order_id": order.order_id, "price": order.price,
+            "quantity": order.quantity, "side": side, "status": order.status,
+        }
+        return order
+
+    def get(self, order_id) -> Optional[LedgerOrder]:
+        return self.orders.get(str(order_id))
+
+    def open_orders(self) -> List[LedgerOrder]:
+        return sorted((o for o in self.orders.values() if o.status == 'open'), key=lambda o: o.seq)
+
+    def set_status(self, order_id, status: str) -> Optional[LedgerOrder]:
+        """Moves an open order to `status`. Returns it, or None if it was not open."""
+        order = self.orders.get(str(order_id))
+        if order is None or order.status != 'open':
+            return None
+        order.status = status
+        pending = self._pending_inserts.get(order.order_id)
+        if pending is not None:
+            pending["status"] = status
+        else:
+            self._pending_updates[order.order_id] = status
+        # Closed orders leave the lookup table; stale heap entries are skipped lazily
+        del self.orders[order.order_id]
+        return order
+
+    def record_trade(self, order_id, trade_id, amount: float) -> Optional[LedgerOrder]:
+        """Adds a private trade to its order. Returns the order once fully filled."""
+        order = self.orders.get(str(order_id))
+        if order is None or order.status != 'open':
+            return None
+        if trade_id is not None:
+            if trade_id in order.trade_ids:
+                return None
+            order.trade_ids.add(trade_id)
+        order.filled += float(amount or 0.0)
+        if order.filled >= order.quantity * (1 - 1e-9):
+            return order
+        return None
+
+    def crossed(self, price: float) -> List[LedgerOrder]:
+        """
+        Open orders the price has traded through (buy: price <= level,
+        sell: price >= level), in placement order. Does not change status.
+        """
+        hits = []
+        while self._buys and -self._buys[0][0] >= price:
+            _, _, order_id = heapq.heappop(self._buys)
+            order = self.orders.get(order_id)
+            if order is not None and order.status == 'open':
+                hits.append(order)
+        while self._sells and self._sells[0][0] <= price:
+            _, _, order_id = heapq.heappop(self._sells)
+            order = self.orders.get(order_id)
+            if order is not None and order.status == 'open':
+                hits.append(order)
+        hits.sort(key=lambda o: o.seq)
+        return hits
+
+    # --- Metrics ----------------------------------------------------------
+
+    def adjust(self, **deltas: float):
+        for col, delta in deltas.items():
+            self.metrics[col] += delta
+            self._pending_deltas[col] = self._pending_deltas.get(col, 0.0) + delta
+
+    # --- Write-back -------------------------------------------------------
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending_inserts) + len(self._pending_updates) + len(self._pending_deltas)
+
+    def drain(self) -> dict:
+        batch = {
+            "inserts": list(self._pending_inserts.values()),
+            "updates": [
+                {"b_bot_id": self.bot_id, "b_order_id": oid, "b_status": status}
+                for oid, status in self._pending_updates.items()
+            ],
+            "deltas": self._pending_deltas,
+        }
+        self._pending_inserts, self._pending_updates, self._pending_deltas = {}, {}, {}
+        return batch
+
+    def requeue(self, batch: dict):
+        """Puts a batch that failed to write back in front of newer changes."""
+        for row in batch["inserts"]:
+            self._pending_inserts.setdefault(row["order_id"], row)
+            # Status changes made since the drain were queued as updates
+            status = self._pending_updates.pop(row["order_id"], None)
+            if status:
+                self._pending_inserts[row["order_id"]]["status"] = status
+        for row in batch["updates"]:
+            self._pending_updates.setdefault(row["b_order_id"], row["b_status"])
+        for col, delta in batch["deltas"].items():
+            self._pending_deltas[col] = self._pending_deltas.get(col, 0.0) + delta
+
+
+def write_batch(db, bot_id: int, batch: dict):
+    """Applies one drained ledger batch in a single transaction."""
+    orders = GridOrder.__table__
+    if batch["inserts"]:
+        db.execute(orders.insert(), batch["inserts"])
+    if batch["updates"]:
+        stmt = orders.update().where(and_(
+            orders.c.bot_id == bindparam("b_bot_id"),
+            orders.c.order_id == bindparam("b_order_id"),
+        )).values(status=bindparam("b_status"))
+        db.execute(stmt, batch["updates"])
+    if batch["deltas"]:
+        bots = GridBot.__table__
+        db.execute(bots.update().where(bots.c.id == bot_id).values(
+            {bots.c[col]: bots.c[col] + delta for col, delta in batch["deltas"].items()}
+        ))
+    db.commit()
+
+
+class GridLedgerWriter:
+    """
+    Flushes ledger changes to the database off the event loop: every
+    `interval` seconds, or sooner once `max_batch` changes are queued.
+    Each flush runs in a worker thread with its own session.
+    """
+
+    def __init__(self, ledger: GridLedger, session_factory: Callable, interval: float = 1.0, max_batch: int = 500):
+        self.ledger = ledger
+        self.session_factory = session_factory
+        self.interval = interval
+        self.max_batch = max_batch
+        self.flush_count = 0
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+
+    def notify(self):
+        if self.ledger.pending >= self.max_batch:
+            self._wake.set()
+
+    def _write(self, batch: dict):
+        db = self.session_factory()
+        try:
+            write_batch(db, self.ledger.bot_id, batch)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def flush(self):
+        async with self._flush_lock:
+            if not self.ledger.pending:
+                return
+            batch = self.ledger.drain()
+            try:
+                await asyncio.to_thread(self._write, batch)
+                self.flush_count += 1
+            except Exception as e:
+                logger.error(f"Grid ledger flush failed for bot {self.ledger.bot_id}: {e}")
+                self.ledger.requeue(batch)
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
@@ -0,0 +1,153 @@
+"""
+Live Indicator State
+====================
+Live strategy গুলোর indicator — প্রতি tick এ পুরো candle frame এর উপর pandas_ta
+আবার না চালিয়ে, প্রতিটা closed candle এ O(1) এ update হয়:
+
+* `EMAState`  -> SMA-seeded EMA (pandas_ta.ema / TA-Lib এর মত)
+* `SMAState`  -> rolling mean (running sum, প্রতি `length` push এ exact re-sum)
+* `RSIState`  -> Wilder RSI: gain / loss এর SMA-seeded RMA (TA-Lib RSI এর মত)
+* `MACDState` -> fast / slow EMA এর পার্থক্য, আর তার উপর signal EMA
+* Bollinger   -> `kline_cache.BollingerState` (rolling sum / sum of squares)
+
+`push(x)` একটা closed candle commit করে; `peek(x)` forming candle এর close `x` হলে
+current value কত হত সেটা দেয়, state না বদলে। Warm-up এর আগে দুটোই None।
+
+Usage:
+    rsi = RSIState(14)
+    for close in closed_closes:
+        rsi.push(close)
+    current_rsi = rsi.peek(forming_close)
+"""
+
+import math
+from collections import deque
+from typing import Optional, Tuple
+
+
+class EMAState:
+    """
+    EMA seeded with the SMA of the first `length` values, then
+    value += alpha * (x - value). alpha defaults to 2 / (length + 1); 1 / length
+    gives Wilder's RMA.
+    """
+
+    def __init__(self, length: int, alpha: Optional[float] = None):
+        self.length = length
+        self.alpha = alpha if alpha is not None else 2.0 / (length + 1)
+        self.count = 0
+        self.value: Optional[float] = None  # after the last pushed value
+        self._seed_sum = 0.0
+
+    def peek(self, x: float) -> Optional[float]:
+        n = self.count + 1
+        if n < self.length:
+            return None
+        if n == self.length:
+            return (self._seed_sum + x) / self.length
+        return self.value + self.alpha * (x - self.value)
+
+    def push(self, x: float):
+        self.value = self.peek(x)
+        self.count += 1
+        if self.count < self.length:
+            self._seed_sum += x
+
+
+class SMAState:
+    """Mean of the last `length` values (pandas rolling(length).mean())."""
+
+    def __init__(self, length: int):
+        self.length = length
+        self.window = deque()
+        self._sum = 0.0
+        self._rolls = 0
+
+    @property
+    def value(self) -> Optional[float]:
+        if len(self.window) < self.length:
+            return None
+        return self._sum / self.length
+
+    def peek(self, x: float) -> Optional[float]:
+        if len(self.window) < self.length - 1:
+            return None
+        dropped = self.window[0] if len(self.window) == self.length else 0.0
+        return (self._sum - dropped + x) / self.length
+
+    def push(self, x: float):
+        self.window.append(x)
+        self._sum += x
+        if len(self.window) > self.length:
+            self._sum -= self.window.popleft()
+        self._rolls += 1
+        if self._rolls >= self.length:
+            # Re-sum exactly so add / subtract rounding can't drift
+            self._sum = math.fsum(self.window)
+            self._rolls = 0
+
+
+class RSIState:
+    """Wilder RSI over close-to-close changes; NaN when gains and losses are both zero."""
+
+    def __init__(self, length: int = 14):
+        self.length = length
+        self.gains = EMAState(length, alpha=1.0 / length)
+        self.losses = EMAState(length, alpha=1.0 / length)
+        self.prev_close: Optional[float] = None
+
+    @staticmethod
+    def _rsi(gain: float, loss: float) -> float:
+        total = gain + loss
+        return 100.0 * gain / total if total > 0 else math.nan
+
+    @property
+    def value(self) -> Optional[float]:
+        if self.gains.value is None:
+            return None
+        return self._rsi(self.gains.value, self.losses.value)
+
+    def peek(self, close: float) -> Optional[float]:
+        if self.prev_close is None:
+            return None
+        change = close - self.prev_close
+        gain = self.gains.peek(max(change, 0.0))
+        if gain is None:
+            return None
+        return self._rsi(gain, self.losses.peek(max(-change, 0.0)))
+
+    def push(self, close: float):
+        if self.prev_close is not None:
+            change = close - self.prev_close
+            self.gains.push(max(change, 0.0))
+            self.losses.push(max(-change, 0.0))
+        self.prev_close = close
+
+
+class MACDState:
+    """
+    MACD line (fast EMA - slow EMA) and its signal EMA, seeded from the first
+    `signal` MACD values like pandas_ta.macd.
+    """
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.fast = EMAState(fast)
+        self.slow = EMAState(slow)
+        self.signal = EMAState(signal)
+        self.value: Optional[Tuple[float, Optional[float]]] = None  # (macd, signal) at the last push
+
+    def peek(self, close: float) -> Optional[Tuple[float, Optional[float]]]:
+        fast, slow = self.fast.peek(close), self.slow.peek(close)
+        if fast is None or slow is None:
+            return None
+        macd = fast - slow
+        return macd, self.signal.peek(macd)
+
+    def push(self, close: float):
+        self.fast.push(close)
+        self.slow.push(close)
+        if self.fast.value is None or self.slow.value is None:
+            return
+        macd = self.fast.value - self.slow.value
+        self.signal.push(macd)
+        self.value = (macd, self.signal.value)
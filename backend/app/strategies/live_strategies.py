@@ -7,11 +7,18 @@ import torch
 import torch.nn as nn
 from app.db.session import SessionLocal
 from app import models
+from app.services.kline_cache import BollingerState
+from app.strategies.live_indicators import MACDState, RSIState, SMAState
 
 # -----------------------------------------------------------
 # 1. Base Interface for Live Strategies
 # -----------------------------------------------------------
 class BaseLiveStrategy:
+    # True for strategies that keep O(1) per-candle indicator state (live_indicators):
+    # the bot feeds them closed candles and calls check_signal_live instead of
+    # building a DataFrame for check_signal on every tick
+    incremental = False
+
     def __init__(self, config):
         self.config = config
 
@@ -23,6 +30,23 @@ class BaseLiveStrategy:
         """
         raise NotImplementedError("Subclasses must implement check_signal method")
 
+    def reset_state(self, closed_closes):
+        """Rebuilds the indicator state from the closes of the closed candles, oldest first."""
+        self._init_state()
+        for close in closed_closes:
+            self.close_candle(float(close))
+
+    def _init_state(self):
+        raise NotImplementedError("Incremental strategies must implement _init_state")
+
+    def close_candle(self, close: float):
+        """Commits one closed candle to the indicator state."""
+        raise NotImplementedError("Incremental strategies must implement close_candle")
+
+    def check_signal_live(self, price: float):
+        """check_signal for the candles seen so far, the forming one closing at `price`."""
+        raise NotImplementedError("Incremental strategies must implement check_signal_live")
+
 # -----------------------------------------------------------
 # 2. Concrete Strategy Implementations
 # -----------------------------------------------------------
@@ -31,19 +55,38 @@ class RSIStrategy(BaseLiveStrategy):
     """
     RSI Strategy: Buy if Oversold (<30), Sell if Overbought (>70) (Optional logic)
     """
-    def check_signal(self, df):
-        period = int(self.config.get('period', 14))
-        lower_band = float(self.config.get('lower', 30))
-        upper_band = float(self.config.get('upper', 70))
+    incremental = True
 
+    def __init__(self, config):
+        super().__init__(config)
+        self.period = int(self.config.get('period', 14))
+        self.lower_band = float(self.config.get('lower', 30))
+        self.upper_band = float(self.config.get('upper', 70))
+        self._init_state()
+
+    def check_signal(self, df):
         # Calculate RSI
-        df['rsi'] = ta.rsi(df['close'], length=period)
+        df['rsi'] = ta.rsi(df['close'], length=self.period)
         
         if df['rsi'].iloc[-1] is None:
             return "HOLD", "Not enough data", df['close'].iloc[-1]
 
-        current_rsi = df['rsi'].iloc[-1]
-        current_price = df['close'].iloc[-1]
+        return self._signal(df['rsi'].iloc[-1], df['close'].iloc[-1])
+
+    def _init_state(self):
+        self.rsi_state = RSIState(self.period)
+
+    def close_candle(self, close):
+        self.rsi_state.push(close)
+
+    def check_signal_live(self, price):
+        current_rsi = self.rsi_state.peek(price)
+        if current_rsi is None:
+            return "HOLD", "Not enough data", price
+        return self._signal(current_rsi, price)
+
+    def _signal(self, current_rsi, current_price):
+        lower_band, upper_band = self.lower_band, self.upper_band
 
         if current_rsi < lower_band:
             return "BUY", f"RSI Oversold ({current_rsi:.2f})", current_price
@@ -58,10 +101,17 @@ class MACDStrategy(BaseLiveStrategy):
     """
     MACD Strategy: Buy (Golden Cross), Sell (Death Cross)
     """
+    incremental = True
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.fast = int(self.config.get('fast_period', 12))
+        self.slow = int(self.config.get('slow_period', 26))
+        self.signal_span = int(self.config.get('signal_period', 9))
+        self._init_state()
+
     def check_signal(self, df):
-        fast = int(self.config.get('fast_period', 12))
-        slow = int(self.config.get('slow_period', 26))
-        signal_span = int(self.config.get('signal_period', 9))
+        fast, slow, signal_span = self.fast, self.slow, self.signal_span
 
         # Calculate MACD
         macd_df = ta.macd(df['close'], fast=fast, slow=slow, signal=signal_span)
@@ -79,6 +129,21 @@ class MACDStrategy(BaseLiveStrategy):
         prev_signal = macd_df[signal_col].iloc[-2]
         current_price = df['close'].iloc[-1]
 
+        return self._signal(prev_macd, prev_signal, current_macd, current_signal, current_price)
+
+    def _init_state(self):
+        self.macd_state = MACDState(self.fast, self.slow, self.signal_span)
+
+    def close_candle(self, close):
+        self.macd_state.push(close)
+
+    def check_signal_live(self, price):
+        current, prev = self.macd_state.peek(price), self.macd_state.value
+        if current is None or prev is None or current[1] is None or prev[1] is None:
+            return "HOLD", "Not enough data", price
+        return self._signal(prev[0], prev[1], current[0], current[1], price)
+
+    def _signal(self, prev_macd, prev_signal, current_macd, current_signal, current_price):
         # Crossover Logic
         # 1. Golden Cross (BUY)
         if prev_macd < prev_signal and current_macd > current_signal:
@@ -94,9 +159,16 @@ class BollingerBandsStrategy(BaseLiveStrategy):
     """
     Bollinger Bands: Buy < Lower, Sell > Upper
     """
+    incremental = True
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.period = int(self.config.get('period', 20))
+        self.std_dev = float(self.config.get('devfactor', 2.0))
+        self._init_state()
+
     def check_signal(self, df):
-        period = int(self.config.get('period', 20))
-        std_dev = float(self.config.get('devfactor', 2.0))
+        period, std_dev = self.period, self.std_dev
 
         bb = ta.bbands(df['close'], length=period, std=std_dev)
         
@@ -110,6 +182,27 @@ class BollingerBandsStrategy(BaseLiveStrategy):
         lower_band = bb[lower_col].iloc[-1]
         upper_band = bb[upper_col].iloc[-1]
 
+        return self._signal(lower_band, upper_band, current_price)
+
+    def _init_state(self):
+        self.bb_state = BollingerState(self.period)
+
+    def reset_state(self, closed_closes):
+        # BollingerState keeps only the last period - 1 closes and re-anchors its sums on reset
+        self.bb_state.reset([float(c) for c in closed_closes], None)
+
+    def close_candle(self, close):
+        self.bb_state.close_candle(close)
+
+    def check_signal_live(self, price):
+        self.bb_state.update_forming(price)
+        bands = self.bb_state.bands(self.std_dev)
+        if bands is None:
+            return "HOLD", "Not enough data", price
+        lower_band, _, upper_band = bands
+        return self._signal(lower_band, upper_band, price)
+
+    def _signal(self, lower_band, upper_band, current_price):
         if current_price < lower_band:
             return "BUY", f"Price below Lower BB ({lower_band:.2f})", current_price
             
@@ -122,9 +215,16 @@ class SMACrossoverStrategy(BaseLiveStrategy):
     """
     Simple Moving Average Crossover: Buy (Fast > Slow), Sell (Fast < Slow)
     """
+    incremental = True
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.fast_p = int(self.config.get('fast_period', 10))
+        self.slow_p = int(self.config.get('slow_period', 30))
+        self._init_state()
+
     def check_signal(self, df):
-        fast_p = int(self.config.get('fast_period', 10))
-        slow_p = int(self.config.get('slow_period', 30))
+        fast_p, slow_p = self.fast_p, self.slow_p
 
         df['fast_sma'] = ta.sma(df['close'], length=fast_p)
         df['slow_sma'] = ta.sma(df['close'], length=slow_p)
@@ -138,6 +238,26 @@ class SMACrossoverStrategy(BaseLiveStrategy):
         prev_slow = df['slow_sma'].iloc[-2]
         current_price = df['close'].iloc[-1]
 
+        return self._signal(prev_fast, prev_slow, curr_fast, curr_slow, current_price)
+
+    def _init_state(self):
+        self.fast_state = SMAState(self.fast_p)
+        self.slow_state = SMAState(self.slow_p)
+
+    def close_candle(self, close):
+        self.fast_state.push(close)
+        self.slow_state.push(close)
+
+    def check_signal_live(self, price):
+        curr_fast, curr_slow = self.fast_state.peek(price), self.slow_state.peek(price)
+        prev_fast, prev_slow = self.fast_state.value, self.slow_state.value
+        if None in (curr_fast, curr_slow, prev_fast, prev_slow):
+            return "HOLD", "Not enough data", price
+        return self._signal(prev_fast, prev_slow, curr_fast, curr_slow, price)
+
+    def _signal(self, prev_fast, prev_slow, curr_fast, curr_slow, current_price):
+        fast_p, slow_p = self.fast_p, self.slow_p
+
         # 1. Golden Cross (BUY)
         if prev_fast < prev_slow and curr_fast > curr_slow:
             return "BUY", f"SMA Cross UP ({fast_p} > {slow_p})", current_price
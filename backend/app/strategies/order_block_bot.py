@@ -1,10 +1,13 @@
 import asyncio
 import json
 import logging
+import math
 import uuid
 import time
-from typing import Dict, Any, List, Optional
+from typing import Callable, Dict, Any, List, Optional
+import numpy as np
 import ccxt.async_support as ccxt
+import ccxt.pro as ccxt_pro
 from app.core.redis import redis_manager
 
 logger = logging.getLogger(__name__)
@@ -46,6 +49,268 @@ class OrderBlockDetector:
 
         return detected_blocks
 
+class _BookSideLevels:
+    """
+    One side of the book, kept across updates and edited in place, with a running
+    volume total and the side's current blocks.
+
+    ccxt.pro hands out the whole (in-place mutated) book, not the deltas, so each
+    update walks it against our copy of the previous levels: unchanged runs are
+    skipped with C-level list slice comparisons, and only the levels that differ
+    are merged by price — overwritten, inserted or removed. The total moves by each
+    touched level's new - old volume (re-summed with math.fsum every `len(levels)`
+    touches so rounding can't drift). Only the touched levels are re-classified
+    against the threshold, unless it moved past an untouched level's volume.
+
+    Finding the changed levels still costs a C-level compare of the whole side, so
+    the merge only pays off on deep books: below STREAM_DEPTH levels (e.g. the bot's
+    watch_order_book limit=50) a plain OrderBlockDetector-style pass is cheaper and
+    is used instead (see scratch/benchmark_order_block_stream.py). A side that is
+    already merging keeps merging down to STREAM_DEPTH / 2 levels.
+    """
+    STREAM_DEPTH = 1000
+    LINEAR = 16  # book activity clusters at the top: compare this many levels one by one first
+    MIN_RUN = 32
+    MAX_RUN = 1024
+
+    def __init__(self, multiplier: float = 3.0, descending: bool = False):
+        self.multiplier = multiplier
+        self.descending = descending  # bids: best (highest) price first
+        self.levels: List[list] = []  # merge: copies of the book's levels (ccxt.pro mutates its own)
+        self.total = 0.0
+        self.changed = 0  # levels touched (merged) or read (scanned) on the last update
+        self.blocks: Dict[float, float] = {}  # price -> volume of the current blocks
+        self.block_set_changed = False  # a block price appeared or went away on the last update
+        self._block_prices: Optional[np.ndarray] = np.empty(0)
+        self._rolls = 0
+        # Volume bounds of the untouched levels: blocks >= _block_min, the rest <= _level_max.
+        # Conservative (levels changed since the last full pass still count), so a threshold
+        # in (_level_max, _block_min] leaves every untouched level's class as it was.
+        self._block_min = math.inf
+        self._level_max = -math.inf
+
+    @property
+    def prices(self) -> np.ndarray:
+        return np.array([level[0] for level in self.levels], dtype=float)
+
+    @property
+    def volumes(self) -> np.ndarray:
+        return np.array([level[1] for level in self.levels], dtype=float)
+
+    @property
+    def block_prices(self) -> np.ndarray:
+        """Block prices in book order (best first); rebuilt only after the block set changed."""
+        if self._block_prices is None:
+            self._block_prices = np.array(sorted(self.blocks, reverse=self.descending), dtype=float)
+        return self._block_prices
+
+    @classmethod
+    def _next_diff(cls, a: list, b: list, i: int) -> int:
+        """First index >= i where a and b differ (or the shorter length), given a[:i] == b[:i]."""
+        limit = min(len(a), len(b))
+        edge = min(i + cls.LINEAR, limit)
+        for k in range(i, edge):
+            if a[k] != b[k]:
+                return k
+        i = edge
+        step = cls.MIN_RUN
+        while i < limit:
+            # Gallop over equal runs (one C-level compare each) ...
+            run = min(step, limit - i)
+            if a[i:i + run] == b[i:i + run]:
+                i += run
+                step = min(step * 4, cls.MAX_RUN)
+                continue
+            # ... then bisect inside the run that differs
+            while run > 1:
+                half = run // 2
+                if a[i:i + half] == b[i:i + half]:
+                    i += half
+                    run -= half
+                else:
+                    run = half
+            return i
+        return limit
+
+    def _drop(self, level: list):
+        self.total -= level[1]
+        if self.blocks.pop(level[0], None) is not None:
+            self.block_set_changed = True
+
+    def _scan(self, levels):
+        """Whole-side pass: total, threshold and blocks recomputed from scratch."""
+        # If the book deepens again the merge restarts from an empty copy, and the
+        # inverted bounds make its first update re-classify every level
+        self.levels.clear()
+        self._rolls = 0
+        self._block_min, self._level_max = -math.inf, math.inf
+        self.total = sum(level[1] for level in levels)
+        self.changed = len(levels)
+        threshold = self.total / len(levels) * self.multiplier if levels else 0.0
+        fresh = {level[0]: level[1] for level in levels if level[1] >= threshold}
+        self.block_set_changed = fresh.keys() != self.blocks.keys()
+        self.blocks = fresh
+        if self.block_set_changed:
+            self._block_prices = None
+
+    def update(self, levels):
+        # Once merging, only drop back to scanning well below STREAM_DEPTH, so a book
+        # hovering around it doesn't restart the merge from an empty copy every time
+        if len(levels) < (self.STREAM_DEPTH // 2 if self.levels else self.STREAM_DEPTH):
+            self._scan(levels)
+            return
+        old = self.levels
+        descending = self.descending
+        touched = []  # our copies of the overwritten / inserted levels
+        removed = 0
+        self.block_set_changed = False
+
+        i = self._next_diff(levels, old, 0)
+        while True:
+            if i >= len(levels):
+                # The book got shorter: drop the old bottom
+                for level in old[i:]:
+                    self._drop(level)
+                removed += len(old) - i
+                del old[i:]
+                break
+            if i >= len(old):
+                # New levels at the bottom
+                for new_level in levels[i:]:
+                    level = list(new_level)
+                    old.append(level)
+                    self.total += level[1]
+                    touched.append(level)
+                break
+
+            new_level, level = levels[i], old[i]
+            if new_level[0] == level[0]:
+                self.total += new_level[1] - level[1]
+                level[:] = new_level
+                touched.append(level)
+                i += 1
+            elif (new_level[0] > level[0]) == descending:
+                # A price level that ranks before the old one: inserted
+                level = list(new_level)
+                old.insert(i, level)
+                self.total += level[1]
+                touched.append(level)
+                i += 1
+            else:
+                # The old level is gone
+                self._drop(old.pop(i))
+                removed += 1
+            i = self._next_diff(levels, old, i)
+
+        n = len(old)
+        self.changed = len(touched)
+        self._rolls += len(touched) + removed
+        if self._rolls >= n:
+            # Re-sum exactly so add / subtract rounding can't drift
+            self.total = math.fsum(level[1] for level in old)
+            self._rolls = 0
+
+        blocks = self.blocks
+        if not n:
+            self._block_min, self._level_max = math.inf, -math.inf
+        else:
+            threshold = self.total / n * self.multiplier
+            if self._level_max < threshold <= self._block_min:
+                # Untouched levels keep their class: re-test only the touched ones
+                for level in touched:
+                    price, volume = level[0], level[1]
+                    if volume >= threshold:
+                        if price not in blocks:
+                            self.block_set_changed = True
+                        blocks[price] = volume
+                        if volume < self._block_min:
+                            self._block_min = volume
+                    else:
+                        if blocks.pop(price, None) is not None:
+                            self.block_set_changed = True
+                        if volume > self._level_max:
+                            self._level_max = volume
+            else:
+                fresh = {}
+                level_max = -math.inf
+                for level in old:
+                    volume = level[1]
+                    if volume >= threshold:
+                        fresh[level[0]] = volume
+                    elif volume > level_max:
+                        level_max = volume
+                if fresh.keys() != blocks.keys():
+                    self.block_set_changed = True
+                self.blocks = fresh
+                self._block_min = min(fresh.values(), default=math.inf)
+                self._level_max = level_max
+
+        if self.block_set_changed:
+            self._block_prices = None
+
+
+class StreamingOrderBlockDetector:
+    """
+    Order block detection for a streamed order book (watch_order_book).
+
+    Same rule as OrderBlockDetector (level volume >= multiplier x side average),
+    but on deep books each update only touches the levels that changed (running
+    totals, and only those levels re-tested against the threshold while it stays
+    between the untouched levels' volumes); shallower sides are re-scanned. Block
+    age / persistence are tracked per block price. Block dicts are built on demand (`blocks()`); the hot path can
+    use `block_prices()`.
+    """
+
+    SIDES = ("bids", "asks")
+
+    def __init__(self, volume_threshold_multiplier: float = 3.0, clock: Callable[[], float] = time.time):
+        self.volume_threshold_multiplier = volume_threshold_multiplier
+        self.clock = clock
+        self._sides = {side: _BookSideLevels(volume_threshold_multiplier, descending=side == "bids") for side in self.SIDES}
+        # side -> {price: (first_seen, first update number)} of the current blocks
+        self._since: Dict[str, Dict[float, tuple]] = {side: {} for side in self.SIDES}
+        self._now = 0.0
+        self._updates = 0
+        self.blocks_changed = False
+
+    def update(self, orderbook: Dict[str, Any]) -> bool:
+        """Applies a book update. True if the set of block prices changed."""
+        self._now = now = self.clock()
+        self._updates += 1
+        self.blocks_changed = False
+        for block_type, side in self._sides.items():
+            side.update(orderbook.get(block_type) or [])
+            if side.block_set_changed:
+                # Blocks that were already blocks on the previous update keep their history
+                self.blocks_changed = True
+                since = self._since[block_type]
+                for price in since.keys() - side.blocks.keys():
+                    del since[price]
+                for price in side.blocks.keys() - since.keys():
+                    since[price] = (now, self._updates)
+        return self.blocks_changed
+
+    def block_prices(self, block_type: str) -> np.ndarray:
+        """Prices of the current blocks on one side, best first."""
+        return self._sides[block_type].block_prices
+
+    def blocks(self, block_type: str) -> List[Dict[str, float]]:
+        """Current blocks on one side, best first, with first_seen / age / persistence."""
+        side, since = self._sides[block_type], self._since[block_type]
+        blocks = []
+        for price in side.block_prices.tolist():
+            seen, first_update = since[price]
+            blocks.append({
+                "price": price,
+                "volume": side.blocks[price],
+                "type": block_type,
+                "first_seen": seen,
+                "age": self._now - seen,
+                "persistence": self._updates - first_update + 1,
+            })
+        return blocks
+
+
 class OrderBlockExecutionEngine:
     """
     Handles trading execution securely. Segregates Real (CCXT) and Paper trading.
@@ -438,29 +703,35 @@ class OrderBlockBotTask:
         self.exchange_id = config.get("exchange", "binance").lower()
         self.trade_amount = config.get("trade_amount", 0.01) # Base currency amount
         
-        self.detector = OrderBlockDetector(volume_threshold_multiplier=config.get("threshold_multiplier", 3.0))
+        self.detector = StreamingOrderBlockDetector(volume_threshold_multiplier=config.get("threshold_multiplier", 3.0))
         self.engine = OrderBlockExecutionEngine(config)
         self.margin_mode = config.get("margin_mode", "cross").lower()
         
         self.running = False
         self._task: Optional[asyncio.Task] = None
+        self._price_task: Optional[asyncio.Task] = None
+        self._last_price: Optional[float] = None
+        self._last_book_poll = 0.0
         
-        # We will use CCXT just to fetch public orderbook data rapidly for detection
+        # Public market data: order book / ticker streams via ccxt.pro (REST polling if the exchange has none)
         exchange_params = {'enableRateLimit': True}
         if config.get("trading_mode", "spot").lower() == "futures":
             exchange_params['options'] = {'defaultType': 'swap'}
-        self._public_exchange = getattr(ccxt, self.exchange_id)(exchange_params)
+        exchange_class = getattr(ccxt_pro, self.exchange_id, None) or getattr(ccxt, self.exchange_id)
+        self._public_exchange = exchange_class(exchange_params)
 
     async def start(self):
         self.running = True
         logger.info(f"Order Block Bot {self.bot_id} started for {self.pair}")
         await self._log(f"Bot started. Searching for order blocks on {self.pair}...")
+        self._price_task = asyncio.create_task(self._watch_price())
         self._task = asyncio.create_task(self._run_loop())
 
     async def stop(self):
         self.running = False
-        if self._task:
-            self._task.cancel()
+        for task in (self._task, self._price_task):
+            if task:
+                task.cancel()
         await self._public_exchange.close()
         logger.info(f"Order Block Bot {self.bot_id} stopped.")
         await self._log("Bot stopped.")
@@ -483,54 +754,81 @@ class OrderBlockBotTask:
         }
         await redis.publish("bot_logs", json.dumps(log_payload))
 
+    async def _watch_price(self):
+        """Keeps the last traded price current (watch_ticker, or fetch_ticker every 2s)."""
+        streaming = self._public_exchange.has.get('watchTicker') and hasattr(self._public_exchange, 'watch_ticker')
+        while self.running:
+            try:
+                if streaming:
+                    ticker = await self._public_exchange.watch_ticker(self.pair)
+                else:
+                    ticker = await self._public_exchange.fetch_ticker(self.pair)
+                self._last_price = ticker.get('last')
+                if not streaming:
+                    await asyncio.sleep(2)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Order Block Bot {self.bot_id} price update failed: {e}")
+                await asyncio.sleep(2)
+
+    async def _next_order_book(self) -> Dict[str, Any]:
+        """Next order book update: pushed by watch_order_book, or a REST poll every 2s."""
+        if self._public_exchange.has.get('watchOrderBook') and hasattr(self._public_exchange, 'watch_order_book'):
+            return await self._public_exchange.watch_order_book(self.pair, limit=50)
+        wait = 2 - (time.monotonic() - self._last_book_poll)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        self._last_book_poll = time.monotonic()
+        return await self._public_exchange.fetch_order_book(self.pair, limit=50)
+
     async def _run_loop(self):
         try:
             while self.running:
-                # 1. Fetch live order book
+                # 1. Wait for the next live order book update
                 try:
-                    orderbook = await self._public_exchange.fetch_order_book(self.pair, limit=50)
+                    orderbook = await self._next_order_book()
                 except Exception as e:
                     await self._log(f"Error fetching order book: {e}", "error")
                     await asyncio.sleep(2)
                     continue
 
-                # 2. Detect Smart Money Blocks
-                support_blocks = self.detector.detect_blocks(orderbook, "bids")
-                resistance_blocks = self.detector.detect_blocks(orderbook, "asks")
-
-                all_blocks = support_blocks + resistance_blocks
-                if all_blocks:
-                    # Notify frontend visually
-                    await self._log(f"Detected {len(all_blocks)} order block(s)", "info", {"blocks": all_blocks})
+                # 2. Detect Smart Money Blocks (incremental; age/persistence tracked per block)
+                if self.detector.update(orderbook):
+                    all_blocks = self.detector.blocks("bids") + self.detector.blocks("asks")
+                    if all_blocks:
+                        # Notify frontend visually (only when the set of blocks changes)
+                        await self._log(f"Detected {len(all_blocks)} order block(s)", "info", {"blocks": all_blocks})
 
                 # 3. Strategy Logic (Extremely basic for demonstration)
                 # If we detect major support (big bid wall) near the current spread, go Long.
                 # If we detect major resistance (big ask wall) near the spread, go Short/Sell.
                 
-                # Fetch current price briefly
-                ticker = await self._public_exchange.fetch_ticker(self.pair)
-                current_price = ticker.get('last')
+                # Current price from the ticker stream
+                current_price = self._last_price
                 
                 if current_price and not self.engine.active_position:
                     # Look for a support block close to current price (e.g. within 0.5%)
-                    for b in support_blocks:
-                        if (current_price - b['price']) / b['price'] < 0.005:
-                            await self._log(f"Price approaching massive support wall at {b['price']}. Executing BUY.", "warn")
-                            trade_res = await self.engine.execute_trade("buy", self.trade_amount, current_price)
-                            if trade_res:
-                                await self._log(f"BUY executed at {current_price}", "success", {"trade": trade_res})
-                            break
+                    support = self.detector.block_prices("bids")
+                    near = support[(current_price - support) / support < 0.005]
+                    if len(near):
+                        price = float(near[0])
+                        await self._log(f"Price approaching massive support wall at {price}. Executing BUY.", "warn")
+                        trade_res = await self.engine.execute_trade("buy", self.trade_amount, current_price)
+                        if trade_res:
+                            await self._log(f"BUY executed at {current_price}", "success", {"trade": trade_res})
                             
                 elif current_price and self.engine.active_position:
                      entry = self.engine.active_position['entry_price']
                      # Exit logic: if we are near a resistance block, or simply taking 1% profit
-                     for b in resistance_blocks:
-                         if (b['price'] - current_price) / current_price < 0.005:
-                             await self._log(f"Price approaching resistance block at {b['price']}. Executing SELL.", "warn")
-                             trade_res = await self.engine.execute_trade("sell", self.trade_amount, current_price)
-                             if trade_res:
-                                 await self._log(f"SELL executed at {current_price}", "success", {"trade": trade_res})
-                             break
+                     resistance = self.detector.block_prices("asks")
+                     near = resistance[(resistance - current_price) / current_price < 0.005]
+                     if len(near):
+                         price = float(near[0])
+                         await self._log(f"Price approaching resistance block at {price}. Executing SELL.", "warn")
+                         trade_res = await self.engine.execute_trade("sell", self.trade_amount, current_price)
+                         if trade_res:
+                             await self._log(f"SELL executed at {current_price}", "success", {"trade": trade_res})
                      
                      # Simple TP/SL
                      if (current_price - entry) / entry >= 0.01: # 1% TP
@@ -540,8 +838,7 @@ class OrderBlockBotTask:
                          trade_res = await self.engine.execute_trade("sell", self.trade_amount, current_price)
                          await self._log(f"Stop loss executed at {current_price}", "error", {"trade": trade_res})
 
-                # Poll interval
-                await asyncio.sleep(2)
+                # No poll interval: the next watch_order_book update paces the loop
         except asyncio.CancelledError:
             pass
         except Exception as e:
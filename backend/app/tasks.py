@@ -1,11 +1,13 @@
 from .celery_app import celery_app
+from celery.signals import worker_process_init, worker_process_shutdown
 from app.db.session import SessionLocal
 from .services.backtest_engine import BacktestEngine
+import os
 import sys
 import math
 import time
 from . import utils 
-from app.services.report_generator import generate_report
+from app.services.report_generator import generate_report, warm_up as warm_up_report_renderer
 from app.strategies import STRATEGY_MAP
 from app.services.live_engine import LiveBotEngine
 import asyncio
@@ -168,7 +170,11 @@ def run_backtest_task(self, symbol: str, timeframe: str, strategy_name: str, ini
             indicator_id=indicator_id
         )
         if result.get("status") == "success":
-            generate_report(self.request.id, result.get("daily_returns", "{}"), symbol, timeframe)
+            # Rendered off the backtest worker; repeat data is served from the report cache
+            render_report_task.apply_async(
+                args=[self.request.id, result.get("daily_returns", "{}"), symbol, timeframe],
+                queue=REPORT_QUEUE,
+            )
 
         print_pretty_result(result)
         publish_task_status('BACKTEST', self.request.id, 'completed', 100, result)
@@ -183,6 +189,25 @@ def run_backtest_task(self, symbol: str, timeframe: str, strategy_name: str, ini
     finally:
         db.close()
 
+# Dedicated queue for quantstats/weasyprint rendering (celery_worker_reports)
+REPORT_QUEUE = "reports"
+
+
+@celery_app.task
+def render_report_task(task_id: str, returns_json: str, symbol: str, timeframe: str, format: str = "pdf"):
+    """
+    Renders a backtest report (or returns the cached file for identical data).
+    """
+    return generate_report(task_id, returns_json, symbol, timeframe, format=format)
+
+
+@worker_process_init.connect
+def _warm_report_worker(**kwargs):
+    # Only the reports worker pre-loads quantstats/matplotlib/weasyprint
+    if os.getenv("REPORT_WORKER") == "1":
+        warm_up_report_renderer()
+
+
 @celery_app.task(bind=True)
 def run_optimization_task(self, symbol: str, timeframe: str, strategy_name: str, initial_cash: float, params: dict, start_date: str = None, end_date: str = None, method="grid", population_size=50, generations=10, commission: float = 0.001, slippage: float = 0.0, leverage: float = 1.0):
     db = SessionLocal()
@@ -839,7 +864,6 @@ def execute_sor_child_order(user_id: int, exchange_id: str, symbol: str, side: s
     from app.core.security import decrypt_key
     
     db = SessionLocal()
-    exchange = None
     try:
         print(f"⚡ Executing SOR Child Order: {side} {amount} {symbol} on {exchange_id}")
         
@@ -854,39 +878,30 @@ def execute_sor_child_order(user_id: int, exchange_id: str, symbol: str, side: s
             print(f"❌ SOR Failed: No API Key for user {user_id}")
             return "Failed: No API Key"
 
-        # 2. Setup Exchange
-        decrypted_secret = decrypt_key(api_key_record.secret_key)
-        exchange_class = getattr(ccxt, exchange_id, None)
-        
-        if not exchange_class:
+        # 2. Pooled Exchange Session
+        # Child slices of one parent order reuse the worker's loop and session
+        # (markets already loaded) instead of building both per slice.
+        from app.services.sor_session_pool import get_sor_session_pool
+
+        if not getattr(ccxt, exchange_id, None):
             return "Failed: Invalid Exchange"
 
-        exchange = exchange_class({
-            'apiKey': api_key_record.api_key,
-            'secret': decrypted_secret,
-            'enableRateLimit': True,
-            'options': {
-                'adjustForTimeDifference': True,
-                'recvWindow': 60000 if exchange_id.lower() == 'mexc' else 10000
-            },
-        })
-        
+        decrypted_secret = decrypt_key(api_key_record.secret_key)
+        pool = get_sor_session_pool()
+
         # 3. Execute Order
-        # Run async in sync celery worker
-        import asyncio
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
         async def _place():
-            if type.lower() == 'market':
-                return await exchange.create_market_order(symbol, side, amount)
-            elif type.lower() == 'limit':
-                return await exchange.create_limit_order(symbol, side, amount, price)
-            return None
-            
-        order = loop.run_until_complete(_place())
-        loop.close()
-        
+            async with pool.session(exchange_id, api_key_record.api_key, decrypted_secret) as exchange:
+                if type.lower() == 'market':
+                    return await exchange.create_market_order(symbol, side, amount)
+                elif type.lower() == 'limit':
+                    return await exchange.create_limit_order(symbol, side, amount, price)
+                return None
+
+        order = pool.run(_place())
+        if order is None:
+            return {"status": "failed", "error": f"Unsupported order type: {type}"}
+
         print(f"✅ SOR Child Order Placed: {order['id']}")
         return {"status": "success", "order_id": order['id']}
 
@@ -896,9 +911,12 @@ def execute_sor_child_order(user_id: int, exchange_id: str, symbol: str, side: s
     
     finally:
         db.close()
-        if exchange:
-            # exchange.close() is async, skipping proper close in sync task for now or use run_until_complete
-            pass 
+
+
+@worker_process_shutdown.connect
+def _close_sor_sessions(**kwargs):
+    from app.services.sor_session_pool import get_sor_session_pool
+    get_sor_session_pool().shutdown()
 
 @celery_app.task
 def run_session_monitor_task():
@@ -989,18 +1007,10 @@ def prune_l2_data():
     logger = get_task_logger("l2_pruner", "l2_pruner.log")
     db = SessionLocal()
     try:
-        from app.models.orderbook_snapshot import OrderBookSnapshot
         from app.services.dataset_archiver import DatasetArchiver
         from datetime import datetime, timedelta, timezone
         
         threshold = datetime.now(timezone.utc) - timedelta(hours=24)
-        
-        # 1. Fetch records to be deleted
-        old_snapshots = db.query(OrderBookSnapshot).filter(OrderBookSnapshot.timestamp < threshold).all()
-        
-        if not old_snapshots:
-            logger.info("No L2 snapshots older than 24 hours to prune.")
-            return "No data to prune."
 
         # Check auto-archiver setting
         from app.utils import get_redis_client
@@ -1008,23 +1018,23 @@ def prune_l2_data():
         status = r.get("global_auto_archiver_enabled")
         auto_archiver_enabled = status in (b"true", "true")
 
-        # 2. Archive records to Parquet (includes 10GB smart management)
-        if auto_archiver_enabled:
-            def log_proxy(msg):
-                logger.info(msg)
-                
-            success = DatasetArchiver.archive_snapshots(old_snapshots, add_log_func=log_proxy)
-            
-            if not success:
-                logger.error("Failed to archive L2 snapshots. Aborting deletion to prevent data loss.")
-                return "Archiving failed. Deletion aborted."
-        else:
+        if not auto_archiver_enabled:
             logger.info("Auto-Archiver is disabled in settings. Skipping archiving.")
 
-        # 3. Safe Deletion
-        deleted_count = db.query(OrderBookSnapshot).filter(OrderBookSnapshot.timestamp < threshold).delete()
-        db.commit()
-        
+        def log_proxy(msg):
+            logger.info(msg)
+
+        # Keyset-paginated stream: archive each chunk to Parquet (includes 10GB smart management)
+        # and delete it by id range; memory stays bounded by the chunk size.
+        result = DatasetArchiver.archive_and_prune(
+            db, threshold, archive=auto_archiver_enabled, add_log_func=log_proxy
+        )
+        deleted_count = result["deleted"]
+
+        if not deleted_count:
+            logger.info("No L2 snapshots older than 24 hours to prune.")
+            return "No data to prune."
+
         msg = f"Archived and Pruned {deleted_count} L2 snapshots older than 24 hours."
         logger.info(msg)
         return msg
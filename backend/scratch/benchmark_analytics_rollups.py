@@ -0,0 +1,87 @@
+"""
+Performance Metrics: Daily Rollups vs Trade Replay
+==================================================
+500k closed trades (~400 days) for one user in SQLite. Times
+`/analytics/performance` computed two ways:
+
+  * replay  - load every closed Trade ORM row and walk the equity curve
+  * rollups - compose one trade_performance_rollups row per day in SQL
+
+Usage: python scratch/benchmark_analytics_rollups.py [n_trades]
+"""
+
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.models.bot import Bot
+from app.services.analytics import AnalyticsService
+from app.services.trade_rollups import rebuild_trade_rollups
+from tests.test_analytics_rollups import BOT_OWNERS, make_session, synthetic_trades
+
+N_TRADES = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+REPEATS = 5
+
+
+def populate(db_path):
+    db = make_session(db_path)
+    db.add_all([Bot(id=bot_id, owner_id=owner, name=f"bot-{bot_id}") for bot_id, owner in BOT_OWNERS.items()])
+    db.commit()
+    closed_at, pnl, pnl_percent, bot_ids = synthetic_trades(N_TRADES)
+    conn = sqlite3.connect(db_path)
+    conn.executemany(
+        "INSERT INTO trades (id, bot_id, symbol, side, entry_price, exit_price, quantity, status, pnl, pnl_percent, closed_at)"
+        " VALUES (?, ?, 'BTC/USDT', 'BUY', 30000, 30000, 1, 'CLOSED', ?, ?, ?)",
+        ((i + 1, int(bot_ids[i]), float(pnl[i]), float(pnl_percent[i]), closed_at[i].isoformat(sep=" "))
+         for i in range(N_TRADES)),
+    )
+    conn.commit()
+    conn.close()
+    t0 = time.perf_counter()
+    days = rebuild_trade_rollups(db)
+    db.commit()
+    return db, closed_at, days, time.perf_counter() - t0
+
+
+def timed(fn, **kwargs):
+    samples = []
+    for _ in range(REPEATS):
+        t0 = time.perf_counter()
+        result = fn(**kwargs)
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples), result
+
+
+def benchmark():
+    with tempfile.TemporaryDirectory() as tmp:
+        db, closed_at, rows, backfill = populate(os.path.join(tmp, "trades.db"))
+        window = dict(start_date=closed_at[len(closed_at) // 4], end_date=closed_at[-len(closed_at) // 4])
+
+        replay, expected = timed(AnalyticsService.calculate_from_trades, db=db, owner_id=1)
+        rollup, actual = timed(AnalyticsService.calculate_performance_metrics, db=db, owner_id=1)
+        replay_win, expected_win = timed(AnalyticsService.calculate_from_trades, db=db, owner_id=1, **window)
+        rollup_win, actual_win = timed(AnalyticsService.calculate_performance_metrics, db=db, owner_id=1, **window)
+        assert actual == expected and actual_win == expected_win
+        db.close()
+
+    print("\n" + "=" * 55)
+    print("   ⚡ Performance Metrics: Rollups vs Trade Replay")
+    print("=" * 55)
+    print(f"   Trades              : {N_TRADES:,}  |  rollup rows: {rows:,}")
+    print(f"   Backfill            : {backfill:>8.2f} s (one-off)")
+    print("-" * 55)
+    print(f"   All time   replay   : {replay * 1000:>9.1f} ms")
+    print(f"   All time   rollups  : {rollup * 1000:>9.1f} ms  ({replay / rollup:,.0f}x)")
+    print(f"   Date range replay   : {replay_win * 1000:>9.1f} ms")
+    print(f"   Date range rollups  : {rollup_win * 1000:>9.1f} ms  (incl. 2 partial days)")
+    print("   Metrics identical   : yes")
+    print("=" * 55 + "\n")
+
+
+if __name__ == "__main__":
+    benchmark()
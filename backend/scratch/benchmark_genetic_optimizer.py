@@ -0,0 +1,139 @@
+"""
+Strategy GA: Parallel Generations + Fitness Cache vs Sequential Loop
+====================================================================
+SMA Crossover on synthetic hourly candles, population 50 x 20 generations:
+
+  * sequential - the old BacktestEngine GA loop (one backtrader run at a time,
+                 in-run signature cache only)
+  * driver     - GeneticOptimizer: whole generation submitted to the pool and
+                 collected as_completed, candles loaded once per worker, LRU
+                 fitness cache; 1 and 4 workers
+  * warm cache - the driver again, reading the fitness cache persisted to disk
+
+Same seed everywhere, so all variants must end on the same best individual.
+Worker speed-up is bounded by the usable cores (printed below).
+
+Usage: python scratch/benchmark_genetic_optimizer.py [bars]
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.genetic_optimizer import BacktestFitness, FitnessCache, GeneticOptimizer, run_single_backtest
+from app.services.ml_walk_forward_cv import available_cores
+from app.strategies import STRATEGY_MAP
+
+BARS = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+POP_SIZE, GENERATIONS = 50, 20
+PARAM_RANGES = {"fast_period": list(range(3, 41)), "slow_period": list(range(20, 201, 5))}
+
+
+def candle_frame(n_bars=600, seed=3):
+    rng = np.random.default_rng(seed)
+    close = 30_000 * np.exp(np.cumsum(rng.normal(0, 0.01, n_bars)) + np.sin(np.arange(n_bars) / 40) * 0.05)
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    spread = np.abs(rng.normal(0, 0.004, n_bars)) * close
+    return pd.DataFrame({
+        "open": open_, "high": np.maximum(open_, close) + spread, "low": np.minimum(open_, close) - spread,
+        "close": close, "volume": rng.uniform(1, 100, n_bars),
+    }, index=pd.date_range("2024-01-01", periods=n_bars, freq="h"))
+
+
+def legacy_genetic_algorithm(df, strategy_class, initial_cash, param_ranges, fixed_params, pop_size, generations,
+                             opt_target="profit", min_trades=5):
+    """The sequential BacktestEngine._run_genetic_algorithm loop before the GA driver."""
+    param_keys = list(param_ranges.keys())
+    population = [{k: random.choice(v) for k, v in param_ranges.items()} for _ in range(pop_size)]
+    best_results, history_cache = [], {}
+    for gen in range(generations):
+        evaluated_pop = []
+        for individual in population:
+            param_signature = json.dumps(individual, sort_keys=True)
+            if param_signature in history_cache:
+                metrics = history_cache[param_signature]
+            else:
+                metrics = run_single_backtest(df, strategy_class, initial_cash, individual, fixed_params)
+                metrics['params'] = individual
+                history_cache[param_signature] = metrics
+            if metrics['total_trades'] < min_trades:
+                metrics['fitness_score'] = -9999
+            else:
+                metrics['fitness_score'] = metrics['profitPercent']
+            evaluated_pop.append(metrics)
+        evaluated_pop.sort(key=lambda x: x.get('fitness_score', -9999), reverse=True)
+        best_results.extend(evaluated_pop[:5])
+        next_generation = [item['params'] for item in evaluated_pop[:int(pop_size * 0.2)]]
+        while len(next_generation) < pop_size:
+            parent1 = random.choice(evaluated_pop[:int(pop_size/2)])['params']
+            parent2 = random.choice(evaluated_pop[:int(pop_size/2)])['params']
+            child = parent1.copy()
+            for k in param_keys:
+                if random.random() > 0.5: child[k] = parent2[k]
+            if random.random() < 0.2:
+                mutate_key = random.choice(param_keys)
+                child[mutate_key] = random.choice(param_ranges[mutate_key])
+            next_generation.append(child)
+        population = next_generation
+    unique_results = {json.dumps(r['params'], sort_keys=True): r for r in best_results}
+    return list(unique_results.values())
+
+
+def best_of(results):
+    return max(results, key=lambda r: r["fitness_score"])
+
+
+def run_driver(evaluator, n_workers, cache_path=None):
+    optimizer = GeneticOptimizer(evaluator, n_workers=n_workers, cache=FitnessCache(path=cache_path), rng=random.Random(7))
+    t0 = time.perf_counter()
+    results = optimizer.run(PARAM_RANGES, pop_size=POP_SIZE, generations=GENERATIONS, min_trades=1)
+    return time.perf_counter() - t0, results, optimizer.generation_stats
+
+
+def benchmark():
+    df = candle_frame(n_bars=BARS)
+    strategy = STRATEGY_MAP["SMA Crossover"]
+
+    random.seed(7)
+    t0 = time.perf_counter()
+    legacy = legacy_genetic_algorithm(df, strategy, 10_000, PARAM_RANGES, {}, POP_SIZE, GENERATIONS, min_trades=1)
+    legacy_time = time.perf_counter() - t0
+    best = best_of(legacy)
+
+    evaluator = BacktestFitness(df, strategy, 10_000, {})
+    cache_path = os.path.join(tempfile.mkdtemp(prefix="ga_bench_"), "fitness.pkl")
+    runs = [("driver, 1 worker", *run_driver(evaluator, 1))]
+    runs.append(("driver, 4 workers", *run_driver(evaluator, 4, cache_path)))
+    runs.append(("warm disk cache", *run_driver(evaluator, 4, cache_path)))
+
+    print("\n" + "=" * 55)
+    print("   ⚡ Strategy GA: Parallel Driver vs Sequential Loop")
+    print("=" * 55)
+    print(f"   Data                : {BARS:,} candles, SMA Crossover")
+    print(f"   Search              : {POP_SIZE} x {GENERATIONS} generations, {available_cores()} usable core(s)")
+    print(f"   Best (sequential)   : {best['params']} -> {best['profitPercent']}%")
+    print("-" * 55)
+    print(f"   {'sequential':<20}: {legacy_time:>7.2f} s")
+    for label, elapsed, results, stats in runs:
+        backtests = sum(s["backtests"] for s in stats)
+        hit_rate = 1 - backtests / (POP_SIZE * GENERATIONS)
+        same = "same best" if best_of(results) == best else "BEST DIFFERS"
+        print(f"   {label:<20}: {elapsed:>7.2f} s  ({legacy_time / elapsed:.2f}x, {backtests} backtests, "
+              f"hit {hit_rate * 100:.0f}%, {same})")
+    print("-" * 55)
+    gens = runs[1][3]
+    print("   Per generation (4 workers): " + ", ".join(
+        f"{s['seconds']:.2f}s/{s['cache_hit_rate'] * 100:.0f}%" for s in gens[:5]) + ", ...")
+    print("=" * 55 + "\n")
+
+
+if __name__ == "__main__":
+    benchmark()
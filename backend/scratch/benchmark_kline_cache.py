@@ -0,0 +1,123 @@
+"""
+Cascading BB: Shared Kline Cache vs Per-Bot REST Polling
+========================================================
+One simulated hour of 50 CascadingBB bots (10 per symbol, 5 symbols),
+each cascading through a few timeframes. Every second each stream gets a
+tick (a new candle when its interval rolls) and every bot reads its bands.
+
+  * polling - each bot: fetch_ohlcv(limit=length+5) + pandas BB every 10 s,
+              plus a cold fetch on every cascade
+  * cache   - one REST seed per (symbol, timeframe), then O(1) BB updates
+              from one shared kline stream per timeframe
+
+Usage: python scratch/benchmark_kline_cache.py
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.candle_subscriptions import CandleSubscriptionRegistry
+from app.services.kline_cache import MultiTimeframeKlineCache
+from tests.test_kline_cache import INTERVAL_MS, TIMEFRAMES, FakeKlineExchange, pandas_bbands
+
+SYMBOLS = ["BTC/USDT", "ETH/USDT", "SOL/USDT", "XRP/USDT", "DOGE/USDT"]
+BOTS_PER_SYMBOL = 10
+SECONDS = 3600
+BB_LENGTH, BB_STD = 20, 2.0
+REFRESH_SECONDS = 10
+CASCADES_PER_HOUR = 4
+
+
+def bot_timeframes(rng):
+    """Timeframe index of each bot for every second: a few cascades, back to 1m after a trade."""
+    schedule = np.zeros((len(SYMBOLS) * BOTS_PER_SYMBOL, SECONDS), dtype=int)
+    for bot in range(schedule.shape[0]):
+        level = 0
+        for t in sorted(rng.choice(SECONDS, CASCADES_PER_HOUR, replace=False)):
+            level = 0 if level >= 3 else level + 1
+            schedule[bot, t:] = level
+    return schedule
+
+
+def tick_all(rng, second):
+    for symbol in SYMBOLS:
+        for tf in TIMEFRAMES:
+            rolls = (second * 1000) % INTERVAL_MS[tf] == 0
+            FakeKlineExchange.tick(symbol, tf, 60000 + rng.standard_normal() * 50, new_candle=rolls and second > 0)
+
+
+async def run_polling(schedule):
+    FakeKlineExchange.reset(symbols=SYMBOLS)
+    rest = FakeKlineExchange("binance")
+    rng = np.random.default_rng(0)
+    last_fetch = np.full(schedule.shape[0], -REFRESH_SECONDS)
+    bb_time = 0.0
+    for second in range(SECONDS):
+        tick_all(rng, second)
+        for bot in range(schedule.shape[0]):
+            level = schedule[bot, second]
+            cascaded = second > 0 and level != schedule[bot, second - 1]
+            if cascaded or second - last_fetch[bot] >= REFRESH_SECONDS:
+                symbol = SYMBOLS[bot // BOTS_PER_SYMBOL]
+                ohlcv = await rest.fetch_ohlcv(symbol, TIMEFRAMES[level], limit=BB_LENGTH + 5)
+                t0 = time.perf_counter()
+                pandas_bbands([c[4] for c in ohlcv], BB_LENGTH, BB_STD)
+                bb_time += time.perf_counter() - t0
+                last_fetch[bot] = second
+    return sum(FakeKlineExchange.rest_calls.values()), bb_time
+
+
+async def run_cache(schedule):
+    FakeKlineExchange.reset(symbols=SYMBOLS)
+    registry = CandleSubscriptionRegistry(exchange_factory=FakeKlineExchange)
+    cache = MultiTimeframeKlineCache(exchange_factory=FakeKlineExchange, registry_factory=lambda market_type: registry)
+    for bot in range(schedule.shape[0]):
+        cache.attach("binance", SYMBOLS[bot // BOTS_PER_SYMBOL], TIMEFRAMES, BB_LENGTH)
+    for _ in range(10):
+        await asyncio.sleep(0)
+    streams = registry.upstream_count
+
+    rng = np.random.default_rng(0)
+    read_time = 0.0
+    for second in range(SECONDS):
+        tick_all(rng, second)
+        for _ in range(3):
+            await asyncio.sleep(0)
+        t0 = time.perf_counter()
+        for bot in range(schedule.shape[0]):
+            bb = cache.bollinger("binance", SYMBOLS[bot // BOTS_PER_SYMBOL], TIMEFRAMES[schedule[bot, second]], BB_LENGTH, BB_STD)
+            assert bb is not None
+        read_time += time.perf_counter() - t0
+    await cache.close()
+    return sum(FakeKlineExchange.rest_calls.values()), read_time, streams
+
+
+def benchmark():
+    schedule = bot_timeframes(np.random.default_rng(42))
+    polling_calls, polling_bb = asyncio.run(run_polling(schedule))
+    cache_calls, cache_reads, streams = asyncio.run(run_cache(schedule))
+    n_bots = schedule.shape[0]
+
+    print("\n" + "=" * 55)
+    print("   ⚡ Cascading BB: Kline Cache vs REST Polling (1 h)")
+    print("=" * 55)
+    print(f"   Bots                : {n_bots}  ({len(SYMBOLS)} symbols x {BOTS_PER_SYMBOL})")
+    print(f"   Kline streams       : {streams}  (symbol x timeframe, shared)")
+    print("-" * 55)
+    print(f"   REST calls  polling : {polling_calls:>8,}")
+    print(f"   REST calls  cache   : {cache_calls:>8,}  (seeds only)")
+    print(f"   REST calls saved    : {polling_calls - cache_calls:>8,} / hour")
+    print("-" * 55)
+    print(f"   BB compute  polling : {polling_bb * 1000:>8.1f} ms  (every {REFRESH_SECONDS} s per bot)")
+    print(f"   BB reads    cache   : {cache_reads * 1000:>8.1f} ms  (every second per bot)")
+    print("=" * 55)
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,125 @@
+"""
+Liquidation Map Gauges: Per-second Bucket Ring vs Event List
+============================================================
+God Mode liquidation stream at 20,000 liquidations / minute (2 exchanges),
+replayed for 8 minutes with the heuristics loop ticking once per second:
+
+  * list   - every liquidation appended to a list; each cycle filters the
+             list (5 min) and re-sums it for the pain gauge and 60s split
+  * bucket - RollingLiquidationWindow: per-second running sums per
+             exchange x side x smart/dumb; each query is O(buckets), plus
+             the 5 min price bands behind the magnet zones
+
+Usage: python scratch/benchmark_liquidation_window.py [per_minute]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.liquidation_window import RollingLiquidationWindow
+
+PER_MINUTE = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+MINUTES = 8
+
+
+class ListLiquidationGauges:
+    """The list-based rolling history GodModeService used before the bucket ring."""
+
+    def __init__(self):
+        self.history = []
+        self.whale_feed = []
+
+    def add(self, now, ex_id, liq):
+        price = float(liq["price"])
+        usd_value = price * float(liq["amount"])
+        is_smart = usd_value > 50000
+        self.history.append({"time": now, "value": usd_value, "is_smart": is_smart})
+        if is_smart and usd_value > 100000:
+            self.whale_feed.insert(0, {"value": round(usd_value), "exchange": ex_id, "timestamp": now * 1000})
+            if len(self.whale_feed) > 20:
+                self.whale_feed.pop()
+
+    def gauges(self, now):
+        self.history = [x for x in self.history if now - x["time"] < 300]
+        pain_value = sum(x["value"] for x in self.history)
+        recent_60s = [x for x in self.history if now - x["time"] < 60]
+        smart_sum = sum(x["value"] for x in recent_60s if x["is_smart"])
+        dumb_sum = sum(x["value"] for x in recent_60s if not x["is_smart"])
+        return pain_value, smart_sum, dumb_sum
+
+
+def liquidation_stream(per_minute=20_000, minutes=8, seed=4):
+    """(time, exchange, liquidation) at `per_minute`, with bursts and whale-sized events."""
+    rng = np.random.default_rng(seed)
+    n = per_minute * minutes
+    start = 1_700_000_000.0
+    times = start + np.sort(rng.uniform(0, minutes * 60, n))
+    values = rng.lognormal(mean=8.0, sigma=1.6, size=n)
+    prices = 60_000 + np.cumsum(rng.normal(0, 4, n))
+    events = []
+    for t, v, p in zip(times, values, prices):
+        ex_id = "binance" if rng.random() < 0.6 else "bybit"
+        side = "sell" if rng.random() < 0.55 else "buy"
+        events.append((float(t), ex_id, {"price": float(p), "amount": float(v / p), "side": side}))
+    return events
+
+
+
+def replay(add, gauges, events):
+    ingest = cycles = 0.0
+    n_cycles = 0
+    next_tick = int(events[0][0]) + 1
+    for t, ex_id, liq in events:
+        if t >= next_tick:
+            t0 = time.perf_counter()
+            gauges(next_tick)
+            cycles += time.perf_counter() - t0
+            n_cycles += 1
+            next_tick += 1
+        t0 = time.perf_counter()
+        add(t, ex_id, liq)
+        ingest += time.perf_counter() - t0
+    return ingest / len(events), cycles / n_cycles
+
+
+def benchmark():
+    events = liquidation_stream(per_minute=PER_MINUTE, minutes=MINUTES)
+
+    reference = ListLiquidationGauges()
+    list_ingest, list_cycle = replay(reference.add, reference.gauges, events)
+
+    window = RollingLiquidationWindow()
+
+    def add(t, ex_id, liq):
+        price = float(liq["price"])
+        window.add(t, ex_id, liq["side"], price * float(liq["amount"]), price)
+
+    def gauges(now):
+        window.total(now, 300)
+        window.smart_dumb(now, 60)
+        window.by_price_band(now, 300)
+
+    bucket_ingest, bucket_cycle = replay(add, gauges, events)
+
+    print("\n" + "=" * 55)
+    print("   ⚡ Liquidation Gauges: Bucket Ring vs Event List")
+    print("=" * 55)
+    print(f"   Stream              : {PER_MINUTE:,} liq/min for {MINUTES} min ({len(events):,} events)")
+    print(f"   5-min window        : {PER_MINUTE * 5:,} events vs 301 buckets")
+    print("-" * 55)
+    print(f"   List   ingest       : {list_ingest * 1e6:>8.2f} µs / liquidation")
+    print(f"   Bucket ingest       : {bucket_ingest * 1e6:>8.2f} µs / liquidation")
+    print(f"   List   gauge cycle  : {list_cycle * 1e3:>8.2f} ms / second")
+    print(f"   Bucket gauge cycle  : {bucket_cycle * 1e3:>8.2f} ms / second  ({list_cycle / bucket_cycle:.0f}x faster)")
+    print(f"   Loop CPU / second   : {(list_ingest * PER_MINUTE / 60 + list_cycle) * 1e3:>8.2f} ms -> "
+          f"{(bucket_ingest * PER_MINUTE / 60 + bucket_cycle) * 1e3:.2f} ms")
+    print("=" * 55)
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,101 @@
+"""
+Live Bots: Candle Ring Buffer + Incremental Signals vs DataFrame Path
+=====================================================================
+100 bots (RSI / MACD / SMA Cross), each with a full 500-candle window, fed the
+same Binance kline stream. Per tick, for every bot:
+
+  * dataframe - the old path: pd.concat / .at update + trim, then pandas_ta
+                over the whole frame in check_signal
+  * ring      - OHLCVRingBuffer update + check_signal_live on O(1) state
+  * ring+view - ring, plus building the DataFrame view (what a strategy
+                without incremental state, e.g. AI Model, pays per tick)
+
+Latency is the time to push one tick through all 100 bots.
+
+Usage: python scratch/benchmark_live_ring_buffer.py [ticks]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tests.test_live_ring_buffer import STRATEGIES, bare_bot, legacy_update_dataframe, recorded_klines
+
+N_BOTS = 100
+TICKS = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+WARMUP_CANDLES = 420
+
+
+def make_bots(history):
+    names = ["RSI", "MACD", "SMA"]
+    bots = []
+    for i in range(N_BOTS):
+        strategy_class, config = STRATEGIES[names[i % len(names)]]
+        bot = bare_bot(strategy_class(config))
+        bot.df = history
+        bots.append(bot)
+    return bots
+
+
+def run_dataframe(history, warmup, ticks):
+    strategies = [bot.strategy_executor for bot in make_bots(history)]
+    frames = [history.copy() for _ in strategies]
+    for kline in warmup:
+        frames = [legacy_update_dataframe(df, kline) for df in frames]
+    latencies = []
+    for kline in ticks:
+        t0 = time.perf_counter()
+        for i, strategy in enumerate(strategies):
+            frames[i] = legacy_update_dataframe(frames[i], kline)
+            strategy.check_signal(frames[i])
+        latencies.append(time.perf_counter() - t0)
+    return latencies
+
+
+def run_ring(history, warmup, ticks, with_view=False):
+    bots = make_bots(history)
+    for kline in warmup:
+        for bot in bots:
+            bot._update_candles(kline)
+    latencies = []
+    for kline in ticks:
+        t0 = time.perf_counter()
+        for bot in bots:
+            bot._update_candles(kline)
+            bot._check_signal()
+            if with_view:
+                bot.df
+        latencies.append(time.perf_counter() - t0)
+    return latencies
+
+
+def benchmark():
+    history, stream = recorded_klines(n_candles=WARMUP_CANDLES + TICKS // 3 + 2)
+    warmup, ticks = stream[:WARMUP_CANDLES * 3], stream[WARMUP_CANDLES * 3:][:TICKS]
+
+    runs = [
+        ("dataframe", run_dataframe(history, warmup, ticks)),
+        ("ring", run_ring(history, warmup, ticks)),
+        ("ring+view", run_ring(history, warmup, ticks, with_view=True)),
+    ]
+    base = np.median(runs[0][1])
+
+    print("\n" + "=" * 55)
+    print("   ⚡ Live Bots: Ring Buffer vs DataFrame Per Tick")
+    print("=" * 55)
+    print(f"   Bots                : {N_BOTS} (RSI / MACD / SMA Cross), 500-candle window")
+    print(f"   Ticks               : {len(ticks)} (3 per candle)")
+    print("-" * 55)
+    for label, latencies in runs:
+        ms = np.array(latencies) * 1000
+        print(f"   {label:<20}: p50 {np.median(ms):>8.2f} ms, p99 {np.percentile(ms, 99):>8.2f} ms "
+              f"({base / np.median(latencies):.0f}x)")
+    print("=" * 55 + "\n")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,97 @@
+"""
+Model Listing: Metadata Catalog vs metadata.json Scan
+=====================================================
+5,000 custom models (each with a metadata.json on disk) for one user in
+SQLite. Times `GET /ml-models?mode=advanced_sl_tp&symbol=BTC/USDT` two ways:
+
+  * scan    - load every model, lazy-load its versions, open + parse each
+              active version's metadata.json, then read `features` from disk
+              again while serializing the response
+  * catalog - filter on the indexed ModelVersion columns in SQL
+
+Usage: python scratch/benchmark_model_catalog.py [n_models]
+"""
+
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import models
+from app.services import model_catalog
+from tests.test_model_catalog import all_models, legacy_advanced_sl_tp, make_session, populate
+
+N_MODELS = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+REPEATS = 5
+SYMBOL = "BTC/USDT"
+
+# Every 13th metadata.json is deliberately corrupt
+logging.getLogger(model_catalog.__name__).setLevel(logging.ERROR)
+
+
+def legacy_features(version):
+    if version.metadata_path and os.path.exists(version.metadata_path):
+        try:
+            with open(version.metadata_path, 'r') as f:
+                return json.load(f).get("features", [])
+        except Exception:
+            return []
+    return []
+
+
+def scan_listing(db):
+    db.expire_all()
+    listed = legacy_advanced_sl_tp(all_models(db), SYMBOL)
+    return [(m.id, [legacy_features(v) for v in m.versions]) for m in listed]
+
+
+def catalog_listing(db):
+    db.expire_all()
+    listed = model_catalog.list_user_models(db, 1, mode="advanced_sl_tp", symbol=SYMBOL)
+    return [(m.id, [v.features for v in m.versions]) for m in listed]
+
+
+def timed(fn, db):
+    samples = []
+    for _ in range(REPEATS):
+        t0 = time.perf_counter()
+        result = fn(db)
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples), result
+
+
+def benchmark():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = make_session(os.path.join(tmp, "models.db"))
+        populate(db, os.path.join(tmp, "uploads"), N_MODELS)
+
+        t0 = time.perf_counter()
+        indexed = model_catalog.backfill_catalog(db)
+        backfill = time.perf_counter() - t0
+
+        scan, expected = timed(scan_listing, db)
+        catalog, actual = timed(catalog_listing, db)
+        assert actual == expected
+        listed = len(actual)
+        versions = db.query(models.ModelVersion).count()
+        db.close()
+
+    print("\n" + "=" * 55)
+    print("   ⚡ Model Listing: Catalog vs metadata.json Scan")
+    print("=" * 55)
+    print(f"   Models              : {N_MODELS:,}  |  versions: {versions:,}")
+    print(f"   Matching SL/TP      : {listed:,} ({SYMBOL})")
+    print(f"   Backfill            : {backfill:>8.2f} s (one-off, {indexed:,} versions)")
+    print("-" * 55)
+    print(f"   metadata.json scan  : {scan * 1000:>9.1f} ms")
+    print(f"   SQL catalog         : {catalog * 1000:>9.1f} ms  ({scan / catalog:,.1f}x)")
+    print("=" * 55)
+
+
+if __name__ == "__main__":
+    benchmark()
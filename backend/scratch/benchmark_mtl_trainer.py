@@ -0,0 +1,137 @@
+"""
+DL Trainer: Mini-batch Streaming vs Full-batch Tensors
+======================================================
+Peak RSS and epoch time of PyTorchTrainer on a large L2 feature matrix
+(default 5M rows x 32 features, float32, loaded into RAM like the training
+engine's arrays):
+
+  * full-batch - the previous loop: whole training set -> one FloatTensor,
+                 one forward/backward over every row per epoch
+  * mini-batch - PyTorchTrainer.train_model: batches sliced from the arrays,
+                 gradient accumulation, early stopping on a held-out tail
+
+Each mode runs in its own process so peak RSS is measured in isolation.
+The full-batch run is capped (--full-rows, default 500k) — at 5M rows the
+LSTM activations alone do not fit in RAM on a typical worker.
+
+Usage: python scratch/benchmark_mtl_trainer.py [rows] [--full-rows N] [--bf16]
+"""
+
+import multiprocessing as mp
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+args = [a for a in sys.argv[1:] if not a.startswith("--")]
+ROWS = int(args[0]) if args else 5_000_000
+FULL_ROWS = int(sys.argv[sys.argv.index("--full-rows") + 1]) if "--full-rows" in sys.argv else 500_000
+USE_BF16 = "--bf16" in sys.argv
+FEATURES = 32
+BATCH_SIZE = 2048
+
+
+def make_dataset(directory, rows):
+    rng = np.random.default_rng(7)
+    X = np.lib.format.open_memmap(os.path.join(directory, "X.npy"), mode="w+", dtype=np.float32, shape=(rows, FEATURES))
+    y = np.lib.format.open_memmap(os.path.join(directory, "y.npy"), mode="w+", dtype=np.float32, shape=(rows,))
+    for start in range(0, rows, 500_000):
+        chunk = rng.normal(size=(min(500_000, rows - start), FEATURES)).astype(np.float32)
+        X[start:start + len(chunk)] = chunk
+        y[start:start + len(chunk)] = chunk[:, 0] + 0.5 * chunk[:, 1] > 0
+    X.flush()
+    y.flush()
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_full_batch(directory, rows, queue):
+    import torch
+    import torch.nn as nn
+    from app.models.classic_dl_models import SimpleLSTM
+
+    X = np.load(os.path.join(directory, "X.npy"))[:rows]
+    y = np.load(os.path.join(directory, "y.npy"))[:rows]
+    torch.manual_seed(0)
+    model = SimpleLSTM(input_size=FEATURES)
+    optimizer = torch.optim.Adam(model.parameters(), lr=0.001)
+    criterion = nn.BCEWithLogitsLoss()
+    t0 = time.perf_counter()
+    X_t = torch.FloatTensor(X).unsqueeze(1)
+    y_t = torch.FloatTensor(y)
+    model.train()
+    outputs = model(X_t)
+    optimizer.zero_grad()
+    loss = criterion(outputs, y_t.reshape(-1, 1))
+    loss.backward()
+    optimizer.step()
+    queue.put((time.perf_counter() - t0, peak_rss_mb()))
+
+
+def run_mini_batch(directory, rows, queue):
+    from app.models.classic_dl_models import SimpleLSTM
+    from app.services.mtl.trainer import PyTorchTrainer
+
+    import torch
+
+    class Job:
+        id, algorithm, progress = 1, "LSTM", 0.0
+
+    X = np.load(os.path.join(directory, "X.npy"))[:rows]
+    y = np.load(os.path.join(directory, "y.npy"))[:rows]
+    torch.manual_seed(0)
+    config = {"epochs": 1, "batch_size": BATCH_SIZE, "grad_accumulation_steps": 2,
+              "prediction_target": "classification", "use_bf16": USE_BF16, "early_stopping_patience": 3}
+    t0 = time.perf_counter()
+    PyTorchTrainer.train_model(
+        model=SimpleLSTM(input_size=FEATURES), X_train=X, y_train=y, X_test=X[:10_000], y_test=y[:10_000],
+        config=config, job=Job(), add_log=lambda message: None, process_metrics=lambda *a: None,
+        calculate_classification_metrics=lambda *a: "", calculate_regression_metrics=lambda *a: "",
+        model_path=os.path.join(directory, "model.pkl"),
+    )
+    queue.put((time.perf_counter() - t0, peak_rss_mb()))
+
+
+def measure(target, directory, rows):
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    process = ctx.Process(target=target, args=(directory, rows, queue))
+    process.start()
+    process.join()
+    if process.exitcode != 0:
+        return None
+    return queue.get()
+
+
+def benchmark():
+    with tempfile.TemporaryDirectory() as directory:
+        make_dataset(directory, ROWS)
+        full_rows = min(FULL_ROWS, ROWS)
+        full = measure(run_full_batch, directory, full_rows)
+        mini = measure(run_mini_batch, directory, ROWS)
+
+    print("\n" + "=" * 55)
+    print("   ⚡ DL Trainer: Mini-batch vs Full-batch (1 epoch)")
+    print("=" * 55)
+    print(f"   Dataset             : {ROWS:,} x {FEATURES} float32 in RAM ({ROWS * FEATURES * 4 / 2**20:,.0f} MiB)")
+    print(f"   Model               : SimpleLSTM(64x2)  |  bf16: {USE_BF16}")
+    print("-" * 55)
+    if full:
+        print(f"   Full-batch  epoch   : {full[0]:>9.1f} s   ({full_rows:,} rows)")
+        print(f"   Full-batch  peak RSS: {full[1]:>9,.0f} MiB ({full_rows:,} rows)")
+    else:
+        print(f"   Full-batch          : out of memory at {full_rows:,} rows")
+    print(f"   Mini-batch  epoch   : {mini[0]:>9.1f} s   ({ROWS:,} rows, batch {BATCH_SIZE} x 2)")
+    print(f"   Mini-batch  peak RSS: {mini[1]:>9,.0f} MiB ({ROWS:,} rows)")
+    print("=" * 55)
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,91 @@
+"""
+AutoML (Optuna): Best Score vs Wall Time, with and without Pruning
+==================================================================
+Same XGBoost search (TPE sampler, same seed, journal storage) run three ways:
+
+  * none      - every trial trains all of its boosting rounds
+  * median    - MedianPruner on the held-out accuracy reported every 10 rounds
+  * hyperband - HyperbandPruner over boosting rounds
+
+The best validation accuracy found so far is read back from the study's trial
+timestamps at fixed wall-clock checkpoints.
+
+Usage: python scratch/benchmark_optuna_pruning.py [trials] [rows]
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import optuna
+import pandas as pd
+from optuna.trial import TrialState
+
+from app.services.ml.optuna_optimizer import load_study_storage, run_optuna_study, study_journal_path
+
+N_TRIALS = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+ROWS = int(sys.argv[2]) if len(sys.argv) > 2 else 20_000
+
+
+def training_frame(n_rows=4_000, seed=0):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.normal(size=(n_rows, 10)), columns=[f"f{i}" for i in range(10)])
+    y = pd.Series((X["f0"] - 0.5 * X["f3"] + rng.normal(scale=0.8, size=n_rows) > 0).astype(int))
+    return X, y
+
+
+def load_trials(study_name, storage_dir):
+    study = optuna.load_study(study_name=study_name, storage=load_study_storage(study_journal_path(study_name, storage_dir)))
+    return study.get_trials(deepcopy=False)
+
+
+def best_score_curve(trials):
+    """[(seconds since the study started, best accuracy so far)] per finished trial."""
+    start = min(t.datetime_start for t in trials)
+    best, curve = 0.0, []
+    for t in sorted(trials, key=lambda t: t.datetime_complete):
+        if t.state == TrialState.COMPLETE:
+            best = max(best, t.value)
+        curve.append(((t.datetime_complete - start).total_seconds(), best))
+    return curve
+
+
+def best_at(curve, seconds):
+    return max([score for elapsed, score in curve if elapsed <= seconds], default=0.0)
+
+
+def benchmark():
+    X, y = training_frame(n_rows=ROWS)
+    storage_dir = tempfile.mkdtemp(prefix="optuna_bench_")
+    curves, pruned = {}, {}
+    for pruner in ("none", "median", "hyperband"):
+        run_optuna_study(X, y, "XGBoost", n_trials=N_TRIALS, study_name=f"bench-{pruner}",
+                         pruner=pruner, storage_dir=storage_dir)
+        trials = load_trials(f"bench-{pruner}", storage_dir)
+        curves[pruner] = best_score_curve(trials)
+        pruned[pruner] = sum(t.state == TrialState.PRUNED for t in trials)
+
+    total = curves["none"][-1][0]
+    checkpoints = [total * f for f in (0.1, 0.25, 0.5, 1.0)]
+
+    print("\n" + "=" * 55)
+    print("   ⚡ Optuna: Best Accuracy vs Wall Time (XGBoost)")
+    print("=" * 55)
+    print(f"   Data                : {ROWS:,} rows, {N_TRIALS} trials")
+    print("-" * 55)
+    print(f"   {'pruner':<10}{'wall s':>8}{'pruned':>8}" + "".join(f"{c:>7.0f}s" for c in checkpoints))
+    for pruner, curve in curves.items():
+        row = "".join(f"{best_at(curve, c) * 100:>7.2f}%" for c in checkpoints)
+        print(f"   {pruner:<10}{curve[-1][0]:>8.1f}{pruned[pruner]:>8}{row}")
+    print("-" * 55)
+    for pruner in ("median", "hyperband"):
+        print(f"   {pruner:<10}: {total / curves[pruner][-1][0]:.2f}x faster for all {N_TRIALS} trials, "
+              f"best {curves[pruner][-1][1] * 100:.2f}% vs {curves['none'][-1][1] * 100:.2f}%")
+    print("=" * 55 + "\n")
+
+
+if __name__ == "__main__":
+    benchmark()
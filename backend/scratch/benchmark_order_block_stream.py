@@ -0,0 +1,74 @@
+"""
+Order Block Detection: Streaming Detector vs Per-Snapshot Scan
+==============================================================
+Per-update detection cost, replaying a recorded watch_order_book sequence on
+the bot's book (watch_order_book limit=50) and on a deep book (1,000 levels
+per side):
+
+  * snapshot  - OrderBlockDetector.detect_blocks() on both sides (Python
+                sum + list scan of every level on every update)
+  * streaming - StreamingOrderBlockDetector.update() (from STREAM_DEPTH levels
+                it merges only the changed levels into its copy, running
+                volume totals, threshold re-test of the touched levels; below
+                that a plain pass; + age/persistence, and block dicts only
+                built when the bot logs a changed block set)
+
+Usage: python scratch/benchmark_order_block_stream.py [n_updates]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.strategies.order_block_bot import OrderBlockDetector, StreamingOrderBlockDetector, _BookSideLevels
+from tests.test_order_block_stream import record_book_sequence
+
+N_UPDATES = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+# (levels per side, updates): the recorded sequence drains a 50-level book after ~400 updates
+RUNS = [(50, min(N_UPDATES, 400)), (1_000, N_UPDATES), (2_000, N_UPDATES // 2)]
+REPEATS = 5
+
+
+def measure(frames):
+    """Best of REPEATS passes, µs / update, for each detector."""
+    reference = OrderBlockDetector(volume_threshold_multiplier=3.0)
+    snapshot = stream = float("inf")
+    for _ in range(REPEATS):
+        t0 = time.perf_counter()
+        for frame in frames:
+            reference.detect_blocks(frame, "bids")
+            reference.detect_blocks(frame, "asks")
+        snapshot = min(snapshot, time.perf_counter() - t0)
+
+        streaming = StreamingOrderBlockDetector(volume_threshold_multiplier=3.0)
+        touched = block_set_changes = 0
+        t0 = time.perf_counter()
+        for frame in frames:
+            block_set_changes += streaming.update(frame)
+            touched += streaming._sides["bids"].changed + streaming._sides["asks"].changed
+        stream = min(stream, time.perf_counter() - t0)
+    n = len(frames)
+    return snapshot / n * 1e6, stream / n * 1e6, touched / n, block_set_changes / n
+
+
+def benchmark():
+    print("\n" + "=" * 55)
+    print("   ⚡ Order Block Detection: Streaming vs Snapshot")
+    print("=" * 55)
+    for depth, n_updates in RUNS:
+        frames, _ = record_book_sequence(n_updates=n_updates, depth=depth, seed=5)
+        snapshot, stream, touched, block_set_changes = measure(frames)
+        path = "merge" if depth >= _BookSideLevels.STREAM_DEPTH else "scan"
+        print(f"   Updates             : {n_updates:,}  |  levels/side: {depth:,} ({path})")
+        print(f"   Levels touched      : {touched:>8.1f} / update  (of {2 * depth:,})")
+        print(f"   Block set changed   : {block_set_changes:>8.0%} of updates")
+        print(f"   Snapshot scan       : {snapshot:>8.1f} µs / update")
+        print(f"   Streaming detector  : {stream:>8.1f} µs / update")
+        print(f"   Speed-up            : {snapshot / stream:>8.1f}x")
+        print("-" * 55 if depth != RUNS[-1][0] else "=" * 55)
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,138 @@
+"""
+Order Book Fan-out: Delta Frames vs Full JSON Payloads
+======================================================
+MarketDataStreamer publishes one order book (1,000 levels per side) at 10 Hz.
+Per second of stream, compares what goes to Redis and the producer CPU:
+
+  * legacy - build the full bid/ask dict list + walls, json.dumps twice
+             (setex + publish) on every update
+  * delta  - OrderBookDeltaEncoder: 1s snapshots + per-level deltas on
+             Pub/Sub; the latest key gets the snapshot frame, or after a
+             delta the current book via encoder.snapshot()
+
+Also reports the consumer side (OrderBookDeltaDecoder rebuilding the full
+payload) for Python subscribers.
+
+Usage: python scratch/benchmark_orderbook_delta.py [seconds]
+"""
+
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.helpers.orderbook_math import calculate_dynamic_wall_threshold
+from app.services.orderbook_delta import ORJSON_AVAILABLE, OrderBookDeltaDecoder, OrderBookDeltaEncoder
+
+SECONDS = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+HZ = 10
+DEPTH = 1_000
+
+
+def legacy_payload(orderbook):
+    """The full payload MarketDataStreamer used to publish on every update."""
+    bids, bid_total = [], 0
+    for bid in orderbook.get('bids', []):
+        bid_total += float(bid[1])
+        bids.append({"price": float(bid[0]), "size": float(bid[1]), "total": bid_total})
+    asks, ask_total = [], 0
+    for ask in orderbook.get('asks', []):
+        ask_total += float(ask[1])
+        asks.append({"price": float(ask[0]), "size": float(ask[1]), "total": ask_total})
+    threshold = calculate_dynamic_wall_threshold(bids, asks)
+    walls = [{"price": a["price"], "type": "sell", "size": a["size"]} for a in asks if a["size"] >= threshold]
+    walls += [{"price": b["price"], "type": "buy", "size": b["size"]} for b in bids if b["size"] >= threshold]
+    current_price = (asks[0]["price"] + bids[0]["price"]) / 2 if asks and bids else 0
+    return {"type": "orderbook", "bids": bids, "asks": asks, "walls": walls, "currentPrice": current_price}
+
+
+def book_updates(n_updates=300, depth=50, seed=3):
+    """Top-`depth` books of a diff-updated book: resizes, inserts / cancels, a moving mid."""
+    rng = np.random.default_rng(seed)
+    size = lambda: max(round(float(rng.exponential(2.0)), 4), 0.0001)  # ccxt drops empty levels
+    tick, mid = 0.01, 2500.0
+    bids = {round(mid - tick * (i + 1), 2): float(rng.exponential(2.0)) for i in range(depth + 30)}
+    asks = {round(mid + tick * (i + 1), 2): float(rng.exponential(2.0)) for i in range(depth + 30)}
+    books = []
+    for step in range(n_updates):
+        for book, sign in ((bids, -1), (asks, 1)):
+            ladder = sorted(book, reverse=sign < 0)
+            for _ in range(rng.integers(1, 8)):
+                book[ladder[min(int(rng.geometric(0.08)) - 1, len(ladder) - 1)]] = size()
+            if rng.random() < 0.4:
+                book.pop(ladder[min(int(rng.geometric(0.1)) - 1, len(ladder) - 1)])
+            if rng.random() < 0.4:
+                book[round(mid + sign * tick * int(rng.geometric(0.1)), 2)] = size()
+        if step % 40 == 20:  # mid moves: top ask lifted, a new best bid
+            mid = round(mid + tick, 2)
+            asks.pop(min(asks))
+            bids[round(max(bids) + tick, 2)] = 1.5
+        books.append({
+            "bids": [[p, bids[p]] for p in sorted(bids, reverse=True)[:depth]],
+            "asks": [[p, asks[p]] for p in sorted(asks)[:depth]],
+        })
+    return books
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def tick(self, step=0.1):
+        self.now = round(self.now + step, 6)
+        return self.now
+
+
+
+def benchmark():
+    books = book_updates(n_updates=SECONDS * HZ, depth=DEPTH, seed=1)
+
+    t0 = time.perf_counter()
+    legacy_bytes = 0
+    for book in books:
+        payload = legacy_payload(book)
+        legacy_bytes += len(json.dumps(payload)) + len(json.dumps(payload))  # setex + publish
+    legacy_cpu = time.perf_counter() - t0
+
+    clock = FakeClock()
+    encoder = OrderBookDeltaEncoder(clock=clock)
+    frames = []
+    delta_bytes = 0
+    t0 = time.perf_counter()
+    for book in books:
+        clock.tick(1 / HZ)
+        frame = encoder.encode(book["bids"], book["asks"])
+        latest = frame if encoder.is_snapshot else encoder.snapshot()
+        delta_bytes += len(frame) + len(latest)  # publish + setex
+        frames.append(frame)
+    delta_cpu = time.perf_counter() - t0
+
+    decoder = OrderBookDeltaDecoder()
+    t0 = time.perf_counter()
+    for frame in frames:
+        decoder.apply(frame)
+    decode_cpu = time.perf_counter() - t0
+
+    print("\n" + "=" * 55)
+    print("   ⚡ Order Book Fan-out: Delta Frames vs Full JSON")
+    print("=" * 55)
+    print(f"   Book                : {DEPTH:,} levels/side @ {HZ} Hz, {SECONDS}s")
+    print(f"   Serializer          : {'orjson' if ORJSON_AVAILABLE else 'json'}")
+    print("-" * 55)
+    print(f"   Legacy  bytes/s     : {legacy_bytes / SECONDS / 1024:>9,.1f} KiB")
+    print(f"   Delta   bytes/s     : {delta_bytes / SECONDS / 1024:>9,.1f} KiB  ({legacy_bytes / delta_bytes:.1f}x less)")
+    print(f"   Legacy  CPU/s       : {legacy_cpu / SECONDS * 1000:>9,.1f} ms")
+    print(f"   Delta   CPU/s       : {delta_cpu / SECONDS * 1000:>9,.1f} ms  ({legacy_cpu / delta_cpu:.1f}x less)")
+    print(f"   Decoder CPU/s       : {decode_cpu / SECONDS * 1000:>9,.1f} ms  (per Python subscriber)")
+    print("=" * 55)
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,111 @@
+"""
+Portfolio Balance Aggregation Benchmark
+=======================================
+5 API keys / 300 assets against mock exchanges with simulated REST
+latency. Compares `GET /portfolio/balances`:
+
+  * sequential - per key: new exchange, load markets, fetch_balance; then a
+                 fresh Binance instance for fetch_tickers (previous endpoint)
+  * concurrent - bounded gather, pooled clients, shared ticker snapshot
+                 (cold = first request, warm = repeat within the TTL)
+"""
+
+import asyncio
+import os
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services import exchange_pool, portfolio_balance_service
+from app.services.portfolio_balance_service import TickerSnapshotCache, aggregate_balances, _merge_balances, _price_assets
+from tests.test_portfolio_balances import EXCHANGES, api_keys, holdings, make_tickers
+
+MARKETS_RTT = 0.15
+BALANCE_RTT = 0.08
+TICKERS_RTT = 0.30
+REPEATS = 5
+
+
+class MockExchange:
+    def __init__(self, config=None):
+        self.key_index = int(config["apiKey"].split("-")[1]) if config else None
+        self.markets = None
+
+    async def load_markets(self):
+        await asyncio.sleep(MARKETS_RTT)
+        self.markets = {}
+
+    async def fetch_balance(self):
+        if self.markets is None:  # ccxt loads markets on first private call
+            await self.load_markets()
+        await asyncio.sleep(BALANCE_RTT)
+        return {"total": holdings(self.key_index)}
+
+    async def fetch_tickers(self):
+        if self.markets is None:
+            await self.load_markets()
+        await asyncio.sleep(TICKERS_RTT)
+        return make_tickers()
+
+    async def close(self):
+        pass
+
+
+async def sequential(keys):
+    results = []
+    for key in keys:
+        api = MockExchange({"apiKey": key.api_key})
+        try:
+            balance = await api.fetch_balance()
+            results.append((key.exchange.lower(), balance["total"]))
+        finally:
+            await api.close()
+    assets = _merge_balances(results)
+    binance = MockExchange()
+    _price_assets(assets, await binance.fetch_tickers())
+    return assets
+
+
+async def run():
+    keys = api_keys()
+    seq = []
+    for _ in range(REPEATS):
+        t0 = time.perf_counter()
+        await sequential(keys)
+        seq.append(time.perf_counter() - t0)
+
+    exchange_pool._pool.clear()
+    snapshot = TickerSnapshotCache(exchange_factory=lambda ex_id: MockExchange())
+    t0 = time.perf_counter()
+    await aggregate_balances(keys, tickers=snapshot)
+    cold = time.perf_counter() - t0
+    warm = []
+    for _ in range(REPEATS):
+        t0 = time.perf_counter()
+        await aggregate_balances(keys, tickers=snapshot)
+        warm.append(time.perf_counter() - t0)
+    return statistics.median(seq), cold, statistics.median(warm)
+
+
+def benchmark():
+    exchange_pool.ccxt = SimpleNamespace(**{ex: MockExchange for ex in EXCHANGES})
+    portfolio_balance_service.security.decrypt_key = lambda value: value
+    seq, cold, warm = asyncio.run(run())
+
+    print("\n" + "=" * 55)
+    print("   ⚡ Portfolio Balances: Sequential vs Concurrent")
+    print("=" * 55)
+    print(f"   Keys / assets       : {len(EXCHANGES)} / 300")
+    print(f"   Simulated RTT       : markets {MARKETS_RTT * 1000:.0f} ms, balance {BALANCE_RTT * 1000:.0f} ms, tickers {TICKERS_RTT * 1000:.0f} ms")
+    print("-" * 55)
+    print(f"   Sequential          : {seq * 1000:>8.1f} ms")
+    print(f"   Concurrent (cold)   : {cold * 1000:>8.1f} ms  ({seq / cold:.1f}x)")
+    print(f"   Concurrent (warm)   : {warm * 1000:>8.1f} ms  ({seq / warm:.1f}x)")
+    print("=" * 55 + "\n")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,106 @@
+"""
+Backtest Report Rendering Benchmark
+===================================
+Renders 50 quantstats reports (distinct returns series) three ways:
+
+  * inline    - generate_report() on the backtest worker, as before
+  * offloaded - a pool of pre-warmed report workers (the `reports` queue
+                setup: quantstats/matplotlib loaded once per process)
+  * repeat    - the same 50 requests again, served from the report cache
+
+"Blocking" is how long the backtest worker is held up by reporting.
+
+Usage: python scratch/benchmark_report_rendering.py [n_reports] [workers]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services import report_generator
+
+N_REPORTS = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+WORKERS = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+FORMAT = "html"  # PDF needs the pango system libs (present in the Docker image)
+
+
+def make_payloads(n):
+    payloads = []
+    for i in range(n):
+        rng = np.random.default_rng(i)
+        returns = pd.Series(rng.normal(0.0005, 0.01, 365), index=pd.date_range("2024-01-01", periods=365))
+        payloads.append((f"task-{i}", returns.to_json(), "BTC/USDT", "1d"))
+    return payloads
+
+
+def render(task_id, returns_json, symbol, timeframe):
+    return report_generator.generate_report(task_id, returns_json, symbol, timeframe, format=FORMAT)
+
+
+def init_worker(report_dir):
+    report_generator.REPORT_DIR = report_dir
+    report_generator.warm_up(pdf=False)
+
+
+def quiet(fn, *args):
+    # generate_report prints per call; keep benchmark output readable
+    stdout, sys.stdout = sys.stdout, open(os.devnull, "w")
+    try:
+        return fn(*args)
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+
+def run_inline(payloads, report_dir):
+    report_generator.REPORT_DIR = report_dir
+    t0 = time.perf_counter()
+    for payload in payloads:
+        quiet(render, *payload)
+    return time.perf_counter() - t0
+
+
+def run_offloaded(payloads, report_dir):
+    with ProcessPoolExecutor(max_workers=WORKERS, initializer=init_worker, initargs=(report_dir,)) as pool:
+        # Workers start and warm up before backtests finish in practice
+        wait([pool.submit(time.sleep, 0) for _ in range(WORKERS)])
+
+        t0 = time.perf_counter()
+        futures = [pool.submit(quiet, render, *payload) for payload in payloads]
+        blocking = time.perf_counter() - t0
+        wait(futures)
+        done = time.perf_counter() - t0
+        assert all(f.result() for f in futures)
+
+        t0 = time.perf_counter()
+        wait([pool.submit(quiet, render, *payload) for payload in payloads])
+        repeat = time.perf_counter() - t0
+    return blocking, done, repeat
+
+
+def benchmark():
+    payloads = make_payloads(N_REPORTS)
+    with tempfile.TemporaryDirectory() as inline_dir, tempfile.TemporaryDirectory() as pool_dir:
+        inline = run_inline(payloads, inline_dir)
+        blocking, done, repeat = run_offloaded(payloads, pool_dir)
+
+    print("\n" + "=" * 55)
+    print("   ⚡ Backtest Report Rendering")
+    print("=" * 55)
+    print(f"   Reports             : {N_REPORTS} x {FORMAT}  |  report workers: {WORKERS}")
+    print("-" * 55)
+    print(f"   Inline   blocking   : {inline:>8.2f} s  (all {N_REPORTS} ready at {inline:.2f} s)")
+    print(f"   Offload  blocking   : {blocking * 1000:>8.2f} ms (all ready at {done:.2f} s)")
+    print(f"   Repeat (cache hits) : {repeat * 1000:>8.2f} ms for {N_REPORTS} reports")
+    print("=" * 55 + "\n")
+
+
+if __name__ == "__main__":
+    benchmark()
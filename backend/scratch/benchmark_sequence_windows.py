@@ -0,0 +1,93 @@
+"""
+Sequence Windows: Strided View + Memmap Dataset vs Per-Window Copies
+====================================================================
+(rows x features) feature matrix, seq_len 60, one shuffled DataLoader epoch:
+
+  * loop    - the old create_sequences: list of window copies -> np.array ->
+              torch.tensor(float32) -> TensorDataset
+  * view    - sliding_windows() view + SequenceDataset (float32 copy per item)
+  * memmap  - float32_memmap() on disk + SequenceDataset over its windows
+
+Every variant runs in its own spawned process so peak RSS (ru_maxrss) is
+measured per variant, not shared with the others.
+
+Usage: python scratch/benchmark_sequence_windows.py [rows] [features]
+"""
+
+import multiprocessing as mp
+import os
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+FEATURES = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+SEQ_LEN, BATCH = 60, 256
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_variant(name, queue):
+    import torch
+    from torch.utils.data import DataLoader, TensorDataset
+
+    from app.services.advanced_ml.sequence_windows import SequenceDataset, float32_memmap
+    from tests.test_sequence_windows import feature_frame, legacy_create_sequences
+
+    df = feature_frame(n_rows=ROWS, n_features=FEATURES)
+    features = [f"f{i}" for i in range(FEATURES)]
+    base_mb = peak_rss_mb()
+
+    t0 = time.perf_counter()
+    if name == "loop":
+        X, y = legacy_create_sequences(df, features, SEQ_LEN, "Target")
+        dataset = TensorDataset(torch.tensor(X, dtype=torch.float32), torch.tensor(y, dtype=torch.float32))
+    elif name == "view":
+        dataset = SequenceDataset.from_rows(df[features].values, SEQ_LEN, targets=df["Target"].values)
+    else:
+        rows, targets = float32_memmap(df[features].values), df["Target"].values
+        del df
+        dataset = SequenceDataset.from_rows(rows, SEQ_LEN, targets=targets)
+    build = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    checksum = 0.0
+    for xb, _ in DataLoader(dataset, batch_size=BATCH, shuffle=True):
+        checksum += float(xb[:, -1, 0].sum())
+    epoch = time.perf_counter() - t0
+    queue.put((build, epoch, peak_rss_mb() - base_mb, len(dataset)))
+
+
+def measure(name):
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=run_variant, args=(name, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+
+def benchmark():
+    raw_mb = ROWS * FEATURES * 8 / 1024 ** 2
+    runs = [(name, *measure(name)) for name in ("loop", "view", "memmap")]
+
+    print("\n" + "=" * 55)
+    print("   ⚡ Sequence Windows: View / Memmap vs Loop")
+    print("=" * 55)
+    print(f"   Data                : {ROWS:,} x {FEATURES} float64 ({raw_mb:.0f} MB), seq_len {SEQ_LEN}")
+    print(f"   Windows             : {runs[0][4]:,} per epoch, batch {BATCH}")
+    print("-" * 55)
+    loop_mb = runs[0][3]
+    for label, build, epoch, extra_mb, _ in runs:
+        print(f"   {label:<20}: build {build:>6.2f} s, epoch {epoch:>6.2f} s, "
+              f"peak +{extra_mb:>7.0f} MB ({loop_mb / max(extra_mb, 1):.1f}x less)")
+    print("=" * 55 + "\n")
+
+
+if __name__ == "__main__":
+    benchmark()
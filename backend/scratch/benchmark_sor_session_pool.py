@@ -0,0 +1,78 @@
+"""
+SOR Child Order Overhead Benchmark
+==================================
+Places TWAP-style child orders against a local mock exchange (no network)
+with simulated market-load, TLS-handshake and order round-trip latencies.
+
+Compares the old path (new event loop + new exchange + load_markets per
+child) with SorSessionPool (one loop and one warm session per worker).
+"""
+
+import asyncio
+import os
+import statistics
+import sys
+import time
+from functools import partial
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.sor_session_pool import SorSessionPool
+from tests.test_sor_session_pool import MockExchange
+
+N_CHILDREN = 200
+MARKET_LATENCY_S = 0.150
+HANDSHAKE_LATENCY_S = 0.050
+ORDER_LATENCY_S = 0.010
+
+factory = partial(MockExchange, market_latency=MARKET_LATENCY_S,
+                  handshake_latency=HANDSHAKE_LATENCY_S, order_latency=ORDER_LATENCY_S)
+
+
+def child_order_fresh(n):
+    """Previous execute_sor_child_order behaviour."""
+    exchange = factory("binance", "key", "secret")
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    order = loop.run_until_complete(exchange.create_market_order("BTC/USDT", "buy", 0.01))
+    loop.close()
+    return order
+
+
+def child_order_pooled(pool, n):
+    async def _place():
+        async with pool.session("binance", "key", "secret") as exchange:
+            return await exchange.create_market_order("BTC/USDT", "buy", 0.01)
+    return pool.run(_place())
+
+
+def measure(fn):
+    timings = []
+    for n in range(N_CHILDREN):
+        t0 = time.perf_counter()
+        fn(n)
+        timings.append(time.perf_counter() - t0)
+    return timings
+
+
+def benchmark():
+    fresh = measure(child_order_fresh)
+    pool = SorSessionPool(exchange_factory=factory)
+    pooled = measure(partial(child_order_pooled, pool))
+    pool.shutdown()
+
+    floor = ORDER_LATENCY_S * 1000
+    print("\n" + "=" * 55)
+    print("   ⚡ SOR Child Order Overhead (mock exchange)")
+    print("=" * 55)
+    print(f"   Child orders        : {N_CHILDREN}")
+    print(f"   Simulated latency   : markets {MARKET_LATENCY_S * 1000:.0f} ms, TLS {HANDSHAKE_LATENCY_S * 1000:.0f} ms, order {floor:.0f} ms")
+    print("-" * 55)
+    print(f"   Fresh loop+exchange : p50 {statistics.median(fresh) * 1000:>7.2f} ms  overhead {statistics.mean(fresh) * 1000 - floor:>7.2f} ms")
+    print(f"   Pooled session      : p50 {statistics.median(pooled) * 1000:>7.2f} ms  overhead {statistics.mean(pooled) * 1000 - floor:>7.2f} ms")
+    print(f"   Total               : {sum(fresh):.2f} s -> {sum(pooled):.2f} s")
+    print("=" * 55 + "\n")
+
+
+if __name__ == "__main__":
+    benchmark()
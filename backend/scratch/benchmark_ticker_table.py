@@ -0,0 +1,95 @@
+"""
+Sentiment Heatmap: Shared Ticker Table vs fetch_tickers() per Request
+=====================================================================
+200 concurrent /heatmap requests against a 2,500-symbol market:
+
+  * per-request - the old handler: new exchange, fetch_tickers() over REST
+                  (simulated 150 ms round trip + JSON parse of the full
+                  market), filter USDT pairs and sort in Python
+  * table       - the shared TickerTable (fed by one watch_tickers stream):
+                  top_by_volume(20) + building the heatmap rows
+
+Usage: python scratch/benchmark_ticker_table.py [concurrent_requests]
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.market_ticker_table import TickerTable
+from tests.test_market_ticker_table import legacy_heatmap_top, market_tickers
+
+REQUESTS = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+REST_LATENCY = 0.150
+
+
+def heatmap_rows(top):
+    rows = []
+    for ticker in top:
+        change = float(ticker.get('percentage', 0) or 0)
+        rows.append({
+            "symbol": ticker['symbol'].split('/')[0],
+            "marketCap": round(float(ticker.get('quoteVolume', 0) or 0) * 25, 0),
+            "sentimentScore": round(max(-1.0, min(1.0, change / 10.0)), 2),
+            "priceChange": round(change, 2),
+        })
+    return rows
+
+
+async def run(handler):
+    cpu = []
+
+    async def request():
+        t0 = time.perf_counter()
+        await handler(cpu)
+        return time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    latencies = sorted(await asyncio.gather(*[request() for _ in range(REQUESTS)]))
+    return time.perf_counter() - t0, latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99) - 1], sum(cpu) / len(cpu)
+
+
+def benchmark():
+    tickers = market_tickers()
+    payload = json.dumps(tickers)
+    table = TickerTable()
+    table.update(tickers)
+
+    async def per_request(cpu):
+        await asyncio.sleep(REST_LATENCY)  # fetch_tickers() round trip
+        t0 = time.perf_counter()
+        heatmap_rows(legacy_heatmap_top(json.loads(payload)))
+        cpu.append(time.perf_counter() - t0)
+
+    async def shared_table(cpu):
+        t0 = time.perf_counter()
+        heatmap_rows(table.top_by_volume(20, "usdt"))
+        cpu.append(time.perf_counter() - t0)
+
+    old = asyncio.run(run(per_request))
+    new = asyncio.run(run(shared_table))
+
+    t0 = time.perf_counter()
+    for _ in range(1_000):
+        table.top_by_volume(20, "usdt")
+    top_k = (time.perf_counter() - t0) / 1_000
+
+    print("\n" + "=" * 55)
+    print("   ⚡ Sentiment Heatmap: Ticker Table vs fetch_tickers()")
+    print("=" * 55)
+    print(f"   Market              : {len(tickers):,} symbols  |  {REQUESTS} concurrent requests")
+    print("-" * 55)
+    print(f"   Per-request  wall   : {old[0] * 1e3:>9.1f} ms   (p50 {old[1] * 1e3:.1f} / p99 {old[2] * 1e3:.1f} ms)")
+    print(f"   Per-request  CPU    : {old[3] * 1e3:>9.2f} ms / request, {REQUESTS} REST calls")
+    print(f"   Ticker table wall   : {new[0] * 1e3:>9.1f} ms   (p50 {new[1] * 1e3:.3f} / p99 {new[2] * 1e3:.3f} ms)")
+    print(f"   Ticker table CPU    : {new[3] * 1e6:>9.1f} µs / request, 0 REST calls")
+    print(f"   top_by_volume(20)   : {top_k * 1e6:>9.1f} µs")
+    print("=" * 55)
+
+
+if __name__ == "__main__":
+    benchmark()
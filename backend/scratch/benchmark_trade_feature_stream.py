@@ -0,0 +1,57 @@
+"""
+Trade-Flow Features: Streaming Engine vs Batch Recompute
+========================================================
+A live consumer needs the current trade-flow features after every trade.
+Compares two ways of keeping them fresh:
+
+  * batch     - calculate_advanced_trade_features() over the trailing tape
+                (2,000 trades) on every refresh
+  * streaming - TradeFeatureEngine.update(trade) + snapshot() per trade
+
+Usage: python scratch/benchmark_trade_feature_stream.py [n_trades]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.trade_feature_engineering import TradeFeatureEngine, calculate_advanced_trade_features
+from tests.test_trade_feature_stream import trade_tape
+
+N_TRADES = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+TAPE = 2_000
+BATCH_REFRESHES = 50
+
+
+def benchmark():
+    df = trade_tape(N_TRADES, seed=3)
+    trades = df.to_dict("records")
+
+    t0 = time.perf_counter()
+    for end in range(len(df) - BATCH_REFRESHES, len(df)):
+        calculate_advanced_trade_features(df.iloc[end - TAPE:end + 1])
+    batch_per_refresh = (time.perf_counter() - t0) / BATCH_REFRESHES
+
+    engine = TradeFeatureEngine()
+    t0 = time.perf_counter()
+    for trade in trades:
+        engine.update(trade)
+        engine.snapshot()
+    streaming = time.perf_counter() - t0
+    stream_per_trade = streaming / N_TRADES
+
+    print("\n" + "=" * 55)
+    print("   ⚡ Trade-Flow Features: Streaming vs Batch")
+    print("=" * 55)
+    print(f"   Trades              : {N_TRADES:,}  |  features: {len(engine.snapshot())}")
+    print("-" * 55)
+    print(f"   Batch ({TAPE:,} tape)  : {batch_per_refresh * 1000:>8.2f} ms / refresh  ({1 / batch_per_refresh:>9,.0f} trades/s)")
+    print(f"   Streaming           : {stream_per_trade * 1e6:>8.2f} µs / trade    ({1 / stream_per_trade:>9,.0f} trades/s)")
+    print(f"   Speed-up            : {batch_per_refresh / stream_per_trade:>8,.0f}x")
+    print("=" * 55)
+
+
+if __name__ == "__main__":
+    benchmark()
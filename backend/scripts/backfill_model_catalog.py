@@ -0,0 +1,31 @@
+"""
+Indexes metadata.json of every ML model version into the model catalog columns.
+
+Run once after the `c3e8f0a15d72` migration, or with --force to re-read all
+metadata files (e.g. after editing them by hand):
+    python -m scripts.backfill_model_catalog [--force]
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.db.session import SessionLocal
+from app.services.model_catalog import backfill_catalog
+
+
+def main():
+    force = "--force" in sys.argv[1:]
+    db = SessionLocal()
+    try:
+        count = backfill_catalog(db, force=force)
+        print(f"✅ Indexed {count} model versions")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
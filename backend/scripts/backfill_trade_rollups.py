@@ -0,0 +1,31 @@
+"""
+Rebuilds trade_performance_rollups from the trades table.
+
+Run once after the `a7c41e9d2b30` migration (or to repair an owner):
+    python -m scripts.backfill_trade_rollups [owner_id]
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.db.session import SessionLocal
+from app.services.trade_rollups import rebuild_trade_rollups
+
+
+def main():
+    owner_id = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    db = SessionLocal()
+    try:
+        rows = rebuild_trade_rollups(db, owner_id=owner_id)
+        db.commit()
+        print(f"✅ Wrote {rows} rollup rows" + (f" for owner {owner_id}" if owner_id is not None else ""))
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ from sqlalchemy.orm import Session
 from app.db.session import SessionLocal
 from app import models
 from app import models
+from app.services import model_catalog
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -111,6 +112,7 @@ def sync_directory(dir_path, db, user):
         latency=latency,
         explainability=explainability
     )
+    model_catalog.index_version(db_version)
     db.add(db_version)
     db.commit()
 
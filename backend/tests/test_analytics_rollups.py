@@ -0,0 +1,134 @@
+import os
+import sqlite3
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.bot import Bot
+from app.models.trade import Trade
+from app.models.trade_rollup import ALL_BOTS, TradePerformanceRollup
+from app.services.analytics import AnalyticsService
+from app.services.trade_rollups import rebuild_trade_rollups, record_trade_close
+
+N_TRADES = int(os.environ.get("ANALYTICS_ROLLUP_TEST_TRADES", 500_000))
+START = datetime(2025, 1, 1)
+# owner 1 runs bots 1-3, owner 2 runs bot 4
+BOT_OWNERS = {1: 1, 2: 1, 3: 1, 4: 2}
+
+
+def make_session(db_path):
+    engine = create_engine(f"sqlite:///{db_path}")
+    Bot.metadata.create_all(engine, tables=[Bot.__table__, Trade.__table__, TradePerformanceRollup.__table__])
+    return sessionmaker(bind=engine)()
+
+
+def synthetic_trades(n, seed=7):
+    """Unique, increasing close times (~400 days for 500k trades); a few days with no trades."""
+    rng = np.random.default_rng(seed)
+    gaps = rng.exponential(70.0, n) + 0.001
+    gaps[rng.random(n) < 0.0005] += 3 * 86400  # occasional idle stretches
+    closed_at = [START + timedelta(seconds=float(s)) for s in np.cumsum(gaps)]
+    pnl_percent = rng.normal(0.02, 1.2, n)
+    pnl_percent[rng.random(n) < 0.01] = 0.0
+    quantity = rng.uniform(0.01, 2.0, n)
+    pnl = pnl_percent / 100 * 30000 * quantity
+    bot_ids = rng.choice(list(BOT_OWNERS), n, p=[0.4, 0.3, 0.2, 0.1])
+    return closed_at, pnl, pnl_percent, bot_ids
+
+
+@pytest.fixture(scope="module")
+def populated(tmp_path_factory):
+    db_path = str(tmp_path_factory.mktemp("rollups") / "trades.db")
+    db = make_session(db_path)
+    db.add_all([Bot(id=bot_id, owner_id=owner, name=f"bot-{bot_id}") for bot_id, owner in BOT_OWNERS.items()])
+    db.commit()
+
+    closed_at, pnl, pnl_percent, bot_ids = synthetic_trades(N_TRADES)
+    conn = sqlite3.connect(db_path)
+    conn.executemany(
+        "INSERT INTO trades (id, bot_id, symbol, side, entry_price, exit_price, quantity, status, pnl, pnl_percent, closed_at)"
+        " VALUES (?, ?, 'BTC/USDT', 'BUY', 30000, 30000, 1, 'CLOSED', ?, ?, ?)",
+        ((i + 1, int(bot_ids[i]), float(pnl[i]), float(pnl_percent[i]), closed_at[i].isoformat(sep=" "))
+         for i in range(N_TRADES)),
+    )
+    conn.commit()
+    conn.close()
+
+    rebuild_trade_rollups(db)
+    db.commit()
+    yield db, closed_at
+    db.close()
+
+
+def assert_same(db, **kwargs):
+    expected = AnalyticsService.calculate_from_trades(db, **kwargs)
+    actual = AnalyticsService.calculate_performance_metrics(db, **kwargs)
+    assert actual == expected
+    return actual
+
+
+def test_rollups_are_per_day(populated):
+    db, closed_at = populated
+    days = db.query(TradePerformanceRollup).filter_by(owner_id=1, bot_id=ALL_BOTS).count()
+    assert days <= (closed_at[-1] - closed_at[0]).days + 1
+    assert db.query(TradePerformanceRollup).count() < N_TRADES / 50
+
+
+def test_full_history_matches_trade_replay(populated):
+    db, _ = populated
+    metrics = assert_same(db, owner_id=1)
+    assert metrics.total_trades > 0.85 * N_TRADES and metrics.max_drawdown > 0
+    assert_same(db, owner_id=2)
+    assert_same(db, owner_id=99)
+
+
+def test_date_filters_match_trade_replay(populated):
+    db, closed_at = populated
+    mid = closed_at[len(closed_at) // 2]
+    midnight = datetime(mid.year, mid.month, mid.day)
+
+    assert_same(db, owner_id=1, start_date=mid)                                   # partial first day
+    assert_same(db, owner_id=1, end_date=mid)                                     # partial last day
+    assert_same(db, owner_id=1, start_date=midnight, end_date=midnight + timedelta(days=30))
+    assert_same(db, owner_id=1, start_date=closed_at[1000], end_date=closed_at[-1000])
+    assert_same(db, owner_id=1, start_date=mid, end_date=mid + timedelta(hours=5))  # within one day
+    assert_same(db, owner_id=1, start_date=mid, end_date=mid + timedelta(days=1, hours=2))
+    assert_same(db, owner_id=1, start_date=closed_at[-1] + timedelta(days=1))     # empty
+
+
+def test_per_bot_metrics_match_trade_replay(populated):
+    db, closed_at = populated
+    assert_same(db, owner_id=1, bot_id=2)
+    assert_same(db, owner_id=1, bot_id=3, start_date=closed_at[5000], end_date=closed_at[-5000])
+
+
+def test_incremental_close_matches_backfill(tmp_path):
+    db = make_session(str(tmp_path / "live.db"))
+    db.add_all([Bot(id=bot_id, owner_id=owner, name=f"bot-{bot_id}") for bot_id, owner in BOT_OWNERS.items()])
+    db.commit()
+
+    closed_at, pnl, pnl_percent, bot_ids = synthetic_trades(3000, seed=3)
+    # Two closes land out of order, as when two bots race on commit
+    closed_at[1500], closed_at[1501] = closed_at[1501], closed_at[1500]
+    for i in range(3000):
+        trade = Trade(bot_id=int(bot_ids[i]), symbol="BTC/USDT", status="CLOSED", closed_at=closed_at[i],
+                      pnl=float(pnl[i]), pnl_percent=float(pnl_percent[i]))
+        db.add(trade)
+        record_trade_close(db, trade, BOT_OWNERS[trade.bot_id])
+        db.commit()
+
+    def snapshot():
+        rows = db.query(TradePerformanceRollup).order_by(
+            TradePerformanceRollup.owner_id, TradePerformanceRollup.bot_id, TradePerformanceRollup.day)
+        return [(r.owner_id, r.bot_id, r.day, r.trade_count, r.win_count, r.last_closed_at,
+                 *np.round([r.pnl_sum, r.return_sum, r.return_sq_sum, r.growth,
+                            r.max_prefix, r.min_prefix, r.max_drawdown], 9)) for r in rows]
+
+    incremental = snapshot()
+    rebuild_trade_rollups(db)
+    db.commit()
+    assert snapshot() == incremental
+    assert_same(db, owner_id=1)
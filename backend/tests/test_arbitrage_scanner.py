@@ -0,0 +1,122 @@
+import asyncio
+import time
+
+import numpy as np
+import pytest
+
+from app.services.arbitrage_scanner import ArbitrageScanner
+
+
+class FakeExchangeFeed:
+    """Local stand-in for a ccxt.pro exchange: tests push tickers, watchers await them."""
+
+    def __init__(self, exchange_id):
+        self.id = exchange_id
+        self.queues = {}
+        self.closed = False
+
+    def _queue(self, symbol):
+        return self.queues.setdefault(symbol, asyncio.Queue())
+
+    def push(self, symbol, bid, ask):
+        self._queue(symbol).put_nowait({
+            'symbol': symbol, 'bid': bid, 'ask': ask,
+            'info': {'sent_at': time.perf_counter()},
+        })
+
+    async def watch_ticker(self, symbol):
+        return await self._queue(symbol).get()
+
+    async def watch_order_book(self, symbol, limit=None):
+        ticker = await self._queue(symbol).get()
+        return {'bids': [[ticker['bid'], 1.0]], 'asks': [[ticker['ask'], 1.0]]}
+
+    async def close(self):
+        self.closed = True
+
+
+def brute_force_best(bids, asks, fees):
+    """Full-matrix recompute for every pair (what the scanner avoids)."""
+    best = []
+    for p in range(bids.shape[0]):
+        top = (np.nan, -1, -1)
+        for i in range(bids.shape[1]):
+            for j in range(bids.shape[1]):
+                if i == j or np.isnan(asks[p, i]) or np.isnan(bids[p, j]):
+                    continue
+                buy = asks[p, i] * (1 + fees[i])
+                spread = (bids[p, j] * (1 - fees[j]) - buy) / buy * 100
+                if np.isnan(top[0]) or spread > top[0]:
+                    top = (spread, i, j)
+        best.append(top)
+    return best
+
+
+def test_row_updates_match_full_recompute():
+    rng = np.random.default_rng(0)
+    pairs = [f"COIN{i}/USDT" for i in range(30)]
+    venues = ["binance", "kraken", "okx", "bybit"]
+    fees = {"binance": 0.001, "kraken": 0.0026, "okx": 0.0008, "bybit": 0.001}
+    scanner = ArbitrageScanner(pairs, venues, fees=fees)
+
+    for _ in range(2000):
+        pair = pairs[rng.integers(len(pairs))]
+        venue = venues[rng.integers(len(venues))]
+        mid = 100 + rng.normal(0, 0.5)
+        scanner.on_quote(pair, venue, mid - 0.01, mid + 0.01)
+
+    expected = brute_force_best(scanner.bids, scanner.asks, scanner.fees)
+    for p, (spread, i, j) in enumerate(expected):
+        if np.isnan(spread):
+            assert np.isnan(scanner.best_spread[p])
+            continue
+        assert scanner.best_spread[p] == pytest.approx(spread)
+        assert (scanner.best_buy[p], scanner.best_sell[p]) == (i, j)
+
+    top = scanner.top_opportunities(5)
+    assert [o["net_spread"] for o in top] == sorted((o["net_spread"] for o in top), reverse=True)
+
+
+def test_net_spread_includes_fees():
+    scanner = ArbitrageScanner(["BTC/USDT"], ["a", "b"], fees={"a": 0.001, "b": 0.001}, min_spread=0.0)
+    assert scanner.on_quote("BTC/USDT", "a", 99.9, 100.0) is None
+    # Gross 0.15% edge is eaten by 0.2% round-trip fees
+    assert scanner.on_quote("BTC/USDT", "b", 100.15, 100.2) is None
+
+    opp = scanner.on_quote("BTC/USDT", "b", 101.0, 101.1)
+    assert opp["buy_exchange"] == "a" and opp["sell_exchange"] == "b"
+    assert opp["net_spread"] == pytest.approx((101.0 * 0.999 - 100.0 * 1.001) / (100.0 * 1.001) * 100)
+
+
+@pytest.mark.parametrize("use_order_book", [False, True])
+def test_streams_detect_opportunity_across_many_pairs(use_order_book):
+    async def scenario():
+        pairs = [f"COIN{i}/USDT" for i in range(50)]
+        feeds = {ex: FakeExchangeFeed(ex) for ex in ("binance", "kraken", "okx")}
+        found = []
+
+        async def on_opportunity(opp):
+            found.append(opp)
+
+        scanner = ArbitrageScanner(pairs, list(feeds), min_spread=0.5, use_order_book=use_order_book,
+                                   exchanges=feeds, on_opportunity=on_opportunity)
+        await scanner.start()
+
+        for pair in pairs:
+            for feed in feeds.values():
+                feed.push(pair, 99.99, 100.01)
+        feeds["okx"].push("COIN7/USDT", 101.5, 101.6)
+
+        for _ in range(100):
+            await asyncio.sleep(0)
+            if found:
+                break
+        await scanner.stop()
+        return scanner, feeds, found
+
+    scanner, feeds, found = asyncio.run(scenario())
+
+    assert scanner.update_count == 151
+    assert [(o["pair"], o["sell_exchange"]) for o in found] == [("COIN7/USDT", "okx")]
+    # Caller-owned exchanges stay open
+    assert not any(feed.closed for feed in feeds.values())
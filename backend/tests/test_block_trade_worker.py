@@ -0,0 +1,210 @@
+import asyncio
+import json
+import time
+from collections import defaultdict
+
+import numpy as np
+
+from app.services import block_trade_worker as worker_module
+from app.services.block_trade_monitor import block_trade_monitor
+from app.services.block_trade_worker import BlockTradeWorker, RecentTradeIds
+
+TRADES_PER_SECOND = 5_000
+BATCH = 50  # one watch_trades delivery every 10ms at 5,000 trades/s
+OVERLAP = 10  # trades repeated from the previous delivery (cache overlap / reconnect)
+
+
+def trade_tape(exchange_id, symbol, n_trades, seed):
+    """A 5,000 trades/s tape with ~5% block trades; ids are missing on some trades."""
+    rng = np.random.default_rng(seed)
+    start = 1_700_000_000_000
+    trades = []
+    for i in range(n_trades):
+        block = rng.random() < 0.05
+        amount = float(rng.uniform(1, 5)) if block else float(rng.uniform(0.001, 0.05))
+        trades.append({
+            "id": None if i % 7 == 0 else f"{exchange_id}-{i}",
+            "timestamp": start + i * 1000 // TRADES_PER_SECOND,
+            "datetime": None,
+            "price": 30_000.0 + i * 0.01,
+            "amount": round(amount, 6),
+            "cost": None,
+            "side": "buy" if i % 2 else "sell",
+        })
+    return trades
+
+
+class FakeProExchange:
+    has = {"watchTrades": True}
+
+    def __init__(self, exchange_id, tapes):
+        self.id = exchange_id
+        self.markets = {symbol: {} for symbol in tapes}
+        self.deliveries = {
+            symbol: [trades[max(0, i - OVERLAP):i + BATCH] for i in range(0, len(trades), BATCH)]
+            for symbol, trades in tapes.items()
+        }
+        self.closed = False
+
+    async def load_markets(self):
+        return self.markets
+
+    @property
+    def exhausted(self):
+        return not any(self.deliveries.values())
+
+    async def watch_trades(self, symbol):
+        await asyncio.sleep(0)
+        if not self.deliveries[symbol]:
+            await asyncio.sleep(3600)
+        return self.deliveries[symbol].pop(0)
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeRedis:
+    def __init__(self):
+        self.keys = {}
+        self.published = []
+        self.round_trips = 0
+        self.set_commands = 0
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def publish(self, channel, message):
+        self.round_trips += 1
+        self.published.append((channel, message))
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def set(self, key, value, ex=None, nx=False):
+        self.commands.append(key)
+
+    async def execute(self):
+        self.redis.round_trips += 1
+        results = []
+        for key in self.commands:
+            self.redis.set_commands += 1
+            is_new = key not in self.redis.keys
+            self.redis.keys.setdefault(key, "1")
+            results.append(True if is_new else None)
+        return results
+
+
+def test_recent_trade_ids_is_a_bounded_lru():
+    seen = RecentTradeIds(maxsize=3)
+    assert [seen.add(k) for k in "abca"] == [True, True, True, False]
+    assert seen.add("d") and len(seen) == 3
+    assert seen.add("b")  # least recently seen key was evicted
+    assert not seen.add("a")
+
+
+def test_replay_5000_trades_per_second_no_lost_or_duplicated_blocks(monkeypatch):
+    symbols = ["BTC/USDT", "ETH/USDT"]
+    seconds = 5
+    tapes = {
+        exchange_id: {s: trade_tape(exchange_id, s, TRADES_PER_SECOND * seconds, seed=i * 10 + j) for j, s in enumerate(symbols)}
+        for i, exchange_id in enumerate(["binance", "bybit"])
+    }
+    exchanges = []  # every worker process opens its own connections
+
+    def connect(exchange_id):
+        def factory(params):
+            exchanges.append(FakeProExchange(exchange_id, tapes[exchange_id]))
+            return exchanges[-1]
+        return staticmethod(factory)
+
+    monkeypatch.setattr(block_trade_monitor, "config", {
+        "min_block_value": 10_000.0, "whale_value": 100_000.0,
+        "active_exchanges": list(tapes), "target_symbols": symbols + ["FDUSD/USDT"],
+    })
+    monkeypatch.setattr(worker_module, "ccxtpro", type("ccxtpro", (), {e: connect(e) for e in tapes}))
+    monkeypatch.setattr(worker_module, "CONFIG_REFRESH_SECONDS", 0.001)
+    redis = FakeRedis()
+    monkeypatch.setattr(worker_module.redis_manager, "redis", redis)
+
+    # Two worker processes on the same stream share only Redis
+    workers = [BlockTradeWorker(), BlockTradeWorker()]
+
+    async def scenario():
+        runners = [asyncio.create_task(w.start()) for w in workers]
+        t0 = time.perf_counter()
+        while len(exchanges) < 4 or not all(e.exhausted for e in exchanges):
+            await asyncio.sleep(0.001)
+        elapsed = time.perf_counter() - t0
+        await asyncio.sleep(0.01)
+        for w in workers:
+            await w.stop()
+        await asyncio.gather(*runners)
+        return elapsed
+
+    elapsed = asyncio.run(scenario())
+
+    published = defaultdict(int)
+    for channel, message in redis.published:
+        assert channel == "block_trade_stream"
+        payload = json.loads(message)
+        assert payload["type"] == "block_trade"
+        for block in payload["data"]:
+            published[(block["exchange"], block["symbol"], block["timestamp"], block["price"], block["amount"])] += 1
+
+    expected = {
+        (exchange_id, symbol, t["timestamp"], t["price"], t["amount"])
+        for exchange_id, by_symbol in tapes.items()
+        for symbol, trades in by_symbol.items()
+        for t in trades if t["price"] * t["amount"] >= 10_000.0
+    }
+    assert len(expected) > 1_000
+    assert set(published) == expected  # zero lost
+    assert max(published.values()) == 1  # zero duplicated, across both workers
+    # Both workers together keep up with 4 streams x 5,000 trades/s (2 x 100,000 trades, 5s of tape)
+    total_trades = 2 * sum(len(trades) for by_symbol in tapes.values() for trades in by_symbol.values())
+    assert total_trades / elapsed > 4 * TRADES_PER_SECOND
+    # Overlapping re-deliveries are dropped in-process: one SET NX per block per worker
+    assert redis.set_commands == 2 * len(expected)
+    assert all(e.closed for e in exchanges)
+
+
+def test_exchanges_use_monitor_config_and_are_cached_only_after_markets_load(monkeypatch):
+    created = []
+
+    class FlakyExchange(FakeProExchange):
+        failures = 1
+
+        def __init__(self, params):
+            super().__init__("okx", {"BTC/USDT": []})
+            self.params = params
+            self.markets = {}
+            created.append(self)
+
+        async def load_markets(self):
+            if FlakyExchange.failures:
+                FlakyExchange.failures -= 1
+                raise ConnectionError("exchange not reachable")
+            self.markets = {"BTC/USDT": {}}
+            return self.markets
+
+    monkeypatch.setattr(worker_module, "ccxtpro", type("ccxtpro", (), {"okx": FlakyExchange}))
+    monkeypatch.setattr(block_trade_monitor, "config", {"active_exchanges": ["okx"], "target_symbols": ["BTC/USDT", "ETH/USDT"]})
+    worker = BlockTradeWorker()
+    worker.running = True
+
+    async def scenario():
+        await worker._sync_subscriptions()
+        assert worker._exchanges == {} and worker._tasks == {} and created[0].closed
+
+        await worker._sync_subscriptions()
+        assert worker._exchanges == {"okx": created[1]}
+        assert set(worker._tasks) == {("okx", "BTC/USDT")}  # only listed markets are subscribed
+        await worker._shutdown()
+
+    asyncio.run(scenario())
+    assert created[1].params == block_trade_monitor.exchange_options("okx")
+    assert created[1].params["options"] == {"adjustForTimeDifference": True, "defaultType": "spot"}
+    assert "userAgent" in created[1].params
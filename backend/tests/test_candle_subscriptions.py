@@ -0,0 +1,204 @@
+import asyncio
+from collections import Counter, defaultdict
+
+import pytest
+
+from app.services.candle_subscriptions import CandleSubscriptionRegistry
+
+N_CLIENTS = 1000
+# 1,000 viewers spread over three (exchange, symbol, timeframe) keys
+CLIENT_KEYS = [("binance", "BTC/USDT", "1m")] * 700 + [("binance", "ETH/USDT", "1m")] * 200 + [("kucoin", "BTC/USDT", "5m")] * 100
+
+
+class FakeStreamingExchange:
+    """watch_ohlcv resolves when the test pushes a candle; tracks concurrent watchers per stream."""
+
+    has = {"watchOHLCV": True}
+
+    def __init__(self, exchange_id):
+        self.id = exchange_id
+        self.closed = False
+        self.watch_calls = Counter()
+        self.active = Counter()
+        self.max_active = Counter()
+        self.fetch_calls = 0
+        self._waiters = defaultdict(list)
+        self.candles = defaultdict(list)
+
+    async def watch_ohlcv(self, symbol, timeframe):
+        key = (symbol, timeframe)
+        self.watch_calls[key] += 1
+        self.active[key] += 1
+        self.max_active[key] = max(self.max_active[key], self.active[key])
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[key].append(future)
+        try:
+            return await future
+        finally:
+            self.active[key] -= 1
+
+    async def fetch_ohlcv(self, symbol, timeframe, limit=None):
+        self.fetch_calls += 1
+        return self.candles[(symbol, timeframe)][-limit:]
+
+    def push(self, symbol, timeframe, close):
+        key = (symbol, timeframe)
+        self.candles[key].append([1_700_000_000_000 + len(self.candles[key]) * 60_000, close, close, close, close, 1.0])
+        waiters, self._waiters[key] = self._waiters[key], []
+        for future in waiters:
+            if not future.done():
+                future.set_result(list(self.candles[key]))
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeFactory:
+    def __init__(self, exchange_class=FakeStreamingExchange):
+        self.exchange_class = exchange_class
+        self.created = []
+
+    def __call__(self, exchange_id):
+        exchange = self.exchange_class(exchange_id)
+        self.created.append(exchange)
+        return exchange
+
+    def get(self, exchange_id):
+        return [ex for ex in self.created if ex.id == exchange_id][-1]
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+async def client(registry, key, received, ready, n_updates):
+    async with registry.subscribe(*key) as updates:
+        ready.release()
+        for _ in range(n_updates):
+            received.append((await updates.get())["close"])
+
+
+def test_thousand_clients_share_one_upstream_per_key():
+    async def scenario():
+        factory = FakeFactory()
+        registry = CandleSubscriptionRegistry(exchange_factory=factory)
+        ready = asyncio.Semaphore(0)
+        received = [[] for _ in range(N_CLIENTS)]
+        tasks = [asyncio.create_task(client(registry, key, received[i], ready, 3)) for i, key in enumerate(CLIENT_KEYS)]
+        for _ in range(N_CLIENTS):
+            await ready.acquire()
+        await settle()
+
+        assert registry.upstream_count == 3
+        assert len(factory.created) == 2  # one connection per exchange
+        assert registry.client_count("binance", "BTC/USDT", "1m") == 700
+
+        for n in range(3):
+            for exchange_id, symbol, timeframe in set(CLIENT_KEYS):
+                factory.get(exchange_id).push(symbol, timeframe, 100.0 + n)
+            await settle()
+
+        await asyncio.gather(*tasks)
+        assert all(r == [100.0, 101.0, 102.0] for r in received)
+
+        binance, kucoin = factory.get("binance"), factory.get("kucoin")
+        assert binance.max_active == {("BTC/USDT", "1m"): 1, ("ETH/USDT", "1m"): 1}
+        assert kucoin.max_active == {("BTC/USDT", "5m"): 1}
+        # 3 candles per key -> 4 watch calls per key, independent of the 1,000 clients
+        assert sum(binance.watch_calls.values()) + sum(kucoin.watch_calls.values()) <= 3 * 4
+
+        # Last client left: upstreams stopped and connections closed
+        await settle()
+        assert registry.upstream_count == 0
+        assert binance.closed and kucoin.closed
+        assert sum(binance.active.values()) == 0
+
+    asyncio.run(scenario())
+
+
+def test_upstream_stops_only_when_last_client_leaves():
+    async def scenario():
+        factory = FakeFactory()
+        registry = CandleSubscriptionRegistry(exchange_factory=factory)
+        key_a, q_a = registry.attach("binance", "BTC/USDT", "1m")
+        key_b, q_b = registry.attach("binance", "BTC/USDT", "1m")
+        key_c, q_c = registry.attach("binance", "ETH/USDT", "1m")
+        await settle()
+        exchange = factory.get("binance")
+
+        registry.detach(key_a, q_a)
+        await settle()
+        assert registry.upstream_count == 2 and exchange.active[("BTC/USDT", "1m")] == 1
+
+        registry.detach(key_b, q_b)
+        await settle()
+        assert registry.upstream_count == 1 and exchange.active[("BTC/USDT", "1m")] == 0
+        assert not exchange.closed  # still streaming ETH/USDT
+
+        registry.detach(key_c, q_c)
+        await settle()
+        assert registry.upstream_count == 0 and exchange.closed
+
+        # A new viewer after everything stopped starts a fresh upstream
+        key, queue = registry.attach("binance", "BTC/USDT", "1m")
+        await settle()
+        assert len(factory.created) == 2 and factory.created[-1].active[("BTC/USDT", "1m")] == 1
+        await registry.close()
+
+    asyncio.run(scenario())
+
+
+def test_late_joiner_gets_latest_and_slow_client_does_not_block():
+    async def scenario():
+        factory = FakeFactory()
+        registry = CandleSubscriptionRegistry(exchange_factory=factory)
+        _, slow = registry.attach("binance", "BTC/USDT", "1m")
+        await settle()
+        exchange = factory.get("binance")
+
+        for n in range(50):
+            exchange.push("BTC/USDT", "1m", float(n))
+            await settle()
+
+        # Bounded buffer: the slow client keeps only the most recent candles
+        buffered = [slow.get_nowait()["close"] for _ in range(slow.qsize())]
+        assert buffered[-1] == 49.0 and len(buffered) < 50
+
+        _, late = registry.attach("binance", "BTC/USDT", "1m")
+        assert late.get_nowait()["close"] == 49.0
+        await registry.close()
+        assert exchange.closed
+
+    asyncio.run(scenario())
+
+
+def test_exchange_without_watch_ohlcv_polls_once_per_key():
+    class RestOnlyExchange(FakeStreamingExchange):
+        has = {"watchOHLCV": False}
+
+    async def scenario():
+        factory = FakeFactory(RestOnlyExchange)
+        registry = CandleSubscriptionRegistry(exchange_factory=factory, poll_interval=0.01)
+        queues = []
+        for _ in range(200):
+            queues.append(registry.attach("mexc", "BTC/USDT", "1m")[1])
+        exchange = factory.get("mexc")
+        exchange.push("BTC/USDT", "1m", 42.0)
+        await asyncio.sleep(0.1)
+
+        assert all(q.get_nowait()["close"] == 42.0 for q in queues)
+        assert exchange.fetch_calls <= 12  # ~10 polls in 0.1 s for all 200 clients
+        await registry.close()
+
+    asyncio.run(scenario())
+
+
+def test_unknown_exchange_is_rejected():
+    async def scenario():
+        registry = CandleSubscriptionRegistry()
+        with pytest.raises(ValueError):
+            registry.attach("not-an-exchange", "BTC/USDT", "1m")
+        assert registry.upstream_count == 0
+
+    asyncio.run(scenario())
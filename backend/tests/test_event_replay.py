@@ -0,0 +1,202 @@
+import asyncio
+import random
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.event_driven.engine import EventDrivenEngine, SimulationStrategy
+from app.services.event_driven.events import OrderEvent, SignalEvent
+from app.services.event_driven.pending_orders import PendingOrderBook
+
+
+class BaselineLatencyBuffer:
+    """
+    The latency buffer of EventDrivenEngine before the heaps: the `pending_orders`
+    list and the ready / remaining scan its run() loop did on every event, as it was.
+    The old engine had no resting LMT/STP orders, so nothing is ever triggered.
+    """
+
+    def __init__(self):
+        self.pending_orders: List[Dict[str, Any]] = []
+
+    def __len__(self):
+        return len(self.pending_orders)
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def schedule(self, order, execute_at):
+        self.pending_orders.append({
+            "order": order,
+            "execute_at": execute_at
+        })
+
+    def pop_due(self, last_event_time):
+        ready_orders = []
+        remaining_orders = []
+
+        for item in self.pending_orders:
+            if last_event_time >= item['execute_at']:
+                ready_orders.append(item)
+            else:
+                remaining_orders.append(item)
+
+        self.pending_orders = remaining_orders
+        return [item['order'] for item in ready_orders]
+
+    def pop_triggered(self, open_price, high, low):
+        return []  # market orders only: nothing ever rests
+
+
+class ScriptedStrategy:
+    """Places a deterministic mix of market, limit and stop orders."""
+
+    def calculate_signal(self, event):
+        bar = int(event.date.timestamp() // 60)
+        rng = random.Random(bar)
+        roll = rng.random()
+        if roll < 0.10:
+            return OrderEvent(event.symbol, "LMT", 1, rng.choice(["BUY", "SELL"]), price=event.close * (1 + rng.uniform(-0.01, 0.01)))
+        if roll < 0.16:
+            return OrderEvent(event.symbol, "STP", 1, rng.choice(["BUY", "SELL"]), price=event.close * (1 + rng.uniform(-0.01, 0.01)))
+        if roll < 0.19:
+            return OrderEvent(event.symbol, "MKT", 1, rng.choice(["BUY", "SELL"]))
+        return None
+
+
+def write_candles(path, n=3000, seed=3):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.003, n)))
+    open_ = np.concatenate([[100.0], close[:-1]])
+    spread = np.abs(rng.normal(0, 0.002, n)) * close
+    df = pd.DataFrame({
+        "timestamp": 1_700_000_000_000 + np.arange(n) * 60_000,
+        "open": open_,
+        "high": np.maximum(open_, close) + spread,
+        "low": np.minimum(open_, close) - spread,
+        "close": close,
+        "volume": rng.integers(100, 1000, n),
+    })
+    if str(path).endswith(".parquet"):
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+    return df
+
+
+def run_replay(path, order_book=None, strategy=None, participation=1.0, **kwargs):
+    random.seed(0)
+    engine = EventDrivenEngine("BTC/USDT", replay_path=str(path), chunk_size=500, **kwargs)
+    engine.strategy = strategy or ScriptedStrategy()
+    engine.latency_ms = 90_000.0
+    engine.volume_participation_rate = participation
+    if order_book is not None:
+        engine.order_book = order_book
+
+    fills = []
+    update_fill = engine.portfolio.update_fill
+
+    def record(fill):
+        fills.append((fill.timestamp, fill.direction, fill.quantity, round(fill.fill_cost, 8), round(fill.commission, 8)))
+        update_fill(fill)
+
+    engine.portfolio.update_fill = record
+    asyncio.run(engine.run())
+    return engine, fills
+
+
+def test_heap_latency_buffer_matches_baseline_list_scan(tmp_path):
+    path = tmp_path / "candles.csv"
+    df = write_candles(path)
+
+    # The engine's own strategy (market entries); thin volume makes partial fills re-queue orders
+    heap_engine, heap_fills = run_replay(path, strategy=SimulationStrategy(), participation=0.002)
+    _, scan_fills = run_replay(path, order_book=BaselineLatencyBuffer(), strategy=SimulationStrategy(), participation=0.002)
+
+    assert len(heap_fills) > 100
+    assert heap_fills == scan_fills
+    # Every bar was replayed
+    assert heap_engine.current_market_event.date == pd.to_datetime(df["timestamp"].iloc[-1], unit="ms").to_pydatetime()
+
+
+class SignalsAtBars:
+    """Emits a (signal_type, order_type, price) entry signal on the given bars."""
+
+    def __init__(self, entries):
+        self.entries = entries
+        self.bar = -1
+
+    def calculate_signal(self, event):
+        self.bar += 1
+        if self.bar not in self.entries:
+            return None
+        signal_type, order_type, price = self.entries[self.bar]
+        return SignalEvent("test", event.symbol, event.date, signal_type, order_type=order_type, price=price)
+
+
+def test_resting_orders_fill_at_trigger_or_gap_price(tmp_path):
+    # Bars 0-3 stay inside 99.5-100.5 while the orders are placed, then 4-6 cross them
+    bars = pd.DataFrame({
+        "timestamp": 1_700_000_000_000 + np.arange(8) * 60_000,
+        "open":  [100.0] * 4 + [100.0, 97.0, 104.0, 100.0],
+        "high":  [100.5] * 4 + [102.5, 97.8, 105.0, 100.5],
+        "low":   [99.5] * 4 + [99.5, 96.0, 103.5, 99.5],
+        "close": [100.0] * 4 + [101.0, 97.5, 104.5, 100.0],
+        "volume": 1000,
+    })
+    bars.to_csv(tmp_path / "bars.csv", index=False)
+
+    engine = EventDrivenEngine("BTC/USDT", replay_path=str(tmp_path / "bars.csv"))
+    engine.strategy = SignalsAtBars({
+        0: ("LONG", "LMT", 98.0), 1: ("SHORT", "LMT", 103.0), 2: ("LONG", "STP", 102.0), 3: ("SHORT", "STP", 97.5),
+    })
+    engine.apply_slippage = lambda price, direction: price
+    fills = []
+    engine.portfolio.update_fill = lambda fill: fills.append((fill.timestamp, fill.direction, fill.fill_cost))
+    asyncio.run(engine.run())
+
+    at = list(pd.DatetimeIndex(pd.to_datetime(bars["timestamp"], unit="ms")).to_pydatetime())
+    assert fills == [
+        (at[4], "BUY", 102.0),   # buy stop 102: the high crossed it
+        (at[5], "BUY", 97.0),    # buy limit 98: gapped down, filled at the open
+        (at[5], "SELL", 97.0),   # sell stop 97.5: gapped through, filled at the open
+        (at[6], "SELL", 104.0),  # sell limit 103: gapped up, filled at the open
+    ]
+    assert not engine.order_book
+
+
+@pytest.mark.parametrize("entry_order", ["LMT", "STP"])
+def test_simulation_strategy_rests_limit_and_stop_entries(tmp_path, monkeypatch, entry_order):
+    path = tmp_path / "candles.csv"
+    write_candles(path, n=600)
+    strategy = SimulationStrategy()
+    strategy.update_parameters({"entry_order": entry_order, "entry_offset": 0.002})
+
+    armed = []
+    arm = PendingOrderBook.arm
+    monkeypatch.setattr(PendingOrderBook, "arm", lambda book, order: (armed.append(order), arm(book, order)))
+    _, fills = run_replay(path, strategy=strategy)
+
+    assert armed and all(order.order_type == entry_order for order in armed)
+    assert fills
+
+
+def test_parquet_and_trade_replay(tmp_path):
+    df = write_candles(tmp_path / "candles.parquet", n=1200)
+    write_candles(tmp_path / "candles.csv", n=1200)
+
+    _, parquet_fills = run_replay(tmp_path / "candles.parquet")
+    _, csv_fills = run_replay(tmp_path / "candles.csv")
+    assert parquet_fills == csv_fills
+
+    trades = pd.DataFrame({
+        "timestamp": pd.to_datetime(df["timestamp"], unit="ms").dt.strftime("%Y-%m-%dT%H:%M:%S"),
+        "price": df["close"],
+        "amount": df["volume"].astype(float),
+    })
+    trades.to_csv(tmp_path / "trades.csv", index=False)
+    engine, _ = run_replay(tmp_path / "trades.csv", replay_kind="trades")
+    last = engine.current_market_event
+    assert last.open == last.high == last.low == last.close == pytest.approx(df["close"].iloc[-1])
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("arch")
+from arch import arch_model
+
+from app.services.ml.forex_volatility_models import (
+    ForexEGARCHModel, ForexGARCHModel, garch_one_step_variance,
+)
+
+
+def garch_returns(n, seed=0, omega=0.02, alpha=0.08, beta=0.9):
+    """Simulated GARCH(1,1) returns (fractional, the model rescales by 100)."""
+    rng = np.random.default_rng(seed)
+    s2 = omega / (1 - alpha - beta)
+    out = np.empty(n)
+    for t in range(n):
+        out[t] = np.sqrt(s2) * rng.standard_normal() + 0.01
+        s2 = omega + alpha * (out[t] - 0.01) ** 2 + beta * s2
+    return out / 100
+
+
+def frame(returns):
+    return pd.DataFrame({"ret": returns, "other": np.zeros(len(returns))})
+
+
+@pytest.mark.parametrize("model_cls, vol", [(ForexGARCHModel, "Garch"), (ForexEGARCHModel, "EGARCH")])
+def test_analytic_one_step_variance_matches_arch_filter(model_cls, vol):
+    returns = garch_returns(3_000)
+    train, test = returns[:2_000], returns[2_000:]
+    model = model_cls().fit(frame(train), pd.Series(np.zeros(len(train))))
+
+    variance = model.forecast_variance(frame(test))
+
+    # arch with the same fixed parameters over train + test: sigma_t only uses data up to t-1
+    fixed = arch_model(returns * 100, vol=vol, p=1, q=1).fix(model.model_fit.params)
+    expected = np.asarray(fixed.conditional_volatility)[2_000:] ** 2
+    np.testing.assert_allclose(variance, expected, rtol=1e-9)
+    # First row = arch's own analytic 1-step forecast at the end of the training data
+    first = model.model_fit.forecast(horizon=1, reindex=False).variance.values[-1, 0]
+    assert variance[0] == pytest.approx(first, rel=1e-9)
+
+    preds = model.predict(frame(test))
+    np.testing.assert_array_equal(preds, (np.sqrt(expected) > np.sqrt(expected).mean()).astype(int))
+
+
+def test_refit_schedule_uses_fixed_trailing_window():
+    returns = garch_returns(2_600, seed=1)
+    train, test = returns[:2_000], returns[2_000:]
+    model = ForexGARCHModel(refit_every=250, refit_window=1_500).fit(frame(train), pd.Series(np.zeros(len(train))))
+    variance = model.forecast_variance(frame(test))
+
+    expected = []
+    history = train * 100
+    for start in (0, 250, 500):
+        block = test[start:start + 250] * 100
+        fit = model.model_fit if start == 0 else arch_model(history[-1_500:], vol="Garch", p=1, q=1).fit(disp="off")
+        expected.append(garch_one_step_variance(
+            block, fit.params, last_resid=np.asarray(fit.resid), last_variance=np.asarray(fit.conditional_volatility) ** 2,
+        ))
+        history = np.concatenate([history, block])
+    np.testing.assert_allclose(variance, np.concatenate(expected), rtol=1e-12)
+
+
+def test_simulation_mode_is_kept_behind_flag():
+    returns = garch_returns(1_200, seed=2)
+    model = ForexGARCHModel(forecast_method="simulation").fit(frame(returns[:1_000]), pd.Series(np.zeros(1_000)))
+    preds = model.predict(frame(returns[1_000:]))
+    assert preds.shape == (200,) and set(np.unique(preds)) <= {0, 1}
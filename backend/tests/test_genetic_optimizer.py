@@ -0,0 +1,159 @@
+import json
+import os
+import random
+
+import numpy as np
+import pandas as pd
+
+from app.services.genetic_optimizer import (
+    BacktestFitness, FitnessCache, GeneticOptimizer, GeneticWorkerPool, canonical_genome, run_single_backtest,
+)
+from app.strategies import STRATEGY_MAP
+
+PARAM_RANGES = {"fast_period": list(range(5, 31, 5)), "slow_period": list(range(20, 101, 10))}
+
+
+def candle_frame(n_bars=600, seed=3):
+    rng = np.random.default_rng(seed)
+    close = 30_000 * np.exp(np.cumsum(rng.normal(0, 0.01, n_bars)) + np.sin(np.arange(n_bars) / 40) * 0.05)
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    spread = np.abs(rng.normal(0, 0.004, n_bars)) * close
+    return pd.DataFrame({
+        "open": open_, "high": np.maximum(open_, close) + spread, "low": np.minimum(open_, close) - spread,
+        "close": close, "volume": rng.uniform(1, 100, n_bars),
+    }, index=pd.date_range("2024-01-01", periods=n_bars, freq="h"))
+
+
+def legacy_genetic_algorithm(df, strategy_class, initial_cash, param_ranges, fixed_params, pop_size, generations,
+                             opt_target="profit", min_trades=5):
+    """The sequential BacktestEngine._run_genetic_algorithm loop before the GA driver."""
+    param_keys = list(param_ranges.keys())
+    population = [{k: random.choice(v) for k, v in param_ranges.items()} for _ in range(pop_size)]
+    best_results, history_cache = [], {}
+    for gen in range(generations):
+        evaluated_pop = []
+        for individual in population:
+            param_signature = json.dumps(individual, sort_keys=True)
+            if param_signature in history_cache:
+                metrics = history_cache[param_signature]
+            else:
+                metrics = run_single_backtest(df, strategy_class, initial_cash, individual, fixed_params)
+                metrics['params'] = individual
+                history_cache[param_signature] = metrics
+            if metrics['total_trades'] < min_trades:
+                metrics['fitness_score'] = -9999
+            else:
+                metrics['fitness_score'] = metrics['profitPercent']
+            evaluated_pop.append(metrics)
+        evaluated_pop.sort(key=lambda x: x.get('fitness_score', -9999), reverse=True)
+        best_results.extend(evaluated_pop[:5])
+        next_generation = [item['params'] for item in evaluated_pop[:int(pop_size * 0.2)]]
+        while len(next_generation) < pop_size:
+            parent1 = random.choice(evaluated_pop[:int(pop_size/2)])['params']
+            parent2 = random.choice(evaluated_pop[:int(pop_size/2)])['params']
+            child = parent1.copy()
+            for k in param_keys:
+                if random.random() > 0.5: child[k] = parent2[k]
+            if random.random() < 0.2:
+                mutate_key = random.choice(param_keys)
+                child[mutate_key] = random.choice(param_ranges[mutate_key])
+            next_generation.append(child)
+        population = next_generation
+    unique_results = {json.dumps(r['params'], sort_keys=True): r for r in best_results}
+    return list(unique_results.values())
+
+
+def best_of(results):
+    return max(results, key=lambda r: r["fitness_score"])
+
+
+def test_parallel_ga_matches_sequential_with_same_seed():
+    df = candle_frame()
+    strategy = STRATEGY_MAP["SMA Crossover"]
+    fixed = {"stop_loss": 0}
+
+    random.seed(11)
+    expected = legacy_genetic_algorithm(df, strategy, 10_000, PARAM_RANGES, fixed, pop_size=12, generations=4, min_trades=1)
+
+    evaluator = BacktestFitness(df, strategy, 10_000, fixed)
+    assert evaluator.picklable
+    optimizer = GeneticOptimizer(evaluator, n_workers=2, rng=random.Random(11))
+    results = optimizer.run(PARAM_RANGES, pop_size=12, generations=4, min_trades=1)
+
+    assert best_of(results) == best_of(expected)
+    assert results == expected
+    stats = optimizer.generation_stats
+    assert [s["generation"] for s in stats] == [1, 2, 3, 4]
+    # Elites are carried over, so later generations are served from the cache
+    assert all(s["cache_hits"] >= 2 for s in stats[1:])
+    assert sum(s["backtests"] for s in stats) == len(optimizer.cache)
+
+
+def test_progress_is_reported_per_evaluated_individual():
+    evaluator = BacktestFitness(candle_frame(n_bars=300), STRATEGY_MAP["SMA Crossover"], 10_000, {})
+    for n_workers in (1, 2):
+        calls = []
+        optimizer = GeneticOptimizer(evaluator, n_workers=n_workers, rng=random.Random(3))
+        optimizer.run(PARAM_RANGES, pop_size=8, generations=3, min_trades=1,
+                      progress_callback=lambda percent, meta: calls.append((percent, meta)))
+
+        steps = [meta["current"] for _, meta in calls]
+        assert steps == sorted(steps) and steps[-1] == 24 and calls[-1][0] == 100
+        assert {meta["total"] for _, meta in calls} == {24}
+        for gen, stats in enumerate(optimizer.generation_stats, start=1):
+            in_gen = [meta for _, meta in calls if meta["generation"] == gen]
+            # One update per backtest as it completes; from generation 2 on the carried-over
+            # elite is already cached and is reported up front in one extra update
+            assert len(in_gen) == stats["backtests"] + (gen > 1)
+            assert in_gen[-1]["current"] == gen * 8
+
+
+def test_worker_pool_is_reused_across_runs():
+    df = candle_frame(n_bars=600)
+    strategy = STRATEGY_MAP["SMA Crossover"]
+    windows = [BacktestFitness(df.iloc[:300], strategy, 10_000, {}),
+               BacktestFitness(df.iloc[300:], strategy, 12_500, {})]
+    expected = [GeneticOptimizer(w, n_workers=1, rng=random.Random(8)).run(PARAM_RANGES, pop_size=8, generations=2, min_trades=1)
+                for w in windows]
+
+    with GeneticWorkerPool(2) as pool:
+        results, workers = [], []
+        for w in windows:
+            results.append(GeneticOptimizer(w, pool=pool, rng=random.Random(8)).run(
+                PARAM_RANGES, pop_size=8, generations=2, min_trades=1))
+            workers.append(set(pool.executor._processes))
+        assert workers[0] == workers[1]  # same processes served the second window
+        assert os.listdir(pool._dir) == []  # per-run evaluator files are released
+    assert results == expected
+    assert not os.path.exists(pool._dir)
+
+
+def test_fitness_cache_is_bounded_and_persists(tmp_path):
+    cache = FitnessCache(maxsize=3, path=str(tmp_path / "ga" / "fitness.pkl"))
+    for i in range(5):
+        cache.put(("ns", canonical_genome({"b": i, "a": 1})), {"profitPercent": i})
+    assert len(cache) == 3
+    assert ("ns", canonical_genome({"a": 1, "b": 0})) not in cache  # least recently used went first
+    cache.get(("ns", (("a", 1), ("b", 2))))
+    cache.put(("ns", (("a", 9),)), {"profitPercent": 9})
+    assert ("ns", (("a", 1), ("b", 2))) in cache and ("ns", (("a", 1), ("b", 3))) not in cache
+    cache.save()
+    assert len(FitnessCache(maxsize=10, path=cache.path)) == 3
+
+    # A second run over the same data reads every fitness from disk
+    df = candle_frame(n_bars=300)
+    evaluator = BacktestFitness(df, STRATEGY_MAP["SMA Crossover"], 10_000, {})
+    path = str(tmp_path / "sma.pkl")
+    first = GeneticOptimizer(evaluator, n_workers=1, cache=FitnessCache(path=path), rng=random.Random(5))
+    first_results = first.run(PARAM_RANGES, pop_size=8, generations=3, min_trades=1)
+    second = GeneticOptimizer(evaluator, n_workers=1, cache=FitnessCache(path=path), rng=random.Random(5))
+    assert second.run(PARAM_RANGES, pop_size=8, generations=3, min_trades=1) == first_results
+    assert sum(s["backtests"] for s in second.generation_stats) == 0
+
+    # Other costs are another namespace: nothing is reused
+    costly = BacktestFitness(df, STRATEGY_MAP["SMA Crossover"], 10_000, {}, commission=0.01)
+    third = GeneticOptimizer(costly, n_workers=1, cache=FitnessCache(path=path), rng=random.Random(5))
+    third.run(PARAM_RANGES, pop_size=8, generations=1, min_trades=1)
+    rng = random.Random(5)
+    initial = [{k: rng.choice(v) for k, v in PARAM_RANGES.items()} for _ in range(8)]
+    assert third.generation_stats[0]["backtests"] == len({canonical_genome(p) for p in initial})
@@ -0,0 +1,269 @@
+import asyncio
+import itertools
+import random
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.models  # noqa: F401  (registers User/ApiKey for the GridBot relationships)
+from app.models.grid import GridBot, GridOrder
+from app.strategies import grid as grid_module
+from app.strategies.grid import GridTradingBot
+from app.strategies.helpers.grid_ledger import GridLedger, GridLedgerWriter
+
+
+class MockGridExchange:
+    """Local stand-in for a ccxt.pro exchange that fills resting limit orders as the price moves."""
+
+    def __init__(self, price, streams=True, latency=0.0):
+        self.last = price
+        self.latency = latency
+        self.has = {'watchOrders': streams, 'watchMyTrades': False, 'watchTicker': streams}
+        self.resting = {}
+        self.closed_orders = {}
+        self.calls = {"create": 0, "fetch_order": 0, "fetch_open_orders": 0, "fetch_ticker": 0}
+        self._ids = itertools.count(1)
+        self._order_events = asyncio.Queue()
+        self._tickers = asyncio.Queue()
+
+    async def _rtt(self):
+        await asyncio.sleep(self.latency)
+
+    async def load_markets(self):
+        return {"BTC/USDT": {"symbol": "BTC/USDT"}}
+
+    def market(self, pair):
+        return {"symbol": pair}
+
+    def price_to_precision(self, pair, price):
+        return f"{price:.2f}"
+
+    def amount_to_precision(self, pair, amount):
+        return f"{amount:.6f}"
+
+    async def fetch_balance(self):
+        return {"USDT": {"free": 1_000_000.0}}
+
+    async def fetch_ticker(self, pair):
+        self.calls["fetch_ticker"] += 1
+        await self._rtt()
+        return {"last": self.last}
+
+    async def _create(self, side, amount, price):
+        self.calls["create"] += 1
+        await self._rtt()
+        order = {"id": str(next(self._ids)), "side": side, "price": float(price),
+                 "amount": float(amount), "status": "open"}
+        self.resting[order["id"]] = order
+        return dict(order)
+
+    async def create_limit_buy_order(self, pair, amount, price):
+        return await self._create("buy", amount, price)
+
+    async def create_limit_sell_order(self, pair, amount, price):
+        return await self._create("sell", amount, price)
+
+    async def fetch_order(self, order_id, pair):
+        self.calls["fetch_order"] += 1
+        await self._rtt()
+        return dict(self.resting.get(order_id) or self.closed_orders[order_id])
+
+    async def fetch_open_orders(self, pair):
+        self.calls["fetch_open_orders"] += 1
+        await self._rtt()
+        return [dict(o) for o in self.resting.values()]
+
+    async def watch_orders(self, pair):
+        return [await self._order_events.get()]
+
+    async def watch_ticker(self, pair):
+        return await self._tickers.get()
+
+    def move_to(self, price, push=True):
+        """Moves the market; crossed resting orders fill and are pushed on the order stream."""
+        self.last = price
+        for order_id, order in list(self.resting.items()):
+            if (order["side"] == "buy" and price <= order["price"]) or \
+               (order["side"] == "sell" and price >= order["price"]):
+                order["status"] = "closed"
+                self.closed_orders[order_id] = self.resting.pop(order_id)
+                if push:
+                    self._order_events.put_nowait(dict(order))
+        self._tickers.put_nowait({"last": price})
+
+    async def close(self):
+        pass
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'grid.db'}")
+    GridBot.metadata.create_all(engine, tables=[GridBot.__table__, GridOrder.__table__])
+    factory = sessionmaker(bind=engine)
+    db = factory()
+    db.add(GridBot(id=1, user_id=1, pair="BTC/USDT", exchange="binance", lower_limit=100, upper_limit=300,
+                   grid_count=200, amount_per_grid=10, is_paper_trading=False,
+                   paper_balance_current=10_000.0, paper_asset_quantity=0.0,
+                   total_profit=0.0, current_cycle_count=0))
+    db.commit()
+    db.close()
+    return factory
+
+
+@pytest.fixture(autouse=True)
+def quiet_bot(monkeypatch):
+    async def _log(self, message, type="info"):
+        pass
+    monkeypatch.setattr(GridTradingBot, "_log", _log)
+    monkeypatch.setattr(grid_module, "ORDER_PLACEMENT_DELAY_SECONDS", 0)
+
+
+def make_config(paper):
+    return {"pair": "BTC/USDT", "exchange": "binance", "lower_limit": 100, "upper_limit": 300,
+            "grid_count": 200, "amount_per_grid": 10, "is_paper_trading": paper}
+
+
+async def wait_for(predicate, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("condition not reached")
+        await asyncio.sleep(0.001)
+
+
+def test_real_mode_200_levels_fills_from_order_stream(session_factory):
+    async def scenario():
+        exchange = MockGridExchange(price=200.5)
+        bot = GridTradingBot(1, make_config(paper=False), exchange=exchange, session_factory=session_factory)
+        task = asyncio.create_task(bot.start())
+        await wait_for(lambda: exchange.calls["create"] == 201 and len(exchange.resting) == 201)
+        await wait_for(lambda: bot._streams_healthy or exchange.calls["fetch_open_orders"] >= 1)
+
+        # 5 buy levels (196..200) fill; each gets a counter sell one step higher
+        exchange.move_to(195.5)
+        await wait_for(lambda: exchange.calls["create"] == 206 and len(exchange.resting) == 201)
+        # Back up through 196.x..201: the 5 counter sells + the original 201 sell fill
+        exchange.move_to(201.0)
+        await wait_for(lambda: exchange.calls["create"] == 212 and len(exchange.resting) == 201)
+
+        bot.is_running = False
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return exchange, bot
+
+    exchange, bot = asyncio.run(scenario())
+
+    # No per-order polling while the stream is healthy
+    assert exchange.calls["fetch_order"] == 0
+    assert exchange.calls["fetch_open_orders"] <= 1
+
+    db = session_factory()
+    rows = db.query(GridOrder).filter(GridOrder.bot_id == 1).all()
+    assert len(rows) == 212
+    assert sum(r.status == "filled" for r in rows) == 11
+    assert {r.order_id for r in rows if r.status == "open"} == set(exchange.resting)
+    bot_row = db.get(GridBot, 1)
+    assert bot_row.current_cycle_count == 6
+    assert bot_row.total_profit > 0
+    db.close()
+
+
+def test_reconcile_batches_rest_calls_when_stream_is_down(session_factory):
+    async def scenario():
+        exchange = MockGridExchange(price=200.5, streams=False)
+        bot = GridTradingBot(1, make_config(paper=False), exchange=exchange, session_factory=session_factory)
+        bot.ledger.load(bot.db)
+        for _ in range(200):
+            order = await exchange._create("buy", 0.1, 150.0)
+            bot.ledger.add(order["id"], "buy", 150.0, 0.1)
+
+        exchange.move_to(149.0, push=False)  # all 200 fill silently
+        # Keep two resting so they must be skipped
+        for order_id in ("1", "2"):
+            exchange.resting[order_id] = exchange.closed_orders.pop(order_id)
+            exchange.resting[order_id]["status"] = "open"
+
+        exchange.calls["create"] = 0
+        await bot._reconcile()
+        await bot.writer.flush()
+        return exchange, bot
+
+    exchange, bot = asyncio.run(scenario())
+    assert exchange.calls["fetch_open_orders"] == 1
+    assert exchange.calls["fetch_order"] == 198
+    assert exchange.calls["create"] == 198  # one counter sell per fill
+    assert {o.order_id for o in bot.ledger.open_orders()} >= {"1", "2"}
+
+
+def test_fill_event_racing_order_creation_is_applied(session_factory):
+    async def scenario():
+        exchange = MockGridExchange(price=200.5)
+        bot = GridTradingBot(1, make_config(paper=False), exchange=exchange, session_factory=session_factory)
+        # The stream reports the fill before create_limit_buy_order has returned
+        await bot._on_exchange_order({"id": "1", "status": "closed"})
+        order = await bot._place_order_dual("buy", 199.0, 0.1)
+        return exchange, order
+
+    exchange, order = asyncio.run(scenario())
+    assert order.order_id == "1" and order.status == "filled"
+    assert exchange.calls["create"] == 2  # counter sell placed
+
+
+def test_crossed_matches_full_scan():
+    rng = random.Random(7)
+    ledger = GridLedger(bot_id=1)
+    reference = {}
+    for i in range(200):
+        side = rng.choice(["buy", "sell"])
+        price = round(rng.uniform(90, 110), 2)
+        ledger.add(f"o{i}", side, price, 1.0)
+        reference[f"o{i}"] = (side, price)
+
+    for step in range(300):
+        price = 100 + rng.gauss(0, 4)
+        expected = [oid for oid, (side, p) in reference.items()
+                    if (side == "buy" and price <= p) or (side == "sell" and price >= p)]
+        hits = ledger.crossed(price)
+        assert [o.order_id for o in hits] == expected
+        for order in hits:
+            ledger.set_status(order.order_id, "filled")
+            del reference[order.order_id]
+            # Counter order, as the grid does
+            counter = ("sell", order.price + 1) if order.side == "buy" else ("buy", order.price - 1)
+            new_id = f"c{step}_{order.order_id}"
+            ledger.add(new_id, *counter, 1.0)
+            reference[new_id] = counter
+
+
+def test_writer_batches_and_requeues_failed_flush(session_factory, monkeypatch):
+    async def scenario():
+        ledger = GridLedger(bot_id=1).load(session_factory())
+        writer = GridLedgerWriter(ledger, session_factory, interval=60)
+        for i in range(50):
+            ledger.add(f"sim_{i}", "buy", 100.0 - i, 0.1)
+        ledger.set_status("sim_3", "filled")
+        ledger.adjust(total_profit=1.5, current_cycle_count=1)
+
+        real_write = writer._write
+        monkeypatch.setattr(writer, "_write", lambda batch: (_ for _ in ()).throw(IOError("db down")))
+        await writer.flush()
+        assert ledger.pending == 52  # 50 inserts + 2 metric deltas kept for retry
+        ledger.set_status("sim_4", "cancelled")
+        ledger.adjust(total_profit=0.5)
+
+        monkeypatch.setattr(writer, "_write", real_write)
+        await writer.flush()
+        return writer
+
+    writer = asyncio.run(scenario())
+    assert writer.flush_count == 1
+
+    db = session_factory()
+    statuses = {r.order_id: r.status for r in db.query(GridOrder).all()}
+    assert len(statuses) == 50
+    assert statuses["sim_3"] == "filled" and statuses["sim_4"] == "cancelled"
+    bot_row = db.get(GridBot, 1)
+    assert bot_row.total_profit == pytest.approx(2.0)
+    assert bot_row.current_cycle_count == 1
+    db.close()
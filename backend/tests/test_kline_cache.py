@@ -0,0 +1,188 @@
+import asyncio
+from collections import Counter, defaultdict
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.candle_subscriptions import CandleSubscriptionRegistry
+from app.services.kline_cache import BollingerState, MultiTimeframeKlineCache
+
+TIMEFRAMES = ["1m", "3m", "5m", "15m", "30m", "1h", "4h", "1d", "1w", "1M"]
+INTERVAL_MS = {"1m": 60_000, "3m": 180_000, "5m": 300_000, "15m": 900_000, "30m": 1_800_000, "1h": 3_600_000,
+               "4h": 14_400_000, "1d": 86_400_000, "1w": 604_800_000, "1M": 2_592_000_000}
+
+
+def pandas_bbands(closes, length, std):
+    """pandas_ta.bbands: SMA middle, population (ddof=0) standard deviation."""
+    close = pd.Series(closes, dtype=float)
+    mid = close.rolling(length).mean()
+    dev = close.rolling(length).std(ddof=0)
+    return mid - std * dev, mid, mid + std * dev
+
+
+class FakeKlineExchange:
+    """Shared candle book per (symbol, timeframe): REST history and a watch_ohlcv stream."""
+
+    has = {"watchOHLCV": True}
+    books = defaultdict(list)
+    rest_calls = Counter()
+
+    def __init__(self, exchange_id, market_type="spot"):
+        self.id = exchange_id
+        self._waiters = defaultdict(list)
+        FakeKlineExchange.instances.append(self)
+
+    @classmethod
+    def reset(cls, history=60, seed=0, symbols=("BTC/USDT",)):
+        cls.books = defaultdict(list)
+        cls.rest_calls = Counter()
+        cls.instances = []
+        rng = np.random.default_rng(seed)
+        for symbol in symbols:
+            for tf in TIMEFRAMES:
+                closes = 60000 + rng.standard_normal(history).cumsum() * 50
+                cls.books[(symbol, tf)] = [[i * INTERVAL_MS[tf], c, c, c, c, 1.0] for i, c in enumerate(closes)]
+
+    async def fetch_ohlcv(self, symbol, timeframe, limit=None):
+        FakeKlineExchange.rest_calls[(symbol, timeframe)] += 1
+        await asyncio.sleep(0)
+        return [list(c) for c in FakeKlineExchange.books[(symbol, timeframe)][-limit:]]
+
+    async def watch_ohlcv(self, symbol, timeframe):
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[(symbol, timeframe)].append(future)
+        return await future
+
+    @classmethod
+    def tick(cls, symbol, timeframe, close, new_candle=False, skip=0):
+        book = cls.books[(symbol, timeframe)]
+        if new_candle:
+            book.append([book[-1][0] + (1 + skip) * INTERVAL_MS[timeframe], close, close, close, close, 1.0])
+        else:
+            book[-1][4] = close
+        if skip:
+            return
+        for ex in cls.instances:
+            waiters, ex._waiters[(symbol, timeframe)] = ex._waiters[(symbol, timeframe)], []
+            for future in waiters:
+                if not future.done():
+                    future.set_result([list(c) for c in book[-3:]])
+
+    async def close(self):
+        pass
+
+
+def make_cache():
+    FakeKlineExchange.reset()
+    registry = CandleSubscriptionRegistry(exchange_factory=FakeKlineExchange)
+    return MultiTimeframeKlineCache(exchange_factory=FakeKlineExchange, registry_factory=lambda market_type: registry), registry
+
+
+async def settle(n=10):
+    for _ in range(n):
+        await asyncio.sleep(0)
+
+
+def expected_bb(timeframe, length=20, std=2.0):
+    closes = [c[4] for c in FakeKlineExchange.books[("BTC/USDT", timeframe)]]
+    lower, mid, upper = pandas_bbands(closes, length, std)
+    return lower.iloc[-1], mid.iloc[-1], upper.iloc[-1]
+
+
+@pytest.mark.parametrize("length", [1, 2, 20, 50])
+def test_bollinger_state_matches_pandas(length):
+    rng = np.random.default_rng(length)
+    # Large price level with small moves: exercises the anchored sums across many re-anchors
+    closes = list(60000 + rng.standard_normal(3000).cumsum() * 5)
+    state = BollingerState(length)
+    state.reset(closes[:length], closes[length])
+    lower, mid, upper = pandas_bbands(closes, length, 2.5)
+
+    for i in range(length, len(closes)):
+        if i > length:
+            # Forming candle ticks towards its close, then the next candle opens
+            state.update_forming(closes[i - 1] + 3.0)
+            state.close_candle(closes[i - 1], closes[i] - 1.0)
+            state.update_forming(closes[i])
+        got = state.bands(2.5)
+        assert got == pytest.approx((lower.iloc[i], mid.iloc[i], upper.iloc[i]), rel=1e-9)
+        # pandas' rolling std itself drifts over 3,000 steps; against the exact window the error is ~1e-12
+        window = np.array(closes[i - length + 1:i + 1])
+        exact_mid, exact_dev = window.mean(), window.std()
+        assert got == pytest.approx((exact_mid - 2.5 * exact_dev, exact_mid, exact_mid + 2.5 * exact_dev), rel=1e-12)
+
+
+def test_bollinger_state_not_ready_until_full_window():
+    state = BollingerState(20)
+    state.reset([1.0] * 10, 1.0)
+    assert state.bands(2.0) is None
+    for _ in range(9):
+        state.close_candle(1.0, 1.0)
+    assert state.bands(2.0) == (1.0, 1.0, 1.0)
+
+
+def test_fifty_bots_share_one_stream_per_timeframe():
+    async def scenario():
+        cache, registry = make_cache()
+        keys = [cache.attach("binance", "BTC/USDT", TIMEFRAMES, 20) for _ in range(50)]
+        assert len(set(keys)) == 1
+        await settle()
+
+        # Every cascade level was seeded once, for all 50 bots
+        assert cache.is_ready(keys[0], TIMEFRAMES)
+        assert FakeKlineExchange.rest_calls == Counter({("BTC/USDT", tf): 1 for tf in TIMEFRAMES})
+        assert registry.upstream_count == len(TIMEFRAMES)
+        for tf in TIMEFRAMES:
+            bb = cache.bollinger("binance", "BTC/USDT", tf, 20, 2.0)
+            assert (bb["lower"], bb["middle"], bb["upper"]) == pytest.approx(expected_bb(tf), rel=1e-12)
+
+        # Live ticks and candle rolls keep every level equal to a fresh REST + pandas computation
+        rng = np.random.default_rng(1)
+        for step in range(120):
+            for tf in ("1m", "5m", "1h"):
+                FakeKlineExchange.tick("BTC/USDT", tf, 60000 + rng.standard_normal() * 80, new_candle=step % 4 == 0)
+            await settle()
+            for tf in ("1m", "5m", "1h"):
+                bb = cache.bollinger("binance", "BTC/USDT", tf, 20, 2.0)
+                assert (bb["lower"], bb["middle"], bb["upper"]) == pytest.approx(expected_bb(tf), rel=1e-12)
+                assert bb["close"] == FakeKlineExchange.books[("BTC/USDT", tf)][-1][4]
+        assert sum(FakeKlineExchange.rest_calls.values()) == len(TIMEFRAMES)
+
+        for key in keys[:-1]:
+            cache.detach(key)
+        assert cache.stream_count == len(TIMEFRAMES)
+        cache.detach(keys[-1])
+        await settle()
+        assert cache.stream_count == 0 and registry.upstream_count == 0
+        await cache.close()
+
+    asyncio.run(scenario())
+
+
+def test_longer_bb_length_and_missed_candles_reseed():
+    async def scenario():
+        cache, _ = make_cache()
+        cache.attach("binance", "BTC/USDT", ["1m"], 20)
+        await settle()
+
+        # A bot with a longer BB on the same symbol: history is re-fetched once
+        key = cache.attach("binance", "BTC/USDT", ["1m"], 50)
+        await settle()
+        assert FakeKlineExchange.rest_calls[("BTC/USDT", "1m")] == 2
+        bb = cache.bollinger("binance", "BTC/USDT", "1m", 50, 2.0)
+        assert (bb["lower"], bb["middle"], bb["upper"]) == pytest.approx(expected_bb("1m", 50), rel=1e-12)
+
+        # Stream missed two candles -> reseed instead of stitching over the gap
+        FakeKlineExchange.tick("BTC/USDT", "1m", 60100.0, new_candle=True, skip=2)
+        FakeKlineExchange.tick("BTC/USDT", "1m", 60200.0, new_candle=True)
+        await settle()
+        assert FakeKlineExchange.rest_calls[("BTC/USDT", "1m")] == 3
+        for length in (20, 50):
+            bb = cache.bollinger("binance", "BTC/USDT", "1m", length, 2.0)
+            assert (bb["lower"], bb["middle"], bb["upper"]) == pytest.approx(expected_bb("1m", length), rel=1e-12)
+
+        assert cache.bollinger("binance", "ETH/USDT", "1m", 20, 2.0) is None
+        await cache.close()
+
+    asyncio.run(scenario())
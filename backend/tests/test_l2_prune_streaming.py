@@ -0,0 +1,156 @@
+import glob
+import json
+import multiprocessing
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.orderbook_snapshot import OrderBookSnapshot
+from app.services import dataset_archiver
+from app.services.dataset_archiver import DatasetArchiver
+
+N_ROWS = int(os.environ.get("L2_PRUNE_TEST_ROWS", 1_000_000))
+RSS_BUDGET_MB = float(os.environ.get("L2_PRUNE_RSS_BUDGET_MB", 150))
+THRESHOLD = datetime(2026, 1, 2)
+
+
+def populate(db_path, n_rows, n_fresh=1000):
+    engine = create_engine(f"sqlite:///{db_path}")
+    OrderBookSnapshot.__table__.create(engine)
+    engine.dispose()
+
+    book = json.dumps([[60000.0 + i, 1.5] for i in range(5)])
+    start = THRESHOLD - timedelta(days=1)
+    conn = sqlite3.connect(db_path)
+    for offset in range(0, n_rows + n_fresh, 100_000):
+        batch = []
+        for i in range(offset, min(offset + 100_000, n_rows + n_fresh)):
+            ts = start + timedelta(milliseconds=i * 50) if i < n_rows else THRESHOLD + timedelta(seconds=i)
+            symbol = "BTC/USDT" if i % 3 else "ETH/USDT"
+            batch.append((i + 1, "binance", symbol, ts.isoformat(sep=" "), book, book, 0.1, 0.5, 60000.25, 0, 0.0, 0.0, None))
+        conn.executemany("INSERT INTO orderbook_snapshots VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)", batch)
+    conn.commit()
+    conn.close()
+
+
+def _prune_in_child(db_path, archive_dir, queue):
+    import psutil
+
+    dataset_archiver.ARCHIVE_DIR = archive_dir
+    DatasetArchiver._notify_admins = staticmethod(lambda message: None)
+    engine = create_engine(f"sqlite:///{db_path}")
+    db = sessionmaker(bind=engine)()
+
+    # Sample RSS while the prune runs: ru_maxrss is a lifetime high-water mark and
+    # also counts whatever the spawned interpreter touched before the call.
+    process = psutil.Process()
+    rss_before = process.memory_info().rss
+    peak = rss_before
+    done = threading.Event()
+
+    def sample():
+        nonlocal peak
+        while not done.wait(0.005):
+            peak = max(peak, process.memory_info().rss)
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    try:
+        result = DatasetArchiver.archive_and_prune(db, THRESHOLD, chunk_size=5000, commit_every=250_000)
+    finally:
+        done.set()
+        sampler.join()
+    peak = max(peak, process.memory_info().rss)
+    db.close()
+    queue.put({"deleted": result["deleted"], "files": result["files"], "peak_delta_mb": (peak - rss_before) / 1024 ** 2})
+
+
+@pytest.fixture
+def archive_dir(tmp_path, monkeypatch):
+    path = tmp_path / "archive"
+    monkeypatch.setattr(dataset_archiver, "ARCHIVE_DIR", str(path))
+    monkeypatch.setattr(DatasetArchiver, "_notify_admins", staticmethod(lambda message: None))
+    return path
+
+
+def test_streaming_prune_archives_and_deletes_everything_expired(tmp_path, archive_dir):
+    db_path = tmp_path / "l2.db"
+    populate(db_path, 12_345)
+    db = sessionmaker(bind=create_engine(f"sqlite:///{db_path}"))()
+
+    result = DatasetArchiver.archive_and_prune(db, THRESHOLD, chunk_size=1000, commit_every=5000)
+
+    assert result["deleted"] == 12_345
+    assert db.query(OrderBookSnapshot).count() == 1000
+    archived = pd.concat(pd.read_parquet(f) for f in glob.glob(str(archive_dir / "*.parquet")))
+    assert sorted(archived["id"]) == list(range(1, 12_346))
+    assert set(archived["symbol"]) == {"BTC/USDT", "ETH/USDT"}
+    assert json.loads(archived["bids"].iloc[0])[0] == [60000.0, 1.5]
+    assert not glob.glob(str(archive_dir / "*.part"))
+    # Readable by the dataset merger's per-symbol glob
+    assert glob.glob(str(archive_dir / "l2_archive_BTC_USDT_*.parquet"))
+
+
+def test_failed_archive_rolls_back_uncommitted_deletes(tmp_path, archive_dir, monkeypatch):
+    db_path = tmp_path / "l2.db"
+    populate(db_path, 3000, n_fresh=0)
+    db = sessionmaker(bind=create_engine(f"sqlite:///{db_path}"))()
+
+    calls = {"n": 0}
+    write_chunk = DatasetArchiver._write_chunk
+
+    def flaky_write(writers, rows, file_tag):
+        calls["n"] += 1
+        if calls["n"] == 3:
+            raise IOError("disk full")
+        write_chunk(writers, rows, file_tag)
+
+    monkeypatch.setattr(DatasetArchiver, "_write_chunk", staticmethod(flaky_write))
+    with pytest.raises(IOError):
+        DatasetArchiver.archive_and_prune(db, THRESHOLD, chunk_size=500, commit_every=1000)
+
+    # First segment (1000 rows) was finalized + committed; the rest is still in the DB
+    assert db.query(OrderBookSnapshot).count() == 2000
+    archived = pd.concat(pd.read_parquet(f) for f in glob.glob(str(archive_dir / "*.parquet")))
+    assert len(archived) == 1000
+    assert not glob.glob(str(archive_dir / "*.part"))
+
+
+def test_size_budget_is_enforced_per_page(tmp_path, archive_dir, monkeypatch):
+    db_path = tmp_path / "l2.db"
+    populate(db_path, 20_000, n_fresh=0)
+    db = sessionmaker(bind=create_engine(f"sqlite:///{db_path}"))()
+
+    archive_dir.mkdir()
+    old = archive_dir / "l2_archive_OLD_20200101.parquet"
+    old.write_bytes(b"x" * 50_000)
+    os.utime(old, (0, 0))
+    # Budget fits the old file alone; it has to go once this run's pages pile up
+    monkeypatch.setattr(dataset_archiver, "MAX_ARCHIVE_SIZE_BYTES", 60_000)
+
+    result = DatasetArchiver.archive_and_prune(db, THRESHOLD, chunk_size=1000, commit_every=50_000)
+
+    assert result["deleted"] == 20_000
+    assert not old.exists()
+    assert len(result["files"]) == 2  # the run's own files are kept
+
+
+def test_peak_rss_stays_within_budget_for_1m_rows(tmp_path):
+    db_path = tmp_path / "l2_big.db"
+    populate(db_path, N_ROWS)
+
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    child = ctx.Process(target=_prune_in_child, args=(str(db_path), str(tmp_path / "archive"), queue))
+    child.start()
+    stats = queue.get(timeout=600)
+    child.join()
+
+    assert stats["deleted"] == N_ROWS
+    assert stats["peak_delta_mb"] < RSS_BUDGET_MB, stats
@@ -0,0 +1,166 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.services import god_mode_liquidation_service as god_mode_module
+from app.services.god_mode_liquidation_service import GodModeService
+from app.services.liquidation_window import RollingLiquidationWindow
+
+
+class ListLiquidationGauges:
+    """The list-based rolling history GodModeService used before the bucket ring."""
+
+    def __init__(self):
+        self.history = []
+        self.whale_feed = []
+
+    def add(self, now, ex_id, liq):
+        price = float(liq["price"])
+        usd_value = price * float(liq["amount"])
+        is_smart = usd_value > 50000
+        self.history.append({"time": now, "value": usd_value, "is_smart": is_smart})
+        if is_smart and usd_value > 100000:
+            self.whale_feed.insert(0, {"value": round(usd_value), "exchange": ex_id, "timestamp": now * 1000})
+            if len(self.whale_feed) > 20:
+                self.whale_feed.pop()
+
+    def gauges(self, now):
+        self.history = [x for x in self.history if now - x["time"] < 300]
+        pain_value = sum(x["value"] for x in self.history)
+        recent_60s = [x for x in self.history if now - x["time"] < 60]
+        smart_sum = sum(x["value"] for x in recent_60s if x["is_smart"])
+        dumb_sum = sum(x["value"] for x in recent_60s if not x["is_smart"])
+        return pain_value, smart_sum, dumb_sum
+
+
+def liquidation_stream(per_minute=20_000, minutes=8, seed=4):
+    """(time, exchange, liquidation) at `per_minute`, with bursts and whale-sized events."""
+    rng = np.random.default_rng(seed)
+    n = per_minute * minutes
+    start = 1_700_000_000.0
+    times = start + np.sort(rng.uniform(0, minutes * 60, n))
+    values = rng.lognormal(mean=8.0, sigma=1.6, size=n)
+    prices = 60_000 + np.cumsum(rng.normal(0, 4, n))
+    events = []
+    for t, v, p in zip(times, values, prices):
+        ex_id = "binance" if rng.random() < 0.6 else "bybit"
+        side = "sell" if rng.random() < 0.55 else "buy"
+        events.append((float(t), ex_id, {"price": float(p), "amount": float(v / p), "side": side}))
+    return events
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def time(self):
+        return self.now
+
+
+def test_replay_matches_list_based_gauges(monkeypatch):
+    events = liquidation_stream(per_minute=2_000, minutes=8)
+    clock = FakeClock()
+    monkeypatch.setattr(god_mode_module, "time", clock)
+    service = GodModeService()
+    reference = ListLiquidationGauges()
+
+    async def replay():
+        next_tick = int(events[0][0]) + 1
+        for t, ex_id, liq in events:
+            while next_tick <= t:
+                # The heuristics loop at a whole second, and half a second later
+                for now in (next_tick, next_tick + 0.5):
+                    if now > t:
+                        break
+                    pain, smart, dumb = reference.gauges(now)
+                    pain_value = service._update_liquidation_gauges(now)
+                    if now == next_tick:
+                        assert pain_value == pytest.approx(pain, rel=1e-9)
+                        total = smart + dumb
+                        expected_smart = round(smart / total * 100) if total else 50
+                        assert service.state["smart_money"] == expected_smart
+                        assert service.state["dumb_money"] == 100 - expected_smart
+                        assert service.state["pain_threshold"]["value"] == round(pain)
+                    else:
+                        # Mid-second: at most the oldest second's worth of extra value
+                        assert pain <= pain_value + 1e-6
+                next_tick += 1
+            clock.now = t
+            await service._process_liquidation(ex_id, "BTC/USDT", liq)
+            reference.add(t, ex_id, liq)
+
+    asyncio.run(replay())
+    feed = service.state["whale_feed"]
+    assert len(feed) == 20
+    assert [(w["value"], w["exchange"], w["timestamp"]) for w in feed] == \
+        [(w["value"], w["exchange"], w["timestamp"]) for w in reference.whale_feed]
+
+
+def test_window_splits_by_exchange_side_and_price_band():
+    events = liquidation_stream(per_minute=600, minutes=3, seed=9)
+    window = RollingLiquidationWindow(horizon_seconds=300, band_width=50.0)
+    for t, ex_id, liq in events:
+        window.add(t, ex_id, liq["side"], liq["price"] * liq["amount"], liq["price"])
+
+    now = float(int(events[-1][0]) + 1)
+    recent = [(ex_id, liq, liq["price"] * liq["amount"]) for t, ex_id, liq in events if now - t < 120]
+    for ex_id in ("binance", "bybit", None):
+        for side in ("buy", "sell", None):
+            rows = [v for e, liq, v in recent if ex_id in (None, e) and side in (None, liq["side"])]
+            value, count = window.total(now, 120, exchange=ex_id, side=side)
+            assert value == pytest.approx(sum(rows), rel=1e-12) and count == len(rows)
+            smart, dumb = window.smart_dumb(now, 120, exchange=ex_id, side=side)
+            assert smart == pytest.approx(sum(v for v in rows if v > 50_000), rel=1e-12)
+            assert dumb == pytest.approx(sum(v for v in rows if v <= 50_000), rel=1e-12)
+
+    bands = window.by_price_band(now, 120)
+    expected = {}
+    for _, liq, v in recent:
+        band = (liq["price"] // 50.0) * 50.0
+        expected[band] = expected.get(band, 0.0) + v
+    assert bands.keys() == expected.keys()
+    for band, value in expected.items():
+        assert bands[band] == pytest.approx(value, rel=1e-12)
+
+    assert window.total(now, 60, exchange="okx") == (0.0, 0)
+    window.add(now, "okx", "buy", 1_000.0, 60_000.0)  # a new exchange gets its own column
+    assert window.total(now, 60, exchange="okx") == (1_000.0, 1)
+    # Buckets older than the horizon are never counted, even after the ring wraps
+    assert window.total(now + 400, 300) == (0.0, 0)
+
+
+def test_magnet_zones_follow_the_densest_price_bands():
+    service = GodModeService()
+    service._update_magnet_zones(1_000.0, 60_000.0)
+    assert [z["price"] for z in service.state["magnet_zones"]] == [61_200.0, 58_200.0]  # no liquidations yet
+
+    window = service._liq_window
+    for t, price, value in ((990.2, 60_010.0, 40_000.0), (995.5, 60_020.0, 30_000.0),
+                            (996.0, 59_500.0, 35_000.0), (999.1, 61_000.0, 10_000.0)):
+        window.add(t, "binance", "sell", value, price)
+    assert window.band_width == pytest.approx(60.01)
+
+    service._update_magnet_zones(1_000.0, 60_000.0)
+    half = window.band_width / 2
+    assert service.state["magnet_zones"] == [
+        {"price": round(1_000 * window.band_width + half, 5), "intensity": 100},  # 70k in 60,010-60,070
+        {"price": round(991 * window.band_width + half, 5), "intensity": 50},
+    ]
+
+
+def test_clear_re_derives_the_band_width():
+    window = RollingLiquidationWindow()
+    window.add(1.0, "binance", "buy", 1_000.0, 60_000.0)
+    assert window.band_width == pytest.approx(60.0)
+    window.clear()
+    assert window.band_width is None
+    window.add(2.0, "binance", "buy", 1_000.0, 2_500.0)  # another symbol after stop/start
+    assert window.band_width == pytest.approx(2.5)
+    [(lower, value)] = window.by_price_band(2.0, 60).items()
+    assert lower == pytest.approx(2_500.0) and value == 1_000.0
+
+    fixed = RollingLiquidationWindow(band_width=50.0)
+    fixed.add(1.0, "binance", "buy", 1_000.0, 60_000.0)
+    fixed.clear()
+    assert fixed.band_width == 50.0
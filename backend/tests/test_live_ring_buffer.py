@@ -0,0 +1,192 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.async_bot_instance import CANDLE_BUFFER_SIZE, AsyncBotInstance
+from app.services.ohlcv_ring_buffer import OHLCVRingBuffer
+from app.strategies.live_indicators import EMAState, MACDState, RSIState, SMAState
+from app.strategies.live_strategies import (
+    BollingerBandsStrategy, MACDStrategy, RSIStrategy, SMACrossoverStrategy,
+)
+from tests.test_kline_cache import pandas_bbands
+
+INTERVAL_MS = 60_000
+STRATEGIES = {
+    "RSI": (RSIStrategy, {"period": 14, "lower": 40, "upper": 60}),
+    "MACD": (MACDStrategy, {}),
+    "SMA": (SMACrossoverStrategy, {"fast_period": 5, "slow_period": 20}),
+    "Bollinger": (BollingerBandsStrategy, {"period": 20, "devfactor": 1.5}),
+}
+
+
+def recorded_klines(n_history=100, n_candles=700, updates=3, seed=5):
+    """
+    A fetch_market_data frame (its last candle still forming) and the Binance kline
+    stream that follows: `updates` ticks per candle, plus a stale packet now and then.
+    """
+    rng = np.random.default_rng(seed)
+    n = n_history + n_candles
+    close = 30_000 * np.exp(np.cumsum(rng.normal(0, 0.004, n)))
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    times = 1_700_000_000_000 + np.arange(n) * INTERVAL_MS
+    history = pd.DataFrame({
+        "timestamp": pd.to_datetime(times[:n_history], unit="ms"), "open": open_[:n_history],
+        "high": np.maximum(open_, close)[:n_history], "low": np.minimum(open_, close)[:n_history],
+        "close": open_[:n_history] + (close - open_)[:n_history] * 0.5, "volume": 1.0,
+    })
+
+    stream = []
+    for i in range(n_history - 1, n):
+        for step in range(1, updates + 1):
+            c = open_[i] + (close[i] - open_[i]) * step / updates
+            stream.append({"t": int(times[i]), "o": str(open_[i]), "h": str(max(open_[i], c)),
+                           "l": str(min(open_[i], c)), "c": str(c), "v": str(float(step))})
+        if i % 50 == 0:
+            stream.append(dict(stream[-updates - 1], c="1.0"))  # late packet of the previous candle
+    return history, stream
+
+
+def legacy_update_dataframe(df, candle_data):
+    """AsyncBotInstance._update_dataframe before the candle ring buffer (Binance klines)."""
+    new_row = {k: float(candle_data[c]) for k, c in
+               [("open", "o"), ("high", "h"), ("low", "l"), ("close", "c"), ("volume", "v")]}
+    new_ts = pd.to_datetime(int(candle_data['t']), unit='ms')
+    last_ts = df['timestamp'].iloc[-1]
+    new_row['timestamp'] = new_ts
+    if new_ts > last_ts:
+        df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
+        if len(df) > 500:
+            df = df.iloc[-500:].reset_index(drop=True)
+    elif new_ts == last_ts:
+        idx = df.index[-1]
+        for col, val in new_row.items():
+            if col in df.columns:
+                df.at[idx, col] = val
+    return df
+
+
+def bare_bot(strategy=None):
+    """AsyncBotInstance without the exchange / DB setup of LiveBotEngine.__init__."""
+    bot = AsyncBotInstance.__new__(AsyncBotInstance)
+    bot.candles = OHLCVRingBuffer(CANDLE_BUFFER_SIZE)
+    bot.strategy_executor = strategy
+    return bot
+
+
+def seeded_ema(series, length, alpha=None):
+    """pandas_ta.ema: SMA of the first `length` values as the seed, then ewm(adjust=False)."""
+    values = series.loc[series.first_valid_index():].copy()
+    values.iloc[length - 1] = values.iloc[:length].mean()
+    values.iloc[:length - 1] = np.nan
+    ema = values.ewm(alpha=alpha, adjust=False).mean() if alpha else values.ewm(span=length, adjust=False).mean()
+    return ema.reindex(series.index)
+
+
+def wilder_rsi(close, length):
+    change = close.diff()
+    gain = seeded_ema(change.clip(lower=0), length, alpha=1 / length)
+    loss = seeded_ema((-change).clip(lower=0), length, alpha=1 / length)
+    return 100 * gain / (gain + loss)
+
+
+def assert_matches(value, expected):
+    if expected is None or (isinstance(expected, float) and math.isnan(expected)):
+        assert value is None or math.isnan(value)
+    else:
+        assert value == pytest.approx(expected, rel=1e-9, abs=1e-9)
+
+
+def test_ring_buffer_frame_matches_legacy_dataframe():
+    history, stream = recorded_klines(n_candles=520)
+    legacy = history.copy()
+    bot = bare_bot()
+    bot.df = history
+    for i, kline in enumerate(stream):
+        legacy = legacy_update_dataframe(legacy, kline)
+        bot._update_candles(kline)
+        if i % 97 == 0 or i == len(stream) - 1:
+            pd.testing.assert_frame_equal(bot.df, legacy[bot.df.columns])
+    # Wrapped past the capacity: head/tail indices moved, oldest candles dropped
+    assert len(bot.candles) == CANDLE_BUFFER_SIZE and bot.candles.head != 0
+    assert bot.candles.last_close == legacy["close"].iloc[-1]
+    assert bot.candles.closed_close == legacy["close"].iloc[-2]
+    assert bot.df is bot.df  # cached until the next update
+
+
+def test_indicator_states_match_pandas():
+    close = pd.Series(np.random.default_rng(8).normal(0, 1, 300).cumsum() + 100)
+    macd_fast, macd_slow = seeded_ema(close, 12), seeded_ema(close, 26)
+    macd = macd_fast - macd_slow
+    references = [
+        (EMAState(10), seeded_ema(close, 10)),
+        (SMAState(20), close.rolling(20).mean()),
+        (RSIState(14), wilder_rsi(close, 14)),
+    ]
+    for state, expected in references:
+        for i, c in enumerate(close):
+            assert_matches(state.peek(c), None if np.isnan(expected[i]) else expected[i])
+            state.push(c)
+            assert_matches(state.value, None if np.isnan(expected[i]) else expected[i])
+
+    state, signal = MACDState(12, 26, 9), seeded_ema(macd, 9)
+    for i, c in enumerate(close):
+        current = state.peek(c)
+        state.push(c)
+        if np.isnan(macd[i]):
+            assert current is None and state.value is None
+            continue
+        assert_matches(current[0], macd[i])
+        assert_matches(current[1], None if np.isnan(signal[i]) else signal[i])
+        assert state.value == current
+
+
+@pytest.mark.parametrize("name", list(STRATEGIES))
+def test_live_signals_replay_recorded_candles(name):
+    strategy_class, config = STRATEGIES[name]
+    history, stream = recorded_klines()
+    bot = bare_bot(strategy_class(config))
+    assert bot.strategy_executor.incremental
+    bot.df = history
+    closes = list(history["close"].iloc[:-1])
+    signals = []
+    for kline in stream:
+        if int(kline["t"]) > bot.candles.last_timestamp:
+            closes.append(bot.candles.last_close)
+        bot._update_candles(kline)
+        signal, reason, price = bot._check_signal()
+        assert price == bot.candles.last_close
+        signals.append(signal)
+
+        # A fresh strategy rebuilt from the buffer's closed candles agrees with the streamed one
+        if len(signals) % 211 == 0:
+            fresh = strategy_class(config)
+            fresh.reset_state(closes)
+            assert fresh.check_signal_live(price) == (signal, reason, price)
+
+        if name == "Bollinger":
+            lower, _, upper = (b.iloc[-1] for b in pandas_bbands(closes[-19:] + [price], 20, 1.5))
+            assert signal == ("BUY" if price < lower else "SELL" if price > upper else "HOLD")
+    assert {"BUY", "SELL"} <= set(signals)
+
+
+@pytest.mark.parametrize("name", ["RSI", "MACD", "SMA"])
+def test_live_signals_match_dataframe_check_signal(name):
+    pytest.importorskip("pandas_ta")
+    strategy_class, config = STRATEGIES[name]
+    history, stream = recorded_klines()
+    legacy, legacy_strategy = history.copy(), strategy_class(config)
+    bot = bare_bot(strategy_class(config))
+    bot.df = history
+    compared = 0
+    for i, kline in enumerate(stream):
+        legacy = legacy_update_dataframe(legacy, kline)
+        bot._update_candles(kline)
+        # Past the warm-up the indicator seeds no longer matter (EMA / RMA weights decay)
+        if i >= 1_200:
+            signal, _, price = bot._check_signal()
+            legacy_signal, _, legacy_price = legacy_strategy.check_signal(legacy)
+            assert (signal, price) == (legacy_signal, legacy_price)
+            compared += 1
+    assert compared > 0
@@ -0,0 +1,153 @@
+import asyncio
+
+import numpy as np
+from ccxt.base.errors import NotSupported
+
+from app.services import market_ticker_table as ticker_module
+from app.services.market_ticker_table import COLUMNS, MarketTickerService, TickerTable
+
+
+def market_tickers(n_symbols=2_500, seed=5):
+    """A fetch_tickers() style dict: mixed quotes, leveraged tokens, missing volumes, ties."""
+    rng = np.random.default_rng(seed)
+    quotes = ["USDT", "USDT", "USDT", "USDC", "USD", "BTC", "ETH"]
+    tickers = {}
+    for i in range(n_symbols):
+        base = f"C{i}" + ("UP" if i % 41 == 0 else "DOWN" if i % 43 == 0 else "")
+        symbol = f"{base}/{quotes[i % len(quotes)]}"
+        quote_volume = None if i % 17 == 0 else float(round(rng.lognormal(14, 2), -3 if i % 5 else 6))
+        tickers[symbol] = {
+            "symbol": symbol,
+            "last": float(rng.uniform(0.01, 1000)),
+            "percentage": None if i % 23 == 0 else float(rng.normal(0, 5)),
+            "quoteVolume": quote_volume,
+            "baseVolume": float(rng.lognormal(10, 2)),
+            "vwap": float(rng.uniform(0.01, 1000)),
+            "average": None,
+            "bidVolume": float(rng.uniform(0, 10)) if i % 3 else None,
+            "askVolume": float(rng.uniform(0, 10)) if i % 3 else None,
+        }
+    return tickers
+
+
+def legacy_heatmap_top(tickers, k=20):
+    valid_pairs = [
+        ticker for symbol, ticker in tickers.items()
+        if symbol.endswith('/USDT') and 'UP/' not in symbol and 'DOWN/' not in symbol
+    ]
+    valid_pairs.sort(key=lambda x: float(x.get('quoteVolume', 0) or 0), reverse=True)
+    return valid_pairs[:k]
+
+
+def legacy_scanner_top(tickers, k=60):
+    valid_pairs = []
+    for symbol, ticker in tickers.items():
+        is_valid = "/USDT" in symbol or "/USD" in symbol
+        if "UP/" in symbol or "DOWN/" in symbol:
+            is_valid = False
+        if is_valid:
+            valid_pairs.append(ticker)
+    valid_pairs.sort(key=lambda x: float(x.get('quoteVolume') or x.get('baseVolume') or 0), reverse=True)
+    return valid_pairs[:k]
+
+
+def as_table_rows(tickers):
+    return [{"symbol": t["symbol"], **{f: float(t.get(f) or 0) for f in COLUMNS}} for t in tickers]
+
+
+def test_top_by_volume_matches_sorted_fetch_tickers():
+    tickers = market_tickers()
+    table = TickerTable(capacity=64)  # grows while loading
+    table.update(tickers)
+    assert len(table) == len(tickers)
+    assert table.top_by_volume(20, "usdt") == as_table_rows(legacy_heatmap_top(tickers))
+    assert table.top_by_volume(60, "usd", base_volume_fallback=True) == as_table_rows(legacy_scanner_top(tickers))
+
+    # Partial updates (watch_tickers batches) re-rank in place
+    rng = np.random.default_rng(1)
+    for _ in range(50):
+        batch = {}
+        for symbol in rng.choice(list(tickers), size=40, replace=False):
+            tickers[symbol] = dict(tickers[symbol], quoteVolume=float(rng.lognormal(15, 2)), percentage=float(rng.normal()))
+            batch[symbol] = tickers[symbol]
+        table.update(batch)
+    table.update({"NEW/USDT": {"symbol": "NEW/USDT", "quoteVolume": 1e15, "last": 1.0}})
+    tickers["NEW/USDT"] = {"symbol": "NEW/USDT", "quoteVolume": 1e15, "last": 1.0}
+    assert table.top_by_volume(20, "usdt") == as_table_rows(legacy_heatmap_top(tickers))
+    assert table.top_by_volume(60, "usd", base_volume_fallback=True) == as_table_rows(legacy_scanner_top(tickers))
+    assert table.get("NEW/USDT")["quoteVolume"] == 1e15 and table.get("MISSING/USDT") is None
+
+
+class FakeTickerExchange:
+    """fetch_tickers() = full snapshot; watch_tickers() = partial batches from a replay."""
+
+    instances = []
+
+    def __init__(self, snapshot, batches, has_watch=True, watch_error=None):
+        self.snapshot, self.batches = snapshot, list(batches)
+        self.has = {"watchTickers": has_watch}
+        self.watch_error = watch_error
+        self.rest_calls = self.watch_calls = 0
+        self.closed = False
+
+    async def fetch_tickers(self):
+        self.rest_calls += 1
+        await asyncio.sleep(0)
+        return dict(self.snapshot)
+
+    async def watch_tickers(self):
+        self.watch_calls += 1
+        await asyncio.sleep(0)
+        if self.watch_error:
+            raise self.watch_error
+        if not self.batches:
+            await asyncio.sleep(3600)
+        return self.batches.pop(0)
+
+    async def close(self):
+        self.closed = True
+
+
+def test_service_shares_one_stream_per_exchange(monkeypatch):
+    snapshot = market_tickers(n_symbols=300)
+    rng = np.random.default_rng(2)
+    batches, merged = [], dict(snapshot)
+    for _ in range(30):
+        batch = {s: dict(merged[s], quoteVolume=float(rng.lognormal(16, 1))) for s in rng.choice(list(merged), 10, replace=False)}
+        merged.update(batch)
+        batches.append(batch)
+
+    exchanges = {
+        "binance": FakeTickerExchange(snapshot, batches),
+        "kraken": FakeTickerExchange(snapshot, [], has_watch=False),
+        "okx": FakeTickerExchange(snapshot, [], watch_error=NotSupported("watchTickers() requires symbols")),
+    }
+    monkeypatch.setattr(ticker_module, "ccxtpro", type("ccxtpro", (), {
+        name: staticmethod(lambda params, e=exchange: e) for name, exchange in exchanges.items()
+    }))
+    monkeypatch.setattr(ticker_module, "REST_REFRESH_SECONDS", 0.001)
+    service = MarketTickerService()
+
+    async def scenario():
+        # 50 concurrent requests: one stream, one REST snapshot
+        tables = await asyncio.gather(*[service.get_table("binance") for _ in range(50)])
+        assert all(t is tables[0] for t in tables)
+        for _ in range(200):
+            await asyncio.sleep(0)
+        top = tables[0].top_by_volume(20, "usdt")
+        kraken = await service.get_table("kraken")
+        okx = await service.get_table("okx")
+        for _ in range(100):
+            await asyncio.sleep(0.001)
+        await service.stop()
+        return top, kraken, okx
+
+    top, kraken, okx = asyncio.run(scenario())
+    assert exchanges["binance"].rest_calls == 1
+    assert exchanges["binance"].watch_calls == len(batches) + 1
+    assert top == as_table_rows(legacy_heatmap_top(merged))
+    # No watchTickers / market-wide watch not supported: polls fetch_tickers()
+    assert exchanges["kraken"].watch_calls == 0 and exchanges["kraken"].rest_calls > 1
+    assert exchanges["okx"].watch_calls == 1 and exchanges["okx"].rest_calls > 1
+    assert kraken.top_by_volume(5, "usdt") == as_table_rows(legacy_heatmap_top(snapshot, 5))
+    assert all(e.closed for e in exchanges.values())
@@ -0,0 +1,177 @@
+import json
+import os
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import models
+from app.services import model_catalog
+
+SYMBOLS = ["BTC/USDT", "BTC-USDT", "ETH/USDT", "btcusdt", None]
+
+
+def legacy_advanced_sl_tp(models_list, symbol=None):
+    """The per-request metadata.json scan the listing endpoint used to do."""
+    filtered = []
+    for model in models_list:
+        if model.active_version_id:
+            version = next((v for v in model.versions if v.id == model.active_version_id), None)
+            if version and version.metadata_path and os.path.exists(version.metadata_path):
+                try:
+                    with open(version.metadata_path, 'r') as f:
+                        meta = json.load(f)
+                    target_col = meta.get('target_column', '')
+                    is_sl_tp = False
+                    if isinstance(target_col, list):
+                        is_sl_tp = any('SL' in t or 'TP' in t for t in target_col)
+                    elif isinstance(target_col, str):
+                        is_sl_tp = 'SL' in target_col or 'TP' in target_col
+                    if symbol:
+                        meta_symbol = meta.get('symbol') or meta.get('config', {}).get('symbol')
+                        if meta_symbol:
+                            if meta_symbol.replace("/", "").replace("-", "").lower() != symbol.replace("/", "").replace("-", "").lower():
+                                continue
+                    if is_sl_tp or meta.get('training_mode') == 'advanced_setup_sl_tp' or meta.get('setup_type') == 'advanced_sl_tp' or meta.get('prediction_target') == 'advanced_setup':
+                        filtered.append(model)
+                except Exception:
+                    pass
+    return filtered
+
+
+def make_metadata(i):
+    kind = i % 8
+    meta = {"features": [f"f{i}", "Close"], "timeframe": "1h"}
+    if kind == 0:
+        meta["target_column"] = ["SL_distance", "TP_distance"]
+    elif kind == 1:
+        meta["target_column"] = "TP_hit"
+    elif kind == 2:
+        meta["training_mode"] = "advanced_setup_sl_tp"
+    elif kind == 3:
+        meta["setup_type"] = "advanced_sl_tp"
+    elif kind == 4:
+        meta["prediction_target"] = "advanced_setup"
+    elif kind == 5:
+        meta["target_column"] = "direction"
+        meta["prediction_target"] = "classification"
+    symbol = SYMBOLS[i % len(SYMBOLS)]
+    if symbol and i % 3 == 0:
+        meta["config"] = {"symbol": symbol}
+    elif symbol:
+        meta["symbol"] = symbol
+    return meta
+
+
+def populate(db, root, n_models, user_id=1, prefix="model"):
+    """Models with a mix of SL/TP markers and symbol spellings; some without (or with broken) metadata."""
+    for i in range(n_models):
+        model_id = f"{prefix}_{i:05d}"
+        version_dir = os.path.join(root, model_id)
+        os.makedirs(version_dir, exist_ok=True)
+        metadata_path = os.path.join(version_dir, "metadata.json")
+        if i % 11 == 0:
+            metadata_path = None
+        else:
+            with open(metadata_path, "w") as f:
+                f.write("{broken" if i % 13 == 0 else json.dumps(make_metadata(i)))
+
+        model = models.CustomMLModel(id=model_id, name=f"Model {i}", model_type="LightGBM", user_id=user_id)
+        db.add(model)
+        # An older version that does not match, so the *active* one decides
+        db.add(models.ModelVersion(id=f"{model_id}-v0", model_id=model_id, version=0.9,
+                                   file_path=os.path.join(version_dir, "old.pkl"), status=models.ModelStatus.READY))
+        db.add(models.ModelVersion(id=f"{model_id}-v1", model_id=model_id, version=1.0, metadata_path=metadata_path,
+                                   file_path=os.path.join(version_dir, "model.pkl"), status=models.ModelStatus.READY))
+        db.flush()
+        model.active_version_id = f"{model_id}-v1"
+    db.commit()
+
+
+def make_session(db_path):
+    engine = create_engine(f"sqlite:///{db_path}")
+    models.CustomMLModel.metadata.create_all(
+        engine, tables=[models.CustomMLModel.__table__, models.ModelVersion.__table__])
+    return sessionmaker(bind=engine)()
+
+
+@pytest.fixture
+def db(tmp_path):
+    session = make_session(str(tmp_path / "catalog.db"))
+    populate(session, str(tmp_path / "uploads"), 400)
+    populate(session, str(tmp_path / "uploads_other"), 20, user_id=2, prefix="other")
+    yield session
+    session.close()
+
+
+def ids(models_list):
+    return [m.id for m in models_list]
+
+
+def all_models(db, user_id=1):
+    return db.query(models.CustomMLModel).filter(models.CustomMLModel.user_id == user_id).order_by(
+        models.CustomMLModel.created_at.desc()).all()
+
+
+@pytest.mark.parametrize("symbol", [None, "BTC/USDT", "btc-usdt", "ETH/USDT", "SOL/USDT"])
+def test_sql_filter_matches_metadata_scan(db, symbol):
+    expected = ids(legacy_advanced_sl_tp(all_models(db), symbol))
+    assert expected  # the data exercises the filter
+
+    # First listing indexes the not-yet-catalogued versions lazily
+    assert ids(model_catalog.list_user_models(db, 1, mode="advanced_sl_tp", symbol=symbol)) == expected
+    assert ids(model_catalog.list_user_models(db, 1, mode="advanced_sl_tp", symbol=symbol)) == expected
+
+
+def test_listing_after_backfill_does_not_touch_disk(db, monkeypatch):
+    assert model_catalog.backfill_catalog(db) == 840
+    assert model_catalog.backfill_catalog(db) == 0  # already indexed
+    expected = ids(legacy_advanced_sl_tp(all_models(db), "BTC/USDT"))
+
+    def no_disk(*args, **kwargs):
+        raise AssertionError("metadata.json read during listing")
+
+    monkeypatch.setattr(model_catalog, "_read_json", no_disk)
+    listed = model_catalog.list_user_models(db, 1, mode="advanced_sl_tp", symbol="BTC/USDT")
+    assert ids(listed) == expected
+    # Response serialization reads `features` from the catalog as well
+    monkeypatch.setattr("builtins.open", no_disk)
+    assert listed[0].versions[-1].features == listed[0].versions[-1].catalog_metadata["features"]
+
+    # Without a mode every model is listed, scoped to the user
+    assert len(model_catalog.list_user_models(db, 1)) == 400
+    assert len(model_catalog.list_user_models(db, 2)) == 20
+
+
+def test_version_metadata_reads_disk_once(db, tmp_path):
+    version = db.get(models.ModelVersion, "model_00001-v1")
+    meta = model_catalog.version_metadata(db, version)
+    assert meta == make_metadata(1)
+    assert version.meta_symbol == model_catalog.normalize_symbol(SYMBOLS[1])
+    assert version.meta_target_is_sl_tp is True
+
+    os.remove(version.metadata_path)
+    db.expire_all()
+    version = db.get(models.ModelVersion, "model_00001-v1")
+    assert model_catalog.version_metadata(db, version) == meta
+
+
+def test_metadata_lookup_order(tmp_path):
+    model_path = str(tmp_path / "job_1_model.pkl")
+    version = models.ModelVersion(id="v", model_id="m", version=1.0, file_path=model_path)
+    assert model_catalog.read_metadata(version) is None
+
+    with open(tmp_path / "job_1_model.json", "w") as f:
+        json.dump({"symbol": "legacy"}, f)
+    assert model_catalog.read_metadata(version)["symbol"] == "legacy"
+
+    with open(tmp_path / "metadata.json", "w") as f:
+        json.dump({"symbol": "dir"}, f)
+    assert model_catalog.read_metadata(version)["symbol"] == "dir"
+
+    version.metadata_path = str(tmp_path / "explicit.json")
+    with open(version.metadata_path, "w") as f:
+        json.dump({"symbol": "BTC-USDT", "setup_type": "advanced_sl_tp"}, f)
+    meta = model_catalog.index_version(version)
+    assert meta["symbol"] == "BTC-USDT"
+    assert version.meta_symbol == "btcusdt" and version.meta_setup_type == "advanced_sl_tp"
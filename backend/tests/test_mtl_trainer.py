@@ -0,0 +1,120 @@
+import re
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+nn = torch.nn
+
+from app.models.classic_dl_models import SimpleLSTM
+from app.services.ml_adversarial import generate_fgsm_attack
+from app.services.mtl.trainer import PyTorchTrainer
+
+
+class FakeJob:
+    def __init__(self, algorithm):
+        self.id = 1
+        self.algorithm = algorithm
+        self.progress = 0.0
+
+
+class BatchRecorder(nn.Module):
+    """Wraps a model and records the row count of every forward pass."""
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+        self.rows = []
+
+    def forward(self, x):
+        self.rows.append(len(x))
+        return self.model(x)
+
+
+def train(model, X_train, y_train, X_test, y_test, config, tmp_path, algorithm="MLP"):
+    logs, metrics = [], []
+    latency, preds = PyTorchTrainer.train_model(
+        model=model, X_train=X_train, y_train=y_train, X_test=X_test, y_test=y_test,
+        config=config, job=FakeJob(algorithm), add_log=logs.append,
+        process_metrics=lambda m, is_class: metrics.append(m),
+        calculate_classification_metrics=lambda y, p: float(np.mean(np.ravel(y) == np.ravel(p))),
+        calculate_regression_metrics=lambda y, p: float(np.mean((np.ravel(y) - np.ravel(p)) ** 2)),
+        model_path=str(tmp_path / "model_1.pkl"),
+    )
+    return preds, logs, metrics
+
+
+def test_lstm_trains_in_bounded_batches_on_every_row_by_default(tmp_path):
+    torch.manual_seed(0)
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(6_000, 8)).astype(np.float32)
+    y = (X[:, 0] + 0.5 * X[:, 1] > 0).astype(np.float32)
+
+    model = BatchRecorder(SimpleLSTM(input_size=8, hidden_size=16, num_layers=1))
+    config = {"epochs": 5, "batch_size": 256, "learning_rate": 0.01, "prediction_target": "classification",
+              "torch_threads": 2}
+    preds, logs, metrics = train(model, X[:5_000], y[:5_000], X[5_000:], y[5_000:], config, tmp_path, algorithm="LSTM")
+
+    # No forward pass ever saw more than one (eval) batch of rows
+    assert max(model.rows) <= 4 * 256
+    # Early stopping is opt-in: all 5 epochs fit all 5,000 rows, then the 1,000 test rows
+    assert sum(model.rows) == 5 * 5_000 + 1_000
+    assert preds.shape == (1_000, 1)
+    assert metrics[0] > 0.9
+    assert (tmp_path / "model_1.pt").exists()
+    assert torch.get_num_threads() == 2
+    assert not any("holdout" in line.lower() or "early stopping" in line.lower() for line in logs)
+
+
+def test_early_stopping_restores_best_holdout_weights(tmp_path):
+    torch.manual_seed(1)
+    rng = np.random.default_rng(1)
+    X = rng.normal(size=(2_000, 4)).astype(np.float32)
+    y = rng.normal(size=2_000).astype(np.float32)  # pure noise: the holdout loss stops improving
+
+    model = nn.Sequential(nn.Linear(4, 64), nn.ReLU(), nn.Linear(64, 1))
+    config = {"epochs": 200, "batch_size": 64, "learning_rate": 0.01, "prediction_target": "regression",
+              "early_stopping_patience": 2, "early_stopping_fraction": 0.25}
+    _, logs, _ = train(model, X, y, X[:10], y[:10], config, tmp_path)
+
+    stop = [re.search(r"epoch (\d+):.*best ([\d.]+)", line) for line in logs if "Early stopping" in line]
+    assert stop and int(stop[0].group(1)) < 200
+    best = float(stop[0].group(2))
+    with torch.no_grad():
+        holdout = nn.functional.mse_loss(model(torch.from_numpy(X[1_500:])), torch.from_numpy(y[1_500:]).reshape(-1, 1))
+    assert holdout.item() == pytest.approx(best, rel=1e-4)
+
+
+def test_gradient_accumulation_matches_one_large_batch(tmp_path):
+    rng = np.random.default_rng(2)
+    X = rng.normal(size=(128, 5)).astype(np.float32)
+    y = rng.normal(size=128).astype(np.float32)
+    base = nn.Linear(5, 1)
+    weights = []
+    for batch_size, steps in ((128, 1), (32, 4)):
+        model = nn.Linear(5, 1)
+        model.load_state_dict(base.state_dict())
+        config = {"epochs": 1, "batch_size": batch_size, "grad_accumulation_steps": steps,
+                  "prediction_target": "regression", "early_stopping_patience": 0}
+        train(model, X, y, X[:4], y[:4], config, tmp_path)
+        weights.append(torch.cat([p.detach().ravel() for p in model.parameters()]))
+    torch.testing.assert_close(weights[0], weights[1])
+
+
+def test_chunked_fgsm_matches_full_pass_and_keeps_param_grads():
+    torch.manual_seed(3)
+    model = nn.Sequential(nn.Linear(6, 16), nn.Tanh(), nn.Linear(16, 1))
+    criterion = nn.BCEWithLogitsLoss()
+    inputs = torch.randn(1_000, 6)
+    targets = (torch.rand(1_000, 1) > 0.5).float()
+
+    criterion(model(inputs), targets).backward()
+    grads = [p.grad.clone() for p in model.parameters()]
+
+    full = generate_fgsm_attack(model, criterion, inputs, targets, epsilon=0.05, chunk_size=None)
+    chunked = generate_fgsm_attack(model, criterion, inputs, targets, epsilon=0.05, chunk_size=128)
+    torch.testing.assert_close(full, chunked)
+    assert not inputs.requires_grad
+    assert torch.allclose((full - inputs).abs(), torch.full_like(inputs, 0.05), atol=1e-6)
+    for p, g in zip(model.parameters(), grads):
+        torch.testing.assert_close(p.grad, g)
@@ -0,0 +1,116 @@
+import os
+import subprocess
+import sys
+import textwrap
+import time
+
+import numpy as np
+import optuna
+import pandas as pd
+import pytest
+from optuna.trial import TrialState
+
+pytest.importorskip("xgboost")
+
+from app.services.ml.optuna_optimizer import (
+    FINISHED_STATES, JOURNAL_RETENTION_DAYS, load_study_storage, run_optuna_study, study_journal_path,
+)
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def training_frame(n_rows=4_000, seed=0):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.normal(size=(n_rows, 10)), columns=[f"f{i}" for i in range(10)])
+    y = pd.Series((X["f0"] - 0.5 * X["f3"] + rng.normal(scale=0.8, size=n_rows) > 0).astype(int))
+    return X, y
+
+
+def load_trials(study_name, storage_dir):
+    study = optuna.load_study(study_name=study_name, storage=load_study_storage(study_journal_path(study_name, storage_dir)))
+    return study.get_trials(deepcopy=False)
+
+
+def finished(trials):
+    return [t for t in trials if t.state in FINISHED_STATES]
+
+
+def test_killed_study_resumes_and_extends(tmp_path):
+    study_name = "forex_job-7_XGBoost"
+    child = textwrap.dedent(f"""
+        import sys
+        sys.path.insert(0, {BACKEND_DIR!r})
+        sys.path.insert(0, {os.path.dirname(os.path.abspath(__file__))!r})
+        from test_optuna_study_resume import training_frame
+        from app.services.ml.optuna_optimizer import run_optuna_study
+        X, y = training_frame()
+        run_optuna_study(X, y, "XGBoost", n_trials=60, study_name={study_name!r}, storage_dir={str(tmp_path)!r})
+    """)
+    proc = subprocess.Popen([sys.executable, "-c", child], cwd=BACKEND_DIR)
+    journal = study_journal_path(study_name, str(tmp_path))
+    try:
+        deadline = time.time() + 120
+        while time.time() < deadline:
+            if os.path.exists(journal) and len(finished(load_trials(study_name, str(tmp_path)))) >= 4:
+                break
+            time.sleep(0.05)
+    finally:
+        proc.kill()  # the training process dies mid-study
+        proc.wait()
+
+    before = load_trials(study_name, str(tmp_path))
+    done_before = finished(before)
+    interrupted = [t for t in before if t.state == TrialState.RUNNING]
+    assert 4 <= len(done_before) < 60
+
+    X, y = training_frame()
+    best = run_optuna_study(X, y, "XGBoost", n_trials=12, study_name=study_name, storage_dir=str(tmp_path))
+
+    after = load_trials(study_name, str(tmp_path))
+    assert len(finished(after)) == 12  # only the missing trials ran
+    # Finished trials survive the crash untouched
+    for old in done_before:
+        assert after[old.number].state == old.state and after[old.number].params == old.params
+        assert after[old.number].value == old.value
+    # The trial the killed process was running is failed and re-evaluated with the same parameters
+    for old in interrupted:
+        assert after[old.number].state == TrialState.FAIL
+        assert any(t.params == old.params and t.state in FINISHED_STATES for t in after[len(before):])
+    assert set(best) == {"n_estimators", "tree_depth", "learning_rate"}
+
+    # A larger n_trials extends the same study
+    run_optuna_study(X, y, "XGBoost", n_trials=15, study_name=study_name, storage_dir=str(tmp_path))
+    assert len(finished(load_trials(study_name, str(tmp_path)))) == 15
+
+
+def test_median_pruner_stops_weak_boosting_trials(tmp_path):
+    X, y = training_frame()
+    for pruner in ("median", "none"):
+        run_optuna_study(X, y, "XGBoost", n_trials=12, study_name=f"pruner-{pruner}", pruner=pruner, storage_dir=str(tmp_path))
+    pruned = [t for t in load_trials("pruner-median", str(tmp_path)) if t.state == TrialState.PRUNED]
+    assert pruned and all(t.last_step < max(t.params["n_estimators"], 50) for t in pruned)
+    assert all(t.state == TrialState.COMPLETE for t in load_trials("pruner-none", str(tmp_path)))
+
+
+def test_parallel_workers_share_one_study(monkeypatch, tmp_path):
+    # Pretend the box has 4 cores so two worker processes really share the journal
+    monkeypatch.setattr("app.services.ml_walk_forward_cv.available_cores", lambda: 4)
+    X, y = training_frame(n_rows=2_000)
+    run_optuna_study(X, y, "XGBoost", n_trials=10, study_name="parallel", n_workers=2, storage_dir=str(tmp_path))
+    trials = load_trials("parallel", str(tmp_path))
+    assert len(trials) == len(finished(trials)) == 10
+    assert len({t.number for t in trials}) == 10
+
+
+def test_stale_journals_are_deleted_after_the_retention_period(tmp_path):
+    X, y = training_frame(n_rows=1_000)
+    run_optuna_study(X, y, "XGBoost", n_trials=2, study_name="old-job", storage_dir=str(tmp_path))
+    run_optuna_study(X, y, "XGBoost", n_trials=2, study_name="recent-job", storage_dir=str(tmp_path))
+    old = study_journal_path("old-job", str(tmp_path))
+    expired = time.time() - (JOURNAL_RETENTION_DAYS + 1) * 86400
+    os.utime(old, (expired, expired))
+
+    run_optuna_study(X, y, "XGBoost", n_trials=2, study_name="new-job", storage_dir=str(tmp_path))
+    assert not os.path.exists(old)
+    assert os.path.exists(study_journal_path("recent-job", str(tmp_path)))
+    assert len(finished(load_trials("recent-job", str(tmp_path)))) == 2
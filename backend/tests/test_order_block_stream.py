@@ -0,0 +1,206 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.strategies import order_block_bot
+from app.strategies.order_block_bot import (
+    OrderBlockBotTask, OrderBlockDetector, StreamingOrderBlockDetector, _BookSideLevels,
+)
+
+
+def record_book_sequence(n_updates=400, depth=50, seed=11):
+    """
+    Top-`depth` snapshots of a diff-updated book, as watch_order_book hands them out:
+    resized levels, levels inserted / cancelled (activity decaying with distance
+    from the top, like a real book), the ladder shifting, and a bid wall that
+    appears, persists and is pulled.
+    """
+    rng = np.random.default_rng(seed)
+    tick = 0.5
+    mid = 30000.0
+    bids = {mid - tick * (i + 1): float(rng.exponential(1.0)) for i in range(depth + 20)}
+    asks = {mid + tick * (i + 1): float(rng.exponential(1.0)) for i in range(depth + 20)}
+    wall_price = mid - tick * 8
+
+    def near_top(book, sign):
+        ladder = sorted(book, reverse=sign < 0)
+        return ladder[min(int(rng.geometric(0.05)) - 1, len(ladder) - 1)]
+
+    frames = []
+    for step in range(n_updates):
+        for book, sign in ((bids, -1), (asks, 1)):
+            for _ in range(rng.integers(1, 6)):
+                book[near_top(book, sign)] = float(rng.exponential(1.0))
+            if rng.random() < 0.3:  # cancel a level
+                book.pop(near_top(book, sign))
+            if rng.random() < 0.3:  # new level
+                book[mid + sign * tick * int(rng.geometric(0.05))] = float(rng.exponential(1.0))
+            if rng.random() < 0.02:  # rare deep change
+                book[mid + sign * tick * int(rng.integers(1, depth + 20))] = float(rng.exponential(1.0))
+        if step % 50 == 25:  # ladder shift: the best ask is lifted, a new bid joins the top
+            asks.pop(min(asks))
+            bids[max(bids) + tick] = float(rng.exponential(1.0))
+        if 100 <= step < 250:
+            bids[wall_price] = 40.0 + step % 3
+        elif step == 250:
+            bids[wall_price] = 0.4
+        frames.append({
+            "bids": [[p, bids[p]] for p in sorted(bids, reverse=True)[:depth]],
+            "asks": [[p, asks[p]] for p in sorted(asks)[:depth]],
+        })
+    return frames, wall_price
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.parametrize("merge", [False, True])
+def test_replay_matches_snapshot_detector_with_persistence(merge, monkeypatch):
+    if merge:
+        monkeypatch.setattr(_BookSideLevels, "STREAM_DEPTH", 0)
+    frames, wall_price = record_book_sequence()
+    reference = OrderBlockDetector(volume_threshold_multiplier=3.0)
+    clock = FakeClock()
+    streaming = StreamingOrderBlockDetector(volume_threshold_multiplier=3.0, clock=clock)
+
+    runs = {"bids": {}, "asks": {}}
+    changes = []
+    wall_persistence = 0
+    for frame in frames:
+        clock.now += 0.1
+        changed = streaming.update(frame)
+        for side in ("bids", "asks"):
+            expected = reference.detect_blocks(frame, side)
+            blocks = streaming.blocks(side)
+            assert [(b["price"], b["volume"]) for b in blocks] == [(b["price"], b["volume"]) for b in expected]
+            np.testing.assert_array_equal(streaming.block_prices(side), [b["price"] for b in expected])
+
+            # Persistence = consecutive frames the level has been a block
+            previous = runs[side]
+            runs[side] = {b["price"]: previous.get(b["price"], 0) + 1 for b in expected}
+            changes.append(runs[side].keys() != previous.keys())
+            for b in blocks:
+                assert b["persistence"] == runs[side][b["price"]]
+                assert b["age"] == pytest.approx((b["persistence"] - 1) * 0.1)
+                assert b["type"] == side
+        assert changed == any(changes[-2:])
+        wall_persistence = max([wall_persistence] + [b["persistence"] for b in streaming.blocks("bids") if b["price"] == wall_price])
+
+    # The bid wall was tracked through its whole life (steps 100-249), then pulled
+    assert wall_persistence == 150
+    assert wall_price not in streaming.block_prices("bids")
+
+
+@pytest.mark.parametrize("depth", [50, 400])
+def test_merged_sides_track_the_book(depth, monkeypatch):
+    monkeypatch.setattr(_BookSideLevels, "STREAM_DEPTH", 0)
+    frames, _ = record_book_sequence(n_updates=300, depth=depth)
+    reference = OrderBlockDetector(volume_threshold_multiplier=3.0)
+    detector = StreamingOrderBlockDetector()
+    kept = {side: detector._sides[side].levels for side in ("bids", "asks")}
+    changed = []
+    for frame in frames:
+        detector.update(frame)
+        for side in ("bids", "asks"):
+            levels = detector._sides[side]
+            assert levels.levels is kept[side]  # edited in place, never rebuilt
+            assert levels.levels == frame[side]
+            assert levels.total == pytest.approx(sum(v for _, v in frame[side]), rel=1e-12)
+            np.testing.assert_array_equal(levels.prices, [p for p, _ in frame[side]])
+            np.testing.assert_array_equal(levels.block_prices, [b["price"] for b in reference.detect_blocks(frame, side)])
+            changed.append(levels.changed)
+    # Only the levels that changed near the top are touched, not the whole side
+    assert np.mean(changed) < 10
+
+
+def test_shallow_sides_are_scanned_and_switch_to_the_merge():
+    frames, _ = record_book_sequence(n_updates=60, depth=60)
+    reference = OrderBlockDetector(volume_threshold_multiplier=3.0)
+    levels = _BookSideLevels(3.0, descending=True)
+    levels.STREAM_DEPTH = 55
+    for i, frame in enumerate(frames):
+        # Alternate between a scanned (20-level) and a merged (60-level) view of the book;
+        # 50 levels keep a merging side merging (down to STREAM_DEPTH / 2) but are scanned otherwise
+        bids = frame["bids"][:(20, 50, 60, 50)[i // 5 % 4]]
+        merging = bool(levels.levels)
+        levels.update(bids)
+        assert levels.levels == (bids if len(bids) >= (27 if merging else 55) else [])
+        assert levels.changed <= len(bids)
+        assert levels.total == pytest.approx(sum(v for _, v in bids), rel=1e-12)
+        np.testing.assert_array_equal(levels.block_prices, [b["price"] for b in reference.detect_blocks({"bids": bids}, "bids")])
+
+
+def test_levels_with_counts_and_empty_sides():
+    detector = StreamingOrderBlockDetector(volume_threshold_multiplier=2.0)
+    book = {"bids": [[100.0, 1.0, 3], [99.0, 10.0, 1], [98.0, 1.0, 2]], "asks": []}
+    assert detector.update(book)
+    assert [b["price"] for b in detector.blocks("bids")] == [99.0] and detector.blocks("asks") == []
+    assert not detector.update(book)
+    assert detector.blocks("bids")[0]["persistence"] == 2
+
+
+class FakeProExchange:
+    """watch_order_book replays the recorded frames; fetch_* must not be used."""
+
+    has = {"watchOrderBook": True, "watchTicker": True}
+
+    def __init__(self, frames, price):
+        self.frames = iter(frames)
+        self.price = price
+        self.rest_calls = 0
+
+    async def watch_order_book(self, symbol, limit=None):
+        await asyncio.sleep(0)
+        try:
+            return next(self.frames)
+        except StopIteration:
+            await asyncio.sleep(3600)
+
+    async def watch_ticker(self, symbol):
+        await asyncio.sleep(0)
+        return {"last": self.price}
+
+    async def fetch_order_book(self, symbol, limit=None):
+        self.rest_calls += 1
+        raise AssertionError("REST order book poll")
+
+    async def fetch_ticker(self, symbol):
+        self.rest_calls += 1
+        raise AssertionError("REST ticker poll")
+
+    async def close(self):
+        pass
+
+
+def test_bot_trades_from_streamed_book(monkeypatch):
+    frames, wall_price = record_book_sequence()
+    exchange = FakeProExchange(frames, price=wall_price * 1.001)
+    monkeypatch.setattr(order_block_bot.ccxt_pro, "binance", lambda params: exchange, raising=False)
+
+    logs = []
+
+    async def fake_log(self, message, level="info", data=None):
+        logs.append((message, data))
+
+    monkeypatch.setattr(OrderBlockBotTask, "_log", fake_log)
+
+    async def scenario():
+        bot = OrderBlockBotTask(1, {"pair": "BTC/USDT", "exchange": "binance", "trade_amount": 0.01})
+        await bot.start()
+        for _ in range(2000):
+            await asyncio.sleep(0)
+        await bot.stop()
+        return bot
+
+    bot = asyncio.run(scenario())
+    assert exchange.rest_calls == 0
+    assert bot.engine.active_position and bot.engine.active_position["side"] == "long"
+    # Block logs only when the block set changes, not on every one of the 400 updates
+    block_logs = [data for message, data in logs if message.startswith("Detected")]
+    assert 0 < len(block_logs) < len(frames) / 2
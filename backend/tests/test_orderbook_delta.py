@@ -0,0 +1,236 @@
+import asyncio
+import json
+from collections import defaultdict
+
+import numpy as np
+
+from app.helpers.orderbook_math import calculate_dynamic_wall_threshold
+from app.services import market_data_streamer as streamer_module
+from app.services.orderbook_delta import (
+    DELTA, SNAPSHOT, OrderBookDeltaDecoder, OrderBookDeltaEncoder, load_cached_orderbook,
+)
+
+
+def legacy_payload(orderbook):
+    """The full payload MarketDataStreamer used to publish on every update."""
+    bids, bid_total = [], 0
+    for bid in orderbook.get('bids', []):
+        bid_total += float(bid[1])
+        bids.append({"price": float(bid[0]), "size": float(bid[1]), "total": bid_total})
+    asks, ask_total = [], 0
+    for ask in orderbook.get('asks', []):
+        ask_total += float(ask[1])
+        asks.append({"price": float(ask[0]), "size": float(ask[1]), "total": ask_total})
+    threshold = calculate_dynamic_wall_threshold(bids, asks)
+    walls = [{"price": a["price"], "type": "sell", "size": a["size"]} for a in asks if a["size"] >= threshold]
+    walls += [{"price": b["price"], "type": "buy", "size": b["size"]} for b in bids if b["size"] >= threshold]
+    current_price = (asks[0]["price"] + bids[0]["price"]) / 2 if asks and bids else 0
+    return {"type": "orderbook", "bids": bids, "asks": asks, "walls": walls, "currentPrice": current_price}
+
+
+def book_updates(n_updates=300, depth=50, seed=3):
+    """Top-`depth` books of a diff-updated book: resizes, inserts / cancels, a moving mid."""
+    rng = np.random.default_rng(seed)
+    size = lambda: max(round(float(rng.exponential(2.0)), 4), 0.0001)  # ccxt drops empty levels
+    tick, mid = 0.01, 2500.0
+    bids = {round(mid - tick * (i + 1), 2): float(rng.exponential(2.0)) for i in range(depth + 30)}
+    asks = {round(mid + tick * (i + 1), 2): float(rng.exponential(2.0)) for i in range(depth + 30)}
+    books = []
+    for step in range(n_updates):
+        for book, sign in ((bids, -1), (asks, 1)):
+            ladder = sorted(book, reverse=sign < 0)
+            for _ in range(rng.integers(1, 8)):
+                book[ladder[min(int(rng.geometric(0.08)) - 1, len(ladder) - 1)]] = size()
+            if rng.random() < 0.4:
+                book.pop(ladder[min(int(rng.geometric(0.1)) - 1, len(ladder) - 1)])
+            if rng.random() < 0.4:
+                book[round(mid + sign * tick * int(rng.geometric(0.1)), 2)] = size()
+        if step % 40 == 20:  # mid moves: top ask lifted, a new best bid
+            mid = round(mid + tick, 2)
+            asks.pop(min(asks))
+            bids[round(max(bids) + tick, 2)] = 1.5
+        books.append({
+            "bids": [[p, bids[p]] for p in sorted(bids, reverse=True)[:depth]],
+            "asks": [[p, asks[p]] for p in sorted(asks)[:depth]],
+        })
+    return books
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def tick(self, step=0.1):
+        self.now = round(self.now + step, 6)
+        return self.now
+
+
+def encode_all(books, step=0.1):
+    clock = FakeClock()
+    encoder = OrderBookDeltaEncoder(clock=clock)
+    frames = []
+    for book in books:
+        clock.tick(step)
+        frames.append(encoder.encode(book["bids"], book["asks"]).decode())
+    return frames
+
+
+def test_round_trip_matches_full_payload_every_update():
+    books = book_updates()
+    frames = encode_all(books)
+    decoder = OrderBookDeltaDecoder()
+    for book, frame in zip(books, frames):
+        assert decoder.apply(frame) == legacy_payload(book)
+
+    kinds = [json.loads(f)["type"] for f in frames]
+    assert kinds.count(SNAPSHOT) == 30 and kinds.count(DELTA) == 270  # 1s snapshots at 10 Hz
+    snapshot_bytes = np.mean([len(f) for f, k in zip(frames, kinds) if k == SNAPSHOT])
+    delta_bytes = np.mean([len(f) for f, k in zip(frames, kinds) if k == DELTA])
+    assert delta_bytes < snapshot_bytes / 4
+
+
+def test_late_joiner_and_gaps_wait_for_the_next_snapshot():
+    books = book_updates(n_updates=60)
+    frames = encode_all(books)
+
+    late = OrderBookDeltaDecoder()
+    assert [late.apply(f) for f in frames[3:10]] == [None] * 7  # deltas before any snapshot
+    assert late.apply(frames[10]) == legacy_payload(books[10])  # snapshot at 1s
+
+    lossy = OrderBookDeltaDecoder()
+    for i, frame in enumerate(frames[:25]):
+        if i == 14:
+            continue  # dropped message
+        payload = lossy.apply(frame)
+        if 14 < i < 20:
+            assert payload is None and not lossy.synced
+        else:
+            assert payload == legacy_payload(books[i])
+
+    # Non-orderbook messages on the channel pass through
+    assert late.apply(json.dumps({"type": "trade", "currentPrice": 1.0})) == {"type": "trade", "currentPrice": 1.0}
+
+
+def test_client_started_from_a_mid_stream_snapshot_stays_in_sync():
+    books = book_updates(n_updates=40)
+    clock = FakeClock()
+    encoder = OrderBookDeltaEncoder(clock=clock)
+    frames, latest = [], []
+    for book in books:
+        clock.tick(0.1)
+        frames.append(encoder.encode(book["bids"], book["asks"]))
+        latest.append(encoder.snapshot())
+
+    # Subscribed at update 14, read the latest key after update 15 went out
+    decoder = OrderBookDeltaDecoder()
+    assert decoder.apply(latest[15]) == legacy_payload(books[15])
+    assert decoder.apply(frames[14]) is None and decoder.apply(frames[15]) is None and decoder.synced
+    for i in range(16, 40):
+        assert decoder.apply(frames[i]) == legacy_payload(books[i])
+
+
+def test_cached_orderbook_reads_snapshots_and_legacy_payloads():
+    books = book_updates(n_updates=1)
+    snapshot = encode_all(books)[0]
+    assert load_cached_orderbook(snapshot) == books[0]
+    legacy = json.dumps({"bids": [{"price": 1.0, "size": 2.0}], "asks": [{"price": 1.1, "size": 3.0}]})
+    assert load_cached_orderbook(legacy) == {"bids": [[1.0, 2.0]], "asks": [[1.1, 3.0]]}
+    assert load_cached_orderbook(None) is None
+
+
+class FakeRedis:
+    """decode_responses=True client: values come back as str."""
+
+    def __init__(self):
+        self.store = {}
+        self.lists = defaultdict(list)
+        self.published = defaultdict(list)
+        self.round_trips = 0
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def __getattr__(self, name):
+        def queue(*args):
+            self.commands.append((name, args))
+            return self
+        return queue
+
+    async def execute(self):
+        self.redis.round_trips += 1
+        text = lambda v: v.decode() if isinstance(v, bytes) else v
+        for name, args in self.commands:
+            if name == "setex":
+                self.redis.store[args[0]] = text(args[2])
+            elif name == "publish":
+                self.redis.published[args[0]].append(text(args[1]))
+            elif name == "rpush":
+                self.redis.lists[args[0]].extend(text(v) for v in args[1:])
+            elif name == "ltrim":
+                self.redis.lists[args[0]] = self.redis.lists[args[0]][args[1]:]
+        return [True] * len(self.commands)
+
+
+class FakeProExchange:
+    def __init__(self, streamer, stream_key, books=(), trade_batches=()):
+        self.streamer, self.stream_key = streamer, stream_key
+        self.books, self.trade_batches = list(books), list(trade_batches)
+
+    async def watch_order_book(self, symbol, limit=None):
+        await asyncio.sleep(0)
+        book = self.books.pop(0)
+        if not self.books:
+            self.streamer._active_streams.discard(self.stream_key)
+        return book
+
+    async def watch_trades(self, symbol):
+        await asyncio.sleep(0)
+        trades = self.trade_batches.pop(0)
+        if not self.trade_batches:
+            self.streamer._active_streams.discard(self.stream_key)
+        return trades
+
+
+def test_streamer_publishes_frames_in_one_round_trip(monkeypatch):
+    books = book_updates(n_updates=25)
+    redis = FakeRedis()
+    monkeypatch.setattr(streamer_module.redis_manager, "get_redis", lambda: redis)
+    # One watch_order_book update per 0.1s
+    monkeypatch.setattr(streamer_module.OrderBookDeltaEncoder.__init__, "__defaults__", (1.0, FakeClock().tick))
+    streamer = streamer_module.MarketDataStreamer()
+    stream_key = "binance:ETH/USDT"
+    streamer._exchange_instances["binance"] = FakeProExchange(streamer, stream_key, books=books)
+    streamer._active_streams.add(stream_key)
+
+    asyncio.run(streamer._stream_order_book("binance", "ETH/USDT", stream_key))
+
+    published = redis.published["market_depth_stream:binance:ETH/USDT"]
+    assert redis.round_trips == len(books) == len(published)
+    decoder = OrderBookDeltaDecoder()
+    assert [decoder.apply(frame) for frame in published] == [legacy_payload(b) for b in books]
+    # The latest key follows every update, not just the 1s snapshots
+    latest = redis.store["latest_orderbook:binance:ETH/USDT"]
+    assert json.loads(published[-1])["type"] == DELTA
+    assert load_cached_orderbook(latest) == books[-1]
+    assert OrderBookDeltaDecoder().apply(latest) == legacy_payload(books[-1])
+
+    trades = [[{"id": f"{i}-{j}", "price": 2500.0 + j, "amount": 0.1 * (j + 1)} for j in range(3)] for i in range(400)]
+    redis.round_trips = 0
+    streamer._exchange_instances["binance"] = FakeProExchange(streamer, stream_key, trade_batches=trades)
+    streamer._active_streams.add(stream_key)
+    asyncio.run(streamer._stream_trades("binance", "ETH/USDT", stream_key))
+
+    assert redis.round_trips == len(trades)
+    kept = redis.lists["recent_trades:binance:ETH/USDT"]
+    assert len(kept) == 1000 and json.loads(kept[-1]) == trades[-1][-1]
+    assert json.loads(published[-1]) == {"type": "trade", "currentPrice": 2502.0, "recentVolume": 0.1 + 0.2 + 0.30000000000000004}
+    streamer._exchange_instances.clear()
@@ -0,0 +1,236 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import exchange_pool, portfolio_balance_service
+from app.services.portfolio_balance_service import TickerSnapshotCache, aggregate_balances
+
+EXCHANGES = ["binance", "kucoin", "okx", "bybit", "mexc"]
+# 300 distinct assets: USDT and BTC on every key, the rest split across the five keys
+ALTS = [f"C{j:03d}" for j in range(298)]
+ASSETS = ["USDT", "BTC"] + ALTS
+
+
+def holdings(key_index):
+    held = {"USDT": 100.0 * (key_index + 1), "BTC": 0.01 * (key_index + 1)}
+    for j, alt in enumerate(ALTS):
+        if j % len(EXCHANGES) == key_index:
+            held[alt] = 1.0 + j
+    held["DUST"] = 0.0  # zero balances are skipped
+    return held
+
+
+def make_tickers():
+    tickers = {"BTC/USDT": {"last": 60000.0, "open": 59000.0}}
+    for j, alt in enumerate(ALTS):
+        if j % 10:  # every 10th alt has no USDT market -> priced at 0
+            tickers[f"{alt}/USDT"] = {"last": 0.5 + j / 100, "open": 0.4 + j / 100}
+    return tickers
+
+
+class Stats:
+    def __init__(self):
+        self.created = 0
+        self.balance_calls = 0
+        self.closed = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+
+def make_exchange_class(stats, latency=0.05, init_latency=0.05, hang=(), hang_init=()):
+    class FakeExchange:
+        def __init__(self, config):
+            stats.created += 1
+            self.config = config
+            self.key_index = int(config["apiKey"].split("-")[1])
+
+        async def load_markets(self):
+            await asyncio.sleep(3600 if self.key_index in hang_init else init_latency)
+
+        async def fetch_balance(self):
+            stats.balance_calls += 1
+            stats.in_flight += 1
+            stats.max_in_flight = max(stats.max_in_flight, stats.in_flight)
+            try:
+                await asyncio.sleep(3600 if self.key_index in hang else latency)
+            finally:
+                stats.in_flight -= 1
+            return {"total": holdings(self.key_index)}
+
+        async def close(self):
+            stats.closed += 1
+
+    return FakeExchange
+
+
+class FakeTickerExchange:
+    def __init__(self, latency=0.05):
+        self.latency = latency
+        self.calls = 0
+
+    async def fetch_tickers(self):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return make_tickers()
+
+    async def close(self):
+        pass
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def api_keys():
+    return [SimpleNamespace(id=i + 1, exchange=ex.upper() if i == 0 else ex, api_key=f"key-{i}",
+                            secret_key=f"secret-{i}", passphrase=None)
+            for i, ex in enumerate(EXCHANGES)]
+
+
+@pytest.fixture
+def fake_exchanges(monkeypatch):
+    monkeypatch.setattr(exchange_pool, "_pool", {})
+    monkeypatch.setattr(exchange_pool, "_key_locks", {})
+    monkeypatch.setattr(portfolio_balance_service.security, "decrypt_key", lambda value: value)
+
+    def install(**kwargs):
+        stats = Stats()
+        exchange_class = make_exchange_class(stats, **kwargs)
+        monkeypatch.setattr(exchange_pool, "ccxt", SimpleNamespace(**{ex: exchange_class for ex in EXCHANGES}))
+        return stats
+
+    return install
+
+
+def make_snapshot(latency=0.05):
+    exchange = FakeTickerExchange(latency)
+    clock = FakeClock()
+    return TickerSnapshotCache(ttl=5, exchange_factory=lambda ex_id: exchange, clock=clock), exchange, clock
+
+
+def expected_portfolio():
+    tickers = make_tickers()
+    amounts = {}
+    for i in range(len(EXCHANGES)):
+        for symbol, amount in holdings(i).items():
+            if amount > 0:
+                amounts[symbol] = amounts.get(symbol, 0.0) + amount
+    values = {}
+    for symbol, amount in amounts.items():
+        if f"{symbol}/USDT" in tickers:
+            values[symbol] = amount * tickers[f"{symbol}/USDT"]["last"]
+        else:
+            values[symbol] = amount * (1.0 if symbol == "USDT" else 0.0)
+    return amounts, values
+
+
+def test_five_keys_three_hundred_assets(fake_exchanges):
+    stats = fake_exchanges()
+    snapshot, ticker_exchange, _ = make_snapshot()
+
+    async def scenario():
+        t0 = time.perf_counter()
+        result = await aggregate_balances(api_keys(), tickers=snapshot)
+        return result, time.perf_counter() - t0
+
+    result, elapsed = asyncio.run(scenario())
+    amounts, values = expected_portfolio()
+    by_symbol = {a["symbol"]: a for a in result["assets"]}
+
+    assert len(by_symbol) == 300 and set(by_symbol) == set(ASSETS)
+    assert {s: a["amount"] for s, a in by_symbol.items()} == pytest.approx(amounts)
+    assert {s: a["value"] for s, a in by_symbol.items()} == pytest.approx(values)
+    assert result["total_portfolio_value"] == round(sum(values.values()), 2)
+    assert [a["exchange"] for a in by_symbol["USDT"]["allocations"]] == EXCHANGES
+    assert by_symbol["BTC"]["price24h"] == 59000.0 and by_symbol["C000"]["price"] == 0.0
+
+    # 5 x (init + fetch) and one ticker fetch, all overlapped: ~1 round trip, not 5
+    assert ticker_exchange.calls == 1
+    assert stats.max_in_flight == 5
+    assert elapsed < 0.3
+
+
+def test_clients_and_ticker_snapshot_are_reused(fake_exchanges):
+    stats = fake_exchanges()
+    snapshot, ticker_exchange, clock = make_snapshot()
+
+    async def scenario():
+        first = await aggregate_balances(api_keys(), tickers=snapshot)
+        second = await aggregate_balances(api_keys(), tickers=snapshot)
+        assert first == second
+        assert stats.created == 5 and stats.balance_calls == 10
+        assert ticker_exchange.calls == 1  # inside the TTL
+
+        # After the TTL, 20 concurrent requests share a single refresh
+        clock.now += 6
+        await asyncio.gather(*(aggregate_balances(api_keys(), tickers=snapshot) for _ in range(20)))
+        assert ticker_exchange.calls == 2
+        assert stats.created == 5
+
+    asyncio.run(scenario())
+
+
+def test_concurrency_is_bounded(fake_exchanges):
+    stats = fake_exchanges(latency=0.02, init_latency=0.0)
+    snapshot, _, _ = make_snapshot(latency=0.0)
+
+    result = asyncio.run(aggregate_balances(api_keys(), tickers=snapshot, max_concurrency=2))
+    assert stats.max_in_flight == 2
+    assert len(result["assets"]) == 300
+
+
+def test_slow_exchange_times_out_without_blocking_others(fake_exchanges):
+    fake_exchanges(hang={2})
+    snapshot, _, _ = make_snapshot()
+
+    async def scenario():
+        t0 = time.perf_counter()
+        result = await aggregate_balances(api_keys(), tickers=snapshot, timeout=0.3)
+        return result, time.perf_counter() - t0
+
+    result, elapsed = asyncio.run(scenario())
+    by_symbol = {a["symbol"]: a for a in result["assets"]}
+    assert "okx" not in [a["exchange"] for a in by_symbol["USDT"]["allocations"]]
+    assert by_symbol["USDT"]["amount"] == pytest.approx(100 + 200 + 400 + 500)
+    assert 0.3 <= elapsed < 0.6
+
+
+def test_timeout_during_creation_closes_the_half_built_client(fake_exchanges):
+    stats = fake_exchanges(hang_init={1})
+    snapshot, _, _ = make_snapshot()
+
+    result = asyncio.run(aggregate_balances(api_keys(), tickers=snapshot, timeout=0.3))
+
+    assert len(result["assets"]) > 0
+    assert stats.created == 5 and stats.closed == 1
+    assert "key_2_spot" not in exchange_pool._pool and len(exchange_pool._pool) == 4
+
+
+def test_invalidate_and_close_all_go_through_the_key_locks(fake_exchanges):
+    stats = fake_exchanges(init_latency=0.05)
+    snapshot, _, _ = make_snapshot(latency=0.0)
+
+    async def scenario():
+        await aggregate_balances(api_keys(), tickers=snapshot)
+        assert len(exchange_pool._pool) == 5
+
+        # invalidate waits for an in-flight re-creation of the same key
+        lock = exchange_pool._key_locks["key_1_spot"]
+        await lock.acquire()
+        task = asyncio.create_task(exchange_pool.invalidate(1))
+        await asyncio.sleep(0.01)
+        assert "key_1_spot" in exchange_pool._pool
+        lock.release()
+        await task
+        assert "key_1_spot" not in exchange_pool._pool and stats.closed == 1
+
+        await exchange_pool.close_all()
+        assert exchange_pool._pool == {} and stats.closed == 5
+
+    asyncio.run(scenario())
@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.regime_service import RegimeService
+
+HOUR_MS = 3_600_000
+
+
+def generate_regime_switching_ohlcv(n=1200, seed=7):
+    """Synthetic candles whose returns switch between four (drift, vol) regimes."""
+    rng = np.random.default_rng(seed)
+    regimes = [(0.002, 0.004), (0.003, 0.02), (-0.002, 0.005), (-0.003, 0.025)]
+    returns = np.empty(n)
+    i = 0
+    while i < n:
+        mu, sigma = regimes[rng.integers(len(regimes))]
+        length = int(rng.integers(40, 120))
+        returns[i:i + length] = rng.normal(mu, sigma, size=min(length, n - i))
+        i += length
+    closes = 30000 * np.exp(np.cumsum(returns))
+    start = 1_700_000_000_000
+    return [[start + k * HOUR_MS, c, c * 1.001, c * 0.999, c, 10.0] for k, c in enumerate(closes)]
+
+
+class FakeExchange:
+    """Serves a prefix of a candle tape, like an exchange whose clock advances."""
+
+    def __init__(self, ohlcv, visible):
+        self.ohlcv = ohlcv
+        self.visible = visible
+        self.calls = []
+
+    def fetch_ohlcv(self, symbol, timeframe, since=None, limit=None):
+        rows = self.ohlcv[:self.visible]
+        self.calls.append(since)
+        if since is None:
+            return rows[-limit:] if limit else rows
+        rows = [r for r in rows if r[0] >= since]
+        return rows[:limit] if limit else rows
+
+
+def make_service(exchange, tmp_path, **kwargs):
+    return RegimeService(limit=5000, model_dir=str(tmp_path), exchange=exchange, **kwargs)
+
+
+def test_incremental_update_matches_full_forward_pass(tmp_path):
+    tape = generate_regime_switching_ohlcv()
+    exchange = FakeExchange(tape, visible=1000)
+    service = make_service(exchange, tmp_path)
+
+    service.execute()
+    fitted_at = service.state['fitted_at']
+
+    exchange.visible = 1040
+    result = service.execute()
+
+    # No refit, only the new closed bars were filtered
+    assert service.state['fitted_at'] == fitted_at
+    assert service.state['bars_since_refit'] == 40
+    assert exchange.calls[-1] is not None
+
+    # Same model, full-sequence filter over every closed bar gives the same posterior
+    df = service.prepare_features(service.fetch_data())
+    closed = df.iloc[:-1]
+    X = closed[['log_return', 'volatility']].values
+    full_posterior = service.state['model'].predict_proba(X)[-1]
+    np.testing.assert_allclose(np.exp(service.state['log_alpha']), full_posterior, atol=1e-6)
+
+    assert service.state['last_timestamp'] == closed['timestamp'].iloc[-1]
+    assert result['current_regime'] in {'Bull Stable', 'Bull Volatile', 'Bear Stable', 'Bear Volatile'}
+    assert pytest.approx(sum(result['regime_probabilities'].values())) == 1.0
+    assert len(result['history']) == 100
+
+
+def test_state_is_persisted_per_symbol_and_timeframe(tmp_path):
+    tape = generate_regime_switching_ohlcv()
+    exchange = FakeExchange(tape, visible=1000)
+    make_service(exchange, tmp_path).execute()
+
+    restarted = make_service(exchange, tmp_path)
+    exchange.visible = 1010
+    restarted.execute()
+
+    assert (tmp_path / "hmm_BTC_USDT_1h.joblib").exists()
+    assert restarted.state['bars_since_refit'] == 10
+    # Only the incremental fetch ran after the restart
+    assert exchange.calls[-1] is not None
+
+
+def test_scheduled_refit(tmp_path):
+    tape = generate_regime_switching_ohlcv()
+    exchange = FakeExchange(tape, visible=1000)
+    service = make_service(exchange, tmp_path, refit_every_bars=20)
+    service.execute()
+    fitted_at = service.state['fitted_at']
+
+    exchange.visible = 1030
+    service.execute()
+
+    assert service.state['fitted_at'] > fitted_at
+    assert service.state['bars_since_refit'] == 0
+
+
+def test_likelihood_drift_triggers_refit(tmp_path):
+    tape = generate_regime_switching_ohlcv()
+    # Append a volatility regime the model has never seen
+    rng = np.random.default_rng(1)
+    last_ts, last_close = tape[-1][0], tape[-1][4]
+    for k in range(60):
+        last_close *= np.exp(rng.normal(0, 0.15))
+        tape.append([last_ts + (k + 1) * HOUR_MS, last_close, last_close, last_close, last_close, 10.0])
+
+    exchange = FakeExchange(tape, visible=1200)
+    service = make_service(exchange, tmp_path, drift_window=24)
+    service.execute()
+    baseline = service.state['baseline_ll']
+    fitted_at = service.state['fitted_at']
+
+    exchange.visible = len(tape)
+    service.execute()
+
+    assert service.state['fitted_at'] > fitted_at
+    assert service.state['baseline_ll'] != baseline
@@ -0,0 +1,110 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services import report_generator
+from app.services.report_generator import cached_report_path, generate_report
+
+
+def make_returns(seed=0, n=250):
+    rng = np.random.default_rng(seed)
+    return pd.Series(rng.normal(0, 0.01, n), index=pd.date_range("2023-01-01", periods=n))
+
+
+class CountingQuantstats:
+    """Records html renders; writes a small file instead of the full quantstats report."""
+
+    def __init__(self):
+        self.calls = 0
+        self.reports = self
+
+    def html(self, returns, output, title, download_filename):
+        self.calls += 1
+        with open(output, "w") as f:
+            f.write(f"<html><title>{title}</title><body>{len(returns)}</body></html>")
+
+
+class CountingPdf:
+    calls = 0
+
+    def __init__(self, filename):
+        self.filename = filename
+
+    def write_pdf(self, target):
+        CountingPdf.calls += 1
+        with open(self.filename) as src, open(target, "w") as dst:
+            dst.write("%PDF " + src.read())
+
+
+@pytest.fixture
+def report_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(report_generator, "REPORT_DIR", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def fake_renderers(monkeypatch):
+    qs = CountingQuantstats()
+    CountingPdf.calls = 0
+    monkeypatch.setattr(report_generator, "_qs", qs)
+    monkeypatch.setattr(report_generator, "_weasy_html", CountingPdf)
+    return qs
+
+
+def test_repeat_request_is_served_from_disk(report_dir, fake_renderers):
+    returns = make_returns()
+    first = generate_report("task-1", returns.to_json(), "BTC/USDT", "1h", format="html")
+    # Same series, different JSON layout and task id -> same cache entry
+    second = generate_report("task-2", returns.to_json(date_format="iso"), "BTC/USDT", "1h", format="html")
+
+    assert first == second and os.path.exists(first)
+    assert fake_renderers.calls == 1
+    assert os.path.basename(first).startswith("report_BTC_USDT_1h_")
+    assert cached_report_path(returns.to_json(), "BTC/USDT", "1h", "html") == first
+
+
+def test_key_covers_returns_symbol_timeframe_and_format(report_dir, fake_renderers):
+    returns = make_returns()
+    paths = {
+        generate_report("t", returns.to_json(), "BTC/USDT", "1h", format="html"),
+        generate_report("t", returns.to_json(), "ETH/USDT", "1h", format="html"),
+        generate_report("t", returns.to_json(), "BTC/USDT", "4h", format="html"),
+        generate_report("t", make_returns(seed=1).to_json(), "BTC/USDT", "1h", format="html"),
+        generate_report("t", returns.to_json(), "BTC/USDT", "1h", format="pdf"),
+    }
+    assert len(paths) == 5
+    assert fake_renderers.calls == 4  # the PDF reused the cached HTML
+    assert CountingPdf.calls == 1
+
+
+def test_pdf_cache_hit_skips_weasyprint(report_dir, fake_renderers):
+    returns_json = make_returns().to_json()
+    assert cached_report_path(returns_json, "BTC/USDT", "1d", "pdf") is None
+
+    path = generate_report("a", returns_json, "BTC/USDT", "1d", format="pdf")
+    assert generate_report("b", returns_json, "BTC/USDT", "1d", format="pdf") == path
+    assert CountingPdf.calls == 1 and fake_renderers.calls == 1
+    assert open(path).read().startswith("%PDF")
+
+
+def test_failed_render_leaves_no_partial_file(report_dir, monkeypatch):
+    class BrokenQuantstats(CountingQuantstats):
+        def html(self, returns, output, title, download_filename):
+            with open(output, "w") as f:
+                f.write("<html>half")
+            raise RuntimeError("matplotlib crashed")
+
+    monkeypatch.setattr(report_generator, "_qs", BrokenQuantstats())
+    returns_json = make_returns().to_json()
+
+    assert generate_report("t", returns_json, "BTC/USDT", "1h", format="html") is None
+    assert os.listdir(report_dir) == []
+    assert cached_report_path(returns_json, "BTC/USDT", "1h", "html") is None
+
+
+def test_quantstats_html_report_end_to_end(report_dir):
+    pytest.importorskip("quantstats")
+    path = generate_report("t", make_returns(n=120).to_json(), "BTC/USDT", "1d", format="html")
+    assert path and os.path.getsize(path) > 10_000
@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.advanced_ml.data_handler import AdvancedDataHandler
+from app.services.advanced_ml.sequence_windows import (
+    SequenceDataset, float32_memmap, sliding_windows, window_targets,
+)
+
+
+def feature_frame(n_rows=500, n_features=7, seed=2):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.normal(size=(n_rows, n_features)), columns=[f"f{i}" for i in range(n_features)])
+    df["Target"] = (rng.random(n_rows) > 0.5).astype(int)
+    df["Target_Reg"] = rng.normal(size=n_rows)
+    return df
+
+
+def legacy_create_sequences(df, features, sequence_length, target_col):
+    """AdvancedDataHandler.create_sequences before the sliding-window view."""
+    X_data = df[features].values
+    if isinstance(target_col, list):
+        y_data = df[target_col].values if all(col in df.columns for col in target_col) else None
+    else:
+        y_data = df[target_col].values if target_col in df.columns else None
+    X, y = [], []
+    for i in range(len(df) - sequence_length + 1):
+        X.append(X_data[i : i + sequence_length])
+        if y_data is not None:
+            y.append(y_data[i + sequence_length - 1])
+    return np.array(X), np.array(y)
+
+
+@pytest.mark.parametrize("seq_len", [1, 5, 60])
+@pytest.mark.parametrize("target_col", ["Target", ["Target", "Target_Reg"], "Missing"])
+def test_create_sequences_matches_loop(seq_len, target_col):
+    df = feature_frame()
+    features = [f"f{i}" for i in range(7)]
+    X, y = AdvancedDataHandler.create_sequences(df, features, sequence_length=seq_len, target_col=target_col)
+    X_ref, y_ref = legacy_create_sequences(df, features, seq_len, target_col)
+    np.testing.assert_array_equal(X, X_ref)
+    np.testing.assert_array_equal(y, y_ref)
+    assert X.shape == (len(df) - seq_len + 1, seq_len, len(features))
+    # The windows are a view on the feature matrix, not per-window copies
+    assert X.base is not None and not X.flags.writeable
+
+
+def test_short_input_gives_no_windows():
+    X = np.zeros((3, 4))
+    assert sliding_windows(X, 5).shape == (0, 5, 4)
+
+
+def test_forex_wrapper_windows_match_loop():
+    pytest.importorskip("torch")
+    pytest.importorskip("gymnasium")  # ml_architectures also holds the RL extractors
+    from app.services.ml.forex_deep_learning_models import PyTorchModelWrapper
+    from app.services.ml_architectures import SimpleLSTM
+
+    wrapper = PyTorchModelWrapper(SimpleLSTM, seq_len=10)
+    X = np.random.default_rng(0).normal(size=(200, 6)).astype(np.float32)
+    y = np.arange(200, dtype=np.float32)
+    Xs, ys = wrapper._create_sequences(X, y)
+    Xs_ref = np.array([X[i:i + 10] for i in range(len(X) - 10)])
+    ys_ref = np.array([y[i + 10] for i in range(len(X) - 10)])
+    np.testing.assert_array_equal(Xs, Xs_ref)
+    np.testing.assert_array_equal(ys, ys_ref)
+    np.testing.assert_array_equal(wrapper._create_sequences(X), Xs_ref)
+
+
+def test_memmap_dataset_batches_match_materialized_windows(tmp_path):
+    torch = pytest.importorskip("torch")
+    from torch.utils.data import DataLoader
+
+    df = feature_frame(n_rows=2_000)
+    features = [f"f{i}" for i in range(7)]
+    X_ref, y_ref = legacy_create_sequences(df, features, 32, "Target")
+
+    rows = float32_memmap(df[features].values, path=str(tmp_path / "rows.npy"))
+    assert isinstance(rows, np.memmap) and rows.dtype == np.float32
+    dataset = SequenceDataset.from_rows(rows, 32, targets=df["Target"].values.reshape(-1, 1))
+    assert len(dataset) == len(X_ref)
+    assert np.shares_memory(dataset.windows, rows)
+
+    x, y = dataset[17]
+    assert x.dtype == torch.float32 and x.shape == (32, 7)
+    np.testing.assert_array_equal(x.numpy(), X_ref[17].astype(np.float32))
+
+    batches = list(DataLoader(dataset, batch_size=256, shuffle=False))
+    np.testing.assert_array_equal(torch.cat([b[0] for b in batches]).numpy(), X_ref.astype(np.float32))
+    np.testing.assert_array_equal(torch.cat([b[1] for b in batches]).numpy().ravel(), y_ref.astype(np.float32))
+
+    # Targets one step after the window (the forex wrappers' alignment) and a temp-file memmap
+    rows = float32_memmap(df[features].values)
+    ahead = SequenceDataset.from_rows(rows, 32, targets=df["Target"].values, target_offset=1)
+    assert len(ahead) == len(X_ref) - 1
+    assert float(ahead[0][1]) == df["Target"].iloc[32]
+    assert len(SequenceDataset(sliding_windows(rows, 32))[0]) == 1  # (x,) like TensorDataset
+    np.testing.assert_array_equal(window_targets(np.arange(10), 3, offset=1), np.arange(3, 10))
@@ -0,0 +1,208 @@
+import asyncio
+import itertools
+
+import ccxt.async_support as ccxt
+import pytest
+
+from app.services.sor_session_pool import SorSessionPool, credentials_hash
+
+
+class MockExchange:
+    """Local stand-in for a ccxt async exchange with simulated connection costs."""
+
+    instances = []
+
+    def __init__(self, exchange_id, api_key, secret, passphrase=None, market_latency=0.0,
+                 handshake_latency=0.0, order_latency=0.0):
+        self.id = exchange_id
+        self.api_key = api_key
+        self.market_latency = market_latency
+        self.handshake_latency = handshake_latency
+        self.order_latency = order_latency
+        self.markets = None
+        self.load_markets_calls = 0
+        self.fetch_time_calls = 0
+        self.connected = False
+        self.closed = False
+        self.fail_next = None
+        self.healthy = True
+        self._ids = itertools.count(1)
+        MockExchange.instances.append(self)
+
+    async def _request(self, latency):
+        if not self.connected:
+            await asyncio.sleep(self.handshake_latency)  # TLS setup on first request
+            self.connected = True
+        await asyncio.sleep(latency)
+
+    async def load_markets(self, reload=False):
+        if self.markets is None or reload:
+            self.load_markets_calls += 1
+            await self._request(self.market_latency)
+            self.markets = {"BTC/USDT": {"symbol": "BTC/USDT"}}
+        return self.markets
+
+    async def fetch_time(self):
+        self.fetch_time_calls += 1
+        if not self.healthy:
+            raise ccxt.NetworkError("connection reset")
+        return 0
+
+    async def create_market_order(self, symbol, side, amount):
+        await self.load_markets()
+        if self.fail_next:
+            error, self.fail_next = self.fail_next, None
+            raise error
+        await self._request(self.order_latency)
+        return {"id": f"{self.id}-{next(self._ids)}", "symbol": symbol, "side": side, "amount": amount}
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(autouse=True)
+def reset_instances():
+    MockExchange.instances = []
+
+
+def make_pool(**kwargs):
+    return SorSessionPool(exchange_factory=MockExchange, **kwargs)
+
+
+def test_child_orders_reuse_one_loop_and_session():
+    pool = make_pool()
+    loops = set()
+
+    async def place(n):
+        loops.add(asyncio.get_running_loop())
+        async with pool.session("binance", "key", "secret") as exchange:
+            return await exchange.create_market_order("BTC/USDT", "buy", 0.01 * n)
+
+    orders = [pool.run(place(n)) for n in range(20)]
+    pool.shutdown()
+
+    assert [o["id"] for o in orders] == [f"binance-{n}" for n in range(1, 21)]
+    assert len(loops) == 1
+    assert len(MockExchange.instances) == 1
+    assert MockExchange.instances[0].load_markets_calls == 1
+    assert MockExchange.instances[0].closed
+    assert pool.stats["created"] == 1 and pool.stats["hits"] == 19
+
+
+def test_sessions_are_keyed_by_exchange_and_credentials():
+    pool = make_pool()
+
+    async def scenario():
+        a = await pool.acquire("binance", "key1", "secret1")
+        b = await pool.acquire("binance", "key2", "secret2")
+        c = await pool.acquire("kucoin", "key1", "secret1")
+        d = await pool.acquire("Binance", "key1", "secret1")
+        return a, b, c, d
+
+    a, b, c, d = pool.run(scenario())
+    assert len({id(a), id(b), id(c)}) == 3
+    assert a is d
+    assert credentials_hash("key1", "secret1") != credentials_hash("key1", "secret1", "pass")
+    assert "secret1" not in repr(list(pool._sessions))
+    pool.shutdown()
+
+
+def test_max_age_idle_and_lru_eviction():
+    clock = FakeClock()
+    pool = make_pool(max_sessions=2, max_age_seconds=100, idle_seconds=30,
+                     health_check_interval=1e9, clock=clock)
+
+    async def scenario():
+        first = await pool.acquire("binance", "k", "s")
+        clock.now = 20
+        assert await pool.acquire("binance", "k", "s") is first
+        clock.now = 60  # idle for 40s > 30s
+        second = await pool.acquire("binance", "k", "s")
+        assert second is not first and first.closed
+
+        for t in range(61, 120, 10):  # keep it busy until it hits max age
+            clock.now = t
+            await pool.acquire("binance", "k", "s")
+        clock.now = 161
+        third = await pool.acquire("binance", "k", "s")
+        assert third is not second and second.closed
+
+        # LRU: a third distinct key pushes out the least recently used one
+        other = await pool.acquire("okx", "k", "s")
+        clock.now = 162
+        await pool.acquire("binance", "k", "s")
+        await pool.acquire("bybit", "k", "s")
+        assert other.closed and not third.closed
+        assert len(pool) == 2
+
+    pool.run(scenario())
+    pool.shutdown()
+
+
+def test_failed_health_check_rebuilds_session():
+    clock = FakeClock()
+    pool = make_pool(health_check_interval=10, clock=clock)
+
+    async def scenario():
+        first = await pool.acquire("binance", "k", "s")
+        clock.now = 5
+        await pool.acquire("binance", "k", "s")
+        assert first.fetch_time_calls == 0  # probed only after the interval
+
+        clock.now = 16
+        assert await pool.acquire("binance", "k", "s") is first
+        assert first.fetch_time_calls == 1
+
+        first.healthy = False
+        clock.now = 27
+        replacement = await pool.acquire("binance", "k", "s")
+        assert replacement is not first and first.closed
+
+    pool.run(scenario())
+    assert pool.stats["health_failures"] == 1
+    pool.shutdown()
+
+
+@pytest.mark.parametrize("error, evicted", [
+    (ccxt.NetworkError("timeout"), True),
+    (ccxt.AuthenticationError("invalid key"), True),
+    (ccxt.InsufficientFunds("balance"), False),
+])
+def test_order_errors_evict_only_untrusted_sessions(error, evicted):
+    pool = make_pool()
+
+    async def scenario():
+        exchange = await pool.acquire("binance", "k", "s")
+        exchange.fail_next = error
+        with pytest.raises(type(error)):
+            async with pool.session("binance", "k", "s") as ex:
+                await ex.create_market_order("BTC/USDT", "buy", 1)
+        return exchange
+
+    exchange = pool.run(scenario())
+    assert exchange.closed is evicted
+    assert len(pool) == (0 if evicted else 1)
+    pool.shutdown()
+
+
+def test_fork_drops_inherited_sessions_without_closing(monkeypatch):
+    pool = make_pool()
+    parent_exchange = pool.run(pool.acquire("binance", "k", "s"))
+    parent_loop = pool.loop
+
+    monkeypatch.setattr("app.services.sor_session_pool.os.getpid", lambda: pool._pid + 1)
+    child_exchange = pool.run(pool.acquire("binance", "k", "s"))
+
+    assert pool.loop is not parent_loop
+    assert child_exchange is not parent_exchange
+    assert not parent_exchange.closed
+    pool.shutdown()
+    parent_loop.close()
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.trade_feature_engineering import (
+    TRADE_FEATURES, TradeFeatureEngine, TradeFeatureStreams, calculate_advanced_trade_features,
+)
+
+
+def trade_tape(n=3000, seed=7, mode="side"):
+    """aggTrade-like tape with a long one-sided run at one price (whale/iceberg/constant-window paths)."""
+    rng = np.random.default_rng(seed)
+    timestamps = pd.date_range("2026-05-01", periods=n, freq="10ms") + pd.to_timedelta(rng.integers(0, 5, n).cumsum(), unit="ms")
+    prices = np.round(60000 + rng.standard_normal(n).cumsum() * 3, 1)
+    amounts = np.round(np.abs(rng.standard_normal(n) * 2), 4)
+    amounts[rng.integers(0, n, n // 50)] *= 25
+    sides = rng.choice(["buy", "sell"], n)
+    sides[300:450], amounts[300:450], prices[300:450] = "buy", 0.5, prices[300]
+
+    df = pd.DataFrame({"timestamp": timestamps, "price": prices, "amount": amounts, "side": sides})
+    if mode == "tick":  # no side -> tick rule, epoch-ms timestamps
+        df = df.drop(columns=["side"])
+        df["timestamp"] = df["timestamp"].astype("int64") // 1_000_000
+    elif mode == "trade_dir":  # explicit direction, no timestamps
+        df["trade_dir"] = df["side"].map({"buy": 1.0, "sell": -1.0})
+        df = df.drop(columns=["side", "timestamp"])
+    return df
+
+
+def stream(engine, df):
+    rows = []
+    for trade in df.to_dict("records"):
+        engine.update(trade)
+        rows.append(engine.snapshot())
+    return pd.DataFrame(rows, index=df.index)
+
+
+@pytest.mark.parametrize("mode", ["side", "tick", "trade_dir"])
+def test_every_snapshot_equals_batch_row(mode):
+    df = trade_tape(mode=mode)
+    expected = calculate_advanced_trade_features(df)
+    actual = stream(TradeFeatureEngine(), df)
+
+    assert list(actual.columns) == TRADE_FEATURES
+    for feature in TRADE_FEATURES:
+        np.testing.assert_array_equal(actual[feature].to_numpy(float), expected[feature].to_numpy(float), err_msg=feature)
+
+
+def test_streams_are_per_symbol_and_honour_requested_features():
+    requested = ["cvd", "kyles_lambda", "whale_trade_freq", "roll_measure_spread"]
+    tapes = {"BTC/USDT": trade_tape(1200, seed=1), "ETH/USDT": trade_tape(800, seed=2, mode="tick")}
+    streams = TradeFeatureStreams(requested_features=requested)
+    assert streams.snapshot("BTC/USDT") == {}
+
+    # Interleave the two tapes (each in its own order) as one live feed
+    pending = {symbol: iter(df.to_dict("records")) for symbol, df in tapes.items()}
+    feed = np.random.default_rng(0).permutation([s for s, df in tapes.items() for _ in range(len(df))])
+    for symbol in feed:
+        last = streams.update(symbol, next(pending[symbol]))
+    assert set(last) == set(requested)
+
+    for symbol, df in tapes.items():
+        expected = calculate_advanced_trade_features(df, requested_features=requested).iloc[-1]
+        assert streams.snapshot(symbol) == {f: expected[f] for f in requested}
+        assert streams.engine(symbol).trades == len(df)
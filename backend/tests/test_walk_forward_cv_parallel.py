@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from app.services.ml_walk_forward_cv import plan_fold_workers, run_walk_forward_cv
+
+FEATURES = [f"f{i}" for i in range(12)]
+
+
+def feature_matrix(n_rows=3_000, seed=11):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_rows, len(FEATURES)))
+    signal = X[:, 0] * 0.8 - X[:, 3] * 0.5 + rng.normal(scale=0.7, size=n_rows)
+    return X, signal
+
+
+def run_cv(algorithm, prediction_target, n_workers):
+    X, signal = feature_matrix()
+    y = (signal > 0).astype(float) if prediction_target == "classification" else signal
+    logs = []
+    result = run_walk_forward_cv(
+        algorithm, X, y.reshape(-1, 1), FEATURES, prediction_target,
+        epochs=20, learning_rate=0.1, max_depth=4, add_log=logs.append, n_workers=n_workers,
+    )
+    return result, logs
+
+
+def test_plan_fold_workers_never_oversubscribes():
+    assert plan_fold_workers(5, cores=8) == (5, 1)
+    assert plan_fold_workers(5, n_workers=2, cores=8) == (2, 4)
+    assert plan_fold_workers(3, n_workers=8, cores=16) == (3, 5)
+    assert plan_fold_workers(5, n_workers=4, cores=1) == (1, 1)
+    for cores in range(1, 33):
+        for requested in (None, 1, 2, 4, 8):
+            workers, threads = plan_fold_workers(5, requested, cores)
+            assert workers * threads <= cores
+
+
+@pytest.mark.parametrize("algorithm,prediction_target,module", [
+    ("Random Forest", "classification", "sklearn"),
+    ("XGBoost", "regression", "xgboost"),
+    ("LightGBM", "classification", "lightgbm"),
+])
+def test_parallel_folds_match_sequential(monkeypatch, algorithm, prediction_target, module):
+    pytest.importorskip(module)
+    # Pretend the box has 4 cores so the pool really runs 2 processes x 2 threads
+    monkeypatch.setattr("app.services.ml_walk_forward_cv.available_cores", lambda: 4)
+
+    sequential, sequential_logs = run_cv(algorithm, prediction_target, n_workers=1)
+    parallel, parallel_logs = run_cv(algorithm, prediction_target, n_workers=2)
+
+    assert len(sequential["cv_scores"]) == 5
+    assert parallel == sequential  # identical per-fold metrics, in fold order
+    assert any("2 worker processes" in line for line in parallel_logs)
+    # Every fold's progress line reaches the job log (in completion order)
+    fold_lines = lambda logs: sorted(line for line in logs if line.startswith("[CV] Fold"))
+    assert fold_lines(parallel_logs) == fold_lines(sequential_logs)
@@ -31,9 +31,9 @@ async def verify_latency():
     await engine.handle_order_event(order)
     
     # Check Buffer
-    if len(engine.pending_orders) == 1:
+    if len(engine.order_book) == 1:
         print("PASS: Order successfully buffered.")
-        scheduled_time = engine.pending_orders[0]['execute_at']
+        scheduled_time = engine.order_book.scheduled()[0]['execute_at']
         print(f"Order scheduled for: {scheduled_time} (Start + 500ms should be roughly {start_time + datetime.timedelta(milliseconds=500)})")
     else:
         print("FAIL: Order not buffered.")
@@ -46,8 +46,8 @@ async def verify_latency():
     engine.last_event_time += datetime.timedelta(milliseconds=200)
     
     # Run the check logic isolated
-    if engine.last_event_time and engine.pending_orders:
-        ready_orders = [item for item in engine.pending_orders if engine.last_event_time >= item['execute_at']]
+    if engine.last_event_time and engine.order_book:
+        ready_orders = engine.order_book.pop_due(engine.last_event_time)
         if len(ready_orders) == 0:
              print("PASS: Order NOT executed yet.")
         else:
@@ -58,21 +58,13 @@ async def verify_latency():
     engine.last_event_time += datetime.timedelta(milliseconds=400)
     
     # Run the logic again
-    if engine.last_event_time and engine.pending_orders:
-        ready_orders = []
-        remaining = []
-        for item in engine.pending_orders:
-            if engine.last_event_time >= item['execute_at']:
-                ready_orders.append(item)
-            else:
-                remaining.append(item)
-        
-        engine.pending_orders = remaining
+    if engine.last_event_time and engine.order_book:
+        ready_orders = engine.order_book.pop_due(engine.last_event_time)
         
         if len(ready_orders) == 1:
             print("PASS: Order identified for execution.")
             # Execute
-            await engine._execute_order(ready_orders[0]['order'])
+            await engine._execute_order(ready_orders[0])
             
             # Check output queue
             if not engine.events.empty():
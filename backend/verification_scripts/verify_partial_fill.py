@@ -36,10 +36,7 @@ async def verify_partial_fill():
     )
     
     # Put order in pending
-    engine.pending_orders.append({
-        "order": order,
-        "execute_at": datetime.now() # Ready immediately
-    })
+    engine.order_book.schedule(order, datetime.now()) # Ready immediately
     
     print(f"Placed Order: {order.quantity} units. Market Volume: {market_event.volume}.")
     print(f"Expected Fill/Bar: {int(market_event.volume * engine.volume_participation_rate)}")
@@ -62,18 +59,16 @@ async def verify_partial_fill():
         # B. Check Pending Orders (Simulates _execute_order call)
         # We need to manually trigger what the loop does
         
-        # In the real loop, it checks pending_orders
-        # engine.pending_orders has newly re-queued orders now if any
+        # In the real loop, it checks the order book
+        # engine.order_book has newly re-queued orders now if any
         
-        current_pending = engine.pending_orders
-        engine.pending_orders = [] # Clear them as we process
+        current_pending = engine.order_book.pop_due(datetime.now()) # Clear them as we process
         
         if not current_pending:
             print("ERROR: No pending orders found! Setup failed?")
             break
             
-        for item in current_pending:
-            current_order = item['order']
+        for current_order in current_pending:
             print(f"Executing Order Qty: {current_order.quantity}")
             await engine._execute_order(current_order)
         
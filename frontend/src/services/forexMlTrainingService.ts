@@ -60,6 +60,8 @@ export interface ForexTrainingConfig {
         yield_differentials?: boolean;
         use_automl?: boolean;
         automl_trials?: number;
+        automl_workers?: number;
+        automl_pruner?: 'median' | 'hyperband' | 'none';
         is_ensemble?: boolean;
         base_models?: string[];
         meta_model?: string;
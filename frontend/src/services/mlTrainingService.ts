@@ -50,6 +50,11 @@ export interface TrainingConfig {
         ewc_lambda?: number;
         enable_adversarial?: boolean;
         adversarial_epsilon?: number;
+        batch_size?: number;
+        grad_accumulation_steps?: number;
+        early_stopping_patience?: number;
+        early_stopping_fraction?: number;
+        use_bf16?: boolean;
         eval_metric?: string;
         split_method?: string;
         purge_length?: number;
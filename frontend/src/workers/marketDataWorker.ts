@@ -11,6 +11,55 @@ export interface MarketDepthData {
     currentPrice: number;
 }
 
+type Level = [number, number];
+type Wall = MarketDepthData['walls'][number];
+
+// Order book frames from the backend (app/services/orderbook_delta.py): a full
+// snapshot now and then, per-level deltas in between ([price, size], size 0 = removed).
+// A delta only applies on top of the previous seq; after a gap we wait for the next snapshot.
+// Deltas at or below our seq are already in the latest_orderbook snapshot we started from.
+const book = {
+    seq: null as number | null,
+    bids: new Map<number, number>(),
+    asks: new Map<number, number>(),
+    walls: [] as Wall[],
+};
+
+const applyLevels = (side: Map<number, number>, levels: Level[]) => {
+    for (const [price, size] of levels) {
+        if (size) side.set(price, size);
+        else side.delete(price);
+    }
+};
+
+const toLevels = (side: Map<number, number>, descending: boolean): OrderBookLevel[] => {
+    const prices = Array.from(side.keys()).sort((a, b) => (descending ? b - a : a - b));
+    return prices.map(price => ({ price, size: side.get(price) as number, total: 0 }));
+};
+
+// Returns the frame as a full orderbook payload, or null while out of sync
+const applyFrame = (parsed: any): any | null => {
+    if (parsed.type === 'orderbook_snapshot') {
+        book.bids = new Map<number, number>();
+        book.asks = new Map<number, number>();
+    } else if (book.seq !== null && parsed.seq <= book.seq) {
+        return null;
+    } else if (book.seq === null || parsed.seq !== book.seq + 1) {
+        book.seq = null;
+        return null;
+    }
+    applyLevels(book.bids, parsed.bids || []);
+    applyLevels(book.asks, parsed.asks || []);
+    book.seq = parsed.seq;
+    if (parsed.walls) book.walls = parsed.walls;
+    return {
+        bids: toLevels(book.bids, true),
+        asks: toLevels(book.asks, false),
+        walls: book.walls,
+        currentPrice: parsed.currentPrice,
+    };
+};
+
 // Ensure this file is treated as a module or dedicated worker file
 // The worker will receive raw string payloads, parse them, calculate walls if needed,
 // sort arrays if needed, and send back the clean MarketDepthData object.
@@ -20,7 +69,7 @@ self.onmessage = (event: MessageEvent) => {
         const { type, payload } = event.data;
 
         if (type === 'PROCESS_MESSAGE') {
-            const parsed = JSON.parse(payload);
+            let parsed = JSON.parse(payload);
 
             if (parsed.type === 'trade') {
                 self.postMessage({
@@ -34,6 +83,11 @@ self.onmessage = (event: MessageEvent) => {
                 return;
             }
 
+            if (parsed.type === 'orderbook_snapshot' || parsed.type === 'orderbook_delta') {
+                parsed = applyFrame(parsed);
+                if (!parsed) return;
+            }
+
             // In a real scenario, you might do heavy sorting or aggregation here.
             // For now, we assume backend sends bids/asks. We just parse and send back.
             // Example of offloaded work: calculating totals, sorting by price.